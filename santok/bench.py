@@ -0,0 +1,647 @@
+#!/usr/bin/env python3
+"""
+SanTOK Benchmark Suite
+Unified timing harness for the tokenizers, numerology, compression,
+reconstruction and the HTTP servers.
+
+Every case is timed the same way: warmup runs, then individually timed
+iterations with time.perf_counter(), reported as chars/s, tokens/s and
+p50/p95/p99 latency, plus a separate tracemalloc pass for peak memory.
+Inputs come from the seeded santok.corpus generators, so runs on different
+machines see identical data. Results are written as JSON and can be
+compared against a stored baseline.
+
+Run from a source checkout (the core engine and servers live in src/, which
+is not part of the installed package):
+
+    python -m santok.bench --output results.json --baseline baseline.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+from santok import corpus
+
+# The core engine lives in src/ of a source checkout
+_SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+if _SRC_DIR not in sys.path:
+    sys.path.insert(0, _SRC_DIR)
+
+GROUPS = ['tokenizers', 'numerology', 'compression', 'reconstruction', 'servers']
+
+TOKENIZER_NAMES = [
+    'space', 'word', 'char', 'grammar', 'subword',
+    'subword_bpe', 'subword_syllable', 'subword_frequency', 'byte'
+]
+
+COMPRESSION_METHODS = ['rle', 'pattern', 'frequency', 'adaptive']
+
+SERVER_ENDPOINTS = ['/tokenize', '/analyze', '/compress', '/validate']
+
+def _core():
+    try:
+        import core.core_tokenizer as KT
+    except ImportError as e:
+        raise ImportError(f"santok.bench needs a source checkout with src/core ({_SRC_DIR}): {e}") from e
+    return KT
+
+
+def build_text(size, kind='english', seed=corpus.DEFAULT_SEED):
+    """Deterministic benchmark text of exactly size characters from the cached corpus"""
+    if kind == 'binary':
+        # Binary files reach the tokenizers through the universal reader
+        KT = _core()
+        return KT._bytes_to_text_representation(corpus.load('binary', max(1, size // 2), seed))[:size]
+    return corpus.load_text(kind, size, seed)
+
+
+def tokenize_stream(KT, text, name):
+    """Run one core tokenizer by stream name"""
+    if name == 'space':
+        return KT.tokenize_space(text)
+    elif name == 'word':
+        return KT.tokenize_word(text)
+    elif name == 'char':
+        return KT.tokenize_char(text)
+    elif name == 'grammar':
+        return KT.tokenize_grammar(text)
+    elif name == 'byte':
+        return KT.tokenize_bytes(text)
+    elif name.startswith('subword'):
+        strategy = name.split('_', 1)[1] if '_' in name else 'fixed'
+        return KT.tokenize_subword(text, 3, strategy)
+    raise ValueError(f"Unknown tokenizer: {name}")
+
+
+# ------------------------------ Measurement ------------------------------
+
+def percentile(sorted_values, q):
+    """Linear-interpolated percentile of an already sorted list (q in 0..100)"""
+    if not sorted_values:
+        return 0.0
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    pos = (len(sorted_values) - 1) * (q / 100.0)
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    frac = pos - lo
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * frac
+
+
+def rss_bytes():
+    """Current resident set size of this process (0 if unknown)"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except Exception:
+        return 0
+
+
+def peak_rss_bytes():
+    """Peak resident set size of this process (0 if unknown)"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except Exception:
+        return 0
+
+
+def measure(func, chars=0, tokens=None, warmup=3, iterations=20, track_memory=True):
+    """
+    Time func() and summarize.
+
+    Args:
+        func: zero-argument callable to benchmark
+        chars: input characters processed per call (for chars/s)
+        tokens: callable(result) -> token count, or an int (for tokens/s)
+        warmup: untimed calls before measuring
+        iterations: timed calls
+        track_memory: run one extra call under tracemalloc for peak memory
+    """
+    result = None
+    for _ in range(warmup):
+        result = func()
+
+    gc.collect()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    timings = []
+    try:
+        for _ in range(iterations):
+            start = time.perf_counter()
+            result = func()
+            timings.append(time.perf_counter() - start)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    peak_alloc = 0
+    if track_memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            func()
+            peak_alloc = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    if callable(tokens):
+        token_count = tokens(result)
+    else:
+        token_count = tokens or 0
+
+    timings.sort()
+    mean = sum(timings) / len(timings) if timings else 0.0
+    p50 = percentile(timings, 50)
+    return {
+        'iterations': iterations,
+        'warmup': warmup,
+        'chars': chars,
+        'tokens': token_count,
+        'mean_ms': mean * 1000,
+        'min_ms': timings[0] * 1000 if timings else 0.0,
+        'max_ms': timings[-1] * 1000 if timings else 0.0,
+        'p50_ms': p50 * 1000,
+        'p95_ms': percentile(timings, 95) * 1000,
+        'p99_ms': percentile(timings, 99) * 1000,
+        'chars_per_s': chars / p50 if p50 > 0 else 0.0,
+        'tokens_per_s': token_count / p50 if p50 > 0 else 0.0,
+        'peak_alloc_bytes': peak_alloc,
+        'rss_bytes': rss_bytes(),
+    }
+
+
+# --------------------------------- Cases ---------------------------------
+
+def tokenizer_cases(text):
+    KT = _core()
+    cases = []
+    for name in TOKENIZER_NAMES:
+        cases.append(('tokenizers/' + name,
+                      (lambda n=name: tokenize_stream(KT, text, n)),
+                      len(text), len))
+    return cases
+
+
+def numerology_cases(text, seed=12345, embedding_bit=False):
+    KT = _core()
+    words = [t['text'] for t in KT.tokenize_word(text)]
+
+    def backend_numbers():
+        out = []
+        for i, w in enumerate(words):
+            out.append(KT.compose_backend_number(w, i, i + 1, i, i + 2, embedding_bit))
+        return out
+
+    def frontend_digits():
+        return [KT.combined_digit(w, embedding_bit) for w in words]
+
+    def build():
+        return KT.TextTokenizer(seed, embedding_bit).build(text)
+
+    def build_tokens(streams):
+        return sum(ts.length() for ts in streams.values())
+
+    return [
+        ('numerology/compose_backend_number', backend_numbers, len(text), len),
+        ('numerology/combined_digit', frontend_digits, len(text), len),
+        ('numerology/text_value_summary',
+         (lambda: KT.compute_text_value_summary(text, embedding_bit)), len(text), 1),
+        ('numerology/build', build, len(text), build_tokens),
+    ]
+
+
+def compression_cases(text, stream='word'):
+    KT = _core()
+    tokens = tokenize_stream(KT, text, stream)
+    cases = []
+    for method in COMPRESSION_METHODS:
+        cases.append(('compression/' + method,
+                      (lambda m=method: KT.compress_tokens(tokens, m)),
+                      len(text), len(tokens)))
+    compressed = KT.compress_tokens(tokens, 'rle')
+    cases.append(('compression/decompress_rle',
+                  (lambda: KT.decompress_tokens(compressed)), len(text), len(tokens)))
+    return cases
+
+
+def reconstruction_cases(text):
+    KT = _core()
+    cases = []
+    for name in TOKENIZER_NAMES:
+        tokens = tokenize_stream(KT, text, name)
+        cases.append(('reconstruction/' + name,
+                      (lambda t=tokens, n=name: KT.reconstruct_from_tokens(t, n)),
+                      len(text), len(tokens)))
+    return cases
+
+
+def _main_server_client():
+    from fastapi.testclient import TestClient
+    from servers.main_server import app
+    return TestClient(app)
+
+
+def _lightweight_server_url():
+    import socketserver
+    import threading
+    from servers.lightweight_server import CORSHTTPRequestHandler
+
+    class _QuietHandler(CORSHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+    httpd = socketserver.TCPServer(('127.0.0.1', 0), _QuietHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    return 'http://127.0.0.1:%d' % httpd.server_address[1], httpd
+
+
+def server_cases(text, tokenizer_type='word', servers=None):
+    """
+    HTTP round trips against main_server (in-process) and lightweight_server (localhost).
+    The started lightweight server is appended to servers; see close_servers().
+    """
+    import urllib.request
+    payload = {'text': text, 'tokenizer_type': tokenizer_type}
+    body = json.dumps(payload).encode('utf-8')
+    cases = []
+
+    try:
+        client = _main_server_client()
+    except Exception as e:
+        print(f"  skipping main_server benchmarks: {e}", file=sys.stderr)
+        client = None
+    if client is not None:
+        for endpoint in SERVER_ENDPOINTS:
+            def call(ep=endpoint):
+                r = client.post(ep, json=payload)
+                r.raise_for_status()
+                return r
+            cases.append(('servers/main' + endpoint, call, len(text),
+                          (lambda r: r.json().get('tokenCount', 0) if isinstance(r.json(), dict) else 0)))
+
+    try:
+        base_url, httpd = _lightweight_server_url()
+    except Exception as e:
+        print(f"  skipping lightweight_server benchmarks: {e}", file=sys.stderr)
+        base_url = None
+    if base_url is not None:
+        if servers is not None:
+            servers.append(httpd)
+        for endpoint in ('/tokenize', '/compress'):
+            def call(ep=endpoint):
+                req = urllib.request.Request(base_url + ep, data=body,
+                                             headers={'Content-Type': 'application/json'})
+                with urllib.request.urlopen(req) as resp:
+                    return resp.read()
+            cases.append(('servers/lightweight' + endpoint, call, len(text),
+                          (lambda raw: json.loads(raw).get('tokenCount', 0) if raw.startswith(b'{') else 0)))
+    return cases
+
+
+def close_servers(servers):
+    for httpd in servers:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def collect_cases(groups, text, server_text, servers=None):
+    cases = []
+    if 'tokenizers' in groups:
+        cases.extend(tokenizer_cases(text))
+    if 'numerology' in groups:
+        cases.extend(numerology_cases(text))
+    if 'compression' in groups:
+        cases.extend(compression_cases(text))
+    if 'reconstruction' in groups:
+        cases.extend(reconstruction_cases(text))
+    if 'servers' in groups:
+        cases.extend(server_cases(server_text, servers=servers))
+    return cases
+
+
+# ---------------------------- Scaling curves -----------------------------
+
+SCALING_INPUTS = ['english', 'multilingual', 'binary']
+
+
+def scaling_cases(kinds):
+    """
+    (name, input kind, prepare(text) -> arg, run(arg)) for every public hot path.
+    prepare() runs outside the timed region.
+    """
+    KT = _core()
+    same = (lambda text: text)
+    cases = []
+    for kind in kinds:
+        for name in TOKENIZER_NAMES:
+            cases.append(('tokenize_' + name, kind, same,
+                          (lambda text, n=name: tokenize_stream(KT, text, n))))
+        cases.append(('tokenize_text', kind, same, (lambda text: KT.tokenize_text(text, 'word'))))
+        cases.append(('detect_language', kind, same, KT.detect_language))
+        cases.append(('to_lower', kind, same, KT.to_lower))
+        if kind == 'multilingual':
+            cases.append(('tokenize_word_multilang', kind, same,
+                          (lambda text: KT.tokenize_word_multilang(text, 'cjk'))))
+        if kind != 'english':
+            continue
+        cases.extend([
+            ('collapse_spaces', kind, same, KT.collapse_spaces),
+            ('remove_specials', kind, same, KT.remove_specials),
+            ('collapse_repeats_letters', kind, same, (lambda text: KT.collapse_repeats_letters(text, 2))),
+            ('sanitize_text', kind, same, (lambda text: KT.sanitize_text(text, True, False, 1))),
+            ('weighted_char_sum', kind, same, KT.weighted_char_sum),
+            ('alphabetic_sum', kind, same, KT.alphabetic_sum),
+            ('hash_token', kind, same, KT.hash_token),
+            ('compute_text_value_summary', kind, same, (lambda text: KT.compute_text_value_summary(text, False))),
+            ('_truncate_list', kind, KT.tokenize_char, (lambda toks: KT._truncate_list(toks, len(toks)))),
+            ('digits_only', kind, (lambda text: [ord(c) * 7919 for c in text]), KT.digits_only),
+            ('TextTokenizer.build', kind, same, (lambda text: KT.TextTokenizer(12345, False).build(text))),
+        ])
+        for name in TOKENIZER_NAMES:
+            cases.append(('reconstruct_' + name, kind,
+                          (lambda text, n=name: tokenize_stream(KT, text, n)),
+                          (lambda toks, n=name: KT.reconstruct_from_tokens(toks, n))))
+        for method in COMPRESSION_METHODS:
+            cases.append(('compress_' + method, kind, KT.tokenize_word,
+                          (lambda toks, m=method: KT.compress_tokens(toks, m))))
+    return cases
+
+
+def geometric_sizes(min_size, max_size, factor=4):
+    sizes = []
+    size = min_size
+    while size <= max_size:
+        sizes.append(int(size))
+        size *= factor
+    return sizes
+
+
+def fit_exponent(points):
+    """
+    Least-squares fit of log(seconds) = k * log(size) + c.
+    Returns (k, r_squared); k ~ 1 is linear, k ~ 2 quadratic.
+    """
+    import math
+    pts = [(math.log(n), math.log(t)) for n, t in points if n > 0 and t > 0]
+    if len(pts) < 2:
+        return 0.0, 0.0
+    mx = sum(x for x, _ in pts) / len(pts)
+    my = sum(y for _, y in pts) / len(pts)
+    sxx = sum((x - mx) ** 2 for x, _ in pts)
+    sxy = sum((x - mx) * (y - my) for x, y in pts)
+    syy = sum((y - my) ** 2 for _, y in pts)
+    if sxx == 0:
+        return 0.0, 0.0
+    k = sxy / sxx
+    r2 = (sxy * sxy) / (sxx * syy) if syy > 0 else 1.0
+    return k, r2
+
+
+def run_scaling(kinds=None, min_size=1024, max_size=1 << 20, factor=4, repeats=3,
+                time_budget=2.0, threshold=1.1, case_filter=None, verbose=True,
+                seed=corpus.DEFAULT_SEED):
+    """
+    Time every scaling case over geometrically growing inputs and fit the
+    complexity exponent. A case stops growing once one run exceeds
+    time_budget seconds; cases above threshold are flagged as super-linear.
+    """
+    kinds = kinds or SCALING_INPUTS
+    sizes = geometric_sizes(min_size, max_size, factor)
+    inputs = {}
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'sizes': sizes,
+            'seed': seed,
+            'repeats': repeats,
+            'time_budget_s': time_budget,
+            'threshold': threshold,
+        },
+        'results': {},
+    }
+    for name, kind, prepare, run in scaling_cases(kinds):
+        key = kind + '/' + name
+        if case_filter and case_filter not in key:
+            continue
+        points = []
+        for size in sizes:
+            if (kind, size) not in inputs:
+                inputs[(kind, size)] = build_text(size, kind, seed)
+            arg = prepare(inputs[(kind, size)])
+            best = None
+            for _ in range(repeats):
+                gc.collect()
+                gc.disable()
+                try:
+                    start = time.perf_counter()
+                    run(arg)
+                    elapsed = time.perf_counter() - start
+                finally:
+                    gc.enable()
+                best = elapsed if best is None or elapsed < best else best
+            points.append((size, best))
+            if best > time_budget:
+                break
+        # tiny inputs are dominated by call overhead; fit on the upper sizes
+        fit_points = points[1:] if len(points) > 3 else points
+        k, r2 = fit_exponent(fit_points)
+        flagged = len(fit_points) >= 2 and k > threshold
+        report['results'][key] = {
+            'exponent': k,
+            'r_squared': r2,
+            'superlinear': flagged,
+            'points': [{'size': n, 'seconds': t} for n, t in points],
+        }
+        if verbose:
+            print("%-44s k=%5.2f  r2=%4.2f  max=%10s chars  %s" % (
+                key, k, r2, f"{points[-1][0]:,}", 'SUPER-LINEAR' if flagged else 'ok'))
+    return report
+
+
+# ------------------------------- Reporting -------------------------------
+
+def run_suite(groups=None, size=100000, server_size=10000, warmup=3, iterations=20,
+              track_memory=True, case_filter=None, verbose=True,
+              kind='english', seed=corpus.DEFAULT_SEED):
+    """Run the selected benchmark groups and return the JSON-ready report"""
+    groups = groups or [g for g in GROUPS if g != 'servers']
+    text = build_text(size, kind, seed)
+    server_text = text[:min(size, server_size)]
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'groups': groups,
+            'corpus': kind,
+            'seed': seed,
+            'corpus_version': corpus.CORPUS_VERSION,
+            'text_chars': len(text),
+            'server_text_chars': len(server_text),
+            'warmup': warmup,
+            'iterations': iterations,
+        },
+        'results': {},
+    }
+    servers = []
+    try:
+        for name, func, chars, tokens in collect_cases(groups, text, server_text, servers):
+            if case_filter and case_filter not in name:
+                continue
+            stats = measure(func, chars=chars, tokens=tokens, warmup=warmup,
+                            iterations=iterations, track_memory=track_memory)
+            report['results'][name] = stats
+            if verbose:
+                print(format_row(name, stats))
+    finally:
+        close_servers(servers)
+    report['meta']['peak_rss_bytes'] = peak_rss_bytes()
+    return report
+
+
+def compare_to_baseline(report, baseline, threshold=0.10, metric='p50_ms'):
+    """
+    Compare a report against a baseline report.
+    A case regresses when its metric grows by more than threshold (0.10 = 10%).
+    Returns a list of {"case", "baseline", "current", "change"} for regressions.
+    """
+    regressions = []
+    base_results = baseline.get('results', {})
+    for name, stats in report.get('results', {}).items():
+        base = base_results.get(name)
+        if not base or not base.get(metric):
+            continue
+        change = (stats[metric] - base[metric]) / base[metric]
+        if change > threshold:
+            regressions.append({
+                'case': name,
+                'metric': metric,
+                'baseline': base[metric],
+                'current': stats[metric],
+                'change': change,
+            })
+    return regressions
+
+
+def format_row(name, stats):
+    return ("%-38s p50 %9.3fms  p95 %9.3fms  p99 %9.3fms  %12s chars/s  %12s tok/s  peak %8.1fKB" % (
+        name, stats['p50_ms'], stats['p95_ms'], stats['p99_ms'],
+        f"{stats['chars_per_s']:,.0f}", f"{stats['tokens_per_s']:,.0f}",
+        stats['peak_alloc_bytes'] / 1024))
+
+
+def main(argv=None):
+    """Benchmark CLI entry point"""
+    parser = argparse.ArgumentParser(
+        description='SanTOK benchmark suite',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python -m santok.bench --output baseline.json
+  python -m santok.bench --groups tokenizers,compression --size 1000000
+  python -m santok.bench --baseline baseline.json --threshold 0.15
+  python -m santok.bench --scaling --max-size 104857600 -o scaling.json
+        """
+    )
+    parser.add_argument('--groups', default=','.join(g for g in GROUPS if g != 'servers'),
+                        help='Comma separated groups: ' + ', '.join(GROUPS) + ' (or "all")')
+    parser.add_argument('--filter', help='Only run cases whose name contains this string')
+    parser.add_argument('--size', type=int, default=100000, help='Input size in characters')
+    parser.add_argument('--server-size', type=int, default=10000,
+                        help='Input size in characters for server round trips')
+    parser.add_argument('--warmup', type=int, default=3, help='Untimed warmup runs per case')
+    parser.add_argument('--iterations', '-n', type=int, default=20, help='Timed runs per case')
+    parser.add_argument('--no-memory', action='store_true', help='Skip the tracemalloc pass')
+    parser.add_argument('--output', '-o', help='Write results as JSON to this file')
+    parser.add_argument('--baseline', '-b', help='Baseline JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Allowed slowdown before a case counts as a regression (0.10 = 10%%)')
+    parser.add_argument('--metric', default='p50_ms', choices=['p50_ms', 'p95_ms', 'p99_ms', 'mean_ms'],
+                        help='Latency metric used for baseline comparison')
+    parser.add_argument('--quiet', '-q', action='store_true', help='Only print regressions')
+    parser.add_argument('--corpus', default='english', choices=corpus.KINDS,
+                        help='Corpus kind used as benchmark input')
+    parser.add_argument('--seed', type=int, default=corpus.DEFAULT_SEED, help='Corpus seed')
+    scaling = parser.add_argument_group('scaling curves')
+    scaling.add_argument('--scaling', action='store_true',
+                         help='Fit the complexity exponent of every hot path instead of timing one size')
+    scaling.add_argument('--inputs', default=','.join(SCALING_INPUTS),
+                         help='Comma separated corpus kinds: ' + ', '.join(corpus.KINDS))
+    scaling.add_argument('--min-size', type=int, default=1024, help='Smallest scaling input in characters')
+    scaling.add_argument('--max-size', type=int, default=1 << 20,
+                         help='Largest scaling input in characters (up to 100MB)')
+    scaling.add_argument('--factor', type=int, default=4, help='Growth factor between scaling sizes')
+    scaling.add_argument('--repeats', type=int, default=3, help='Runs per size; the fastest is kept')
+    scaling.add_argument('--time-budget', type=float, default=2.0,
+                         help='Stop growing a case once one run takes longer than this (seconds)')
+    scaling.add_argument('--exponent-threshold', type=float, default=1.1,
+                         help='Flag cases whose fitted exponent exceeds this')
+    args = parser.parse_args(argv)
+
+    if args.scaling:
+        kinds = [k.strip() for k in args.inputs.split(',') if k.strip()]
+        unknown = [k for k in kinds if k not in corpus.KINDS]
+        if unknown:
+            parser.error(f"unknown inputs: {', '.join(unknown)}")
+        report = run_scaling(kinds, min_size=args.min_size, max_size=args.max_size, factor=args.factor,
+                             repeats=args.repeats, time_budget=args.time_budget,
+                             threshold=args.exponent_threshold, case_filter=args.filter,
+                             verbose=not args.quiet, seed=args.seed)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+        flagged = sorted(k for k, v in report['results'].items() if v['superlinear'])
+        for key in flagged:
+            print("SUPER-LINEAR %-40s k=%.2f" % (key, report['results'][key]['exponent']))
+        return 1 if flagged else 0
+
+    groups = GROUPS if args.groups == 'all' else [g.strip() for g in args.groups.split(',') if g.strip()]
+    unknown = [g for g in groups if g not in GROUPS]
+    if unknown:
+        parser.error(f"unknown groups: {', '.join(unknown)}")
+
+    report = run_suite(groups, size=args.size, server_size=args.server_size, warmup=args.warmup,
+                       iterations=args.iterations, track_memory=not args.no_memory,
+                       case_filter=args.filter, verbose=not args.quiet,
+                       kind=args.corpus, seed=args.seed)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        if not args.quiet:
+            print(f"Results saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(report, baseline, args.threshold, args.metric)
+        for r in regressions:
+            print("REGRESSION %-38s %s %.3fms -> %.3fms (%+.1f%%)" % (
+                r['case'], r['metric'], r['baseline'], r['current'], r['change'] * 100))
+        if regressions:
+            return 1
+        if not args.quiet:
+            print(f"No regressions above {args.threshold * 100:.0f}% against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
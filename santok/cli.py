@@ -7,6 +7,7 @@ import argparse
 import json
 import sys
 from .santok import TextTokenizationEngine
+from .inputs import read_text
 
 def main():
     """Main CLI function"""
@@ -19,6 +20,7 @@ Examples:
   santok "Hello World" --method word --features
   santok "Hello World" --analyze --output results.json
   santok --file input.txt --method character
+  santok --file app.log.gz --method word
         """
     )
     
@@ -62,8 +64,8 @@ Examples:
     # Get input text
     if args.file:
         try:
-            with open(args.file, 'r', encoding='utf-8') as f:
-                text = f.read()
+            # .gz/.bz2/.xz files and zip/tar archives are decompressed as read
+            text = read_text(args.file)
         except FileNotFoundError:
             print(f"Error: File '{args.file}' not found", file=sys.stderr)
             sys.exit(1)
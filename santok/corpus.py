@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+SanTOK Benchmark Corpus
+Seeded, reproducible test corpora for benchmarks and stress tests.
+
+Every generator draws from its own random.Random(seed), so the same
+(kind, size, seed) produces byte-identical data on every machine.
+Generated corpora are cached as gzip files keyed by kind, seed and size
+so large inputs are only built once.
+
+Run: python -m santok.corpus --kinds english,multilingual --sizes 1000000
+"""
+
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+
+CORPUS_VERSION = 1
+DEFAULT_SEED = 20240601
+
+KINDS = ['english', 'multilingual', 'code', 'json', 'csv', 'xml', 'binary']
+
+# Script ranges mirrored from core_tokenizer's _is_cjk/_is_arabic/... helpers
+SCRIPT_RANGES = {
+    'cjk': [(0x4E00, 0x9FFF), (0x3400, 0x4DBF), (0x20000, 0x2A6DF)],
+    'hiragana': [(0x3040, 0x309F)],
+    'katakana': [(0x30A0, 0x30FF)],
+    'hangul': [(0xAC00, 0xD7AF)],
+    'arabic': [(0x0600, 0x06FF), (0x0750, 0x077F)],
+    'cyrillic': [(0x0400, 0x04FF), (0x0500, 0x052F)],
+    'hebrew': [(0x0590, 0x05FF)],
+    'thai': [(0x0E00, 0x0E7F)],
+    'devanagari': [(0x0900, 0x097F)],
+    'latin': [(0x0061, 0x007A)],
+}
+
+WORDS = [
+    'the', 'be', 'to', 'of', 'and', 'a', 'in', 'that', 'have', 'i',
+    'it', 'for', 'not', 'on', 'with', 'he', 'as', 'you', 'do', 'at',
+    'this', 'but', 'his', 'by', 'from', 'they', 'she', 'or', 'an',
+    'will', 'my', 'one', 'all', 'would', 'there', 'their', 'what',
+    'so', 'up', 'out', 'if', 'about', 'who', 'get', 'which', 'go',
+    'me', 'when', 'make', 'can', 'like', 'time', 'no', 'just', 'him',
+    'know', 'take', 'people', 'into', 'year', 'your', 'good', 'some',
+    'could', 'them', 'see', 'other', 'than', 'then', 'now', 'look',
+    'only', 'come', 'its', 'over', 'think', 'also', 'back', 'after',
+    'use', 'two', 'how', 'our', 'work', 'first', 'well', 'way', 'even',
+    'new', 'want', 'because', 'any', 'these', 'give', 'day', 'most',
+    'us', 'is', 'was', 'are', 'been', 'has', 'had', 'were', 'said',
+    'each', 'many', 'very', 'much', 'water', 'call', 'oil', 'find',
+    'long', 'down', 'did', 'made', 'may', 'part', 'tokenization',
+    'analysis', 'reconstruction', 'throughput', 'quickly', "don't",
+]
+
+IDENTIFIERS = [
+    'tokens', 'text', 'index', 'result', 'value', 'count', 'buffer',
+    'stream', 'offset', 'length', 'config', 'item', 'node', 'total',
+]
+
+FIRST_NAMES = ['John', 'Jane', 'Bob', 'Alice', 'Charlie', 'Maria', 'Wei', 'Amir', 'Olga', 'Priya']
+LAST_NAMES = ['Doe', 'Smith', 'Johnson', 'Brown', 'Wilson', 'Garcia', 'Chen', 'Haddad', 'Ivanova', 'Patel']
+CITIES = ['New York', 'Los Angeles', 'Chicago', 'Houston', 'Phoenix', 'Tokyo', 'Cairo', 'Moscow', 'Delhi']
+UNICODE_SNIPPETS = ['你好世界', '🌍', 'مرحبا بالعالم', 'привет', 'שלום', 'สวัสดี', 'नमस्ते', 'こんにちは', '안녕하세요']
+
+
+# ------------------------------ Generators -------------------------------
+
+def _sentence(rng):
+    words = rng.choices(WORDS, k=6 + int(rng.random() * 20))
+    words[0] = words[0].capitalize()
+    roll = rng.random()
+    if roll < 0.05:
+        words.append(str(int(rng.random() * 1000000)))
+    elif roll < 0.08:
+        words.append(UNICODE_SNIPPETS[int(rng.random() * len(UNICODE_SNIPPETS))])
+    elif roll < 0.12:
+        words.append('@#$%^&*()')
+    if rng.random() < 0.15:
+        words[int(rng.random() * len(words))] += ','
+    return ' '.join(words) + ('.', '.', '.', '!', '?')[int(rng.random() * 5)]
+
+
+def _english_parts(rng):
+    """English prose: sentences grouped into paragraphs"""
+    while True:
+        yield ' '.join(_sentence(rng) for _ in range(2 + int(rng.random() * 6)))
+        yield '\n\n'
+
+
+def _multilingual_parts(rng):
+    """Words drawn from every script range the core language detector knows"""
+    scripts = list(SCRIPT_RANGES)
+    while True:
+        ranges = SCRIPT_RANGES[scripts[int(rng.random() * len(scripts))]]
+        words = []
+        for _ in range(3 + int(rng.random() * 10)):
+            lo, hi = ranges[int(rng.random() * len(ranges))]
+            span = hi - lo + 1
+            words.append(''.join(chr(lo + int(rng.random() * span))
+                                 for _ in range(1 + int(rng.random() * 7))))
+        yield ' '.join(words)
+        yield ('. ', ' ', '\n')[int(rng.random() * 3)]
+
+
+def _code_parts(rng):
+    """Python-like source code"""
+    n = 0
+    while True:
+        n += 1
+        name = rng.choice(IDENTIFIERS)
+        arg = rng.choice(IDENTIFIERS)
+        lines = [f'def {name}_{n}({arg}, limit={int(rng.random() * 100)}):',
+                 f'    """Process {arg} and return the {name}"""',
+                 f'    {name} = []']
+        for _ in range(1 + int(rng.random() * 5)):
+            other = rng.choice(IDENTIFIERS)
+            lines.append(f'    for {other} in range(len({arg})):')
+            lines.append(f'        if {arg}[{other}] % {2 + int(rng.random() * 9)} == 0:  # filter')
+            lines.append(f'            {name}.append({arg}[{other}] ** 2)')
+        lines.append(f'    return {name}[:limit]')
+        yield '\n'.join(lines)
+        yield '\n\n\n'
+
+
+def _record(rng, i):
+    return {
+        'id': i,
+        'name': f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+        'email': f'user{i}@example.com',
+        'age': 18 + int(rng.random() * 60),
+        'city': rng.choice(CITIES),
+        'score': round(rng.random() * 100, 3),
+        'note': rng.choice(UNICODE_SNIPPETS) if rng.random() < 0.2 else _sentence(rng),
+    }
+
+
+def _json_parts(rng):
+    """JSON Lines records"""
+    i = 0
+    while True:
+        i += 1
+        yield json.dumps(_record(rng, i), ensure_ascii=False)
+        yield '\n'
+
+
+def _csv_parts(rng):
+    """CSV with a header row and quoted free-text columns"""
+    yield 'id,name,email,age,city,score,note\n'
+    i = 0
+    while True:
+        i += 1
+        r = _record(rng, i)
+        note = r['note'].replace('"', '""')
+        yield f'{r["id"]},{r["name"]},{r["email"]},{r["age"]},"{r["city"]}",{r["score"]},"{note}"\n'
+
+
+def _xml_parts(rng):
+    """XML document of user records"""
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n<root>\n'
+    i = 0
+    while True:
+        i += 1
+        r = _record(rng, i)
+        note = r['note'].replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+        yield (f'  <user id="{r["id"]}">\n'
+               f'    <name>{r["name"]}</name>\n'
+               f'    <email>{r["email"]}</email>\n'
+               f'    <age>{r["age"]}</age>\n'
+               f'    <city>{r["city"]}</city>\n'
+               f'    <note>{note}</note>\n'
+               f'  </user>\n')
+
+
+_TEXT_GENERATORS = {
+    'english': _english_parts,
+    'multilingual': _multilingual_parts,
+    'code': _code_parts,
+    'json': _json_parts,
+    'csv': _csv_parts,
+    'xml': _xml_parts,
+}
+
+
+def generate(kind, size, seed=DEFAULT_SEED):
+    """
+    Build a corpus without touching the cache.
+    Text kinds return a str of exactly size characters; 'binary' returns
+    size bytes.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Unknown corpus kind: {kind}")
+    if size < 0:
+        raise ValueError("size must be >= 0")
+    rng = random.Random(f"{kind}:{seed}")
+    if kind == 'binary':
+        # Mostly random bytes with runs and embedded text, like real blobs
+        out = bytearray()
+        while len(out) < size:
+            roll = rng.random()
+            n = 16 + int(rng.random() * 240)
+            if roll < 0.7:
+                out += rng.getrandbits(8 * n).to_bytes(n, 'little')
+            elif roll < 0.85:
+                out += bytes([int(rng.random() * 256)]) * n
+            else:
+                out += _sentence(rng).encode('utf-8')
+        return bytes(out[:size])
+    parts = []
+    total = 0
+    for part in _TEXT_GENERATORS[kind](rng):
+        parts.append(part)
+        total += len(part)
+        if total >= size:
+            break
+    return ''.join(parts)[:size]
+
+
+# -------------------------------- Cache ----------------------------------
+
+def cache_dir():
+    """Corpus cache directory ($SANTOK_CORPUS_DIR or ~/.cache/santok/corpus)"""
+    path = os.environ.get('SANTOK_CORPUS_DIR')
+    if not path:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+        path = os.path.join(base, 'santok', 'corpus')
+    return path
+
+
+def cache_path(kind, size, seed=DEFAULT_SEED, directory=None):
+    ext = 'bin' if kind == 'binary' else 'txt'
+    name = f"{kind}-seed{seed}-size{size}-v{CORPUS_VERSION}.{ext}.gz"
+    return os.path.join(directory or cache_dir(), name)
+
+
+def load(kind, size, seed=DEFAULT_SEED, directory=None, use_cache=True):
+    """
+    Return the corpus for (kind, size, seed), generating and caching it on
+    first use. A missing or unreadable cache directory only disables caching.
+    """
+    if not use_cache:
+        return generate(kind, size, seed)
+    path = cache_path(kind, size, seed, directory)
+    try:
+        with gzip.open(path, 'rb') as f:
+            data = f.read()
+        if kind == 'binary':
+            return data
+        return data.decode('utf-8', 'surrogatepass')
+    except (OSError, EOFError, UnicodeDecodeError):
+        pass
+    data = generate(kind, size, seed)
+    raw = data if kind == 'binary' else data.encode('utf-8', 'surrogatepass')
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with gzip.open(tmp, 'wb', compresslevel=6) as f:
+            f.write(raw)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+    return data
+
+
+def load_text(kind, size, seed=DEFAULT_SEED, directory=None, use_cache=True):
+    """Like load(), but binary corpora are decoded as latin-1 so every kind is a str"""
+    data = load(kind, size, seed, directory, use_cache)
+    if isinstance(data, bytes):
+        return data.decode('latin-1')
+    return data
+
+
+def main(argv=None):
+    """Pre-build cached corpora or export them as plain files"""
+    parser = argparse.ArgumentParser(description='SanTOK benchmark corpus generator')
+    parser.add_argument('--kinds', default=','.join(KINDS), help='Comma separated kinds: ' + ', '.join(KINDS))
+    parser.add_argument('--sizes', default='100000', help='Comma separated sizes (characters, or bytes for binary)')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='Generator seed')
+    parser.add_argument('--cache-dir', help='Cache directory (default: %s)' % cache_dir())
+    parser.add_argument('--export', help='Also write each corpus uncompressed into this directory')
+    args = parser.parse_args(argv)
+
+    kinds = [k.strip() for k in args.kinds.split(',') if k.strip()]
+    unknown = [k for k in kinds if k not in KINDS]
+    if unknown:
+        parser.error(f"unknown kinds: {', '.join(unknown)}")
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+
+    for kind in kinds:
+        for size in sizes:
+            data = load(kind, size, args.seed, args.cache_dir)
+            print(f"{kind:<13} {size:>12,}  {cache_path(kind, size, args.seed, args.cache_dir)}")
+            if args.export:
+                os.makedirs(args.export, exist_ok=True)
+                ext = 'bin' if kind == 'binary' else 'txt'
+                out = os.path.join(args.export, f"{kind}-seed{args.seed}-size{size}.{ext}")
+                if isinstance(data, bytes):
+                    with open(out, 'wb') as f:
+                        f.write(data)
+                else:
+                    with open(out, 'w', encoding='utf-8', errors='surrogatepass', newline='') as f:
+                        f.write(data)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
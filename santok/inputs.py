@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+SanTOK Input Files
+Reads text files for the CLI, decompressing gzip, bz2 and xz files and
+the members of zip and tar archives on the fly with the standard library.
+
+Decompression runs on a reader thread a few blocks ahead of the caller
+(zlib, bz2 and lzma release the GIL while they work), so it overlaps with
+tokenization and nothing is unpacked to disk. The format is recognised by
+its magic bytes, not the file extension.
+
+This module is the one implementation of the container layer
+(compression_kind, member_blocks, prefetch). src/core/core_tokenizer.py
+loads this file directly (keep it standard library only and free of
+package-relative imports) and adds its own encoding sniffing on top (per
+member, with a latin-1 fallback for stray bytes); iter_text() here decodes
+with the one encoding it is given, strictly, and translates newlines like
+a text-mode open(), as the CLI always has.
+"""
+
+import bz2
+import codecs
+import gzip
+import io
+import lzma
+import os
+import queue
+import tarfile
+import threading
+import zipfile
+
+BLOCK_SIZE = 1 << 20
+PREFETCH_BLOCKS = 4
+
+OPENERS = {'gzip': gzip.open, 'bz2': bz2.open, 'xz': lzma.open}
+
+
+def compression_kind(path):
+    """'gzip', 'bz2', 'xz', 'zip', 'tar' or None for a plain (or unreadable) file"""
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(512)
+    except OSError:
+        return None
+    if head[:2] == b'\x1f\x8b':
+        return 'gzip'
+    if _is_bz2_header(head):
+        return 'bz2'
+    if head[:6] == b'\xfd7zXZ\x00':
+        return 'xz'
+    if head[:4] in (b'PK\x03\x04', b'PK\x05\x06'):
+        return 'zip'
+    if _is_tar_header(head):
+        return 'tar'
+    return None
+
+
+def _is_bz2_header(head):
+    # "BZh", the block size digit, then the magic of the first block (or of
+    # the end of an empty stream); plain text may well start with "BZh"
+    return (head[:3] == b'BZh' and head[3:4] in b'123456789' and len(head) >= 10
+            and head[4:10] in (b'1AY&SY', b'\x17rE8P\x90'))
+
+
+def _is_tar_header(block):
+    return len(block) >= 262 and block[257:262] == b'ustar'
+
+
+def _read_blocks(f, block_size):
+    return iter(lambda: f.read(block_size), b'')
+
+
+def member_blocks(path, block_size=BLOCK_SIZE, kind=None):
+    """
+    (member number, member name, bytes block) for every non-empty block of
+    every regular file in path: the file itself, the stream of a
+    .gz/.bz2/.xz file (a compressed tar is read as the tar), or each
+    zip/tar member. kind is compression_kind(path) if the caller has it.
+    """
+    kind = kind or compression_kind(path)
+    if kind is None:
+        with open(path, 'rb') as f:
+            for block in _read_blocks(f, block_size):
+                yield 0, path, block
+        return
+    if kind == 'zip':
+        with zipfile.ZipFile(path) as zf:
+            members = [info for info in zf.infolist() if not info.is_dir()]
+            for number, info in enumerate(members):
+                with zf.open(info) as f:
+                    for block in _read_blocks(f, block_size):
+                        yield number, info.filename, block
+        return
+    if kind != 'tar':
+        with OPENERS[kind](path, 'rb') as f:
+            head = f.read(512)
+            if not _is_tar_header(head):
+                name = os.path.splitext(os.path.basename(path))[0]
+                block = head + f.read(block_size)
+                while block:
+                    yield 0, name, block
+                    block = f.read(block_size)
+                return
+    # Stream mode reads members in archive order without seeking
+    with tarfile.open(path, 'r|*') as tf:
+        number = 0
+        for info in tf:
+            if not info.isfile():
+                continue
+            for block in _read_blocks(tf.extractfile(info), block_size):
+                yield number, info.name, block
+            number += 1
+
+
+def prefetch(iterator, depth=PREFETCH_BLOCKS):
+    """
+    Run iterator on a reader thread, up to depth items ahead. Exceptions
+    are raised in the caller; closing the returned generator stops the
+    thread.
+    """
+    items = queue.Queue(depth)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in iterator:
+                if not put((True, item)):
+                    return
+            put((False, None))
+        except BaseException as e:
+            put((False, e))
+        finally:
+            close = getattr(iterator, 'close', None)
+            if close is not None:
+                close()
+
+    reader = threading.Thread(target=produce, name='santok-reader', daemon=True)
+    reader.start()
+    try:
+        while True:
+            ok, item = items.get()
+            if not ok:
+                if item is not None:
+                    raise item
+                return
+            yield item
+    finally:
+        stop.set()
+        reader.join()
+
+
+def iter_text(path, encoding='utf-8', block_size=BLOCK_SIZE):
+    """
+    Text chunks of path (every member, joined with newlines), decoded
+    incrementally. "\r\n" and "\r" become "\n", as in a text-mode open().
+    """
+    decoder = None
+    current = None
+    blocks = prefetch(member_blocks(path, block_size))
+    try:
+        for number, _, block in blocks:
+            if number != current:
+                if decoder is not None:
+                    yield decoder.decode(b'', True) + '\n'
+                decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder(encoding)(), True)
+                current = number
+            text = decoder.decode(block, False)
+            if text:
+                yield text
+        if decoder is not None:
+            text = decoder.decode(b'', True)
+            if text:
+                yield text
+    finally:
+        blocks.close()
+
+
+def read_text(path, encoding='utf-8'):
+    """The whole text of path, decompressed"""
+    return ''.join(iter_text(path, encoding))
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+SanTOK Batch - tokenize a directory tree
+
+Walks INPUT_DIR, tokenizes every matching file on a process pool and
+writes the results under OUTPUT_DIR, with a manifest that makes reruns
+incremental.
+
+- Files are scheduled largest first. Files smaller than --small-bytes are
+  packed together into tasks of about --group-bytes each, so millions of
+  tiny files do not cost one task each.
+- --layout files writes one output per input (OUTPUT_DIR/files/<path>.<ext>).
+  --layout shards writes one token store per task instead
+  (OUTPUT_DIR/shards/shard-*.stc). The store's index column holds character
+  offsets into the files' texts laid end to end, and the manifest records
+  each file's token and character range.
+- OUTPUT_DIR/manifest.jsonl gets one line per finished file: size, mtime,
+  BLAKE2b content hash, token count, stream digest and output location.
+  Lines are appended as tasks finish, so a crashed run keeps its progress.
+- On a rerun a file is skipped when its size and mtime match the manifest
+  and the config is unchanged. When only the mtime differs, the content
+  hash decides; --check-hash hashes every file. Files that disappeared are
+  dropped from the manifest and their outputs removed.
+
+Compressed files and archives are decompressed as they are read (see
+iter_file_text in core_tokenizer).
+
+Usage:
+    python src/cli/batch.py corpus/ out/ --include '*.log' --include '*.txt' --workers 8
+    python src/cli/batch.py corpus/ out/ --layout shards --exclude '.git'
+"""
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from core.core_tokenizer import (
+    TextTokenizer, TokenStore, iter_file_text, iter_tokens, write_jsonl_stream, write_token_store
+)
+
+MANIFEST = 'manifest.jsonl'
+FORMATS = {'store': '.stc', 'jsonl': '.jsonl', 'npz': '.npz'}
+HASH_BLOCK = 1 << 20
+
+
+def file_hash(path):
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _matches(rel_path, patterns):
+    name = rel_path.rsplit('/', 1)[-1]
+    return any(fnmatch.fnmatch(rel_path, p) or fnmatch.fnmatch(name, p) for p in patterns)
+
+
+def walk(root, include=('*',), exclude=()):
+    """(relative path, absolute path, size, mtime_ns) for every matching regular file under root"""
+    root = os.path.abspath(root)
+    for dirpath, dirnames, filenames in os.walk(root):
+        rel_dir = os.path.relpath(dirpath, root).replace(os.sep, '/')
+        rel_dir = '' if rel_dir == '.' else rel_dir + '/'
+        # Prune excluded directories instead of walking them
+        dirnames[:] = sorted(d for d in dirnames if not _matches(rel_dir + d, exclude))
+        for name in sorted(filenames):
+            rel = rel_dir + name
+            if not _matches(rel, include) or _matches(rel, exclude):
+                continue
+            path = os.path.join(dirpath, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if os.path.isfile(path):
+                yield rel, path, st.st_size, st.st_mtime_ns
+
+
+def load_manifest(output_dir):
+    """path -> latest manifest entry (later lines win; a torn last line is ignored)"""
+    entries = {}
+    path = os.path.join(output_dir, MANIFEST)
+    try:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                entries[entry['path']] = entry
+    except FileNotFoundError:
+        pass
+    return entries
+
+
+def plan(files, manifest, config, check_hash=False):
+    """
+    Split walked files into (todo, unchanged, touched): touched files kept
+    their content but not their mtime, and only need a manifest update.
+    """
+    todo, unchanged, touched = [], [], []
+    for rel, path, size, mtime_ns in files:
+        entry = manifest.get(rel)
+        if entry is None or entry.get('status') != 'ok' or entry.get('config') != config or entry['size'] != size:
+            todo.append((rel, path, size, mtime_ns))
+        elif entry['mtime_ns'] == mtime_ns and not check_hash:
+            unchanged.append(rel)
+        elif file_hash(path) == entry['hash']:
+            touched.append(dict(entry, mtime_ns=mtime_ns))
+        else:
+            todo.append((rel, path, size, mtime_ns))
+    return todo, unchanged, touched
+
+
+def make_tasks(files, small_bytes, group_bytes):
+    """Files largest first; files under small_bytes packed into groups of about group_bytes"""
+    tasks = []
+    group = []
+    group_size = 0
+    for f in sorted(files, key=lambda f: f[2], reverse=True):
+        if f[2] >= small_bytes:
+            tasks.append([f])
+            continue
+        group.append(f)
+        group_size += f[2]
+        if group_size >= group_bytes:
+            tasks.append(group)
+            group = []
+            group_size = 0
+    if group:
+        tasks.append(group)
+    return tasks
+
+
+def _counted_tokens(path, tokenizer, char_start, sizes):
+    # Tokens of one file with "index" moved by char_start; the file's
+    # character count is left in sizes['chars'] once they are consumed
+    sizes['chars'] = 0
+
+    def chunks():
+        for chunk in iter_file_text(path):
+            sizes['chars'] += len(chunk)
+            yield chunk
+
+    for tok in iter_tokens(chunks(), tokenizer):
+        if char_start:
+            tok['index'] += char_start
+        yield tok
+
+
+def _entry(rel, size, mtime_ns, digest, config, **fields):
+    entry = {'path': rel, 'size': size, 'mtime_ns': mtime_ns, 'hash': digest, 'config': config, 'status': 'ok'}
+    entry.update(fields)
+    return entry
+
+
+def _replace_with(tmp_path, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.replace(tmp_path, path)
+
+
+def run_file(output_dir, config, f):
+    """Tokenize one file to its own output; returns its manifest entry"""
+    rel, path, size, mtime_ns = f
+    digest = file_hash(path)
+    out = os.path.join(output_dir, 'files', rel + FORMATS[config['format']])
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    sizes = {}
+    tokens = _counted_tokens(path, config['tokenizer'], 0, sizes)
+    if config['format'] == 'jsonl':
+        tmp = f"{out}.{os.getpid()}.tmp"
+        engine = TextTokenizer(config['seed'], config['embedding_bit'])
+        count = write_jsonl_stream(tmp, engine.iter_stream(config['tokenizer'], tokens))
+        _replace_with(tmp, out)
+        return _entry(rel, size, mtime_ns, digest, config, output=os.path.relpath(out, output_dir),
+                      tokens=count, chars=sizes['chars'])
+    store_path = out if config['format'] == 'store' else f"{out}.{os.getpid()}.stc"
+    header = write_token_store(store_path, config['tokenizer'], tokens, config['seed'], config['embedding_bit'])
+    if config['format'] == 'npz':
+        with TokenStore(store_path) as store:
+            store.to_npz(out)
+        os.unlink(store_path)
+    return _entry(rel, size, mtime_ns, digest, config, output=os.path.relpath(out, output_dir),
+                  tokens=header['count'], chars=sizes['chars'], stream_digest=header['stream_digest'])
+
+
+def run_shard(output_dir, config, files):
+    """Tokenize a group of files into one shared store; returns their manifest entries"""
+    digests = [file_hash(f[1]) for f in files]
+    name = 'shard-' + hashlib.blake2b(''.join(digests).encode() + json.dumps(config, sort_keys=True).encode(),
+                                      digest_size=10).hexdigest() + '.stc'
+    out = os.path.join(output_dir, 'shards', name)
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    ranges = []
+    counter = {'tokens': 0}
+
+    def tokens():
+        char_start = 0
+        for rel, path, _, _ in files:
+            sizes = {}
+            token_start = counter['tokens']
+            for tok in _counted_tokens(path, config['tokenizer'], char_start, sizes):
+                counter['tokens'] += 1
+                yield tok
+            ranges.append((token_start, counter['tokens'] - token_start, char_start, sizes['chars']))
+            char_start += sizes['chars']
+
+    header = write_token_store(out, config['tokenizer'], tokens(), config['seed'], config['embedding_bit'])
+    entries = []
+    for (rel, _, size, mtime_ns), digest, (token_start, count, char_start, chars) in zip(files, digests, ranges):
+        entries.append(_entry(rel, size, mtime_ns, digest, config, output=os.path.relpath(out, output_dir),
+                              token_start=token_start, tokens=count, char_start=char_start, chars=chars,
+                              stream_digest=header['stream_digest']))
+    return entries
+
+
+def run_task(output_dir, config, layout, files):
+    """One scheduled task; failures are reported per file instead of raised"""
+    if layout == 'shards':
+        try:
+            return run_shard(output_dir, config, files)
+        except Exception as e:
+            return [{'path': f[0], 'status': 'error', 'error': f"{type(e).__name__}: {e}"} for f in files]
+    entries = []
+    for f in files:
+        try:
+            entries.append(run_file(output_dir, config, f))
+        except Exception as e:
+            entries.append({'path': f[0], 'status': 'error', 'error': f"{type(e).__name__}: {e}"})
+    return entries
+
+
+def _remove_output(output_dir, entry, still_used):
+    output = entry.get('output')
+    if not output or output in still_used:
+        return
+    try:
+        os.unlink(os.path.join(output_dir, output))
+    except OSError:
+        pass
+
+
+def compact_manifest(output_dir, entries):
+    """Rewrite the manifest with one line per current file"""
+    path = os.path.join(output_dir, MANIFEST)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        for rel in sorted(entries):
+            f.write(json.dumps(entries[rel], sort_keys=True) + '\n')
+    os.replace(tmp, path)
+
+
+def run_batch(input_dir, output_dir, tokenizer='word', fmt='store', layout='files', include=('*',), exclude=(),
+              workers=None, small_bytes=1 << 20, group_bytes=16 << 20, seed=12345, embedding_bit=False,
+              check_hash=False, log=None):
+    """
+    Tokenize everything under input_dir that changed since the last run.
+    Returns a summary dict (counts of processed, unchanged, touched, removed
+    and failed files, tokens and seconds).
+    """
+    if layout == 'shards' and fmt != 'store':
+        raise ValueError("--layout shards writes token stores; use --format store")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format: {fmt}")
+    started = time.perf_counter()
+    os.makedirs(output_dir, exist_ok=True)
+    config = {'tokenizer': tokenizer, 'format': fmt, 'layout': layout, 'seed': seed, 'embedding_bit': embedding_bit}
+    output_abs = os.path.abspath(output_dir)
+    files = [f for f in walk(input_dir, include, exclude)
+             if not os.path.abspath(f[1]).startswith(output_abs + os.sep)]
+    manifest = load_manifest(output_dir)
+    todo, unchanged, touched = plan(files, manifest, config, check_hash)
+    current = {f[0] for f in files}
+    removed = [rel for rel in manifest if rel not in current]
+
+    entries = {rel: manifest[rel] for rel in unchanged}
+    for entry in touched:
+        entries[entry['path']] = entry
+    failed = 0
+    tokens = 0
+    # A shard only stands alone once it fills a whole group
+    tasks = make_tasks(todo, small_bytes if layout == 'files' else group_bytes, group_bytes)
+    with open(os.path.join(output_dir, MANIFEST), 'a', encoding='utf-8') as journal:
+        def record(results):
+            nonlocal failed, tokens
+            for entry in results:
+                journal.write(json.dumps(entry, sort_keys=True) + '\n')
+                if entry['status'] == 'ok':
+                    entries[entry['path']] = entry
+                    tokens += entry['tokens']
+                else:
+                    failed += 1
+                    if log:
+                        log(f"error: {entry['path']}: {entry['error']}")
+            journal.flush()
+
+        if workers == 0 or len(tasks) <= 1:
+            for task in tasks:
+                record(run_task(output_dir, config, layout, task))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # Submitted largest first; the pool starts them in that order
+                futures = [pool.submit(run_task, output_dir, config, layout, task) for task in tasks]
+                done = 0
+                for future in as_completed(futures):
+                    record(future.result())
+                    done += 1
+                    if log:
+                        log(f"{done}/{len(tasks)} tasks")
+
+    # Outputs no current entry points at any more (removed files, rewritten shards)
+    still_used = {entry.get('output') for entry in entries.values()}
+    for rel in removed:
+        _remove_output(output_dir, manifest[rel], still_used)
+    for rel, entry in manifest.items():
+        if rel in entries and entries[rel] is not entry:
+            _remove_output(output_dir, entry, still_used)
+    compact_manifest(output_dir, entries)
+    return {
+        'files': len(files),
+        'processed': len(todo) - failed,
+        'unchanged': len(unchanged),
+        'touched': len(touched),
+        'removed': len(removed),
+        'failed': failed,
+        'tasks': len(tasks),
+        'tokens': tokens,
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='SanTOK batch tokenization of a directory tree')
+    parser.add_argument('input_dir', help='Directory to walk')
+    parser.add_argument('output_dir', help='Where outputs and manifest.jsonl go')
+    parser.add_argument('-t', '--tokenizer', default='word',
+                        choices=['space', 'word', 'char', 'grammar', 'subword', 'subword_bpe', 'subword_syllable',
+                                 'subword_frequency', 'byte'],
+                        help='Tokenizer type to use')
+    parser.add_argument('-f', '--format', default='store', choices=sorted(FORMATS),
+                        help='Output format (store: columnar token store)')
+    parser.add_argument('--layout', default='files', choices=['files', 'shards'],
+                        help='One output per file, or one store per task')
+    parser.add_argument('--include', action='append', help='Glob of files to take (repeatable; default: all)')
+    parser.add_argument('--exclude', action='append', default=[], help='Glob of files/directories to skip (repeatable)')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='Worker processes (default: CPU count; 0: inline)')
+    parser.add_argument('--small-bytes', type=int, default=1 << 20, help='Files below this size are grouped')
+    parser.add_argument('--group-bytes', type=int, default=16 << 20, help='Target input bytes per grouped task')
+    parser.add_argument('--seed', type=int, default=12345, help='Engine seed')
+    parser.add_argument('--embedding-bit', action='store_true', help='Use the embedding bit')
+    parser.add_argument('--check-hash', action='store_true', help='Hash every file, not only those with a new mtime')
+    parser.add_argument('-q', '--quiet', action='store_true', help='Only print the summary')
+    args = parser.parse_args(argv)
+    if args.layout == 'shards' and args.format != 'store':
+        parser.error("--layout shards writes token stores; use --format store")
+
+    log = None if args.quiet else (lambda msg: print(msg, file=sys.stderr))
+    summary = run_batch(args.input_dir, args.output_dir, args.tokenizer, args.format, args.layout,
+                        args.include or ['*'], args.exclude, args.workers, args.small_bytes, args.group_bytes,
+                        args.seed, args.embedding_bit, args.check_hash, log)
+    print(json.dumps(summary))
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,7 @@
 """
-Self-contained Text Tokenization System (no imports, no third-party).
+Self-contained Text Tokenization System (standard library only, no third-party).
+Compressed inputs are read by the stdlib-only santok/inputs.py, which is
+loaded from its file; without it they are read as plain bytes.
 
 Run: python SanTOK_tokenizer.py
 
@@ -16,6 +18,238 @@ try:
 except Exception:
     json = None
 
+try:
+    import hashlib  # standard library allowed (stream digests)
+except Exception:
+    hashlib = None
+
+try:
+    import codecs  # standard library allowed (incremental file decoding)
+except Exception:
+    codecs = None
+
+try:
+    import threading  # standard library allowed (instrumentation lock, .npz export)
+    import zipfile
+except Exception:
+    threading = zipfile = None
+
+try:
+    import csv  # standard library allowed (token writers)
+except Exception:
+    csv = None
+
+try:
+    import array  # standard library allowed (columnar token store)
+    import os
+    import struct
+    import sys
+    import tempfile
+    from bisect import bisect_right
+except Exception:
+    array = os = struct = sys = tempfile = bisect_right = None
+
+try:
+    import mmap  # standard library allowed (binary files)
+    import re
+except Exception:
+    mmap = None
+    re = None
+
+try:
+    import argparse  # standard library allowed (headless main)
+except Exception:
+    argparse = None
+
+try:
+    import marshal  # standard library allowed (chunk token cache)
+except Exception:
+    marshal = None
+
+try:
+    import importlib.util  # standard library allowed (shared compressed-input reader)
+    import warnings
+except Exception:
+    importlib = None
+    warnings = None
+
+# Compressed inputs: santok/inputs.py is the one implementation. It is a
+# stdlib-only module, loaded from its file so that neither the santok
+# package nor sys.path is involved (an installed santok of another version
+# cannot stand in for it).
+_INPUTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "santok", "inputs.py")
+try:
+    _inputs_spec = importlib.util.spec_from_file_location("_santok_core_inputs", _INPUTS_PATH)
+    _inputs = importlib.util.module_from_spec(_inputs_spec)
+    _inputs_spec.loader.exec_module(_inputs)
+except (ImportError, OSError, AttributeError) as e:
+    _inputs = None
+    if warnings is not None:
+        warnings.warn(f"compressed inputs disabled, {_INPUTS_PATH} not loaded ({e}); "
+                      "gzip/bz2/xz files and archives are read as plain bytes", RuntimeWarning)
+
+
+try:
+    import contextvars  # standard library allowed (instrumentation)
+    from time import perf_counter as _perf_counter
+except Exception:
+    contextvars = None
+    _perf_counter = None
+
+
+# ---------------------------- Instrumentation ----------------------------
+# Opt-in stage timers and counters. Nothing is recorded unless a caller
+# enters instrument(); until then every hook is a single global check.
+
+_INSTRUMENT_ACTIVE = 0
+_TIMINGS = contextvars.ContextVar("santok_stage_timings", default=None) if contextvars is not None else None
+
+
+class StageTimings:
+    """Accumulated per-stage wall time and counters for one instrumented run"""
+
+    def __init__(self):
+        self.stages = {}    # name -> [calls, seconds]
+        self.counters = {}  # name -> int
+
+    def add(self, name, seconds, calls=1):
+        entry = self.stages.get(name)
+        if entry is None:
+            self.stages[name] = [calls, seconds]
+        else:
+            entry[0] += calls
+            entry[1] += seconds
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def merge(self, other):
+        for name in other.stages:
+            calls, seconds = other.stages[name]
+            self.add(name, seconds, calls)
+        for name in other.counters:
+            self.count(name, other.counters[name])
+
+    def as_dict(self):
+        stages = {}
+        for name in self.stages:
+            calls, seconds = self.stages[name]
+            stages[name] = {"calls": calls, "ms": seconds * 1000.0}
+        return {"stages": stages, "counters": dict(self.counters)}
+
+    def server_timing(self):
+        """Render as a Server-Timing header value (stage;dur=ms, ...)"""
+        parts = []
+        for name in self.stages:
+            calls, seconds = self.stages[name]
+            parts.append('%s;dur=%.3f;desc="%d calls"' % (name, seconds * 1000.0, calls))
+        return ", ".join(parts)
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+# instrument() blocks may open and close on many threads at once; the
+# count is a read-modify-write, so it is only changed under this lock
+_INSTRUMENT_LOCK = threading.Lock() if threading is not None else _NULL_STAGE
+
+
+class _Stage:
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.start = _perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.timings.add(self.name, _perf_counter() - self.start)
+        return False
+
+
+class instrument:
+    """
+    Collect stage timings for everything run inside the block:
+
+        with instrument() as timings:
+            TextTokenizer(seed, False).build(text)
+        print(timings.as_dict())
+
+    Timings are scoped to the current thread / asyncio task (contextvars).
+    """
+
+    def __init__(self, timings=None):
+        self.timings = timings if timings is not None else StageTimings()
+
+    def __enter__(self):
+        global _INSTRUMENT_ACTIVE
+        with _INSTRUMENT_LOCK:
+            _INSTRUMENT_ACTIVE += 1
+        self._token = _TIMINGS.set(self.timings)
+        return self.timings
+
+    def __exit__(self, exc_type, exc, tb):
+        global _INSTRUMENT_ACTIVE
+        _TIMINGS.reset(self._token)
+        with _INSTRUMENT_LOCK:
+            _INSTRUMENT_ACTIVE -= 1
+        return False
+
+
+def current_timings():
+    """The StageTimings collecting for this context, or None"""
+    if not _INSTRUMENT_ACTIVE:
+        return None
+    return _TIMINGS.get()
+
+
+def stage(name):
+    """Context manager timing one stage; a shared no-op when not instrumented"""
+    if not _INSTRUMENT_ACTIVE:
+        return _NULL_STAGE
+    timings = _TIMINGS.get()
+    if timings is None:
+        return _NULL_STAGE
+    return _Stage(timings, name)
+
+
+def count(name, n=1):
+    """Bump a counter when instrumented"""
+    if _INSTRUMENT_ACTIVE:
+        timings = _TIMINGS.get()
+        if timings is not None:
+            timings.count(name, n)
+
+
+def _instrumented(name):
+    # Decorator for pipeline stages; costs one global check when disabled
+    def wrap(func):
+        def inner(*args, **kwargs):
+            if not _INSTRUMENT_ACTIVE:
+                return func(*args, **kwargs)
+            timings = _TIMINGS.get()
+            if timings is None:
+                return func(*args, **kwargs)
+            start = _perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timings.add(name, _perf_counter() - start)
+        inner.__name__ = func.__name__
+        inner.__qualname__ = func.__qualname__
+        inner.__doc__ = func.__doc__
+        inner.__wrapped__ = func
+        return inner
+    return wrap
+
 
 # -------------------------- Primitive helpers --------------------------
 
@@ -152,6 +386,7 @@ def _is_word_char_multilang(char, language):
 
 # ---------------------------- Reversible Tokenizers -------------------------------
 
+@_instrumented("tokenize_space")
 def tokenize_space(text):
     """
     STABLE & REVERSIBLE space tokenization with unique IDs by design.
@@ -230,6 +465,7 @@ def _classify_space_type(space_text):
         return "mixed"
 
 
+@_instrumented("tokenize_char")
 def tokenize_char(text):
     """
     FULLY REVERSIBLE character tokenization with unique IDs by design.
@@ -257,6 +493,7 @@ def tokenize_char(text):
     return tokens
 
 
+@_instrumented("tokenize_word")
 def tokenize_word(text):
     """
     FULLY REVERSIBLE word tokenization with unique IDs by design.
@@ -318,6 +555,7 @@ def tokenize_word(text):
     return tokens
 
 
+@_instrumented("tokenize_grammar")
 def tokenize_grammar(text):
     """
     FULLY REVERSIBLE grammar tokenization with unique IDs by design.
@@ -386,6 +624,7 @@ def tokenize_grammar(text):
     return tokens
 
 
+@_instrumented("tokenize_subword")
 def tokenize_subword(text, chunk_len=3, strategy="fixed"):
     """
     STABLE & REVERSIBLE sub-word tokenization with unique IDs by design.
@@ -559,6 +798,7 @@ def _frequency_based_split(word):
     return result
 
 
+@_instrumented("tokenize_bytes")
 def tokenize_bytes(text):
     """
     STABLE & REVERSIBLE byte tokenization with unique IDs by design.
@@ -640,6 +880,7 @@ def tokenize_text(text, tokenizer_type="word", language=None, use_parallel=False
         raise ValueError(f"Unknown tokenizer type: {tokenizer_type}")
 
 
+@_instrumented("tokenize_word_multilang")
 def tokenize_word_multilang(text, language):
     """Multi-language word tokenization"""
     tokens = []
@@ -740,6 +981,436 @@ def _tokenize_large_text(text, tokenizer_type, **kwargs):
     return all_tokens
 
 
+def _tokenize_named(text, name):
+    # Stream name -> tokenizer, matching all_tokenizations()
+    if name == "space":
+        return tokenize_space(text)
+    elif name == "word":
+        return tokenize_word(text)
+    elif name == "char":
+        return tokenize_char(text)
+    elif name == "grammar":
+        return tokenize_grammar(text)
+    elif name == "subword":
+        return tokenize_subword(text, 3, "fixed")
+    elif name == "subword_bpe":
+        return tokenize_subword(text, 3, "bpe")
+    elif name == "subword_syllable":
+        return tokenize_subword(text, 3, "syllable")
+    elif name == "subword_frequency":
+        return tokenize_subword(text, 3, "frequency")
+    elif name == "byte":
+        return tokenize_bytes(text)
+    raise ValueError(f"Unknown tokenizer type: {name}")
+
+
+def _safe_cut(text, lo=1):
+    """
+    Last position p >= lo with text[p-1] whitespace and text[p] not. Every
+    tokenizer starts a fresh token there, so tokenizing text[:p] and
+    text[p:] separately gives the same tokens as the whole. 0 if none.
+    """
+    i = len(text) - 1
+    if lo < 1:
+        lo = 1
+    while i >= lo:
+        if _is_space(text[i - 1]) and not _is_space(text[i]):
+            return i
+        i -= 1
+    return 0
+
+
+def iter_tokens(source, tokenizer_type="word", chunk_chars=1 << 16, max_carry=1 << 20):
+    """
+    Streaming tokenization: yields the same token dicts as the stream's
+    tokenizer on the whole text, without holding all tokens at once.
+
+    source is a str or any iterable of str chunks (e.g. a file read in
+    blocks). Text is cut only at whitespace -> non-whitespace boundaries;
+    "id", "index" and "parent_start" are rebased to whole-text values.
+    A run of more than max_carry characters without such a boundary is cut
+    where it stands, which can split one token in two.
+    """
+    if isinstance(source, str):
+        chunks = _str_chunks(source, chunk_chars)
+    else:
+        chunks = source
+    carry = ""
+    char_offset = 0
+    id_offset = 0
+    for chunk in chunks:
+        if not chunk:
+            continue
+        # carry has no boundary of its own; only look where the new chunk starts
+        lo = len(carry)
+        buf = carry + chunk if carry else chunk
+        cut = _safe_cut(buf, lo)
+        if cut == 0:
+            if len(buf) < max_carry:
+                carry = buf
+                continue
+            cut = len(buf)
+        segment = buf[:cut]
+        carry = buf[cut:]
+        tokens = _tokenize_named(segment, tokenizer_type)
+        _rebase_tokens(tokens, id_offset, char_offset)
+        # ids are dense per segment
+        id_offset += len(tokens)
+        char_offset += cut
+        yield from tokens
+    if carry:
+        tokens = _tokenize_named(carry, tokenizer_type)
+        _rebase_tokens(tokens, id_offset, char_offset)
+        yield from tokens
+
+
+def _str_chunks(text, size):
+    for i in range(0, len(text), size):
+        yield text[i:i + size]
+
+
+def _rebase_tokens(tokens, id_offset, char_offset):
+    if not id_offset and not char_offset:
+        return
+    for tok in tokens:
+        tok["id"] += id_offset
+        tok["index"] += char_offset
+        if "parent_start" in tok:
+            tok["parent_start"] += char_offset
+
+
+# ---------------------------- Content-defined chunking ----------------------------
+# Chunk boundaries chosen by the text around them rather than by position, so
+# an edit moves only the boundaries next to it. Chunk tokenizations are
+# cached by content hash; a new version of a document re-tokenizes only the
+# chunks that changed.
+
+_CDC_MIN = 1 << 11
+_CDC_MAX = 1 << 15
+_CDC_WINDOW = 16
+_CDC_LINE_BITS = 5
+_CDC_WORD_BITS = 9
+_CDC_LINE = re.compile(r"\n(?=[^ \t\n\r])") if re is not None else None
+_CDC_WORD = re.compile(r"[ \t\n\r](?=[^ \t\n\r])") if re is not None else None
+_GEAR = []
+
+
+def _gear_table():
+    if not _GEAR:
+        rng = XorShift64Star(0x5A17C0DE)
+        _GEAR.extend(rng.next_u64() >> 32 for _ in range(256))
+    return _GEAR
+
+
+def _gear_hash(text, pos):
+    # Gear hash of the _CDC_WINDOW characters before pos; the same value a
+    # rolling Gear hash has at pos, computed only where a cut is possible
+    gear = _gear_table()
+    h = 0
+    for ch in text[max(0, pos - _CDC_WINDOW):pos]:
+        o = ord(ch)
+        h = ((h << 1) + gear[(o ^ (o >> 8)) & 255]) & 0xFFFFFFFF
+    return h
+
+
+def _cdc_cut(text, start, min_size, max_size):
+    # End of the chunk that starts at start. Cuts are always at token starts
+    # (whitespace -> non-whitespace, see _safe_cut): first choice a line
+    # start whose Gear hash has _CDC_LINE_BITS zero top bits, then a word
+    # start with _CDC_WORD_BITS, then the last word start before max_size;
+    # a single token longer than that ends the chunk where it ends.
+    n = len(text)
+    if n - start <= min_size:
+        return n
+    lo = start + min_size - 1
+    hi = min(n, start + max_size)
+    for pattern, bits in ((_CDC_LINE, _CDC_LINE_BITS), (_CDC_WORD, _CDC_WORD_BITS)):
+        shift = 32 - bits
+        last = 0
+        for m in pattern.finditer(text, lo, hi):
+            last = m.end()
+            if _gear_hash(text, last) >> shift == 0:
+                return last
+    if hi == n:
+        return n
+    if last:
+        return last
+    m = _CDC_WORD.search(text, hi - 1)
+    return m.end() if m else n
+
+
+def content_defined_chunks(text, min_size=_CDC_MIN, max_size=_CDC_MAX, start=0):
+    """
+    Yield (start, end) of content-defined chunks of text. Every cut is at a
+    token start, so tokenizing the chunks one by one gives the tokens of the
+    whole text. Chunks are min_size..max_size characters, except the last
+    one and those holding a longer token. A cut depends only on the
+    previous cut and the text after it, so after an edit the cuts fall back
+    into step with the old ones.
+    """
+    n = len(text)
+    while start < n:
+        end = _cdc_cut(text, start, min_size, max_size)
+        yield start, end
+        start = end
+
+
+def _chunk_key(chunk, tokenizer_type):
+    return tokenizer_type + ":" + hashlib.blake2b(chunk.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+
+
+def _pack_tokens(tokens):
+    return marshal.dumps(tokens) if marshal is not None else tokens
+
+
+def _unpack_tokens(packed):
+    # Fresh dicts every time; callers rebase them in place
+    return marshal.loads(packed) if marshal is not None else [dict(t) for t in packed]
+
+
+class ChunkCache:
+    """
+    LRU of chunk tokenizations keyed by tokenizer + chunk content hash,
+    bounded by the number of tokens held. Tokens are stored packed
+    (marshal) with chunk-relative "id", "index" and "parent_start".
+    """
+
+    def __init__(self, max_tokens=1 << 21):
+        self.max_tokens = max_tokens
+        self.tokens = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+
+    def get(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries[key] = entry
+        self.hits += 1
+        return entry
+
+    def put(self, key, packed, count):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.tokens -= old[1]
+        if count > self.max_tokens:
+            return
+        self._entries[key] = (packed, count)
+        self.tokens += count
+        while self.tokens > self.max_tokens:
+            oldest = next(iter(self._entries))
+            self.tokens -= self._entries.pop(oldest)[1]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_CHUNK_CACHE = ChunkCache()
+
+# uid of token i is the (i+1)-th XorShift64Star output. Its state update is
+# not linear (the multiply is stored back), so there is no jump-ahead;
+# instead the state is kept every _UID_STRIDE draws, per seed.
+_UID_STRIDE = 4096
+_UID_CHECKPOINTS = {}
+
+
+def _uid_state(seed, draws):
+    """XorShift64Star(seed).state after draws calls to next_u64()"""
+    rng = XorShift64Star(seed)
+    points = _UID_CHECKPOINTS.setdefault(seed, [rng.state])
+    k = draws // _UID_STRIDE
+    while len(points) <= k:
+        rng.state = points[-1]
+        for _ in range(_UID_STRIDE):
+            rng.next_u64()
+        points.append(rng.state)
+    rng.state = points[k]
+    for _ in range(draws - k * _UID_STRIDE):
+        rng.next_u64()
+    return rng.state
+
+
+class ChunkedDocument:
+    """
+    A text tokenized in content-defined chunks (see content_defined_chunks).
+
+    Each chunk's tokens are kept packed and chunk-relative; global "id",
+    "index" and "parent_start" come from per-chunk prefix sums when tokens
+    are read, so they cost nothing to move. update(new_text) and
+    edit(start, end, replacement) return the next version, re-tokenizing
+    only chunks whose content is new: unchanged chunks are taken from this
+    version or from the ChunkCache.
+
+        doc = ChunkedDocument(text, "word")
+        doc2 = doc.edit(p, p, "a new line\n")   # doc2.stats["tokenized"] == 1
+        for tok in doc2.iter_tokens(): ...
+        for rec in doc2.records(TextTokenizer(seed, False), "word", a, b): ...
+    """
+
+    def __init__(self, text, tokenizer_type="word", cache=None, min_size=_CDC_MIN, max_size=_CDC_MAX, _chunks=None):
+        self.text = text
+        self.tokenizer_type = tokenizer_type
+        self.cache = cache if cache is not None else _CHUNK_CACHE
+        self.min_size = min_size
+        self.max_size = max_size
+        self.stats = {"chunks": 0, "reused": 0, "tokenized": 0, "rechunked_chars": 0}
+        if _chunks is None:
+            _chunks, _ = self._chunk_from(0, {}, [], 0, 0)
+            self.stats["rechunked_chars"] = len(text)
+        self._set_chunks(_chunks)
+
+    def _set_chunks(self, chunks):
+        # chunks: [start, end, key, packed tokens, token count]
+        self.chunks = chunks
+        self.starts = [c[0] for c in chunks]
+        self.token_starts = []
+        n = 0
+        for c in chunks:
+            self.token_starts.append(n)
+            n += c[4]
+        self.token_count = n
+        self.stats["chunks"] = len(chunks)
+
+    def _tokenize_chunk(self, start, end, known):
+        chunk = self.text[start:end]
+        key = _chunk_key(chunk, self.tokenizer_type)
+        entry = known.get(key) or self.cache.get(key)
+        if entry is not None:
+            self.stats["reused"] += 1
+            return [start, end, key, entry[0], entry[1]]
+        tokens = _tokenize_named(chunk, self.tokenizer_type)
+        packed = _pack_tokens(tokens)
+        self.cache.put(key, packed, len(tokens))
+        self.stats["tokenized"] += 1
+        return [start, end, key, packed, len(tokens)]
+
+    def _chunk_from(self, start, known, old_starts, first, delta):
+        # Chunk the text from start until a cut lands on the moved start of
+        # old chunk first or a later one; returns the chunks and that old
+        # chunk's index (None if chunking ran to the end)
+        chunks = []
+        for a, b in content_defined_chunks(self.text, self.min_size, self.max_size, start):
+            k = bisect_right(old_starts, a - delta) - 1
+            if k >= first and old_starts[k] == a - delta:
+                return chunks, k
+            chunks.append(self._tokenize_chunk(a, b, known))
+        return chunks, None
+
+    def update(self, new_text):
+        """
+        The document after an edit: new_text is compared with this version
+        chunk by chunk from both ends (a memcmp pass over the text) and
+        only the chunks in between are redone. Use edit() when the edited
+        range is known, which skips the comparison.
+        """
+        old = self.text
+        chunks = self.chunks
+        n = len(chunks)
+        delta = len(new_text) - len(old)
+        # Leading chunks with the same text
+        i = 0
+        while i < n and new_text.startswith(old[chunks[i][0]:chunks[i][1]], chunks[i][0]):
+            i += 1
+        if i == n and delta == 0:
+            return self._patched(new_text, len(old), n, 0)
+        # Trailing chunks with the same text, moved by delta
+        j = n
+        while j > i and chunks[j - 1][0] + delta >= 0 and \
+                new_text.startswith(old[chunks[j - 1][0]:chunks[j - 1][1]], chunks[j - 1][0] + delta):
+            j -= 1
+        return self._patched(new_text, chunks[i][0] if i < n else len(old), j, delta)
+
+    def edit(self, start, end, replacement):
+        """The document with text[start:end] replaced by replacement"""
+        new_text = self.text[:start] + replacement + self.text[end:]
+        # First chunk wholly after the replaced range
+        j = bisect_right(self.starts, end - 1)
+        return self._patched(new_text, start, j, len(replacement) - (end - start))
+
+    def _patched(self, new_text, changed_from, j, delta):
+        # Text before changed_from is unchanged in place, chunks from j on
+        # are unchanged but moved by delta. A cut looks up to max_size past
+        # its chunk's start (or to the end of its chunk), so chunking
+        # restarts at the first chunk that sees changed_from and runs until
+        # it falls into step with a moved chunk.
+        chunks = self.chunks
+        n = len(chunks)
+        doc = ChunkedDocument(new_text, self.tokenizer_type, self.cache, self.min_size, self.max_size, _chunks=[])
+        if changed_from == len(self.text) and delta == 0:
+            doc.stats["reused"] = n
+            doc._set_chunks(list(chunks))
+            return doc
+        restart = min(bisect_right(self.starts, changed_from - self.max_size),
+                      max(bisect_right(self.starts, changed_from - 1) - 1, 0))
+        j = max(j, restart)
+        begin = chunks[restart][0] if chunks else 0
+        known = {c[2]: (c[3], c[4]) for c in chunks[restart:j]}
+        middle, resync_at = doc._chunk_from(begin, known, self.starts, j, delta)
+        tail = []
+        if resync_at is not None:
+            tail = [[c[0] + delta, c[1] + delta, c[2], c[3], c[4]] for c in chunks[resync_at:]]
+        doc.stats["reused"] += restart + len(tail)
+        doc.stats["rechunked_chars"] = (tail[0][0] if tail else len(new_text)) - begin
+        doc._set_chunks(chunks[:restart] + middle + tail)
+        return doc
+
+    def __len__(self):
+        return self.token_count
+
+    def _chunk_tokens(self, k):
+        # Tokens of chunk k with whole-text "id", "index" and "parent_start"
+        tokens = _unpack_tokens(self.chunks[k][3])
+        _rebase_tokens(tokens, self.token_starts[k], self.chunks[k][0])
+        return tokens
+
+    def iter_tokens(self, start=0, stop=None):
+        """Tokens start..stop-1, equal to iter_tokens(text)'s (ids are whole-text positions)"""
+        stop = self.token_count if stop is None else min(stop, self.token_count)
+        if start >= stop:
+            return
+        k = bisect_right(self.token_starts, start) - 1
+        while k < len(self.chunks) and self.token_starts[k] < stop:
+            base = self.token_starts[k]
+            tokens = self._chunk_tokens(k)
+            yield from tokens[max(0, start - base):stop - base]
+            k += 1
+
+    def tokens(self):
+        return list(self.iter_tokens())
+
+    def token(self, position):
+        if not 0 <= position < self.token_count:
+            raise IndexError(position)
+        return next(self.iter_tokens(position, position + 1))
+
+    def records(self, engine, name, start=0, stop=None):
+        """
+        TokenRecords start..stop-1 of engine.iter_stream(name, tokens),
+        including prev_uid / next_uid across the window's edges, without
+        building the records before start.
+        """
+        n = self.token_count
+        stop = n if stop is None else min(stop, n)
+        if start >= stop:
+            return
+        sid = TokenStream(name).stream_id
+        rng = XorShift64Star(engine.seed)
+        rng.state = _uid_state(engine.seed, start)
+        prev_uid = None
+        if start > 0:
+            prev_uid = rng.state
+        uid = rng.next_u64()
+        i = start
+        for tok in self.iter_tokens(start, stop):
+            next_uid = rng.next_u64() if i + 1 < n else None
+            yield engine._record(name, sid, i, tok["text"], uid, prev_uid, next_uid)
+            prev_uid = uid
+            uid = next_uid
+            i += 1
+
+
 def _simulate_utf8_bytes(codepoint):
     """
     Simulate UTF-8 byte encoding without using stdlib
@@ -803,6 +1474,7 @@ def all_tokenizations(text):
 
 # ---------------------------- COMPRESSION FUNCTIONS -------------------------------
 
+@_instrumented("compress_tokens")
 def compress_tokens(tokens, compression_type="rle"):
     """
     COMPRESSION: Compress tokens while maintaining full reversibility.
@@ -997,6 +1669,7 @@ def _compress_adaptive(tokens):
         return frequency_compressed
 
 
+@_instrumented("decompress_tokens")
 def decompress_tokens(compressed_tokens):
     """
     DECOMPRESSION: Decompress tokens back to original form.
@@ -1070,13 +1743,16 @@ def calculate_compression_ratio(original_tokens, compressed_tokens):
     return compressed_size / original_size
 
 
-def analyze_compression_efficiency(text, tokenizer_type="space"):
+def analyze_compression_efficiency(text, tokenizer_type="space", tokens=None):
     """
     Analyze compression efficiency for different tokenization types.
     Returns detailed compression analysis.
+    tokens: an existing tokenization of text to reuse instead of tokenizing again.
     """
-    # Get tokens
-    if tokenizer_type == "space":
+    # Get tokens (unless the caller already has them)
+    if tokens is not None:
+        pass
+    elif tokenizer_type == "space":
         tokens = tokenize_space(text)
     elif tokenizer_type == "word":
         tokens = tokenize_word(text)
@@ -1137,6 +1813,7 @@ def analyze_compression_efficiency(text, tokenizer_type="space"):
 
 # ---------------------------- REVERSIBILITY FUNCTIONS -------------------------------
 
+@_instrumented("reconstruct_from_tokens")
 def reconstruct_from_tokens(tokens, tokenizer_type="space"):
     """
     FULLY REVERSIBLE reconstruction from tokens back to original text.
@@ -1385,7 +2062,7 @@ def comprehensive_validation(text, tokenizer_types=None, include_compression=Tru
                 strategy = tokenizer_type.split("_", 1)[1] if "_" in tokenizer_type else "fixed"
                 tokens2 = tokenize_subword(text, 3, strategy)
             
-            validation_result["deterministic"] = _compare_token_sequences(tokens, tokens2)
+            validation_result["deterministic"] = digest_tokens(tokens, tokenizer_type) == digest_tokens(tokens2, tokenizer_type)
             
             # Performance test (simple timing)
             import time
@@ -1437,16 +2114,19 @@ def _compare_token_sequences(tokens1, tokens2):
     return True
 
 
-def stability_test(text, iterations=1000):
+def stability_test(text, iterations=1000, golden=None):
     """
     STABILITY TEST: Run tokenization multiple times to ensure consistency.
+    Each run is reduced to a stream digest; only the first digest is kept.
+    golden optionally maps tokenizer type -> expected digest from an earlier run.
     Returns stability report.
     """
     tokenizer_types = ["space", "byte", "subword"]
     results = {}
     
     for tokenizer_type in tokenizer_types:
-        first_run = None
+        first_digest = None
+        token_count = 0
         stable = True
         errors = []
         
@@ -1459,29 +2139,39 @@ def stability_test(text, iterations=1000):
                 elif tokenizer_type == "subword":
                     tokens = tokenize_subword(text, 3, "fixed")
                 
-                if first_run is None:
-                    first_run = tokens
-                else:
-                    if not _compare_token_sequences(first_run, tokens):
-                        stable = False
-                        break
+                digest = digest_tokens(tokens, tokenizer_type)
+                if first_digest is None:
+                    first_digest = digest
+                    token_count = _len(tokens)
+                elif digest != first_digest:
+                    stable = False
+                    break
                         
             except Exception as e:
                 errors.append(f"Iteration {i}: {str(e)}")
         
+        matches_golden = None
+        if golden is not None and tokenizer_type in golden:
+            matches_golden = (first_digest == golden[tokenizer_type])
+            if not matches_golden:
+                stable = False
+        
         results[tokenizer_type] = {
             "stable": stable,
             "iterations": iterations,
             "errors": errors,
-            "token_count": _len(first_run) if first_run else 0
+            "token_count": token_count,
+            "digest": first_digest,
+            "matches_golden": matches_golden
         }
     
     return results
 
 
-def performance_benchmark(text, iterations=100):
+def performance_benchmark(text, iterations=100, warmup=3):
     """
     PERFORMANCE BENCHMARK: Measure tokenization speed.
+    Uses the same perf_counter timing, warmup and percentiles as santok.bench.
     Returns performance report.
     """
     import time
@@ -1491,9 +2181,10 @@ def performance_benchmark(text, iterations=100):
     
     for tokenizer_type in tokenizer_types:
         times = []
+        failures = 0
         
-        for _ in range(iterations):
-            start_time = time.time()
+        for run in range(warmup + iterations):
+            start_time = time.perf_counter()
             
             try:
                 if tokenizer_type == "space":
@@ -1504,25 +2195,33 @@ def performance_benchmark(text, iterations=100):
                     strategy = tokenizer_type.split("_", 1)[1] if "_" in tokenizer_type else "fixed"
                     tokenize_subword(text, 3, strategy)
                 
-                end_time = time.time()
-                times.append(end_time - start_time)
+                elapsed = time.perf_counter() - start_time
+                if run >= warmup:
+                    times.append(elapsed)
                 
             except Exception as e:
-                times.append(float('inf'))  # Mark as failed
+                if run >= warmup:
+                    failures += 1
         
         if times:
+            times.sort()
             avg_time = sum(times) / len(times)
-            min_time = min(times)
-            max_time = max(times)
-            success_rate = sum(1 for t in times if t != float('inf')) / len(times)
+            min_time = times[0]
+            max_time = times[-1]
+            p50 = times[int(0.50 * (len(times) - 1))]
+            p95 = times[int(0.95 * (len(times) - 1))]
+            p99 = times[int(0.99 * (len(times) - 1))]
         else:
-            avg_time = min_time = max_time = 0
-            success_rate = 0
+            avg_time = min_time = max_time = p50 = p95 = p99 = 0
+        success_rate = (iterations - failures) / iterations if iterations > 0 else 0
         
         results[tokenizer_type] = {
             "avg_time": avg_time,
             "min_time": min_time,
             "max_time": max_time,
+            "p50_time": p50,
+            "p95_time": p95,
+            "p99_time": p99,
             "success_rate": success_rate,
             "iterations": iterations
         }
@@ -1679,6 +2378,7 @@ def collapse_repeats_letters(s, max_repeat):
     return r
 
 
+@_instrumented("sanitize_text")
 def sanitize_text(s, use_lower, drop_specials, collapse_letters_to):
     t = s
     if use_lower:
@@ -1912,6 +2612,7 @@ class XorShift64Star:
         return x
 
 
+@_instrumented("assign_uids")
 def assign_uids(tokens, seed):
     rng = XorShift64Star(seed)
     assigned = []
@@ -1925,6 +2626,7 @@ def assign_uids(tokens, seed):
     return assigned
 
 
+@_instrumented("neighbor_uids")
 def neighbor_uids(token_records):
     n = 0
     for _ in token_records:
@@ -2101,33 +2803,38 @@ def _count_chars(s):
     return n
 
 
+def _quote_text(t):
+    # Token text in double quotes, escaping only quotes and backslashes
+    return "\"" + t.replace("\\", "\\\\").replace("\"", "\\\"") + "\""
+
+
 def _truncate_list(lst, max_items):
-    # Build a string like [a, b, c, ...] without imports
-    # lst is list of dicts with 'text'
-    out = "["
-    count = 0
-    for item in lst:
-        if count >= max_items:
-            out += "..."
-            break
-        # represent token text safely
-        t = item["text"]
-        # simple repr: wrap in quotes, escape quotes minimally
-        rep = "\""
-        for ch in t:
-            if ch == "\"":
-                rep += "\\\""
-            elif ch == "\\":
-                rep += "\\\\"
-            else:
-                rep += ch
-        rep += "\""
-        if count > 0:
-            out += ", "
-        out += rep
-        count += 1
-    out += "]"
-    return out
+    # Build a string like ["a", "b", "c"...] from the first max_items token texts
+    out = "[" + ", ".join(_quote_text(item["text"]) for item in lst[:max_items])
+    if len(lst) > max_items:
+        out += "..."
+    return out + "]"
+
+
+_PRINT_BATCH = 4096
+
+
+def _print_list(pieces):
+    # Same line as print("[" + ", ".join(pieces) + "]"), written in batches
+    # rather than as one string the size of the whole list
+    write = sys.stdout.write
+    write("[")
+    batch = []
+    sep = ""
+    for piece in pieces:
+        batch.append(piece)
+        if len(batch) >= _PRINT_BATCH:
+            write(sep + ", ".join(batch))
+            sep = ", "
+            batch = []
+    if batch:
+        write(sep + ", ".join(batch))
+    write("]\n")
 
 
 def _parse_int(s):
@@ -2178,22 +2885,261 @@ def digits_only(seq, base=10):
 
 # --------------------------- UNIVERSAL FILE HANDLING ---------------------------
 
+# Sniffing looks at the head of a file plus a few windows spread over the
+# rest, so classifying a multi-GB file costs a few reads, not a full pass
+_SNIFF_HEAD = 1 << 16
+_SNIFF_WINDOW = 1 << 14
+_SNIFF_WINDOWS = 4
+_READ_BLOCK = 1 << 20
+
+# Bytes counted as printable (ASCII 32..126 plus \n \r \t), and UTF-8
+# continuation bytes (0x80..0xBF) for counting characters without decoding
+_PRINTABLE_BYTES = bytes(range(32, 127)) + b"\n\r\t"
+_NON_PRINTABLE_BYTES = bytes(b for b in range(256) if b not in _PRINTABLE_BYTES)
+_NON_CONTINUATION_BYTES = bytes(b for b in range(256) if not 0x80 <= b <= 0xBF)
+
+
+def _latin1_fallback(err):
+    # Bytes that are not UTF-8 in a file sniffed as UTF-8 read as latin-1
+    return err.object[err.start:err.end].decode("latin-1"), err.end
+
+
+if codecs is not None:
+    codecs.register_error("santok_latin1", _latin1_fallback)
+
+
+def _utf8_sample(sample, at_start):
+    """(printable, chars) of a UTF-8 sample, or None if it is not UTF-8"""
+    if not at_start:
+        # A window can start inside a multibyte sequence
+        skip = 0
+        while skip < 3 and skip < len(sample) and 0x80 <= sample[skip] <= 0xBF:
+            skip += 1
+        sample = sample[skip:]
+    try:
+        # final=False: a sequence cut by the end of the window is fine
+        codecs.getincrementaldecoder("utf-8")().decode(sample, False)
+    except UnicodeDecodeError:
+        return None
+    printable = len(sample.translate(None, _NON_PRINTABLE_BYTES))
+    chars = len(sample) - len(sample.translate(None, _NON_CONTINUATION_BYTES))
+    return printable, chars
+
+
+def _classify_samples(samples):
+    """
+    "utf-8", "latin-1" or "hex" for a list of (bytes, at_start) samples.
+    Same rule as decoding the whole file: UTF-8 if it decodes and more than
+    70% of the characters are printable, else latin-1 if more than 70% of
+    the bytes are, else hex.
+    """
+    printable = 0
+    chars = 0
+    utf8 = True
+    for sample, at_start in samples:
+        counts = _utf8_sample(sample, at_start)
+        if counts is None:
+            utf8 = False
+            break
+        printable += counts[0]
+        chars += counts[1]
+    if utf8 and chars and printable / chars > 0.7:
+        return "utf-8"
+    total = 0
+    printable = 0
+    for sample, _ in samples:
+        total += len(sample)
+        printable += len(sample.translate(None, _NON_PRINTABLE_BYTES))
+    if total and printable / total > 0.7:
+        return "latin-1"
+    return "hex"
+
+
+def _sample_windows(size):
+    """Offsets of the sampled windows after the head of a file of size bytes"""
+    rest = size - _SNIFF_HEAD
+    if rest <= 0:
+        return []
+    if rest <= _SNIFF_WINDOW * _SNIFF_WINDOWS:
+        return [_SNIFF_HEAD]
+    step = rest // _SNIFF_WINDOWS
+    return [_SNIFF_HEAD + step * (i + 1) - _SNIFF_WINDOW for i in range(_SNIFF_WINDOWS)]
+
+
+def sniff_file_encoding(file_path):
+    """How a file will be read as text: "utf-8", "latin-1", "hex" ("" if empty)"""
+    with open(file_path, "rb") as f:
+        return _sniff(f)[0]
+
+
+def _sniff(f):
+    # Returns (encoding, head); f is left positioned right after head
+    head = f.read(_SNIFF_HEAD)
+    if not head:
+        return "", head
+    samples = [(head, True)]
+    if len(head) == _SNIFF_HEAD:
+        try:
+            size = f.seek(0, 2)
+        except (OSError, ValueError):
+            size = None  # pipes: the head is all there is to go on
+        if size is not None:
+            for offset in _sample_windows(size):
+                f.seek(offset)
+                samples.append((f.read(_SNIFF_WINDOW), False))
+            f.seek(len(head))
+    return _classify_samples(samples), head
+
+
+def iter_file_text(file_path, block_size=_READ_BLOCK, encoding=None):
+    """
+    Stream a file as text chunks, in one pass and bounded memory; the
+    chunks joined equal _read_any_file()'s result.
+
+    The encoding is sniffed from the head and a few sampled windows unless
+    given ("utf-8", "latin-1" or "hex"). Decoding is incremental, so
+    multibyte sequences split across reads are kept whole. Binary files
+    come out as "BINARY_FILE_HEX:" followed by the hex of the bytes. Feed the
+    result to iter_tokens(), or use iter_file_tokens().
+
+    gzip, bz2 and xz files and zip/tar archives are decompressed on the fly
+    (see iter_file_members); the members' texts are joined with newlines.
+    """
+    if compression_kind(file_path) is not None:
+        first = True
+        for _, chunks in iter_file_members(file_path, block_size, encoding):
+            if not first:
+                yield "\n"
+            first = False
+            yield from chunks
+        return
+    with open(file_path, "rb") as f:
+        sniffed, head = _sniff(f)
+        yield from _decode_blocks(head, iter(lambda: f.read(block_size), b""), encoding or sniffed)
+
+
+def _decode_blocks(head, blocks, encoding):
+    # Text chunks for head followed by the byte blocks, as iter_file_text() yields them
+    if not head:
+        return
+    if encoding == "hex":
+        yield "BINARY_FILE_HEX:"
+        yield head.hex()
+        for block in blocks:
+            yield block.hex()
+        return
+    # UTF-8 errors past the sampled parts fall back to latin-1 for the
+    # offending bytes only, instead of failing half way through
+    decoder = codecs.getincrementaldecoder(encoding)("santok_latin1" if encoding == "utf-8" else "strict")
+    text = decoder.decode(head, False)
+    if text:
+        yield text
+    for block in blocks:
+        text = decoder.decode(block, False)
+        if text:
+            yield text
+    text = decoder.decode(b"", True)
+    if text:
+        yield text
+
+
+# ---------------------------- COMPRESSED INPUTS ----------------------------
+# gzip/bz2/xz streams and zip/tar archives are read by santok/inputs.py
+# (compression_kind, member_blocks, prefetch; loaded at the top of this
+# file, without the rest of the santok package) on a reader thread, so
+# decompression overlaps with tokenizing and nothing is unpacked to disk.
+# What is added here is the per-member encoding sniffing.
+
+
+def compression_kind(file_path):
+    """"gzip", "bz2", "xz", "zip", "tar" or None, from the file's magic bytes"""
+    if _inputs is None:
+        return None
+    return _inputs.compression_kind(file_path)
+
+
+def iter_file_members(file_path, block_size=_READ_BLOCK, encoding=None):
+    """
+    (name, text chunks) for every regular file in a compressed file or
+    archive: the one stream of a .gz/.bz2/.xz file (a compressed tar is
+    read as the tar), or each member of a .zip/.tar. A plain file is its
+    own single member.
+
+    Each member's encoding is sniffed from its first 64 KB unless given.
+    Members are read in order through one reader thread, so consume each
+    member's chunks before moving on to the next.
+    """
+    kind = compression_kind(file_path)
+    if kind is None:
+        yield file_path, iter_file_text(file_path, block_size, encoding)
+        return
+    blocks = _inputs.prefetch(_inputs.member_blocks(file_path, block_size, kind))
+    pending = next(blocks, None)
+    try:
+        while pending is not None:
+            number, name = pending[0], pending[1]
+
+            def member_blocks():
+                nonlocal pending
+                while pending is not None and pending[0] == number:
+                    yield pending[2]
+                    pending = next(blocks, None)
+
+            chunks = _decode_member(member_blocks(), encoding)
+            yield name, chunks
+            # Skip whatever the caller left of this member
+            for _ in chunks:
+                pass
+    finally:
+        blocks.close()
+
+
+def _decode_member(blocks, encoding):
+    # Sniff from the member's head (compressed streams cannot seek to sample)
+    head = b""
+    for block in blocks:
+        head += block
+        if len(head) >= _SNIFF_HEAD:
+            break
+    if not head:
+        return
+    yield from _decode_blocks(head, blocks, encoding or _classify_samples([(head[:_SNIFF_HEAD], True)]))
+
+
+def iter_file_tokens(file_path, tokenizer_type="word", block_size=_READ_BLOCK, max_carry=1 << 20, binary=None):
+    """
+    iter_tokens() over iter_file_text(): tokenize a file of any size as it
+    is read. With binary set to a binary mode ("byte", "ngram", "word"), a
+    file sniffed as binary is tokenized by iter_binary_file_tokens() in that
+    mode instead of as hex text.
+    """
+    if binary is not None and sniff_file_encoding(file_path) == "hex":
+        return iter_binary_file_tokens(file_path, binary)
+    return iter_tokens(iter_file_text(file_path, block_size), tokenizer_type, max_carry=max_carry)
+
+
 def _read_any_file(file_path):
     """
     UNIVERSAL FILE READER - Handles ANY file type.
     No matter what - text, binary, images, videos, executables, etc.
+    The encoding is sniffed from samples (see iter_file_text) and the bytes
+    are decoded once; use iter_file_text() or iter_file_tokens() to avoid
+    holding the whole file. Compressed files and archives are decompressed
+    (see iter_file_members).
     """
     try:
-        # First try as binary to get raw bytes
+        if compression_kind(file_path) is not None:
+            return "".join(iter_file_text(file_path))
         with open(file_path, "rb") as f:
-            raw_bytes = f.read()
-        
-        # Convert bytes to string representation for tokenization
-        # This ensures ANY file can be processed
-        text_content = _bytes_to_text_representation(raw_bytes)
-        
-        return text_content
-        
+            encoding, head = _sniff(f)
+            if f.seekable():
+                # One read and one decode; joining streamed chunks would
+                # hold the text twice
+                f.seek(0)
+                raw_bytes = f.read()
+            else:
+                raw_bytes = head + f.read()
+        return _decode_as(raw_bytes, encoding)
     except Exception as e:
         # If file doesn't exist or can't be read, return error message
         return f"ERROR: Could not read file '{file_path}': {str(e)}"
@@ -2203,33 +3149,383 @@ def _bytes_to_text_representation(raw_bytes):
     """
     Convert raw bytes to text representation for tokenization.
     Handles ANY file type by representing bytes as text.
+    The encoding is chosen from sampled windows (as for files), then the
+    bytes are decoded once.
     """
     if not raw_bytes:
         return ""
-    
-    # Method 1: Try to decode as UTF-8 (for text files)
+    samples = [(raw_bytes[:_SNIFF_HEAD], True)]
+    samples += [(raw_bytes[o:o + _SNIFF_WINDOW], False) for o in _sample_windows(len(raw_bytes))]
+    return _decode_as(raw_bytes, _classify_samples(samples))
+
+
+def _decode_as(raw_bytes, encoding):
+    if not raw_bytes:
+        return ""
+    if encoding == "hex":
+        return f"BINARY_FILE_HEX:{raw_bytes.hex()}"
+    return raw_bytes.decode(encoding, "santok_latin1" if encoding == "utf-8" else "strict")
+
+
+# ----------------------------- BINARY FILES -----------------------------
+# Binary files tokenized as bytes rather than as their hex text: one token
+# per byte, read straight from a memory map, so the byte stream is as long
+# as the file instead of twice its size in hex digits (times UTF-8 bytes).
+
+# Token text per byte value; shared, so byte tokens allocate no strings
+_BYTE_TEXT = tuple(str(b) for b in range(256))
+
+BINARY_MODES = ("byte", "ngram", "word")
+
+# Printable ASCII runs for "word" mode (like strings(1))
+_ASCII_RUNS = {}
+
+
+def _ascii_run_pattern(min_word):
+    pattern = _ASCII_RUNS.get(min_word)
+    if pattern is None:
+        pattern = _ASCII_RUNS[min_word] = re.compile(rb"[\x20-\x7e]{%d,}" % min_word)
+    return pattern
+
+
+class MappedFile:
+    """
+    A file opened read-only as a memory map: data supports len(), indexing
+    and the buffer protocol (memoryview, re, hashlib) without reading the
+    file into memory. Empty files, and platforms without mmap, fall back to
+    the file's bytes.
+
+        with MappedFile(path) as mf:
+            for tok in iter_binary_tokens(mf.data): ...
+    """
+
+    def __init__(self, file_path):
+        self._file = open(file_path, "rb")
+        self._map = None
+        try:
+            if mmap is not None and self._file.seek(0, 2) > 0:
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                self.data = self._map
+            else:
+                self._file.seek(0)
+                self.data = self._file.read()
+        except Exception:
+            self._file.close()
+            raise
+
+    def __len__(self):
+        return len(self.data)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self.data = b""
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def iter_binary_tokens(data, mode="byte", width=4, min_word=4):
+    """
+    Tokenize bytes as bytes. data is any bytes-like object (bytes,
+    bytearray, memoryview, mmap, MappedFile.data); "index" is a byte offset.
+
+    mode "byte":  one token per byte, type "byte", text its decimal value
+    mode "ngram": fixed-width chunks of width bytes (the last may be
+                  shorter), type "ngram", text the chunk in hex, "value" the
+                  chunk as a big-endian integer
+    mode "word":  runs of at least min_word printable ASCII bytes as type
+                  "word" tokens, every other byte as a "byte" token
+
+    reconstruct_binary_tokens() turns any of them back into the bytes.
+    """
+    if mode not in BINARY_MODES:
+        raise ValueError(f"Unknown binary mode: {mode}")
+    view = memoryview(data).cast("B")
     try:
-        decoded = raw_bytes.decode('utf-8')
-        # Check if it's valid text (mostly printable characters)
-        printable_count = sum(1 for c in decoded if 32 <= ord(c) <= 126 or c in '\n\r\t')
-        if printable_count / len(decoded) > 0.7:  # 70% printable
-            return decoded
-    except:
-        pass
-    
-    # Method 2: Try other common text encodings
-    for encoding in ['latin-1', 'cp1252', 'ascii']:
+        if mode == "byte":
+            yield from _byte_tokens(view, 0, len(view), 0)
+        elif mode == "ngram":
+            if width < 1:
+                raise ValueError("width must be at least 1")
+            token_id = 0
+            for start in range(0, len(view), width):
+                chunk = view[start:start + width]
+                yield {
+                    "id": token_id,
+                    "text": chunk.hex(),
+                    "index": start,
+                    "type": "ngram",
+                    "value": int.from_bytes(chunk, "big"),
+                    "length": len(chunk),
+                }
+                token_id += 1
+        else:
+            token_id = 0
+            pos = 0
+            for m in _ascii_run_pattern(min_word).finditer(view):
+                start, end = m.span()
+                yield from _byte_tokens(view, pos, start, token_id)
+                token_id += start - pos
+                yield {
+                    "id": token_id,
+                    "text": m.group().decode("ascii"),
+                    "index": start,
+                    "type": "word",
+                    "length": end - start,
+                }
+                token_id += 1
+                pos = end
+            yield from _byte_tokens(view, pos, len(view), token_id)
+    finally:
+        view.release()
+
+
+def _byte_tokens(view, start, end, token_id):
+    byte_text = _BYTE_TEXT
+    for i in range(start, end):
+        b = view[i]
+        yield {"id": token_id, "text": byte_text[b], "index": i, "type": "byte", "byte_value": b}
+        token_id += 1
+
+
+def iter_binary_file_tokens(file_path, mode="byte", width=4, min_word=4):
+    """iter_binary_tokens() over a memory-mapped file; the map is closed when the iterator is"""
+    with MappedFile(file_path) as mf:
+        yield from iter_binary_tokens(mf.data, mode, width, min_word)
+
+
+def reconstruct_binary_tokens(tokens):
+    """The bytes that iter_binary_tokens() tokens came from"""
+    out = bytearray()
+    for tok in sorted(tokens, key=lambda t: t["index"]):
+        kind = tok["type"]
+        if kind == "byte":
+            out.append(tok["byte_value"])
+        elif kind == "ngram":
+            out += tok["value"].to_bytes(tok["length"], "big")
+        else:
+            out += tok["text"].encode("ascii")
+    return bytes(out)
+
+
+# ------------------------------ FOLLOW MODE ------------------------------
+# A growing file (an application log) tokenized as it is written, like
+# tail -F. Each poll reads the appended bytes; tokens end at the last
+# whitespace -> non-whitespace boundary and the rest is carried to the next
+# read, as in iter_tokens. The uid generator and neighbor links run on
+# across polls, restarts and rotations as one stream.
+
+_FOLLOW_CHECKPOINT_VERSION = 1
+
+
+class FileFollower:
+    """
+    Follow path and turn what is appended to it into TokenRecords.
+
+    poll() returns the records of the tokens completed since the last
+    call; the newest record's next_uid is already the uid the next token
+    will get. Bytes are decoded as encoding with undecodable bytes kept as
+    surrogate escapes, so the byte offset of every cut is exact.
+
+    save_checkpoint() stores the byte offset of the last cut, the file's
+    device/inode and the generator state in checkpoint_path; a follower
+    created on the same checkpoint goes on from there. When path gets a new
+    inode (rotation) the old file is read to its end first and the new one
+    is read from its start; a file shorter than the offset (truncation) is
+    read again from its start.
+    """
+
+    def __init__(self, path, tokenizer_type="word", seed=12345, embedding_bit=False, checkpoint_path=None,
+                 encoding="utf-8", block_size=_READ_BLOCK, max_carry=1 << 20):
+        self.path = path
+        self.tokenizer_type = tokenizer_type
+        self.checkpoint_path = checkpoint_path
+        self.encoding = encoding
+        self.block_size = block_size
+        self.max_carry = max_carry
+        self.engine = TextTokenizer(seed, embedding_bit)
+        self.stream_id = TokenStream(tokenizer_type).stream_id
+        self.rotations = 0
+        self._file = None
+        self._decoder = None
+        self._identity = None
+        self._offset = 0        # bytes of the current file up to the last cut
+        self._carry = ""
+        self._position = 0      # records emitted
+        self._rng = XorShift64Star(seed)
+        self._prev_uid = None
+        # uid of the next token; XorShift64Star.next_u64() returns its new state
+        self._next_uid = self._rng.next_u64()
+        if checkpoint_path is not None and os.path.exists(checkpoint_path):
+            self._restore(checkpoint_path)
+
+    def poll(self):
+        """Records of the tokens completed by what was appended since the last poll"""
+        records = []
         try:
-            decoded = raw_bytes.decode(encoding)
-            printable_count = sum(1 for c in decoded if 32 <= ord(c) <= 126 or c in '\n\r\t')
-            if printable_count / len(decoded) > 0.7:
-                return decoded
-        except:
-            continue
-    
-    # Method 3: Convert bytes to hex representation (for binary files)
-    hex_representation = raw_bytes.hex()
-    return f"BINARY_FILE_HEX:{hex_representation}"
+            st = os.stat(self.path)
+        except OSError:
+            st = None
+        if self._file is not None and st is not None:
+            if (st.st_dev, st.st_ino) != self._identity:
+                # Rotated: finish the old file, then start on the new one
+                self._read(records)
+                self._end_file(records)
+                self.rotations += 1
+            elif st.st_size < self._file.tell():
+                self._end_file(records)
+                self._offset = 0
+                self.rotations += 1
+        if self._file is None and st is not None:
+            self._open()
+        if self._file is not None:
+            self._read(records)
+        return records
+
+    def flush(self):
+        """
+        Records of the carried, not yet finished tokens. Text appended later
+        is tokenized on its own, so a token cut here stays cut.
+        """
+        records = []
+        if self._carry:
+            self._emit(self._carry, records)
+            self._carry = ""
+        return records
+
+    def follow(self, interval=1.0, idle_flush=None, stop=None):
+        """
+        poll() every interval seconds until stop() is true, yielding each
+        non-empty batch of records. The checkpoint is saved when the next
+        batch is asked for, i.e. after the caller has handled this one.
+        After idle_flush seconds without new data the carry is flushed.
+        """
+        import time
+        idle = 0.0
+        while stop is None or not stop():
+            records = self.poll()
+            if not records and idle_flush is not None and idle >= idle_flush:
+                records = self.flush()
+            if records:
+                idle = 0.0
+                yield records
+                self.save_checkpoint()
+                continue
+            time.sleep(interval)
+            idle += interval
+
+    def checkpoint(self):
+        return {
+            "version": _FOLLOW_CHECKPOINT_VERSION,
+            "path": self.path,
+            "tokenizer": self.tokenizer_type,
+            "seed": self.engine.seed,
+            "embedding_bit": self.engine.embedding_bit,
+            "encoding": self.encoding,
+            "device": self._identity[0] if self._identity else None,
+            "inode": self._identity[1] if self._identity else None,
+            "offset": self._offset,
+            "position": self._position,
+            "rng_state": self._rng.state,
+            "prev_uid": self._prev_uid,
+        }
+
+    def save_checkpoint(self):
+        if self.checkpoint_path is None:
+            return
+        tmp = f"{self.checkpoint_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.checkpoint(), f)
+        os.replace(tmp, self.checkpoint_path)
+
+    def _restore(self, checkpoint_path):
+        with open(checkpoint_path, encoding="utf-8") as f:
+            state = json.load(f)
+        config = (state.get("tokenizer"), state.get("seed"), state.get("embedding_bit"), state.get("encoding"))
+        if config != (self.tokenizer_type, self.engine.seed, self.engine.embedding_bit, self.encoding):
+            raise ValueError(f"Checkpoint {checkpoint_path} was made with tokenizer/seed/embedding_bit/encoding {config}")
+        if state.get("inode") is not None:
+            self._identity = (state["device"], state["inode"])
+        self._offset = state["offset"]
+        self._position = state["position"]
+        self._rng.state = state["rng_state"]
+        self._next_uid = state["rng_state"]
+        self._prev_uid = state["prev_uid"]
+
+    def _open(self):
+        f = open(self.path, "rb")
+        st = os.fstat(f.fileno())
+        identity = (st.st_dev, st.st_ino)
+        if identity == self._identity and st.st_size >= self._offset:
+            f.seek(self._offset)
+        else:
+            if self._identity is not None:
+                # Rotated or truncated while nobody was following
+                self.rotations += 1
+            self._offset = 0
+        self._file = f
+        self._identity = identity
+        self._decoder = codecs.getincrementaldecoder(self.encoding)("surrogateescape")
+        self._carry = ""
+
+    def _read(self, records):
+        while True:
+            block = self._file.read(self.block_size)
+            if not block:
+                return
+            self._feed(self._decoder.decode(block, False), records)
+
+    def _end_file(self, records):
+        # The file is complete: everything still held becomes tokens
+        self._carry += self._decoder.decode(b"", True)
+        records.extend(self.flush())
+        self._file.close()
+        self._file = None
+        self._identity = None
+
+    def _feed(self, text, records):
+        if not text:
+            return
+        # carry has no boundary of its own; only look where the new text starts
+        lo = len(self._carry)
+        buf = self._carry + text if self._carry else text
+        cut = _safe_cut(buf, lo)
+        if cut == 0:
+            if len(buf) < self.max_carry:
+                self._carry = buf
+                return
+            cut = len(buf)
+        self._emit(buf[:cut], records)
+        self._carry = buf[cut:]
+
+    def _emit(self, segment, records):
+        name = self.tokenizer_type
+        for tok in _tokenize_named(segment, name):
+            uid = self._next_uid
+            self._next_uid = self._rng.next_u64()
+            records.append(self.engine._record(name, self.stream_id, self._position, tok["text"], uid,
+                                               self._prev_uid, self._next_uid))
+            self._prev_uid = uid
+            self._position += 1
+        self._offset += len(segment.encode(self.encoding, "surrogateescape"))
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
 
 
 def _detect_file_type(file_path):
@@ -2270,7 +3566,7 @@ def _detect_file_type(file_path):
             file_category = "binary"
         
         # Archive extensions
-        archive_extensions = ['zip', 'rar', '7z', 'tar', 'gz', 'bz2']
+        archive_extensions = ['zip', 'rar', '7z', 'tar', 'gz', 'tgz', 'bz2', 'xz']
         if extension in archive_extensions:
             file_type = "archive"
             file_category = "compressed"
@@ -2284,10 +3580,13 @@ def _detect_file_type(file_path):
     return {
         "type": file_type,
         "category": file_category,
-        "extension": extension
+        "extension": extension,
+        # What the universal reader decompresses (by content, not extension)
+        "compression": compression_kind(file_path)
     }
 
 
+@_instrumented("write_file")
 def _write_any_file(file_path, content, file_format="auto"):
     """
     UNIVERSAL FILE WRITER - Writes to ANY file format.
@@ -2339,38 +3638,7 @@ def _write_text_file(file_path, content):
 
 def _write_formatted_txt_file(file_path, tokens, tokenizer_name):
     """Write tokens in a clean, readable format"""
-    with open(file_path, "w", encoding="utf-8") as f:
-        f.write(f"SanTOK TOKENIZER - {tokenizer_name.upper()} TOKENS\n")
-        f.write("=" * 60 + "\n\n")
-        
-        f.write(f"Total Tokens: {len(tokens)}\n")
-        f.write(f"Tokenizer: {tokenizer_name}\n")
-        f.write(f"Generated: {_get_timestamp()}\n\n")
-        
-        f.write("TOKEN DETAILS:\n")
-        f.write("-" * 40 + "\n")
-        
-        for i, token in enumerate(tokens):
-            f.write(f"Token {i+1:3d}: '{token.get('text', '')}'\n")
-            f.write(f"         ID: {token.get('id', 'N/A')}\n")
-            f.write(f"         Type: {token.get('type', 'N/A')}\n")
-            f.write(f"         Length: {token.get('length', 'N/A')}\n")
-            
-            # Add specific metadata based on tokenizer type
-            if tokenizer_name == "char":
-                f.write(f"         Codepoint: {token.get('codepoint', 'N/A')}\n")
-                f.write(f"         ASCII: {token.get('is_ascii', 'N/A')}\n")
-            elif tokenizer_name == "byte":
-                f.write(f"         Byte Index: {token.get('byte_index', 'N/A')}\n")
-                f.write(f"         Byte Value: {token.get('byte_value', 'N/A')}\n")
-            elif tokenizer_name.startswith("subword"):
-                f.write(f"         Parent Word: {token.get('parent_word', 'N/A')}\n")
-                f.write(f"         Subword Index: {token.get('subword_index', 'N/A')}\n")
-            
-            f.write("\n")
-        
-        f.write("\n" + "=" * 60 + "\n")
-        f.write("END OF TOKENIZATION\n")
+    write_txt_stream(file_path, tokens, tokenizer_name)
 
 
 def _get_timestamp():
@@ -2482,24 +3750,24 @@ def _write_json_file(file_path, content):
 
 def _write_csv_file(file_path, content):
     """Write content as CSV file"""
+    if isinstance(content, list) and content and all(isinstance(row, dict) for row in content):
+        write_csv_stream(file_path, content)
+        return
     with open(file_path, "w", encoding="utf-8", newline='') as f:
-        # Simple CSV writer without external dependencies
         if isinstance(content, list):
             for row in content:
-                if isinstance(row, dict):
-                    # Convert dict to CSV row
-                    values = [str(row.get(key, '')) for key in row.keys()]
-                    f.write(','.join(f'"{v}"' for v in values) + '\n')
-                else:
-                    f.write(str(row) + '\n')
+                f.write(str(row) + '\n')
 
 
 def _write_xml_file(file_path, content):
     """Write content as XML file"""
+    if isinstance(content, list) and all(isinstance(row, (dict, TokenRecord)) for row in content):
+        write_xml_stream(file_path, content)
+        return
     with open(file_path, "w", encoding="utf-8") as f:
         f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
         f.write('<root>\n')
-        f.write(f'<content>{str(content)}</content>\n')
+        f.write(f'<content>{_xml_escape(str(content))}</content>\n')
         f.write('</root>\n')
 
 
@@ -2512,6 +3780,711 @@ def _write_binary_file(file_path, content):
             f.write(str(content).encode('utf-8'))
 
 
+# --------------------------- STREAMING WRITERS ---------------------------
+# Token rows written from any iterable (TokenStream.tokens, iter_stream(),
+# lists of row dicts) without materializing them: rows are encoded into
+# text pieces and written as one UTF-8 chunk per ~1M characters, so memory
+# stays bounded however long the stream is.
+
+_WRITE_BUFFER = 1 << 20
+
+_XML_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;",
+                              "\n": "&#10;", "\r": "&#13;", "\t": "&#9;"})
+# Characters XML 1.0 cannot carry even as references
+_XML_INVALID = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]") if re is not None else None
+
+
+# Lone surrogates (e.g. from surrogateescape'd input) cannot be UTF-8 encoded
+_SURROGATE = re.compile("[\ud800-\udfff]") if re is not None else None
+
+
+def _json_escape_surrogates(text):
+    # Inside JSON strings a surrogate can be written as a \uXXXX escape,
+    # which json.loads() turns back into the same code point
+    return _SURROGATE.sub(lambda m: "\\u%04x" % ord(m.group()), text)
+
+
+# Rows per csv.writer.writerows() call
+_CSV_BATCH = 4096
+
+
+class _Pieces(list):
+    """A list csv.writer can write to"""
+    write = list.append
+
+
+class _ChunkWriter:
+    """Collects text pieces and writes them to a binary file in large UTF-8 chunks"""
+
+    def __init__(self, f, buffer_size=_WRITE_BUFFER, escape=None):
+        self.f = f
+        self.pieces = _Pieces()
+        self.size = 0
+        self.buffer_size = buffer_size
+        # escape(text) rewrites what UTF-8 cannot encode; without it lone
+        # surrogates are written as their (invalid) UTF-8 bytes
+        self.escape = escape
+
+    def write(self, piece):
+        self.pieces.append(piece)
+        self.size += len(piece)
+        if self.size >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self.pieces:
+            text = "".join(self.pieces)
+            try:
+                data = text.encode("utf-8")
+            except UnicodeEncodeError:
+                data = self.escape(text).encode("utf-8") if self.escape else text.encode("utf-8", "surrogatepass")
+            self.f.write(data)
+            self.pieces.clear()
+            self.size = 0
+
+
+def _as_row(item):
+    # Row dicts pass through; TokenRecords become their to_row()
+    return item if isinstance(item, dict) else item.to_row()
+
+
+def _record_json(r, quote):
+    # json.dumps(r.to_row(), ensure_ascii=False) with the keys known up front
+    return (f'{{"text": {quote(r.text)}, "stream": {quote(r.stream)}, "index": {r.index}, "uid": {r.uid}, '
+            f'"prev_uid": {r.prev_uid if r.prev_uid is not None else 0}, '
+            f'"next_uid": {r.next_uid if r.next_uid is not None else 0}, '
+            f'"content_id": {r.content_id}, "global_id": {r.global_id}, "frontend": {r.frontend}, '
+            f'"backend_huge": {r.backend_huge}, "backend_scaled": {r.backend_scaled}}}')
+
+
+def _manual_json(row):
+    # Minimal JSON for flat rows when the json module is unavailable
+    parts = []
+    for k in row:
+        v = row[k]
+        if isinstance(v, bool):
+            value = "true" if v else "false"
+        elif isinstance(v, int):
+            value = str(v)
+        elif isinstance(v, list):
+            value = "[" + ",".join(str(it) if isinstance(it, int) else "\"" + str(it).replace("\"", "\\\"") + "\""
+                                   for it in v) + "]"
+        else:
+            value = "\"" + str(v).replace("\"", "\\\"") + "\""
+        parts.append("\"" + str(k).replace("\"", "\\\"") + "\":" + value)
+    return "{" + ",".join(parts) + "}"
+
+
+@_instrumented("write_file")
+def write_jsonl_stream(file_path, rows, buffer_size=_WRITE_BUFFER):
+    """
+    Write rows (dicts or TokenRecords) as JSON lines; returns the number
+    written. The file is valid UTF-8: lone surrogates are written as
+    \\uXXXX escapes.
+    """
+    # One encoder for the whole stream; json.dumps(..., ensure_ascii=False)
+    # builds a new one per call
+    encode = json.JSONEncoder(ensure_ascii=False).encode if json is not None else _manual_json
+    quote = json.encoder.encode_basestring if json is not None else None
+    n = 0
+    with open(file_path, "wb") as f:
+        out = _ChunkWriter(f, buffer_size, _json_escape_surrogates if _SURROGATE is not None else None)
+        for item in rows:
+            if quote is not None and type(item) is TokenRecord:
+                out.write(_record_json(item, quote) + "\n")
+            else:
+                out.write(encode(_as_row(item)) + "\n")
+            n += 1
+        out.flush()
+    return n
+
+
+@_instrumented("write_file")
+def write_csv_stream(file_path, rows, fields=None, buffer_size=_WRITE_BUFFER):
+    """
+    Write rows (dicts or TokenRecords) as CSV with a header; fields default
+    to the first row's keys. Values are quoted as needed (RFC 4180), so
+    commas, quotes and newlines in token text survive. Returns the number
+    of rows written.
+    """
+    n = 0
+    with open(file_path, "wb") as f:
+        out = _ChunkWriter(f, buffer_size)
+        writer = csv.writer(out.pieces, lineterminator="\r\n")
+        if fields is not None:
+            writer.writerow(fields)
+        record_fields = None
+        batch = []
+        for item in rows:
+            if fields is None:
+                fields = list(TokenRecord.ROW_FIELDS if type(item) is TokenRecord else item)
+                writer.writerow(fields)
+            if record_fields is None:
+                record_fields = tuple(fields) == TokenRecord.ROW_FIELDS
+            if record_fields and type(item) is TokenRecord:
+                batch.append(item.row_values())
+            else:
+                row = _as_row(item)
+                batch.append([row.get(k, "") for k in fields])
+            if len(batch) >= _CSV_BATCH:
+                writer.writerows(batch)
+                batch.clear()
+                out.flush()
+            n += 1
+        writer.writerows(batch)
+        out.flush()
+    return n
+
+
+def _xml_escape(value):
+    return value.translate(_XML_ESCAPES)
+
+
+def _xml_attributes(row):
+    parts = []
+    for k in row:
+        v = row[k]
+        if v is None:
+            continue
+        if type(v) is int:
+            parts.append(f' {k}="{v}"')
+            continue
+        v = str(v)
+        if _XML_INVALID is not None and _XML_INVALID.search(v):
+            # Not representable in XML 1.0: the UTF-8 bytes in hex instead
+            parts.append(f' {k}_hex="{v.encode("utf-8", "surrogatepass").hex()}"')
+        else:
+            parts.append(f' {k}="{v.translate(_XML_ESCAPES)}"')
+    return "".join(parts)
+
+
+@_instrumented("write_file")
+def write_xml_stream(file_path, rows, stream_name="tokens", buffer_size=_WRITE_BUFFER):
+    """
+    Write rows (dicts or TokenRecords) as XML, one <token> element per row
+    with the row's fields as attributes, inside <tokens stream="...">.
+    A value XML 1.0 cannot hold (control characters, lone surrogates) is
+    written as <field>_hex with its UTF-8 bytes. Returns the number written.
+    """
+    n = 0
+    with open(file_path, "wb") as f:
+        out = _ChunkWriter(f, buffer_size)
+        out.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        out.write(f'<tokens stream="{_xml_escape(str(stream_name))}">\n')
+        ints = TokenRecord.ROW_FIELDS[2:]
+        for item in rows:
+            if type(item) is TokenRecord and type(item.text) is str and item.text.isprintable():
+                # Only text and stream need escaping; the rest are ints
+                values = item.row_values()
+                out.write(f'  <token text="{values[0].translate(_XML_ESCAPES)}" '
+                          f'stream="{_xml_escape(str(values[1]))}"'
+                          + "".join([f' {k}="{v}"' for k, v in zip(ints, values[2:])]) + "/>\n")
+            else:
+                out.write("  <token" + _xml_attributes(_as_row(item)) + "/>\n")
+            n += 1
+        out.write("</tokens>\n")
+        out.flush()
+    return n
+
+
+@_instrumented("write_file")
+def write_txt_stream(file_path, rows, tokenizer_name, buffer_size=_WRITE_BUFFER):
+    """
+    Write tokens in the readable TXT layout. The token total is in the
+    header when rows has a length, otherwise in the footer. Returns the
+    number written.
+    """
+    total = len(rows) if hasattr(rows, "__len__") else None
+    n = 0
+    with open(file_path, "wb") as f:
+        out = _ChunkWriter(f, buffer_size)
+        out.write(f"SanTOK TOKENIZER - {tokenizer_name.upper()} TOKENS\n")
+        out.write("=" * 60 + "\n\n")
+        if total is not None:
+            out.write(f"Total Tokens: {total}\n")
+        out.write(f"Tokenizer: {tokenizer_name}\n")
+        out.write(f"Generated: {_get_timestamp()}\n\n")
+        out.write("TOKEN DETAILS:\n")
+        out.write("-" * 40 + "\n")
+        for item in rows:
+            token = _as_row(item)
+            n += 1
+            lines = [
+                f"Token {n:3d}: '{token.get('text', '')}'",
+                f"         ID: {token.get('id', 'N/A')}",
+                f"         Type: {token.get('type', 'N/A')}",
+                f"         Length: {token.get('length', 'N/A')}",
+            ]
+            # Add specific metadata based on tokenizer type
+            if tokenizer_name == "char":
+                lines.append(f"         Codepoint: {token.get('codepoint', 'N/A')}")
+                lines.append(f"         ASCII: {token.get('is_ascii', 'N/A')}")
+            elif tokenizer_name == "byte":
+                lines.append(f"         Byte Index: {token.get('byte_index', 'N/A')}")
+                lines.append(f"         Byte Value: {token.get('byte_value', 'N/A')}")
+            elif tokenizer_name.startswith("subword"):
+                lines.append(f"         Parent Word: {token.get('parent_word', 'N/A')}")
+                lines.append(f"         Subword Index: {token.get('subword_index', 'N/A')}")
+            out.write("\n".join(lines) + "\n\n")
+        out.write("\n" + "=" * 60 + "\n")
+        if total is None:
+            out.write(f"Total Tokens: {n}\n")
+        out.write("END OF TOKENIZATION\n")
+        out.flush()
+    return n
+
+
+def write_token_stream(file_path, rows, file_format="auto", stream_name="tokens"):
+    """Streaming writer for file_format ("jsonl", "csv", "xml", "txt"; "auto" from the extension)"""
+    if file_format == "auto":
+        extension = file_path.rsplit(".", 1)[-1].lower() if "." in file_path else ""
+        file_format = {"json": "jsonl", "jsonl": "jsonl", "csv": "csv", "xml": "xml"}.get(extension, "txt")
+    if file_format == "jsonl":
+        return write_jsonl_stream(file_path, rows)
+    if file_format == "csv":
+        return write_csv_stream(file_path, rows)
+    if file_format == "xml":
+        return write_xml_stream(file_path, rows, stream_name)
+    if file_format == "txt":
+        return write_txt_stream(file_path, rows, stream_name)
+    raise ValueError(f"Unknown output format: {file_format}")
+
+
+# ------------------------- COLUMNAR TOKEN STORE -------------------------
+# A tokenized stream saved once and queried many times. One file:
+#
+#   b"SANTOKCS" | u32 version | u32 header length | header (JSON) | sections
+#
+# Sections start on 64-byte boundaries (offsets in the header are from the
+# first one): one fixed-width little-endian column per field, u64 byte
+# offsets into the text heap (count + 1 of them), the UTF-8 text heap, and
+# a block index holding the character offset of every block_size-th token.
+# Readers memory-map the file and hand out columns without copying.
+
+_STORE_MAGIC = b"SANTOKCS"
+_STORE_VERSION = 1
+_STORE_ALIGN = 64
+_STORE_BLOCK = 1024
+_STORE_SPILL = 1 << 16  # values per column buffered before spilling to disk
+
+# (column, array/memoryview typecode, numpy dtype); "index" is the token's
+# character offset in the text, the position is the row number
+STORE_COLUMNS = (
+    ("uid", "Q", "<u8"),
+    ("index", "Q", "<u8"),
+    ("content_id", "I", "<u4"),
+    ("frontend", "B", "<u1"),
+    ("backend_scaled", "I", "<u4"),
+    ("global_id", "Q", "<u8"),
+)
+_STORE_TYPECODES = {name: code for name, code, _ in STORE_COLUMNS}
+_STORE_TYPECODES.update({"text_offsets": "Q", "blocks": "Q"})
+_STORE_DTYPES = {name: dtype for name, _, dtype in STORE_COLUMNS}
+_STORE_DTYPES.update({"text_offsets": "<u8", "blocks": "<u8", "text": "|u1"})
+# Sections are little-endian; memoryview casts read them in place only on such hosts
+_STORE_ZERO_COPY = sys.byteorder == "little"
+
+
+def _store_align(n):
+    return (n + _STORE_ALIGN - 1) // _STORE_ALIGN * _STORE_ALIGN
+
+
+class _Spill:
+    """One section being written: values buffered in an array, spilled to a temporary file"""
+
+    def __init__(self, typecode, directory):
+        self.typecode = typecode
+        self.values = array.array(typecode)
+        self.file = tempfile.TemporaryFile(dir=directory)
+        self.nbytes = 0
+
+    def append(self, value):
+        self.values.append(value)
+        if len(self.values) >= _STORE_SPILL:
+            self.flush()
+
+    def flush(self):
+        if self.values:
+            if sys.byteorder == "big":
+                self.values.byteswap()
+            self.values.tofile(self.file)
+            self.nbytes += len(self.values) * self.values.itemsize
+            self.values = array.array(self.typecode)
+
+    def write_bytes(self, data):
+        self.file.write(data)
+        self.nbytes += len(data)
+
+
+def write_token_store(file_path, name, tokens, seed=12345, embedding_bit=False, block_size=_STORE_BLOCK):
+    """
+    Build the engine records for one stream from its tokenizer output
+    (a list or any iterator, e.g. iter_tokens / iter_file_tokens) and save
+    them as a columnar store. Memory stays bounded: sections are spilled
+    to temporary files next to file_path and joined at the end, then the
+    finished file replaces file_path. Returns the header.
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    engine = TextTokenizer(seed, embedding_bit)
+    digest = StreamDigest(name)
+    char_offsets = []
+
+    def with_offsets():
+        # iter_stream reads one token ahead; keep the offsets it has not used yet
+        for tok in tokens:
+            char_offsets.append(tok.get("index", 0))
+            yield tok
+
+    spills = {col: _Spill(code, directory) for col, code, _ in STORE_COLUMNS}
+    text_offsets = _Spill("Q", directory)
+    heap = _Spill("B", directory)
+    blocks = _Spill("Q", directory)
+    sections = [(col, spills[col]) for col, _, _ in STORE_COLUMNS]
+    sections += [("text_offsets", text_offsets), ("text", heap), ("blocks", blocks)]
+    heap_pieces = []
+    heap_size = 0
+    text_offsets.append(0)
+    count = 0
+    try:
+        for rec in engine.iter_stream(name, with_offsets()):
+            char_offset = char_offsets.pop(0)
+            if count % block_size == 0:
+                blocks.append(char_offset)
+            spills["uid"].append(rec.uid)
+            spills["index"].append(char_offset)
+            spills["content_id"].append(rec.content_id)
+            spills["frontend"].append(rec.frontend)
+            spills["backend_scaled"].append(rec.backend_scaled)
+            spills["global_id"].append(rec.global_id)
+            digest.update(rec.text, rec.index, rec.uid, rec.backend_huge)
+            data = rec.text.encode("utf-8", "surrogatepass")
+            heap_pieces.append(data)
+            heap_size += len(data)
+            text_offsets.append(heap_size)
+            if len(heap_pieces) >= _STORE_SPILL:
+                heap.write_bytes(b"".join(heap_pieces))
+                heap_pieces = []
+            count += 1
+        heap.write_bytes(b"".join(heap_pieces))
+        for _, spill in sections:
+            spill.flush()
+
+        layout = {}
+        offset = 0
+        for section, spill in sections:
+            layout[section] = {"dtype": _STORE_DTYPES[section], "offset": offset, "nbytes": spill.nbytes}
+            offset = _store_align(offset + spill.nbytes)
+        # The content digest covers every section as laid out in the file
+        content = hashlib.blake2b(digest_size=32)
+        for section, spill in sections:
+            spill.file.seek(0)
+            for chunk in iter(lambda: spill.file.read(_READ_BLOCK), b""):
+                content.update(chunk)
+        header = {
+            "format": "santok-columns",
+            "version": _STORE_VERSION,
+            "stream": name,
+            "count": count,
+            "config": {"seed": seed, "embedding_bit": bool(embedding_bit), "block_size": block_size},
+            "sections": layout,
+            "stream_digest": digest.hexdigest(),
+            "digest": content.hexdigest(),
+            "digest_algorithm": "blake2b-256",
+        }
+        header_bytes = json.dumps(header, sort_keys=True).encode("utf-8")
+        prefix = _STORE_MAGIC + struct.pack("<II", _STORE_VERSION, len(header_bytes)) + header_bytes
+        tmp_path = f"{file_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as out:
+            out.write(prefix + b"\0" * (_store_align(len(prefix)) - len(prefix)))
+            for section, spill in sections:
+                spill.file.seek(0)
+                for chunk in iter(lambda: spill.file.read(_READ_BLOCK), b""):
+                    out.write(chunk)
+                out.write(b"\0" * (_store_align(spill.nbytes) - spill.nbytes))
+        os.replace(tmp_path, file_path)
+    finally:
+        for _, spill in sections:
+            spill.file.close()
+    return header
+
+
+class TokenStore:
+    """
+    A columnar token store opened read-only with mmap:
+
+        with TokenStore("word.stc") as store:
+            uids = store.numpy("uid")          # zero-copy NumPy view
+            ids = store.column("content_id")   # zero-copy memoryview
+            pos = store.position_at(12345)     # token covering char 12345
+            store.text(pos), store.row(pos)
+
+    Columns are STORE_COLUMNS plus "text_offsets" and "blocks". Views
+    returned by column()/numpy() point into the map: drop them before
+    close(), or the map stays open until they are gone. text(), row() and
+    position_at() work on any host: on big-endian ones they read decoded
+    copies of the columns.
+    """
+
+    def __init__(self, file_path):
+        self.path = file_path
+        self._file = open(file_path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        try:
+            self._view = memoryview(self._map)
+            if self._view[:8] != _STORE_MAGIC:
+                raise ValueError(f"{file_path} is not a SanTOK token store")
+            version, header_len = struct.unpack_from("<II", self._map, 8)
+            if version != _STORE_VERSION:
+                raise ValueError(f"unsupported token store version {version}")
+            self.header = json.loads(bytes(self._view[16:16 + header_len]))
+        except Exception:
+            self.close()
+            raise
+        self._data = _store_align(16 + header_len)
+        self.name = self.header["stream"]
+        self.count = self.header["count"]
+        self.config = self.header["config"]
+        self.block_size = self.config["block_size"]
+        self._columns = {}
+        self._text_offsets = self._values("text_offsets")
+        self._index = self._values("index")
+        self._blocks = self._values("blocks")
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        if self._map is None:
+            return
+        for attr in ("_text_offsets", "_index", "_blocks"):
+            self.__dict__.pop(attr, None)
+        for values in self.__dict__.pop("_columns", {}).values():
+            if isinstance(values, memoryview):
+                values.release()
+        view = self.__dict__.pop("_view", None)
+        if view is not None:
+            view.release()
+        try:
+            self._map.close()
+        except BufferError:
+            pass  # caller still holds column views; unmapped once they are gone
+        self._map = None
+        self._file.close()
+
+    def _section(self, name):
+        try:
+            info = self.header["sections"][name]
+        except KeyError:
+            raise KeyError(f"Unknown column: {name}")
+        start = self._data + info["offset"]
+        return start, info["nbytes"]
+
+    def column(self, name):
+        """Zero-copy memoryview of a column (little-endian hosts; use numpy() elsewhere)"""
+        if sys.byteorder != "little":
+            raise RuntimeError("memoryview columns need a little-endian host; use numpy()")
+        start, nbytes = self._section(name)
+        view = self._view[start:start + nbytes]
+        return view.cast(_STORE_TYPECODES[name]) if name in _STORE_TYPECODES else view
+
+    def _values(self, name):
+        # Typed values of a column for internal lookups, made once and released by close()
+        values = self._columns.get(name)
+        if values is None:
+            if _STORE_ZERO_COPY:
+                values = self.column(name)
+            else:
+                start, nbytes = self._section(name)
+                values = array.array(_STORE_TYPECODES[name])
+                values.frombytes(self._view[start:start + nbytes])
+                if sys.byteorder == "big":
+                    values.byteswap()
+            self._columns[name] = values
+        return values
+
+    def numpy(self, name):
+        """Zero-copy read-only NumPy array of a column (requires numpy)"""
+        import numpy as np
+        start, nbytes = self._section(name)
+        dtype = np.dtype(_STORE_DTYPES[name])
+        return np.frombuffer(self._map, dtype=dtype, count=nbytes // dtype.itemsize, offset=start)
+
+    def text(self, position):
+        """Text of the token at position"""
+        if not 0 <= position < self.count:
+            raise IndexError("token position out of range")
+        start, _ = self._section("text")
+        a = self._text_offsets[position]
+        b = self._text_offsets[position + 1]
+        return str(self._view[start + a:start + b], "utf-8", "surrogatepass")
+
+    def texts(self, start=0, stop=None):
+        """Texts of the tokens in [start, stop), decoded from one slice of the heap"""
+        stop = self.count if stop is None else min(stop, self.count)
+        if start >= stop:
+            return []
+        base, _ = self._section("text")
+        offsets = self._text_offsets[start:stop + 1].tolist()
+        first = offsets[0]
+        heap = bytes(self._view[base + first:base + offsets[-1]])
+        return [heap[a - first:b - first].decode("utf-8", "surrogatepass") for a, b in zip(offsets, offsets[1:])]
+
+    def row(self, position):
+        """One token as a dict: position, text and every column"""
+        if not 0 <= position < self.count:
+            raise IndexError("token position out of range")
+        row = {"position": position, "text": self.text(position)}
+        for name, _, _ in STORE_COLUMNS:
+            row[name] = self._values(name)[position]
+        return row
+
+    def position_at(self, char_offset):
+        """
+        Position of the token covering char_offset (the last token starting
+        at or before it), or -1 before the first token. The block index
+        narrows the search to one block of the index column.
+        """
+        block = bisect_right(self._blocks, char_offset) - 1
+        if block < 0:
+            return -1
+        lo = block * self.block_size
+        hi = min(lo + self.block_size, self.count)
+        return bisect_right(self._index, char_offset, lo, hi) - 1
+
+    def verify(self):
+        """True if the sections still match the header's digest"""
+        content = hashlib.blake2b(digest_size=32)
+        for info in sorted(self.header["sections"].values(), key=lambda info: info["offset"]):
+            start = self._data + info["offset"]
+            content.update(self._view[start:start + info["nbytes"]])
+        return content.hexdigest() == self.header["digest"]
+
+    # -- NumPy export --
+
+    def metadata(self):
+        """The header without the file layout: stream, count, config, digests"""
+        meta = {k: v for k, v in self.header.items() if k != "sections"}
+        meta["arrays"] = {name: _STORE_DTYPES[name] for name in _export_columns(True)}
+        return meta
+
+    def to_npy(self, directory, include_text=False):
+        """
+        Write every column as <directory>/<stream>.<column>.npy plus
+        <stream>.metadata.json, straight from the mapped columns. Returns
+        the paths written.
+        """
+        import numpy as np
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for name in _export_columns(include_text):
+            path = os.path.join(directory, f"{self.name}.{name}.npy")
+            np.save(path, self.numpy(name), allow_pickle=False)
+            paths.append(path)
+        path = os.path.join(directory, f"{self.name}.metadata.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.metadata(), f, indent=2, sort_keys=True)
+        paths.append(path)
+        return paths
+
+    def to_npz(self, file_path, include_text=False, compress=False):
+        """
+        Write every column into one .npz (np.load() reads it) with a
+        metadata.json member. Uncompressed members can be memory-mapped
+        back by load_token_arrays().
+        """
+        import numpy as np
+        mode = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+        tmp_path = f"{file_path}.{os.getpid()}.tmp"
+        with zipfile.ZipFile(tmp_path, "w", mode, allowZip64=True) as zf:
+            for name in _export_columns(include_text):
+                with zf.open(name + ".npy", "w", force_zip64=True) as f:
+                    np.lib.format.write_array(f, self.numpy(name), allow_pickle=False)
+            zf.writestr("metadata.json", json.dumps(self.metadata(), indent=2, sort_keys=True))
+        os.replace(tmp_path, file_path)
+        return file_path
+
+
+def _export_columns(include_text):
+    names = [name for name, _, _ in STORE_COLUMNS] + ["text_offsets"]
+    return names + ["text"] if include_text else names
+
+
+def load_token_arrays(path, stream=None):
+    """
+    Load arrays written by TokenStore.to_npz() or to_npy(): a dict of
+    column -> read-only NumPy array, memory-mapped where the file allows
+    it (.npy files and uncompressed .npz members), plus "metadata".
+    For a to_npy() directory, stream picks the stream when it holds several.
+    """
+    import numpy as np
+    if os.path.isdir(path):
+        if stream is None:
+            streams = sorted(f[:-len(".metadata.json")] for f in os.listdir(path) if f.endswith(".metadata.json"))
+            if len(streams) != 1:
+                raise ValueError(f"{path} holds streams {streams}; pass stream=")
+            stream = streams[0]
+        with open(os.path.join(path, f"{stream}.metadata.json"), encoding="utf-8") as f:
+            out = {"metadata": json.load(f)}
+        for name in out["metadata"]["arrays"]:
+            array_path = os.path.join(path, f"{stream}.{name}.npy")
+            if os.path.exists(array_path):
+                out[name] = _load_npy(np, array_path)
+        return out
+    out = {}
+    with zipfile.ZipFile(path) as zf:
+        out["metadata"] = json.loads(zf.read("metadata.json"))
+        for info in zf.infolist():
+            if not info.filename.endswith(".npy"):
+                continue
+            name = info.filename[:-4]
+            if info.compress_type == zipfile.ZIP_STORED:
+                out[name] = _map_npz_member(np, path, info)
+            else:
+                with zf.open(info) as f:
+                    out[name] = np.lib.format.read_array(f, allow_pickle=False)
+    return out
+
+
+def _load_npy(np, path):
+    try:
+        return np.load(path, mmap_mode="r", allow_pickle=False)
+    except ValueError:
+        # Empty arrays cannot be mapped
+        return np.load(path, allow_pickle=False)
+
+
+def _map_npz_member(np, path, info):
+    # An uncompressed member is a plain .npy at a fixed offset in the zip
+    with open(path, "rb") as f:
+        f.seek(info.header_offset)
+        local = f.read(30)
+        name_len, extra_len = struct.unpack("<HH", local[26:30])
+        f.seek(info.header_offset + 30 + name_len + extra_len)
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+    count = 1
+    for n in shape:
+        count *= n
+    if count == 0:
+        return np.empty(shape, dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape, order="F" if fortran else "C")
+
+
 # --------------------------- Deterministic IDs ---------------------------
 
 def _content_id(token_text):
@@ -2530,6 +4503,100 @@ def _content_id(token_text):
     return small
 
 
+# ----------------------------- Stream digests -----------------------------
+
+_DIGEST_SIZE = 32
+_DIGEST_PERSON = b"santok-stream-v1"
+_DIGEST_FLUSH_BYTES = 1 << 16
+
+
+def _pack_token(text, index, uid, backend):
+    # Canonical packing: u32 text length + UTF-8 text, u64 index, u64 uid,
+    # u16 length + signed little-endian backend (backends are unbounded ints)
+    b = text.encode("utf-8", "surrogatepass")
+    backend_bytes = backend.to_bytes((backend.bit_length() + 8) // 8, "little", signed=True)
+    return (
+        len(b).to_bytes(4, "little") + b
+        + (index & ((1 << 64) - 1)).to_bytes(8, "little")
+        + (uid & ((1 << 64) - 1)).to_bytes(8, "little")
+        + len(backend_bytes).to_bytes(2, "little") + backend_bytes
+    )
+
+
+class StreamDigest:
+    """
+    Incremental BLAKE2b digest over the canonical packing of a token stream.
+    Updated token by token, so a stream never has to be kept around to be
+    compared; two streams are identical iff their hexdigest() matches.
+    """
+
+    def __init__(self, name=""):
+        if hashlib is None:
+            raise RuntimeError("hashlib is required for stream digests")
+        self.name = name
+        self.count = 0
+        self._hash = hashlib.blake2b(digest_size=_DIGEST_SIZE, person=_DIGEST_PERSON)
+        # stream name acts as a domain separator between streams
+        header = name.encode("utf-8")
+        self._hash.update(len(header).to_bytes(4, "little") + header)
+        self._buf = bytearray()
+
+    def update(self, text, index, uid=0, backend=0):
+        self._buf += _pack_token(text, index, uid, backend)
+        self.count += 1
+        if len(self._buf) >= _DIGEST_FLUSH_BYTES:
+            self._hash.update(self._buf)
+            self._buf = bytearray()
+
+    def hexdigest(self):
+        # count is folded in at the end so truncated streams never collide
+        h = self._hash.copy()
+        h.update(self._buf)
+        h.update(self.count.to_bytes(8, "little"))
+        return h.hexdigest()
+
+
+def digest_tokens(tokens, name=""):
+    """Digest a raw tokenizer output list (text, index, id)."""
+    d = StreamDigest(name)
+    for t in tokens:
+        d.update(t["text"], t.get("index", 0), t.get("id", 0), 0)
+    return d.hexdigest()
+
+
+def compare_digests(manifest, golden):
+    """
+    Compare a manifest from TextTokenizer.validate() against golden digests.
+    golden maps stream name -> hexdigest (or a manifest entry with "digest").
+    Returns the list of stream names that differ or are missing.
+    """
+    mismatched = []
+    for name in golden:
+        expected = golden[name]
+        if isinstance(expected, dict):
+            expected = expected.get("digest")
+        entry = manifest.get(name)
+        if entry is None or entry.get("digest") != expected:
+            mismatched.append(name)
+    return mismatched
+
+
+def save_golden_digests(path, manifest):
+    """Store the per-stream digests of a manifest as a golden file."""
+    golden = {}
+    for name in manifest:
+        golden[name] = {"length": manifest[name]["length"], "digest": manifest[name]["digest"]}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(golden, f, indent=2, sort_keys=True)
+    return golden
+
+
+def load_golden_digests(path):
+    """Load a golden file written by save_golden_digests()."""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
 # ------------------------------ OOP classes ------------------------------
 
 class TokenRecord:
@@ -2546,6 +4613,16 @@ class TokenRecord:
         self.backend_scaled = backend_scaled
         self.global_id = global_id
 
+    ROW_FIELDS = ("text", "stream", "index", "uid", "prev_uid", "next_uid", "content_id", "global_id",
+                  "frontend", "backend_huge", "backend_scaled")
+
+    def row_values(self):
+        # to_row()'s values in ROW_FIELDS order, without building the dict
+        return (self.text, self.stream, self.index, self.uid,
+                (self.prev_uid if self.prev_uid is not None else 0),
+                (self.next_uid if self.next_uid is not None else 0),
+                self.content_id, self.global_id, self.frontend, self.backend_huge, self.backend_scaled)
+
     def to_row(self):
         return {
             "text": self.text,
@@ -2567,9 +4644,16 @@ class TokenStream:
         self.name = name
         self.tokens = []
         self.stream_id = _content_id(name)
+        # digest is maintained while tokens are produced
+        self.digest = StreamDigest(name) if hashlib is not None else None
 
     def add(self, token):
         self.tokens.append(token)
+        if self.digest is not None:
+            self.digest.update(token.text, token.index, token.uid, token.backend_huge)
+
+    def hexdigest(self):
+        return self.digest.hexdigest() if self.digest is not None else None
 
     def length(self):
         n = 0
@@ -2597,6 +4681,7 @@ class TextTokenizer:
         # session id derived from seed
         self.session_id = (seed ^ 0x9E3779B97F4A7C15) & ((1 << 64) - 1)
 
+    @_instrumented("TextTokenizer.build")
     def build(self, text):
         # text is math view; do not alter
         toks = all_tokenizations(text)
@@ -2606,54 +4691,136 @@ class TextTokenizer:
         
         for name in tokenizer_names:
             if name in toks:
-                stream = toks[name]
-                with_uids = assign_uids(stream, self.seed)
-                with_neighbors = neighbor_uids(with_uids)
                 ts = TokenStream(name)
-                i = 0
-                for rec in with_neighbors:
-                    backend = compose_backend_number(rec["text"], i, rec["uid"], rec["prev_uid"], rec["next_uid"], self.embedding_bit)
-                    digit = combined_digit(rec["text"], self.embedding_bit)
-                    scaled = (backend % 100000)
-                    # global id: combine uid, content_id, index, and stream hash
-                    sid = ts.stream_id
-                    gid = (rec["uid"] ^ _content_id(rec["text"]) ^ (i << 17) ^ sid ^ self.session_id) & ((1 << 64) - 1)
-                    tok = TokenRecord(
-                        text=rec["text"],
-                        stream=name,
-                        index=i,
-                        uid=rec["uid"],
-                        prev_uid=rec["prev_uid"],
-                        next_uid=rec["next_uid"],
-                        content_id=_content_id(rec["text"]),
-                        frontend=digit,
-                        backend_huge=backend,
-                        backend_scaled=scaled,
-                        global_id=gid,
-                    )
+                for tok in self._iter_records(name, toks[name], ts.stream_id):
                     ts.add(tok)
-                    i += 1
                 streams[name] = ts
+                count("tokens." + name, ts.length())
         return streams
 
+    def build_stream(self, name, tokens):
+        """
+        Build one stream from tokens its tokenizer already produced.
+        Records match build(text)[name] without running the other tokenizers.
+        """
+        ts = TokenStream(name)
+        for tok in self._iter_records(name, tokens, ts.stream_id):
+            ts.add(tok)
+        count("tokens." + name, ts.length())
+        return ts
+
+    def iter_stream(self, name, tokens):
+        """
+        Lazy build_stream: yields the same TokenRecords one at a time from
+        any token iterable (e.g. iter_tokens), holding one token of
+        lookahead for next_uid instead of the whole stream.
+        """
+        sid = TokenStream(name).stream_id
+        rng = XorShift64Star(self.seed)
+        pending = None
+        prev_uid = None
+        i = 0
+        for t in tokens:
+            uid = rng.next_u64()
+            if pending is not None:
+                yield self._record(name, sid, i, pending[0], pending[1], prev_uid, uid)
+                prev_uid = pending[1]
+                i += 1
+            pending = (t["text"], uid)
+        if pending is not None:
+            yield self._record(name, sid, i, pending[0], pending[1], prev_uid, None)
+
+    def _iter_records(self, name, stream, sid):
+        with_uids = assign_uids(stream, self.seed)
+        with_neighbors = neighbor_uids(with_uids)
+        i = 0
+        # One stage for the whole per-token loop; hooks on the per-token
+        # helpers would cost more than the work they measure
+        with stage("engine"):
+            for rec in with_neighbors:
+                yield self._record(name, sid, i, rec["text"], rec["uid"], rec["prev_uid"], rec["next_uid"])
+                i += 1
+
+    def _record(self, name, sid, i, text, uid, prev_uid, next_uid):
+        backend = compose_backend_number(text, i, uid, prev_uid, next_uid, self.embedding_bit)
+        digit = combined_digit(text, self.embedding_bit)
+        scaled = (backend % 100000)
+        content_id = _content_id(text)
+        # global id: combine uid, content_id, index, and stream hash
+        gid = (uid ^ content_id ^ (i << 17) ^ sid ^ self.session_id) & ((1 << 64) - 1)
+        return TokenRecord(
+            text=text,
+            stream=name,
+            index=i,
+            uid=uid,
+            prev_uid=prev_uid,
+            next_uid=next_uid,
+            content_id=content_id,
+            frontend=digit,
+            backend_huge=backend,
+            backend_scaled=scaled,
+            global_id=gid,
+        )
+
+    def digests(self, text):
+        """
+        Digest-only pass: same pipeline as build(), but records are folded into
+        the stream digest and dropped instead of being kept in memory.
+        Returns {name: {"length": n, "digest": hex}} like validate().
+        """
+        toks = all_tokenizations(text)
+        out = {}
+        tokenizer_names = ("space", "word", "char", "grammar", "subword", "subword_bpe", "subword_syllable", "subword_frequency", "byte")
+        for name in tokenizer_names:
+            if name in toks:
+                d = StreamDigest(name)
+                for tok in self._iter_records(name, toks[name], _content_id(name)):
+                    d.update(tok.text, tok.index, tok.uid, tok.backend_huge)
+                out[name] = {"length": d.count, "digest": d.hexdigest()}
+        return out
+
     def validate(self, streams):
-        # Basic validations: non-empty, checksums
+        # Basic validations: non-empty, checksums, stream digests
         manifest = {}
         for name in streams:
             ts = streams[name]
             manifest[name] = {
                 "length": ts.length(),
                 "checksum": ts.checksum_digits(),
+                "digest": ts.hexdigest(),
             }
         return manifest
 
-def main():
-    print("Input mode? 1=text, 2=file path:")
-    mode = input()
+def _ask_input(key, prompt):
+    print(prompt)
+    return input()
+
+
+def main(argv=None):
+    """
+    Interactive run: every choice is prompted for on stdin. Given
+    command-line arguments it runs headless instead (see run_headless).
+    """
+    if argv is None:
+        argv = sys.argv[1:] if sys is not None else []
+    if argv:
+        return run_headless(argv)
+    _run_main(_ask_input)
+
+
+def _run_main(ask, validate=True, determinism=True, base_dir="outputs", golden=None, save_golden=None):
+    """
+    The pipeline behind main() and run_headless(). ask(key, prompt) supplies
+    each answer: "mode", "path", "text", "seed", "embedding_bit",
+    "output_mode", "save", "readable" and "format". Returns False if the
+    determinism check failed. With golden (a save_golden_digests() file)
+    the digests are checked against it instead of a second build;
+    save_golden writes them to such a file.
+    """
+    mode = ask("mode", "Input mode? 1=text, 2=file path:")
     original_text = ""
     if (len(mode) > 0 and mode[0] == '2'):
-        print("Enter file path:")
-        fpath = input()
+        fpath = ask("path", "Enter file path:")
         # Clean file path - remove quotes if present
         fpath = fpath.strip().strip('"').strip("'")
         # UNIVERSAL FILE HANDLING - Handle ANY file type
@@ -2662,6 +4829,8 @@ def main():
         # Detect and display file type information
         file_info = _detect_file_type(fpath)
         print(f"File detected: {file_info['type']} ({file_info['category']}) - .{file_info['extension']}")
+        if file_info['compression']:
+            print(f"Decompressing: {file_info['compression']}")
         print(f"File path: {fpath}")
         
         # Show file size if possible
@@ -2673,8 +4842,7 @@ def main():
         except:
             print("File size: unknown")
     else:
-        print("Enter text:")
-        original_text = input()
+        original_text = ask("text", "Enter text:")
     # Display text is exactly what user typed
     display_text = original_text
     # Math view (numbers only): lowercase for stable numerology, keep specials, run-aware collapse
@@ -2694,10 +4862,8 @@ def main():
         "compat_digit": summary["compat_digit"],
         "final_digit": summary["final_digit"],
     })
-    print("Enter integer seed (e.g., 12345):")
-    seed = _parse_int(input())
-    print("Use embedding bit? (0/1):")
-    eb = input()
+    seed = _parse_int(ask("seed", "Enter integer seed (e.g., 12345):"))
+    eb = ask("embedding_bit", "Use embedding bit? (0/1):")
     embedding_bit = True if (_len(eb) > 0 and eb[0] == '1') else False
     # Show summary with embedding bit choice as well (math view)
     summary2 = compute_text_value_summary(math_text, embedding_bit)
@@ -2720,35 +4886,35 @@ def main():
             print(f"  Types: {stats['type_distribution']}")
     
     # Show stability and reversibility validation
-    print("\n=== STABILITY & REVERSIBILITY VALIDATION ===")
-    validation_results = comprehensive_validation(display_text, include_compression=True)
-    for name, validation in validation_results["validations"].items():
-        reversibility = validation["reversibility"]
-        unique_ids = validation["unique_ids"]
-        deterministic = validation["deterministic"]
-        performance = validation["performance"]
-        compression_analysis = validation.get("compression_analysis")
-        errors = validation["errors"]
+    if validate:
+        print("\n=== STABILITY & REVERSIBILITY VALIDATION ===")
+        validation_results = comprehensive_validation(display_text, include_compression=True)
+        for name, validation in validation_results["validations"].items():
+            reversibility = validation["reversibility"]
+            unique_ids = validation["unique_ids"]
+            deterministic = validation["deterministic"]
+            performance = validation["performance"]
+            compression_analysis = validation.get("compression_analysis")
+            errors = validation["errors"]
         
-        status = "✓ STABLE" if reversibility and unique_ids and deterministic and len(errors) == 0 else "✗ UNSTABLE"
-        print(f"{name}: {status} (rev:{reversibility}, ids:{unique_ids}, det:{deterministic}, perf:{performance:.6f}s)")
+            status = "✓ STABLE" if reversibility and unique_ids and deterministic and len(errors) == 0 else "✗ UNSTABLE"
+            print(f"{name}: {status} (rev:{reversibility}, ids:{unique_ids}, det:{deterministic}, perf:{performance:.6f}s)")
         
-        # Show compression analysis
-        if compression_analysis and "error" not in compression_analysis:
-            print(f"  Compression Analysis:")
-            for method, stats in compression_analysis["compression_methods"].items():
-                if "error" not in stats:
-                    ratio = stats["compression_ratio"]
-                    percentage = stats["compression_percentage"]
-                    space_saved = stats["space_saved"]
-                    print(f"    {method}: {ratio:.3f} ratio ({percentage:.1f}% saved, {space_saved} tokens)")
+            # Show compression analysis
+            if compression_analysis and "error" not in compression_analysis:
+                print(f"  Compression Analysis:")
+                for method, stats in compression_analysis["compression_methods"].items():
+                    if "error" not in stats:
+                        ratio = stats["compression_ratio"]
+                        percentage = stats["compression_percentage"]
+                        space_saved = stats["space_saved"]
+                        print(f"    {method}: {ratio:.3f} ratio ({percentage:.1f}% saved, {space_saved} tokens)")
         
-        if errors:
-            print(f"  Errors: {errors}")
+            if errors:
+                print(f"  Errors: {errors}")
     
     # Mode switch: DEV (full), USER (summary), JSON (compact)
-    print("\nOutput mode? 1=DEV (full), 2=USER (summary), 3=JSON:")
-    out_mode = input()
+    out_mode = ask("output_mode", "\nOutput mode? 1=DEV (full), 2=USER (summary), 3=JSON:")
     dev_mode = not (_len(out_mode) > 0 and (out_mode[0] == '2' or out_mode[0] == '3'))
     json_mode = (_len(out_mode) > 0 and out_mode[0] == '3')
     
@@ -2764,63 +4930,13 @@ def main():
                 preview = _truncate_list(stream, 12)
                 print(name + "_tokens:", tc, name + "_preview:", preview)
         grammar_stream = toks_preview["grammar"]
-        gt_out = "["
-        gtc = 0
-        for rec in grammar_stream:
-            if gtc > 0:
-                gt_out += ", "
-            t = rec["text"]
-            rep = "\""
-            for ch in t:
-                if ch == "\"":
-                    rep += "\\\""
-                elif ch == "\\":
-                    rep += "\\\\"
-                else:
-                    rep += ch
-            rep += "\""
-            gt_out += rep
-            gtc += 1
-        gt_out += "]"
         print("grammar_tokens_list:")
-        print(gt_out)
-        ids = []
-        for rec in grammar_stream:
-            ids.append(_content_id(rec["text"]))
+        _print_list(_quote_text(rec["text"]) for rec in grammar_stream)
         print("Tokens")
         print(0 + sum(1 for _ in grammar_stream))
         print("Characters")
         print(_count_chars(display_text))
-        out_ids = "["
-        cnt = 0
-        for v in ids:
-            if cnt > 0:
-                out_ids += ", "
-            n = v
-            if n == 0:
-                out_ids += "0"
-            else:
-                digits = []
-                neg = False
-                if n < 0:
-                    neg = True
-                    n = -n
-                while n > 0:
-                    d = n % 10
-                    digits.append(chr(48 + d))
-                    n //= 10
-                if neg:
-                    out_ids += "-"
-                k = 0
-                m = 0
-                for _ in digits:
-                    m += 1
-                while k < m:
-                    out_ids += digits[m - 1 - k]
-                    k += 1
-            cnt += 1
-        out_ids += "]"
-        print(out_ids)
+        _print_list(str(_content_id(rec["text"])) for rec in grammar_stream)
     else:
         # USER summary baseline
         words = []
@@ -2933,51 +5049,7 @@ def main():
 
     # ---------------- Advanced OOP/FILES/Validation pass ----------------
     # Minimal OOP wrappers using existing functions.
-    base_dir = "outputs"
     # ensure directory exists using built-in open in append to create on demand (no os import)
-    def _write_jsonl(path, rows):
-        # write rows as JSON lines (fallback to manual if json not available)
-        # create/truncate file
-        f = open(path, "w", encoding="utf-8")
-        try:
-            for row in rows:
-                if json is not None:
-                    f.write(json.dumps(row, ensure_ascii=False))
-                else:
-                    # manual minimal JSON: keys/values assumed simple
-                    f.write("{")
-                    first = True
-                    for k in row:
-                        if not first:
-                            f.write(",")
-                        first = False
-                        # key
-                        f.write("\"" + str(k).replace("\"", "\\\"") + "\":")
-                        v = row[k]
-                        if isinstance(v, int):
-                            f.write(str(v))
-                        elif isinstance(v, bool):
-                            f.write("true" if v else "false")
-                        elif isinstance(v, list):
-                            # only ints/strings expected
-                            f.write("[")
-                            c = 0
-                            for it in v:
-                                if c > 0:
-                                    f.write(",")
-                                if isinstance(it, int):
-                                    f.write(str(it))
-                                else:
-                                    f.write("\"" + str(it).replace("\"", "\\\"") + "\"")
-                                c += 1
-                            f.write("]")
-                        else:
-                            f.write("\"" + str(v).replace("\"", "\\\"") + "\"")
-                    f.write("}")
-                f.write("\n")
-        finally:
-            f.close()
-
     # build rows per stream with identity roles and validation checksum
     def _checksum_digits(digs):
         s = 0
@@ -2986,20 +5058,17 @@ def main():
         return s
 
     # Ask user whether to save outputs
-    print("Save outputs to files? (y/n):")
-    ans = input()
+    ans = ask("save", "Save outputs to files? (y/n):")
     save_files = (len(ans) > 0 and (ans[0] == 'y' or ans[0] == 'Y'))
     
     # Ask user whether to show readable content
-    print("Show readable content (words/letters)? (y/n):")
-    ans2 = input()
+    ans2 = ask("readable", "Show readable content (words/letters)? (y/n):")
     show_readable = (len(ans2) > 0 and (ans2[0] == 'y' or ans2[0] == 'Y'))
     if save_files:
         print("writing_files:")
         
         # UNIVERSAL OUTPUT - Ask user for output format
-        print("Output format? 1=JSON, 2=CSV, 3=XML, 4=TXT, 5=ALL:")
-        format_choice = input()
+        format_choice = ask("format", "Output format? 1=JSON, 2=CSV, 3=XML, 4=TXT, 5=ALL:")
         output_formats = []
         
         if format_choice == "1":
@@ -3015,44 +5084,34 @@ def main():
         else:
             output_formats = ["json"]  # default
         
+        # Interactive runs write into an existing output directory only;
+        # run_headless() creates its directory before getting here
+        if not os.path.isdir(base_dir):
+            base_dir = "."
+            print("Using current directory for output files")
+
         # write per-stream in multiple formats
         tokenizer_names = ("space", "word", "char", "grammar", "subword", "subword_bpe", "subword_syllable", "subword_frequency", "byte")
         
         for name in tokenizer_names:
             if name in streams_oop:
                 ts = streams_oop[name]
-                rows = ts.to_rows()
+                # Records are converted to rows as they are written
+                rows = ts.tokens
                 checksum = ts.checksum_digits()
                 
-                # ensure parent dir exists by creating directory manually
-                try:
-                    # Try to create directory by writing a test file
-                    test_file = base_dir + "/.test"
-                    with open(test_file, "w") as f:
-                        f.write("test")
-                    # Remove test file
-                    import os
-                    try:
-                        os.remove(test_file)
-                    except:
-                        pass
-                except Exception:
-                    # If directory creation fails, create files in current directory
-                    base_dir = "."
-                    print(f"Using current directory for {name} files")
-                
                 # Write in all requested formats
                 for fmt in output_formats:
                     path = base_dir + "/" + name + "." + fmt
                     try:
                         if fmt == "json":
-                            _write_jsonl(path, rows)
+                            write_jsonl_stream(path, rows)
                         elif fmt == "csv":
-                            _write_csv_file(path, rows)
+                            write_csv_stream(path, rows)
                         elif fmt == "xml":
-                            _write_xml_file(path, rows)
+                            write_xml_stream(path, rows, name)
                         elif fmt == "txt":
-                            _write_formatted_txt_file(path, rows, name)
+                            write_txt_stream(path, rows, name)
                         
                         print(name + "_" + fmt + "_file:", path, " checksum:", checksum)
                     except Exception as e:
@@ -3062,16 +5121,20 @@ def main():
         print("manifest:", json.dumps(manifest))
     else:
         print("manifest:", str(manifest))
-    # Determinism check: rebuild and compare checksums
-    engine2 = TextTokenizer(seed, embedding_bit)
-    streams2 = engine2.build(math_text)
-    manifest2 = engine2.validate(streams2)
+    if save_golden is not None:
+        save_golden_digests(save_golden, manifest)
+        print("golden_saved:", save_golden)
+    # Determinism check: against stored golden digests, or a digest-only
+    # second pass, compared stream by stream
     ok = True
-    for name in manifest:
-        if manifest[name]["checksum"] != manifest2[name]["checksum"] or manifest[name]["length"] != manifest2[name]["length"]:
-            ok = False
-            break
-    print("determinism:", ("ok" if ok else "mismatch"))
+    if golden is not None:
+        mismatched = compare_digests(manifest, load_golden_digests(golden))
+        ok = not mismatched
+        print("determinism:", ("ok" if ok else "mismatch " + ",".join(mismatched)), "(golden)")
+    elif determinism:
+        engine2 = TextTokenizer(seed, embedding_bit)
+        ok = not compare_digests(manifest, engine2.digests(math_text))
+        print("determinism:", ("ok" if ok else "mismatch"))
     
     # Show readable content if requested
     if show_readable:
@@ -3127,9 +5190,149 @@ def main():
     print()
     print("The SanTOK Tokenizer is UNIVERSAL and working perfectly!")
     # End of output
+    return ok
+
+
+_HEADLESS_MODES = {"dev": "1", "user": "2", "json": "3"}
+_HEADLESS_FORMATS = {"json": "1", "csv": "2", "xml": "3", "txt": "4", "all": "5"}
+_HEADLESS_STREAMS = ("space", "word", "char", "grammar", "subword", "subword_bpe", "subword_syllable",
+                     "subword_frequency", "byte")
+_ASCII_LOWER = {c: c + 32 for c in range(65, 91)}
+_SPACE_RUN = re.compile("[ \t\n\r]+") if re is not None else None
+
+
+def _iter_math_text(chunks):
+    """The math view main() builds (sanitize_text(text, True, False, 1)), chunk by chunk"""
+    after_space = True  # leading whitespace is trimmed
+    for chunk in chunks:
+        chunk = _SPACE_RUN.sub(" ", chunk.translate(_ASCII_LOWER))
+        if after_space and chunk[:1] == " ":
+            chunk = chunk[1:]
+        if chunk:
+            after_space = chunk[-1] == " "
+            yield chunk
+
+
+def write_token_files(read_chunks, output_dir, formats=("json",), names=_HEADLESS_STREAMS, seed=12345,
+                      embedding_bit=False, log=print):
+    """
+    Write the token files main() saves (<output_dir>/<stream>.<format>)
+    without building the streams in memory: every stream and format is one
+    pass of iter_tokens() and iter_stream() over read_chunks(), a callable
+    returning the text as an iterable of chunks. Records match main()'s,
+    except that a TXT file has its token total in the footer. Returns the
+    manifest {stream: {"length": n, "digest": hex}} of the streams, as
+    compare_digests() and save_golden_digests() take it.
+    """
+    global _RUN_COLLAPSE_TO_ONE
+    _RUN_COLLAPSE_TO_ONE = _AUTO_SAN_COLLAPSE_N == 1  # as sanitize_text() leaves it for the engine
+    engine = TextTokenizer(seed, embedding_bit)
+    manifest = {}
+    for name in names:
+        for i, fmt in enumerate(formats):
+            path = os.path.join(output_dir, name + "." + fmt)
+            records = engine.iter_stream(name, iter_tokens(_iter_math_text(read_chunks()), name))
+            if i == 0:
+                digest = StreamDigest(name)
+                records = _digested(records, digest)
+            n = write_token_stream(path, records, "jsonl" if fmt == "json" else fmt, name)
+            manifest[name] = {"length": n, "digest": digest.hexdigest()}
+            if log:
+                log(name + "_" + fmt + "_file:", path, " tokens:", n)
+    return manifest
+
+
+def _digested(records, digest):
+    # Pass records through, folding each into digest as TokenStream.add() does
+    for rec in records:
+        digest.update(rec.text, rec.index, rec.uid, rec.backend_huge)
+        yield rec
+
+
+def run_headless(argv=None):
+    """
+    main() without prompts, for scripts and cron jobs: the same report, with
+    every answer taken from the command line. Text comes from --text, --file
+    or stdin. Returns the exit status (1 if the determinism check failed).
+    With --tokens-only only the token files are written (write_token_files),
+    reading a --file in blocks instead of holding it and its streams.
+    """
+    parser = argparse.ArgumentParser(prog="core_tokenizer.py", description="SanTOK tokenizer (headless run)")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--text", help="Text to tokenize (default: read stdin)")
+    source.add_argument("--file", help="File to tokenize (any type; compressed files are decompressed)")
+    parser.add_argument("--seed", type=int, default=12345, help="Engine seed")
+    parser.add_argument("--embedding-bit", action="store_true", help="Use the embedding bit")
+    parser.add_argument("--mode", choices=sorted(_HEADLESS_MODES), default="dev", help="Report detail")
+    parser.add_argument("--save", action="store_true", help="Write every stream's tokens to --output-dir")
+    parser.add_argument("--format", choices=sorted(_HEADLESS_FORMATS), default="json", help="Format of saved tokens")
+    parser.add_argument("--output-dir", default="outputs", help="Directory for saved tokens")
+    parser.add_argument("--readable", action="store_true", help="Add the readable content analysis")
+    parser.add_argument("--skip-validation", action="store_true",
+                        help="Skip the stability & reversibility validation pass")
+    parser.add_argument("--skip-determinism", action="store_true",
+                        help="Skip the second build that checks determinism")
+    parser.add_argument("--report", help="Write the report to this file instead of stdout")
+    parser.add_argument("--tokens-only", action="store_true",
+                        help="Only write the token files (implies --save), streamed from the input without "
+                             "building the report; for large inputs")
+    parser.add_argument("--stream", action="append", choices=_HEADLESS_STREAMS,
+                        help="Stream to write with --tokens-only (repeatable; default: all)")
+    parser.add_argument("--golden", help="Check determinism against this golden digest file instead of a "
+                                         "second build")
+    parser.add_argument("--save-golden", help="Write the streams' digests to this golden file")
+    args = parser.parse_args(argv)
+    if args.golden and not os.path.isfile(args.golden):
+        parser.error(f"golden file not found: {args.golden}")
+
+    if args.file is None and args.text is None:
+        args.text = sys.stdin.read()
+    if args.tokens_only:
+        os.makedirs(args.output_dir, exist_ok=True)
+        if args.file is not None:
+            read_chunks = lambda: iter_file_text(args.file)
+        else:
+            read_chunks = lambda: [args.text]
+        formats = ["json", "csv", "xml", "txt"] if args.format == "all" else [args.format]
+        manifest = write_token_files(read_chunks, args.output_dir, formats, args.stream or _HEADLESS_STREAMS,
+                                     args.seed, args.embedding_bit)
+        if args.save_golden:
+            save_golden_digests(args.save_golden, manifest)
+            print("golden_saved:", args.save_golden)
+        if args.golden:
+            # Only the streams written this time are compared
+            golden = {name: entry for name, entry in load_golden_digests(args.golden).items() if name in manifest}
+            mismatched = compare_digests(manifest, golden)
+            print("determinism:", ("ok" if not mismatched else "mismatch " + ",".join(mismatched)), "(golden)")
+            return 1 if mismatched else 0
+        return 0
+    answers = {
+        "mode": "2" if args.file is not None else "1",
+        "path": args.file,
+        "text": args.text,
+        "seed": str(args.seed),
+        "embedding_bit": "1" if args.embedding_bit else "0",
+        "output_mode": _HEADLESS_MODES[args.mode],
+        "save": "y" if args.save else "n",
+        "readable": "y" if args.readable else "n",
+        "format": _HEADLESS_FORMATS[args.format],
+    }
+    if args.save:
+        os.makedirs(args.output_dir, exist_ok=True)
+    stdout = sys.stdout
+    if args.report:
+        sys.stdout = open(args.report, "w", encoding="utf-8", buffering=_WRITE_BUFFER)
+    try:
+        ok = _run_main(lambda key, prompt: answers[key], not args.skip_validation, not args.skip_determinism,
+                       args.output_dir, args.golden, args.save_golden)
+    finally:
+        if args.report:
+            sys.stdout.close()
+            sys.stdout = stdout
+    return 0 if ok else 1
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
 
 
@@ -104,19 +104,19 @@ def benchmark_parallel_performance(text: str, tokenizer_type: str = 'word',
     results = {}
     
     # Sequential processing
-    start_time = time.time()
+    start_time = time.perf_counter()
     sequential_tokens = process_chunk_sequential((text, None, tokenizer_type, 0))
-    sequential_time = time.time() - start_time
+    sequential_time = time.perf_counter() - start_time
     
     # Threaded processing
-    start_time = time.time()
+    start_time = time.perf_counter()
     threaded_tokens = tokenize_parallel_threaded(text, tokenizer_type, chunk_size=chunk_size)
-    threaded_time = time.time() - start_time
+    threaded_time = time.perf_counter() - start_time
     
     # Multi-process processing
-    start_time = time.time()
+    start_time = time.perf_counter()
     multiprocess_tokens = tokenize_parallel_multiprocess(text, tokenizer_type, chunk_size=chunk_size)
-    multiprocess_time = time.time() - start_time
+    multiprocess_time = time.perf_counter() - start_time
     
     results = {
         'text_length': len(text),
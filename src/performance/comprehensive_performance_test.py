@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """
 Comprehensive Performance Test for SanTOK
+(for machine-readable results and baseline comparison use: python -m santok.bench)
 """
 
 import sys
@@ -73,7 +74,7 @@ def test_tokenizer_performance(text, tokenizer_type, iterations=10):
             tokens = tokenize_bytes(text)
     
     # Time tokenization
-    start_time = time.time()
+    start_time = time.perf_counter()
     for _ in range(iterations):
         if tokenizer_type == 'space':
             tokens = tokenize_space(text)
@@ -93,7 +94,7 @@ def test_tokenizer_performance(text, tokenizer_type, iterations=10):
             tokens = tokenize_subword(text, 3, 'frequency')
         elif tokenizer_type == 'byte':
             tokens = tokenize_bytes(text)
-    end_time = time.time()
+    end_time = time.perf_counter()
     
     # Calculate metrics
     total_time = end_time - start_time
@@ -136,10 +137,10 @@ def test_reconstruction_performance(text, tokenizer_type, iterations=10):
         reconstructed = reconstruct_from_tokens(tokens, tokenizer_type)
     
     # Time reconstruction
-    start_time = time.time()
+    start_time = time.perf_counter()
     for _ in range(iterations):
         reconstructed = reconstruct_from_tokens(tokens, tokenizer_type)
-    end_time = time.time()
+    end_time = time.perf_counter()
     
     # Calculate metrics
     total_time = end_time - start_time
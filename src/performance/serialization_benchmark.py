@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Serialization Benchmark for SanTOK
+Compares the ways a /tokenize response can be turned into bytes.
+
+Builds a /tokenize-shaped payload with --tokens tokens (default 1M) in the
+default object schema and in the columnar format, then times:
+
+  pydantic   TokenizationResult validation + model_dump + json.dumps
+             (what main_server did through response_model)
+  json       json.dumps with default settings (what the stdlib servers did)
+  stdlib     fast_json's compact stdlib encoder
+  orjson     fast_json with orjson (when installed)
+
+The payload is synthetic (regex-split corpus text with fake digits) so a
+1M-token run does not need minutes of tokenization first.
+
+Run: python src/performance/serialization_benchmark.py
+     python src/performance/serialization_benchmark.py --tokens 200000 --repeats 5
+"""
+
+import argparse
+import gc
+import json
+import os
+import re
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, '..', 'servers'))
+sys.path.append(os.path.join(HERE, '..', '..'))
+
+import fast_json
+import server_tasks
+from santok import corpus
+
+TOKEN_RE = re.compile(r"\w+|\s+|[^\w\s]")
+
+
+def build_payload(n_tokens, seed=corpus.DEFAULT_SEED):
+    """A tokenize_task-shaped result with n_tokens tokens"""
+    size = n_tokens * 3
+    while True:
+        text = corpus.generate('english', size, seed)
+        matches = TOKEN_RE.findall(text)
+        if len(matches) >= n_tokens:
+            break
+        size *= 2
+    tokens = []
+    position = 0
+    for i, tok in enumerate(matches[:n_tokens]):
+        tokens.append({
+            "text": tok,
+            "id": (i * 7) % 9 + 1,
+            "position": position,
+            "length": len(tok),
+            "type": "word" if tok[0].isalnum() else ("space" if tok.isspace() else "punctuation"),
+            "color": f"hsl({(i * 137.5) % 360}, 70%, 50%)",
+        })
+        position += len(tok)
+    return {
+        "tokens": tokens,
+        "tokenCount": len(tokens),
+        "characterCount": position,
+        "tokenizerType": "word",
+        "processingTime": 0.0,
+        "memoryUsage": position / 1024,
+        "compressionRatio": 1.0,
+        "reversibility": True,
+        "fingerprint": {"signatureDigit": 1, "compatDigit": 2, "textValue": 3, "textValueWithEmbedding": 4},
+        "originalText": text[:position],
+        "frontendDigits": [t["id"] for t in tokens],
+        "backendScaled": [(i * 7919) % 100000 for i in range(len(tokens))],
+        "contentIds": [(i * 104729) % 150001 for i in range(len(tokens))],
+    }
+
+
+def _time(func, repeats):
+    best = float('inf')
+    out = None
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            out = func()
+            best = min(best, time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return best, len(out)
+
+
+def serializers(skip_pydantic=False):
+    out = []
+    if not skip_pydantic:
+        try:
+            os.environ.setdefault('SANTOK_WORKERS', '0')
+            from main_server import TokenizationResult
+
+            def pydantic_path(payload):
+                model = TokenizationResult(**payload)
+                return json.dumps(model.model_dump(mode="json"), ensure_ascii=False,
+                                  separators=(',', ':')).encode('utf-8')
+            out.append(('pydantic', pydantic_path))
+        except ImportError as e:
+            print(f"pydantic path unavailable: {e}")
+    out.append(('json', lambda payload: json.dumps(payload).encode('utf-8')))
+    out.append(('stdlib', fast_json.dumps_stdlib))
+    if fast_json.orjson is not None:
+        out.append(('orjson', fast_json.dumps))
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='SanTOK response serialization benchmark')
+    parser.add_argument('--tokens', type=int, default=1_000_000, help='Tokens in the payload')
+    parser.add_argument('--repeats', type=int, default=3, help='Runs per serializer (best is reported)')
+    parser.add_argument('--skip-pydantic', action='store_true', help='Skip the slow response_model path')
+    args = parser.parse_args(argv)
+
+    payload = build_payload(args.tokens)
+    views = {
+        'objects': payload,
+        'columnar': server_tasks.project_result(payload, 'columnar'),
+    }
+    print(f"Payload: {payload['tokenCount']:,} tokens, {payload['characterCount']:,} chars  "
+          f"(fast_json backend: {fast_json.BACKEND})")
+    print(f"{'format':<10} {'serializer':<10} {'seconds':>9} {'MB':>8} {'tokens/s':>12}")
+    for fmt, data in views.items():
+        for name, func in serializers(args.skip_pydantic):
+            if name == 'pydantic' and fmt != 'objects':
+                continue
+            seconds, size = _time(lambda: func(data), 1 if name == 'pydantic' else args.repeats)
+            print(f"{fmt:<10} {name:<10} {seconds:9.3f} {size / 1e6:8.1f} {payload['tokenCount'] / seconds:12,.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Server Load Test for SanTOK
+Measures small-request latency on main_server while one large request runs.
+
+Starts main_server under uvicorn in a subprocess, keeps a steady stream of
+small /tokenize requests going, fires one large request part way through and
+reports p50/p99 of the small requests before and during the large one. With
+the worker pool the event loop stays free, so the "during" p99 should stay
+close to the "before" p99; with SANTOK_WORKERS=0 it jumps to the duration
+of the large request.
+
+Run: python src/performance/server_load_test.py --big-size 10000000
+     python src/performance/server_load_test.py --workers 0   (inline, for comparison)
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from santok.bench import percentile
+
+SERVERS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'servers')
+SMALL_TEXT = "Hello world! The quick brown fox jumps over the lazy dog."
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, workers, timeout):
+    env = dict(os.environ)
+    if workers is not None:
+        env['SANTOK_WORKERS'] = str(workers)
+    env['SANTOK_REQUEST_TIMEOUT'] = str(timeout)
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main_server:app', '--app-dir', SERVERS_DIR,
+         '--host', '127.0.0.1', '--port', str(port), '--log-level', 'warning'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("server did not start")
+
+
+async def run_load(url, big_size, rate, before, during):
+    import httpx
+
+    samples = []  # (start offset, latency seconds, phase)
+    big_started = asyncio.Event()
+    big_result = {}
+
+    async with httpx.AsyncClient(timeout=None) as client:
+        async def small(phase, t0):
+            start = time.perf_counter()
+            r = await client.post(url, json={'text': SMALL_TEXT, 'tokenizer_type': 'word'})
+            r.raise_for_status()
+            samples.append((start - t0, time.perf_counter() - start, phase))
+
+        async def big():
+            text = ('lorem ipsum dolor sit amet ' * (big_size // 27 + 1))[:big_size]
+            start = time.perf_counter()
+            big_started.set()
+            r = await client.post(url, json={'text': text, 'tokenizer_type': 'word'})
+            big_result['status'] = r.status_code
+            big_result['seconds'] = time.perf_counter() - start
+
+        t0 = time.perf_counter()
+        tasks = []
+        big_task = None
+        interval = 1.0 / rate
+        n = 0
+        while True:
+            elapsed = time.perf_counter() - t0
+            if elapsed >= before + during:
+                break
+            if big_task is None and elapsed >= before:
+                big_task = asyncio.create_task(big())
+                await big_started.wait()
+            phase = 'during' if big_task is not None else 'before'
+            tasks.append(asyncio.create_task(small(phase, t0)))
+            n += 1
+            await asyncio.sleep(max(0.0, t0 + n * interval - time.perf_counter()))
+        await asyncio.gather(*tasks)
+        if big_task is not None:
+            big_task.cancel()
+    return samples, big_result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='SanTOK main_server load test')
+    parser.add_argument('--big-size', type=int, default=10_000_000, help='Characters in the large request')
+    parser.add_argument('--rate', type=float, default=20.0, help='Small requests per second')
+    parser.add_argument('--before', type=float, default=3.0, help='Seconds of load before the large request')
+    parser.add_argument('--during', type=float, default=10.0, help='Seconds of load after the large request starts')
+    parser.add_argument('--workers', type=int, help='SANTOK_WORKERS for the server (0 = inline)')
+    parser.add_argument('--timeout', type=float, default=600.0, help='SANTOK_REQUEST_TIMEOUT for the server')
+    args = parser.parse_args(argv)
+
+    port = _free_port()
+    proc = start_server(port, args.workers, args.timeout)
+    try:
+        samples, big = asyncio.run(run_load(f'http://127.0.0.1:{port}/tokenize', args.big_size,
+                                            args.rate, args.before, args.during))
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+    print(f"Workers: {args.workers if args.workers is not None else 'default'}  "
+          f"large request: {args.big_size:,} chars")
+    for phase in ('before', 'during'):
+        lat = sorted(s[1] * 1000 for s in samples if s[2] == phase)
+        print(f"  {phase:<7} n={len(lat):<5} p50={percentile(lat, 50):8.2f}ms  "
+              f"p99={percentile(lat, 99):8.2f}ms  max={lat[-1] if lat else 0:8.2f}ms")
+    if big:
+        print(f"  large request: HTTP {big['status']} in {big['seconds']:.2f}s")
+    else:
+        print("  large request: still running at end of test")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
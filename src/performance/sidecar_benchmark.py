@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Sidecar Benchmark for SanTOK
+Compares tokenizing many short texts through the binary sidecar protocol
+with POST /tokenize over localhost HTTP.
+
+Starts sidecar_server.py (Unix socket and TCP) and an HTTP server in
+subprocesses, then tokenizes --count short texts (one corpus sentence
+each) one request at a time through:
+
+  http          POST /tokenize, default response, keep-alive connection
+  http-lean     POST /tokenize?format=columnar&fields=text,id,position
+  tcp           sidecar over TCP, one request at a time
+  uds           sidecar over a Unix socket, one request at a time
+  uds-pipeline  sidecar over a Unix socket, --window requests in flight
+
+Run: python src/performance/sidecar_benchmark.py
+     python src/performance/sidecar_benchmark.py --http lightweight --count 5000
+"""
+
+import argparse
+import http.client
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SERVERS_DIR = os.path.join(HERE, '..', 'servers')
+sys.path.append(SERVERS_DIR)
+sys.path.append(os.path.join(HERE, '..', '..'))
+
+from santok import corpus
+from sidecar_client import SidecarClient
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _wait_for(connect, proc, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("server exited during startup")
+        try:
+            connect().close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+def start_http(kind, port):
+    # Every run sends the same texts; without a result cache no run is
+    # answered from an earlier one
+    env = dict(os.environ, SANTOK_WORKERS='0', SANTOK_CACHE_BYTES='0')
+    if kind == 'main':
+        cmd = [sys.executable, '-m', 'uvicorn', 'main_server:app', '--app-dir', SERVERS_DIR,
+               '--host', '127.0.0.1', '--port', str(port), '--log-level', 'warning']
+    else:
+        cmd = [sys.executable, os.path.join(SERVERS_DIR, 'lightweight_server.py'),
+               '--production', '--host', '127.0.0.1', '--port', str(port)]
+    proc = subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    _wait_for(lambda: socket.create_connection(('127.0.0.1', port), timeout=0.5), proc)
+    return proc
+
+
+def start_sidecar(args):
+    proc = subprocess.Popen([sys.executable, os.path.join(SERVERS_DIR, 'sidecar_server.py')] + args,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return proc
+
+
+def short_texts(count, seed=corpus.DEFAULT_SEED):
+    text = corpus.generate('english', count * 120, seed)
+    sentences = [s.strip() for s in re.split(r'(?<=[.!?])\s+', text) if s.strip()]
+    while len(sentences) < count:
+        sentences += sentences
+    return [f"{s} #{i}" for i, s in enumerate(sentences[:count])]
+
+
+def run_http(port, texts, tokenizer, path):
+    conn = http.client.HTTPConnection('127.0.0.1', port)
+    headers = {'Content-Type': 'application/json'}
+    tokens = 0
+    start = time.perf_counter()
+    for text in texts:
+        conn.request('POST', path, body=json.dumps({'text': text, 'tokenizer_type': tokenizer}), headers=headers)
+        response = conn.getresponse()
+        body = json.loads(response.read())
+        if response.status != 200:
+            raise RuntimeError(f"HTTP {response.status}: {body}")
+        tokens += body['tokenCount']
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed, tokens
+
+
+def run_sidecar(address, texts, tokenizer, window):
+    with SidecarClient(address) as client:
+        start = time.perf_counter()
+        if window > 1:
+            items = client.tokenize_many(texts, tokenizer, window=window)
+        else:
+            items = [client.tokenize(text, tokenizer) for text in texts]
+        elapsed = time.perf_counter() - start
+    return elapsed, sum(item['tokenCount'] for item in items)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='SanTOK sidecar vs HTTP benchmark')
+    parser.add_argument('--count', type=int, default=2000, help='Short texts to tokenize')
+    parser.add_argument('--tokenizer', default='word', help='Tokenizer type')
+    parser.add_argument('--window', type=int, default=128, help='Requests in flight when pipelining')
+    parser.add_argument('--http', choices=['main', 'lightweight'], default='main',
+                        help='HTTP server to compare against (default: main_server under uvicorn)')
+    args = parser.parse_args(argv)
+
+    texts = short_texts(args.count)
+    chars = sum(len(t) for t in texts)
+    socket_path = os.path.join(tempfile.mkdtemp(prefix='santok-bench-'), 'sidecar.sock')
+    http_port = _free_port()
+    tcp_port = _free_port()
+    procs = [
+        start_http(args.http, http_port),
+        start_sidecar(['--socket', socket_path]),
+        start_sidecar(['--tcp', f'127.0.0.1:{tcp_port}']),
+    ]
+    try:
+        _wait_for(lambda: SidecarClient(socket_path), procs[1])
+        _wait_for(lambda: SidecarClient(('127.0.0.1', tcp_port)), procs[2])
+        # Warm every path once so imports and first-request setup are not timed
+        run_http(http_port, texts[:20], args.tokenizer, '/tokenize')
+        run_sidecar(socket_path, texts[:20], args.tokenizer, 1)
+
+        runs = [
+            ('http', lambda: run_http(http_port, texts, args.tokenizer, '/tokenize')),
+            ('http-lean', lambda: run_http(http_port, texts, args.tokenizer,
+                                           '/tokenize?format=columnar&fields=text,id,position')),
+            ('tcp', lambda: run_sidecar(('127.0.0.1', tcp_port), texts, args.tokenizer, 1)),
+            ('uds', lambda: run_sidecar(socket_path, texts, args.tokenizer, 1)),
+            ('uds-pipeline', lambda: run_sidecar(socket_path, texts, args.tokenizer, args.window)),
+        ]
+        print(f"{len(texts):,} texts, {chars:,} chars, tokenizer={args.tokenizer}, HTTP server={args.http}")
+        print(f"{'transport':<14} {'seconds':>8} {'req/s':>9} {'us/req':>8} {'tokens':>9}")
+        for name, run in runs:
+            elapsed, tokens = run()
+            print(f"{name:<14} {elapsed:8.3f} {len(texts) / elapsed:9,.0f} "
+                  f"{elapsed / len(texts) * 1e6:8.0f} {tokens:9,}")
+    finally:
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            proc.wait(timeout=30)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,306 @@
+"""
+Length-prefixed binary protocol for the SanTOK sidecar
+Used by sidecar_server.py and sidecar_client.py over a Unix domain socket
+(or TCP) when HTTP + JSON framing costs more than tokenizing the text.
+
+Every message is a frame: a big-endian u32 payload length, then the payload.
+
+Request payload:
+  u8 version | u8 op | u32 request_id | u16 flags | i64 seed | u8 tokenizer | UTF-8 text
+
+Response payload:
+  u8 version | u8 status | u32 request_id | body
+  status OK:    the encoded tokens (below); status ERROR: a UTF-8 message
+
+Tokens are the /tokenize/batch item (tokens, ids, positions) as arrays:
+  varint characterCount | varint tokenCount | u8 has_fingerprint
+  array ids | array position deltas | array token lengths (code points)
+  varint byte length | UTF-8 of all token texts joined
+  [4 zigzag varints: signatureDigit, compatDigit, textValue, textValueWithEmbedding]
+
+An array is a u8 tag and tokenCount values: raw bytes when every value is
+0..255 (the common case; no per-value work on either side), otherwise
+LEB128 varints, zigzag-mapped when there are negative values.
+
+request_id is chosen by the client and echoed back, so any number of
+requests can be in flight on one connection.
+"""
+
+import os
+import struct
+from itertools import accumulate
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+VERSION = 1
+
+FRAME = struct.Struct('>I')
+REQUEST = struct.Struct('>BBIHqB')
+RESPONSE = struct.Struct('>BBI')
+
+OP_PING = 0
+OP_TOKENIZE = 1
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+FLAG_LOWER = 1
+FLAG_DROP_SPECIALS = 2
+FLAG_COLLAPSE_REPEATS = 4
+FLAG_EMBEDDING = 8
+FLAG_FINGERPRINT = 16
+
+# Wire codes for the tokenizer types (index = code); append only
+TOKENIZER_CODES = ('space', 'word', 'char', 'grammar', 'subword', 'bpe', 'syllable', 'frequency', 'byte')
+TOKENIZER_IDS = {name: code for code, name in enumerate(TOKENIZER_CODES)}
+
+ARRAY_U8 = 0
+ARRAY_VARINT = 1
+ARRAY_ZIGZAG = 2
+
+FINGERPRINT_KEYS = ('signatureDigit', 'compatDigit', 'textValue', 'textValueWithEmbedding')
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    try:
+        return int(value) if value not in (None, '') else default
+    except ValueError:
+        return default
+
+
+# Largest accepted frame payload (SANTOK_SIDECAR_MAX_FRAME, default 64 MiB)
+MAX_FRAME = _env_int('SANTOK_SIDECAR_MAX_FRAME', 64 << 20)
+
+
+class ProtocolError(ValueError):
+    """A malformed or unsupported frame"""
+
+
+# -- varints and arrays --
+
+def encode_varints(values: Sequence[int], out: Optional[bytearray] = None) -> bytearray:
+    """Append unsigned LEB128 varints to out"""
+    out = bytearray() if out is None else out
+    append = out.append
+    for v in values:
+        while v >= 0x80:
+            append((v & 0x7F) | 0x80)
+            v >>= 7
+        append(v)
+    return out
+
+
+def decode_varints(buf, pos: int, count: int) -> Tuple[List[int], int]:
+    """count varints from buf[pos:]; returns (values, new position)"""
+    out = []
+    append = out.append
+    try:
+        for _ in range(count):
+            b = buf[pos]
+            pos += 1
+            if b < 0x80:
+                append(b)
+                continue
+            value = b & 0x7F
+            shift = 7
+            while True:
+                b = buf[pos]
+                pos += 1
+                value |= (b & 0x7F) << shift
+                if b < 0x80:
+                    break
+                shift += 7
+            append(value)
+    except IndexError:
+        raise ProtocolError("truncated varint")
+    return out, pos
+
+
+def _zigzag(values: Sequence[int]) -> List[int]:
+    return [v << 1 if v >= 0 else ((-v) << 1) - 1 for v in values]
+
+
+def _unzigzag(values: Sequence[int]) -> List[int]:
+    return [v >> 1 if not v & 1 else -((v + 1) >> 1) for v in values]
+
+
+def encode_array(values: Sequence[int], out: bytearray):
+    """Append one array (tag + values) to out"""
+    if not values:
+        out.append(ARRAY_U8)
+        return
+    lo = min(values)
+    hi = max(values)
+    if lo >= 0 and hi < 256:
+        out.append(ARRAY_U8)
+        out += bytes(values)
+    elif lo >= 0:
+        out.append(ARRAY_VARINT)
+        encode_varints(values, out)
+    else:
+        out.append(ARRAY_ZIGZAG)
+        encode_varints(_zigzag(values), out)
+
+
+def decode_array(buf, pos: int, count: int) -> Tuple[List[int], int]:
+    try:
+        tag = buf[pos]
+    except IndexError:
+        raise ProtocolError("truncated array")
+    pos += 1
+    if tag == ARRAY_U8:
+        end = pos + count
+        if end > len(buf):
+            raise ProtocolError("truncated array")
+        return list(buf[pos:end]), end
+    if tag == ARRAY_VARINT:
+        return decode_varints(buf, pos, count)
+    if tag == ARRAY_ZIGZAG:
+        values, pos = decode_varints(buf, pos, count)
+        return _unzigzag(values), pos
+    raise ProtocolError(f"unknown array tag {tag}")
+
+
+# -- frames --
+
+def frame(payload: bytes) -> bytes:
+    return FRAME.pack(len(payload)) + payload
+
+
+def split_frames(buf: bytearray, max_frame: Optional[int] = None) -> Tuple[List[bytes], int]:
+    """
+    Complete frame payloads at the start of buf and the number of bytes
+    they use (the caller drops those). Raises ProtocolError for a frame
+    larger than max_frame.
+    """
+    max_frame = MAX_FRAME if max_frame is None else max_frame
+    frames = []
+    pos = 0
+    end = len(buf)
+    while end - pos >= 4:
+        (length,) = FRAME.unpack_from(buf, pos)
+        if length > max_frame:
+            raise ProtocolError(f"frame too large: {length} > {max_frame} bytes")
+        if end - pos - 4 < length:
+            break
+        frames.append(bytes(buf[pos + 4:pos + 4 + length]))
+        pos += 4 + length
+    return frames, pos
+
+
+# -- requests --
+
+def options_to_flags(lower: bool = False, drop_specials: bool = False, collapse_repeats: bool = False,
+                     embedding: bool = False, fingerprint: bool = False) -> int:
+    return ((FLAG_LOWER if lower else 0) | (FLAG_DROP_SPECIALS if drop_specials else 0)
+            | (FLAG_COLLAPSE_REPEATS if collapse_repeats else 0) | (FLAG_EMBEDDING if embedding else 0)
+            | (FLAG_FINGERPRINT if fingerprint else 0))
+
+
+def encode_request(request_id: int, text: str = '', tokenizer_type: str = 'word', flags: int = 0,
+                   seed: int = 12345, op: int = OP_TOKENIZE) -> bytes:
+    try:
+        code = TOKENIZER_IDS[tokenizer_type]
+    except KeyError:
+        raise ValueError(f"Unknown tokenizer type: {tokenizer_type}")
+    payload = REQUEST.pack(VERSION, op, request_id, flags, seed, code) + text.encode('utf-8')
+    return frame(payload)
+
+
+def peek_request_id(payload: bytes) -> int:
+    """request_id of a request that failed to decode (0 if it is too short to tell)"""
+    return struct.unpack_from('>I', payload, 2)[0] if len(payload) >= 6 else 0
+
+
+def decode_request(payload: bytes) -> Tuple[int, int, Dict[str, Any], str]:
+    """(op, request_id, params, text); params use the /tokenize option names"""
+    if len(payload) < REQUEST.size:
+        raise ProtocolError("truncated request")
+    version, op, request_id, flags, seed, code = REQUEST.unpack_from(payload)
+    if version != VERSION:
+        raise ProtocolError(f"unsupported protocol version {version}")
+    if code >= len(TOKENIZER_CODES):
+        raise ProtocolError(f"unknown tokenizer code {code}")
+    params = {
+        'tokenizer_type': TOKENIZER_CODES[code],
+        'seed': seed,
+        'lower': bool(flags & FLAG_LOWER),
+        'drop_specials': bool(flags & FLAG_DROP_SPECIALS),
+        'collapse_repeats': bool(flags & FLAG_COLLAPSE_REPEATS),
+        'embedding': bool(flags & FLAG_EMBEDDING),
+        'fingerprint': bool(flags & FLAG_FINGERPRINT),
+    }
+    try:
+        text = payload[REQUEST.size:].decode('utf-8')
+    except UnicodeDecodeError as e:
+        raise ProtocolError(f"text is not valid UTF-8: {e}")
+    return op, request_id, params, text
+
+
+# -- responses --
+
+def encode_tokens(item: Dict[str, Any]) -> bytes:
+    """Response frame body for a tokenize_batch_task item"""
+    texts = item['tokens']
+    positions = item['positions']
+    out = bytearray()
+    encode_varints((item['characterCount'], len(texts)), out)
+    fingerprint = item.get('fingerprint')
+    out.append(1 if fingerprint else 0)
+    encode_array(item['ids'], out)
+    encode_array([b - a for a, b in zip([0] + positions, positions)], out)
+    encode_array(list(map(len, texts)), out)
+    blob = ''.join(texts).encode('utf-8', 'surrogatepass')
+    encode_varints((len(blob),), out)
+    out += blob
+    if fingerprint:
+        encode_varints(_zigzag([int(fingerprint[key]) for key in FINGERPRINT_KEYS]), out)
+    return bytes(out)
+
+
+def decode_tokens(body, pos: int = 0) -> Dict[str, Any]:
+    """Inverse of encode_tokens()"""
+    (chars, count), pos = decode_varints(body, pos, 2)
+    if pos >= len(body):
+        raise ProtocolError("truncated tokens")
+    has_fingerprint = body[pos]
+    pos += 1
+    ids, pos = decode_array(body, pos, count)
+    deltas, pos = decode_array(body, pos, count)
+    lengths, pos = decode_array(body, pos, count)
+    (size,), pos = decode_varints(body, pos, 1)
+    if pos + size > len(body):
+        raise ProtocolError("truncated token text")
+    joined = bytes(body[pos:pos + size]).decode('utf-8', 'surrogatepass')
+    pos += size
+    # accumulate(..., initial=0) is Python 3.8+
+    offsets = [0] + list(accumulate(lengths))
+    item = {
+        'tokens': [joined[a:b] for a, b in zip(offsets, offsets[1:])],
+        'ids': ids,
+        'positions': list(accumulate(deltas)),
+        'tokenCount': count,
+        'characterCount': chars,
+    }
+    if has_fingerprint:
+        values, pos = decode_varints(body, pos, len(FINGERPRINT_KEYS))
+        item['fingerprint'] = dict(zip(FINGERPRINT_KEYS, _unzigzag(values)))
+    return item
+
+
+def encode_response(request_id: int, status: int, body: bytes) -> bytes:
+    return frame(RESPONSE.pack(VERSION, status, request_id) + body)
+
+
+def encode_error(request_id: int, message: str) -> bytes:
+    return encode_response(request_id, STATUS_ERROR, message.encode('utf-8', 'replace'))
+
+
+def decode_response(payload: bytes) -> Tuple[int, int, bytes]:
+    """(request_id, status, body)"""
+    if len(payload) < RESPONSE.size:
+        raise ProtocolError("truncated response")
+    version, status, request_id = RESPONSE.unpack_from(payload)
+    if version != VERSION:
+        raise ProtocolError(f"unsupported protocol version {version}")
+    return request_id, status, memoryview(payload)[RESPONSE.size:]
@@ -0,0 +1,73 @@
+"""
+JSON serialization for the SanTOK servers
+Responses are built from plain dicts, lists, strings and numbers, so they
+can go straight to bytes without model validation or jsonable_encoder.
+
+- orjson is used when it is installed (several times faster on
+  token-heavy responses).
+- Otherwise the stdlib C encoder writes compact ASCII JSON. A Python-level
+  writer for homogeneous arrays was measured and is slower than the C
+  encoder, so the stdlib path does not try to beat it.
+- Values orjson cannot handle (integers over 64 bits, lone surrogates)
+  fall back to the stdlib encoder for that call.
+
+loads() parses request bodies with the same backend.
+Set SANTOK_JSON=json to force the stdlib path.
+"""
+
+import json
+import os
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if os.environ.get('SANTOK_JSON', '').lower() == 'json':
+    orjson = None
+
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+# ASCII output: the C encoder's ASCII path is faster than its UTF-8 one, and
+# lone surrogates (allowed as JSON escapes in requests) stay valid
+_encoder = json.JSONEncoder(separators=(',', ':'))
+
+
+def dumps_stdlib(obj: Any) -> bytes:
+    """Compact JSON with the stdlib encoder"""
+    return _encoder.encode(obj).encode('ascii')
+
+
+def dumps(obj: Any) -> bytes:
+    """Compact UTF-8 JSON bytes"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass
+    return dumps_stdlib(obj)
+
+
+def dumps_line(obj: Any) -> bytes:
+    """One NDJSON record (JSON followed by a newline)"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+        except TypeError:
+            pass
+    return dumps_stdlib(obj) + b'\n'
+
+
+def loads(data: bytes) -> Any:
+    """Parse a JSON request body (raises ValueError on invalid JSON)"""
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson rejects lone surrogate escapes the stdlib accepts;
+            # retry there so both paths accept the same bodies
+            pass
+    if isinstance(data, (bytes, bytearray)):
+        data = data.decode('utf-8')
+    return json.loads(data)
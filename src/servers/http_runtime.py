@@ -0,0 +1,256 @@
+"""
+Production runtime for the stdlib SanTOK servers
+Runs an http.server handler class without extra dependencies:
+
+- Threaded mode: ThreadingHTTPServer with HTTP/1.1 keep-alive. Idle
+  connections close after keepalive seconds.
+- Pre-fork mode: N worker processes serve the same port. Each worker binds
+  its own listening socket with SO_REUSEPORT and the kernel spreads
+  connections across them. Without SO_REUSEPORT, the workers share one
+  socket bound by the parent. Workers that die are restarted. Each worker
+  labels its metrics with its slot (worker="0".."N-1"), which a restarted
+  worker takes over.
+- Request bodies need a Content-Length and are capped at max_body bytes
+  (411 / 413 otherwise).
+- Graceful shutdown: on SIGTERM or SIGINT the server stops accepting,
+  answers in-flight requests with "Connection: close" and waits for them.
+
+Configuration (environment, overridden by command line flags):
+  SANTOK_HTTP_WORKERS  worker processes for pre-fork mode (default: 1)
+  SANTOK_MAX_BODY      largest accepted request body in bytes (default: 64 MiB)
+  SANTOK_KEEPALIVE     idle keep-alive timeout in seconds (default: 5)
+"""
+
+import argparse
+import http.server
+import os
+import signal
+import socket
+import socketserver
+import threading
+import time
+from typing import Any, Optional
+
+import fast_json
+import metrics
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    try:
+        return int(value) if value not in (None, '') else default
+    except ValueError:
+        return default
+
+
+MAX_BODY = _env_int('SANTOK_MAX_BODY', 64 << 20)
+
+
+class RequestError(Exception):
+    """A request that must be answered with an HTTP error status"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def read_body(handler: http.server.BaseHTTPRequestHandler, max_bytes: Optional[int] = None) -> bytes:
+    """
+    Read exactly the request body. Raises RequestError (and marks the
+    connection for closing when the body is left unread).
+    """
+    max_bytes = MAX_BODY if max_bytes is None else max_bytes
+    if 'chunked' in (handler.headers.get('Transfer-Encoding') or '').lower():
+        handler.close_connection = True
+        raise RequestError(411, "Chunked request bodies are not supported; send Content-Length")
+    length = handler.headers.get('Content-Length')
+    if length is None:
+        if handler.command in ('POST', 'PUT', 'PATCH'):
+            handler.close_connection = True
+            raise RequestError(411, "Content-Length required")
+        return b''
+    try:
+        length = int(length)
+        if length < 0:
+            raise ValueError(length)
+    except ValueError:
+        handler.close_connection = True
+        raise RequestError(400, f"Invalid Content-Length: {handler.headers.get('Content-Length')}")
+    if length > max_bytes:
+        handler.close_connection = True
+        raise RequestError(413, f"Request body too large: {length} > {max_bytes} bytes")
+    body = handler.rfile.read(length)
+    if len(body) != length:
+        handler.close_connection = True
+        raise RequestError(400, "Request body shorter than Content-Length")
+    return body
+
+
+def read_json(handler: http.server.BaseHTTPRequestHandler, max_bytes: Optional[int] = None) -> Any:
+    """read_body() parsed as JSON ({} for an empty body)"""
+    body = read_body(handler, max_bytes)
+    if not body:
+        return {}
+    try:
+        return fast_json.loads(body)
+    except ValueError as e:
+        raise RequestError(400, f"Invalid JSON body: {e}")
+
+
+class ProductionHTTPServer(http.server.ThreadingHTTPServer):
+    """ThreadingHTTPServer that can share its port (SO_REUSEPORT) and drain on shutdown"""
+
+    daemon_threads = False      # server_close() waits for in-flight requests
+    block_on_close = True
+    request_queue_size = 128
+
+    def __init__(self, address, handler, reuse_port: bool = False, bind_and_activate: bool = True):
+        self.reuse_port = reuse_port
+        self.draining = False
+        super().__init__(address, handler, bind_and_activate)
+
+    def server_bind(self):
+        if self.reuse_port:
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+
+    def drain(self):
+        """Stop accepting; in-flight keep-alive connections close after their current request"""
+        self.draining = True
+        threading.Thread(target=self.shutdown, daemon=True).start()
+
+
+class _DrainingHandler:
+    """Mixed into handler classes for production mode"""
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out as separate writes; on a kept-alive connection
+    # Nagle + delayed ACK would hold the body back ~40ms
+    disable_nagle_algorithm = True
+
+    def end_headers(self):
+        if getattr(self.server, 'draining', False):
+            self.send_header('Connection', 'close')
+        super().end_headers()
+
+
+def production_handler(handler_cls, keepalive: float):
+    """handler_cls with HTTP/1.1 keep-alive, an idle timeout and drain support"""
+    return type(handler_cls.__name__, (_DrainingHandler, handler_cls), {'timeout': keepalive})
+
+
+def _serve(httpd: socketserver.BaseServer):
+    def stop(signum, frame):
+        httpd.drain()
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    try:
+        httpd.serve_forever()
+    finally:
+        httpd.server_close()
+
+
+def serve(handler_cls, host: str = '', port: int = 8000, workers: int = 1, keepalive: float = 5.0,
+          log=print):
+    """Run handler_cls in production mode until SIGTERM/SIGINT"""
+    handler = production_handler(handler_cls, keepalive)
+    if workers > 1 and not hasattr(os, 'fork'):
+        log("Pre-fork mode needs os.fork; running a single process")
+        workers = 1
+    if workers <= 1:
+        httpd = ProductionHTTPServer((host, port), handler)
+        log(f"Serving on {host or '0.0.0.0'}:{httpd.server_address[1]} (threaded, keep-alive)")
+        _serve(httpd)
+        return
+    _prefork(handler, host, port, workers, log)
+
+
+def _prefork(handler, host, port, workers, log):
+    reuse_port = hasattr(socket, 'SO_REUSEPORT')
+    shared = reserved = None
+    if reuse_port and port == 0:
+        # Pick one free port for all workers. The socket holding it is bound
+        # but never listens, so the kernel hands it no connections.
+        reserved = socket.socket(ProductionHTTPServer.address_family, socket.SOCK_STREAM)
+        reserved.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        reserved.bind((host, 0))
+        port = reserved.getsockname()[1]
+    if not reuse_port:
+        # One socket bound here and inherited by every worker
+        shared = ProductionHTTPServer((host, port), handler)
+        port = shared.server_address[1]
+
+    def spawn(slot):
+        pid = os.fork()
+        if pid:
+            children[pid] = (time.monotonic(), slot)
+            return
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        metrics.set_worker(slot)
+        code = 0
+        try:
+            httpd = shared or ProductionHTTPServer((host, port), handler, reuse_port=True)
+            _serve(httpd)
+        except OSError as e:
+            log(f"Worker {os.getpid()} failed: {e}")
+            code = 3
+        finally:
+            os._exit(code)
+
+    stopping = []
+
+    def stop(signum, frame):
+        stopping.append(signum)
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    children = {}
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for slot in range(workers):
+        spawn(slot)
+    log(f"Serving on {host or '0.0.0.0'}:{port} with {workers} pre-forked workers "
+        f"({'SO_REUSEPORT' if reuse_port else 'shared socket'})")
+    quick_exits = 0
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        child = children.pop(pid, None)
+        if child is None or stopping:
+            continue
+        started, slot = child
+        # Restart crashed workers, but give up on a crash loop (e.g. port in use)
+        quick_exits = quick_exits + 1 if time.monotonic() - started < 1.0 else 0
+        if quick_exits >= workers * 2:
+            log("Workers keep exiting at startup; shutting down")
+            stop(signal.SIGTERM, None)
+            continue
+        log(f"Worker {pid} exited ({status}); restarting")
+        spawn(slot)
+    if shared is not None:
+        shared.server_close()
+    if reserved is not None:
+        reserved.close()
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Command line flags shared by the stdlib servers"""
+    parser.add_argument('--host', default='', help='Interface to bind (default: all)')
+    parser.add_argument('--port', type=int, default=8000, help='Port (default: 8000)')
+    parser.add_argument('--production', action='store_true',
+                        help='Threaded server with HTTP/1.1 keep-alive and graceful shutdown')
+    parser.add_argument('--workers', type=int, default=_env_int('SANTOK_HTTP_WORKERS', 1),
+                        help='Pre-forked worker processes (implies --production)')
+    parser.add_argument('--max-body', type=int, default=MAX_BODY,
+                        help='Largest accepted request body in bytes')
+    parser.add_argument('--keepalive', type=float, default=float(_env_int('SANTOK_KEEPALIVE', 5)),
+                        help='Idle keep-alive timeout in seconds')
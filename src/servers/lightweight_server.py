@@ -3,6 +3,7 @@ Simple HTTP Backend Server for SanTOK
 Uses only standard library - no external dependencies
 """
 
+import argparse
 import http.server
 import socketserver
 import json
@@ -12,8 +13,9 @@ import os
 import time
 from typing import Dict, List, Any
 
-# Add src directory to path to import backend files
+# Add src directory (backend files) and this directory (server helpers) to path
 sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # Import your existing backend files
 try:
@@ -25,6 +27,15 @@ except ImportError as e:
     print(f"Error importing core_tokenizer.py: {e}")
     sys.exit(1)
 
+import server_tasks
+from result_cache import ResultCache, cache_key
+import fast_json
+import http_runtime
+import metrics
+
+# Identical text + options are served from here (SANTOK_CACHE_* settings)
+cache = ResultCache.from_env()
+
 # Tokenizer mapping
 TOKENIZERS = {
     'space': KT.tokenize_space,
@@ -38,6 +49,25 @@ TOKENIZERS = {
     'byte': KT.tokenize_bytes
 }
 
+# Prometheus counters and latency histograms (GET /metrics)
+request_metrics = metrics.Metrics(tokenizers=TOKENIZERS)
+request_metrics.add_stats('cache', 'Result cache', cache.stats,
+                          counters=('hits', 'misses', 'disk_hits', 'stores', 'evictions', 'expirations'),
+                          gauges=('entries', 'bytes', 'hit_rate', 'disk_bytes'))
+
+# Paths reported as-is in metrics; anything else is counted as "other"
+ENDPOINTS = {'/', '/tokenize', '/tokenize/batch', '/analyze', '/compress', '/validate',
+             '/cache/stats', '/metrics'}
+
+# Largest accepted /tokenize/batch request (number of texts)
+BATCH_MAX = int(os.environ.get('SANTOK_BATCH_MAX', '1000'))
+
+# Tokens per record in streamed /tokenize responses
+STREAM_BATCH = int(os.environ.get('SANTOK_STREAM_BATCH', '1000'))
+
+# Per-stage timings returned as a Server-Timing header (opt-in: SANTOK_SERVER_TIMING=1)
+SERVER_TIMING = os.environ.get('SANTOK_SERVER_TIMING', '0') not in ('', '0')
+
 def _stream_name_for(tokenizer_type: str) -> str:
     if tokenizer_type == 'bpe':
         return 'subword_bpe'
@@ -52,30 +82,85 @@ class CORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Access-Control-Expose-Headers', 'Server-Timing')
         super().end_headers()
 
+    def send_response(self, code, message=None):
+        record = getattr(self, '_metrics_record', None)
+        if record is not None:
+            record.status = code
+        super().send_response(code, message)
+
+    def tracked(self, handler):
+        """Run handler() counted and timed under this request's path"""
+        path = self.path.partition('?')[0]
+        with request_metrics.track(path if path in ENDPOINTS else 'other') as self._metrics_record:
+            try:
+                handler()
+            finally:
+                self._metrics_record = None
+
     def do_OPTIONS(self):
         self.send_response(200)
+        self.send_header('Content-Length', '0')
         self.end_headers()
 
     def do_POST(self):
-        if self.path == '/tokenize':
-            self.handle_tokenize()
-        elif self.path == '/analyze':
+        self.tracked(self.handle_post)
+
+    def handle_post(self):
+        self._request_start = time.perf_counter()
+        # Read the whole body up front so a keep-alive connection stays in
+        # sync even when a handler ignores it
+        try:
+            self.json_body = http_runtime.read_json(self)
+        except http_runtime.RequestError as e:
+            self.send_error(e.status, e.message)
+            return
+        if not SERVER_TIMING:
+            return self.route_post()
+        with KT.instrument():
+            self.route_post()
+
+    def route_post(self):
+        path, _, query = self.path.partition('?')
+        if path == '/tokenize':
+            if self.wants_stream(query):
+                self.handle_tokenize_stream()
+            else:
+                self.handle_tokenize(query)
+        elif path == '/tokenize/batch':
+            self.handle_tokenize_batch()
+        elif path == '/analyze':
             self.handle_analyze()
-        elif self.path == '/compress':
+        elif path == '/compress':
             self.handle_compress()
-        elif self.path == '/validate':
+        elif path == '/validate':
             self.handle_validate()
         else:
             self.send_error(404, "Not Found")
 
     def do_GET(self):
+        self.tracked(self.route_get)
+
+    def route_get(self):
         if self.path == '/':
             self.handle_root()
+        elif self.path == '/cache/stats':
+            self.send_json_response(cache.stats())
+        elif self.path == '/metrics':
+            self.send_metrics()
         else:
             self.send_error(404, "Not Found")
 
+    def send_metrics(self):
+        body = request_metrics.render()
+        self.send_response(200)
+        self.send_header('Content-Type', metrics.CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
     def handle_root(self):
         response = {
             "message": "SanTOK API is running!",
@@ -84,119 +169,227 @@ class CORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
         }
         self.send_json_response(response)
 
-    def handle_tokenize(self):
+    def handle_tokenize(self, query: str = ''):
+        # ?format=columnar and/or ?fields=text,id for a lean response
+        options = urllib.parse.parse_qs(query)
+        response_format = options.get('format', ['objects'])[-1]
+        if response_format not in server_tasks.RESPONSE_FORMATS:
+            self.send_error(400, f"Unknown format: {response_format}")
+            return
         try:
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            data = json.loads(post_data.decode('utf-8'))
-            
-            # Extract parameters
-            text = data.get('text', '')
-            tokenizer_type = data.get('tokenizer_type', 'word')
-            lower = data.get('lower', False)
-            drop_specials = data.get('drop_specials', False)
-            collapse_repeats = data.get('collapse_repeats', False)
-            embedding = data.get('embedding', False)
-            seed = data.get('seed', 12345)
-            embedding_bit = bool(data.get('embedding_bit', 0)) or bool(embedding)
-            
-            # Preprocess text
-            processed_text = self.preprocess_text(text, lower, drop_specials, collapse_repeats)
-            
-            # Get tokenizer function
-            if tokenizer_type not in TOKENIZERS:
-                raise ValueError(f"Unknown tokenizer type: {tokenizer_type}")
-            
-            tokenizer_func = TOKENIZERS[tokenizer_type]
-            
-            # Tokenize
-            start_time = time.time()
-            tokens = tokenizer_func(processed_text)
-            processing_time = (time.time() - start_time) * 1000  # Convert to ms
-            
-            # Generate colors
-            colors = self.generate_token_colors(tokens)
-            
-            # Create token objects
-            # Build engine digits/metrics from KT.TextTokenizer so output matches CLI
-            try:
-                engine = KT.TextTokenizer(seed, embedding_bit)
-                streams = engine.build(processed_text)
-                stream_name = _stream_name_for(tokenizer_type)
-                ts = streams.get(stream_name)
-                frontend_digits = [t.frontend for t in ts.tokens] if ts else []
-                backend_scaled = [t.backend_scaled for t in ts.tokens] if ts else []
-                content_ids = [t.content_id for t in ts.tokens] if ts else []
-            except Exception:
-                frontend_digits = []
-                backend_scaled = []
-                content_ids = []
-
-            token_objects = []
-            position = 0
-            for i, token in enumerate(tokens):
-                # Handle both string tokens and complex token objects
-                if isinstance(token, str):
-                    token_text = token
-                    token_id = frontend_digits[i] if i < len(frontend_digits) else i
-                    token_length = len(token_text)
-                    token_type = tokenizer_type
-                else:
-                    # Complex token object from core_tokenizer
-                    token_text = token.get('text', '')
-                    token_id = frontend_digits[i] if i < len(frontend_digits) else i
-                    token_length = token.get('length', len(token_text))
-                    token_type = token.get('type', tokenizer_type)
-                    # prefer real index if available
-                    if 'index' in token:
-                        position = token.get('index', position)
-                
-                token_obj = {
-                    "text": token_text,
-                    "id": token_id,
-                    "position": position,
-                    "length": token_length,
-                    "type": token_type,
-                    "color": colors[i] if i < len(colors) else colors[i % len(colors)]
-                }
-                token_objects.append(token_obj)
-                position += token_length + 1  # +1 for space
-            
-            # Calculate metrics
-            memory_usage = len(processed_text.encode('utf-8')) / 1024  # KB
-            # Count actual word tokens (not spaces/punctuation)
-            word_tokens = [t for t in token_objects if t.get('type') == 'word']
-            compression_ratio = len(word_tokens) / len(processed_text.split()) if processed_text.split() else 1.0
+            projection = server_tasks.parse_fields(options['fields'][-1] if 'fields' in options else None)
+        except ValueError as e:
+            self.send_error(400, str(e))
+            return
+        try:
+            data = self.json_body
+            metrics.annotate(data.get('tokenizer_type', 'word'), chars=len(data.get('text', '')))
+            result = self.cached_tokenize(data)
+            metrics.annotate(tokens=result['tokenCount'])
+            self.send_json_response(server_tasks.project_result(result, response_format, projection))
             
-            # Calculate fingerprint
-            fingerprint = self.calculate_fingerprint(processed_text, tokens, embedding_bit)
+        except Exception as e:
+            self.send_error(500, f"Tokenization error: {str(e)}")
+
+    def cached_tokenize(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """The /tokenize result for a request body, from the result cache when it is there"""
+        key = None
+        if cache.admits(len(data.get('text', ''))):
+            key = cache_key('lightweight.tokenize', dict(data, collapse_repeats=data.get('collapse_repeats', False)))
+            result = cache.get(key)
+            if result is not None:
+                return result
+        result = self.tokenize_result(data)
+        if key is not None:
+            cache.put(key, result)
+        return result
+
+    def tokenize_result(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        # Extract parameters
+        text = data.get('text', '')
+        tokenizer_type = data.get('tokenizer_type', 'word')
+        lower = data.get('lower', False)
+        drop_specials = data.get('drop_specials', False)
+        collapse_repeats = data.get('collapse_repeats', False)
+        embedding = data.get('embedding', False)
+        seed = data.get('seed', 12345)
+        embedding_bit = bool(data.get('embedding_bit', 0)) or bool(embedding)
+
+        # Preprocess text
+        processed_text = self.preprocess_text(text, lower, drop_specials, collapse_repeats)
+        
+        # Get tokenizer function
+        if tokenizer_type not in TOKENIZERS:
+            raise ValueError(f"Unknown tokenizer type: {tokenizer_type}")
+        
+        tokenizer_func = TOKENIZERS[tokenizer_type]
+        
+        # Tokenize
+        start_time = time.time()
+        tokens = tokenizer_func(processed_text)
+        processing_time = (time.time() - start_time) * 1000  # Convert to ms
+        
+        # Generate colors
+        colors = self.generate_token_colors(tokens)
+        
+        # Create token objects
+        # Build engine digits/metrics from KT.TextTokenizer so output matches CLI
+        try:
+            engine = KT.TextTokenizer(seed, embedding_bit)
+            streams = engine.build(processed_text)
+            stream_name = _stream_name_for(tokenizer_type)
+            ts = streams.get(stream_name)
+            frontend_digits = [t.frontend for t in ts.tokens] if ts else []
+            backend_scaled = [t.backend_scaled for t in ts.tokens] if ts else []
+            content_ids = [t.content_id for t in ts.tokens] if ts else []
+        except Exception:
+            frontend_digits = []
+            backend_scaled = []
+            content_ids = []
+
+        token_objects = []
+        position = 0
+        for i, token in enumerate(tokens):
+            # Handle both string tokens and complex token objects
+            if isinstance(token, str):
+                token_text = token
+                token_id = frontend_digits[i] if i < len(frontend_digits) else i
+                token_length = len(token_text)
+                token_type = tokenizer_type
+            else:
+                # Complex token object from core_tokenizer
+                token_text = token.get('text', '')
+                token_id = frontend_digits[i] if i < len(frontend_digits) else i
+                token_length = token.get('length', len(token_text))
+                token_type = token.get('type', tokenizer_type)
+                # prefer real index if available
+                if 'index' in token:
+                    position = token.get('index', position)
             
-            # Create result
-            result = {
-                "tokens": token_objects,
-                "tokenCount": len(tokens),
-                "characterCount": len(processed_text),
-                "tokenizerType": tokenizer_type,
-                "processingTime": processing_time,
-                "memoryUsage": memory_usage,
-                "compressionRatio": compression_ratio,
-                "reversibility": True,
-                "fingerprint": fingerprint,
-                "frontendDigits": frontend_digits if frontend_digits else None,
-                "backendScaled": backend_scaled if backend_scaled else None,
-                "contentIds": content_ids if content_ids else None,
+            token_obj = {
+                "text": token_text,
+                "id": token_id,
+                "position": position,
+                "length": token_length,
+                "type": token_type,
+                "color": colors[i] if i < len(colors) else colors[i % len(colors)]
             }
-            
-            self.send_json_response(result)
-            
+            token_objects.append(token_obj)
+            position += token_length + 1  # +1 for space
+        
+        # Calculate metrics
+        memory_usage = len(processed_text.encode('utf-8')) / 1024  # KB
+        # Count actual word tokens (not spaces/punctuation)
+        word_tokens = [t for t in token_objects if t.get('type') == 'word']
+        compression_ratio = len(word_tokens) / len(processed_text.split()) if processed_text.split() else 1.0
+        
+        # Calculate fingerprint
+        fingerprint = self.calculate_fingerprint(processed_text, tokens, embedding_bit)
+        
+        # Create result
+        result = {
+            "tokens": token_objects,
+            "tokenCount": len(tokens),
+            "characterCount": len(processed_text),
+            "tokenizerType": tokenizer_type,
+            "processingTime": processing_time,
+            "memoryUsage": memory_usage,
+            "compressionRatio": compression_ratio,
+            "reversibility": True,
+            "fingerprint": fingerprint,
+            "frontendDigits": frontend_digits if frontend_digits else None,
+            "backendScaled": backend_scaled if backend_scaled else None,
+            "contentIds": content_ids if content_ids else None,
+        }
+        return result
+
+    def wants_stream(self, query: str) -> bool:
+        """?stream=1 or Accept: application/x-ndjson"""
+        flag = urllib.parse.parse_qs(query).get('stream', [''])[-1].lower()
+        if flag in ('1', 'true', 'yes'):
+            return True
+        return 'application/x-ndjson' in (self.headers.get('Accept') or '')
+
+    def handle_tokenize_stream(self):
+        """NDJSON /tokenize: header, token batches and trailer sent as HTTP/1.1 chunks"""
+        try:
+            data = self.json_body
+            tokenizer_type = data.get('tokenizer_type', 'word')
+            if tokenizer_type not in TOKENIZERS:
+                self.send_error(400, f"Unknown tokenizer type: {tokenizer_type}")
+                return
+            metrics.annotate(tokenizer_type, chars=len(data.get('text', '')))
+            params = dict(data)
+            params['tokenizer_type'] = tokenizer_type
+            params.setdefault('collapse_repeats', False)
+            # compressionRatio as tokenize_result() computes it
+            records = server_tasks.stream_tokenize(params, STREAM_BATCH, word_ratio=True)
+            # Run up to the header so bad input still gets a plain error response
+            first = next(records)
         except Exception as e:
             self.send_error(500, f"Tokenization error: {str(e)}")
+            return
+
+        self.protocol_version = 'HTTP/1.1'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.send_header('Connection', 'close')
+        self.send_server_timing()
+        self.end_headers()
+        try:
+            self.write_chunk(fast_json.dumps_line(first))
+            for record in records:
+                self.write_chunk(fast_json.dumps_line(record))
+        except (BrokenPipeError, ConnectionResetError):
+            return
+        except Exception as e:
+            # Headers are gone; report the failure in-band and end the stream
+            print(f"Error while streaming tokens: {e}")
+            self.write_chunk(fast_json.dumps_line({"type": "error", "detail": str(e)}))
+        self.wfile.write(b'0\r\n\r\n')
+
+    def write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b'\r\n')
+
+    def handle_tokenize_batch(self):
+        try:
+            data = self.json_body
+            texts = data.get('texts', [])
+            tokenizer_type = data.get('tokenizer_type', 'word')
+            if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+                self.send_error(400, "texts must be a list of strings")
+                return
+            if tokenizer_type not in TOKENIZERS:
+                self.send_error(400, f"Unknown tokenizer type: {tokenizer_type}")
+                return
+            if len(texts) > BATCH_MAX:
+                self.send_error(413, f"Batch too large: {len(texts)} > {BATCH_MAX} texts")
+                return
+
+            metrics.annotate(tokenizer_type, chars=sum(len(t) for t in texts))
+            start_time = time.perf_counter()
+            params = {key: value for key, value in data.items() if key != 'texts'}
+            params['tokenizer_type'] = tokenizer_type
+            params.setdefault('collapse_repeats', False)
+            # Identical texts are computed once and fanned back out in order
+            unique, order = server_tasks.dedupe_texts(texts)
+            computed = server_tasks.tokenize_batch_task(params, unique)
+            metrics.annotate(tokens=sum(computed[i]['tokenCount'] for i in order))
+            self.send_json_response({
+                "tokenizerType": tokenizer_type,
+                "count": len(texts),
+                "uniqueCount": len(unique),
+                "processingTime": (time.perf_counter() - start_time) * 1000,
+                "items": [computed[i] for i in order],
+            })
+        except Exception as e:
+            print(f"Error in batch tokenization: {e}")
+            self.send_error(500, f"Batch tokenization error: {str(e)}")
 
     def handle_analyze(self):
         try:
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            data = json.loads(post_data.decode('utf-8'))
+            data = self.json_body
             
             # For now, return a simple analysis
             response = {
@@ -227,18 +420,21 @@ class CORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
 
     def handle_compress(self):
         try:
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            data = json.loads(post_data.decode('utf-8'))
+            data = self.json_body
             text = data.get('text', '')
             tokenizer_type = data.get('tokenizer_type', 'word')
             lower = data.get('lower', False)
             drop_specials = data.get('drop_specials', False)
             collapse_repeats = data.get('collapse_repeats', False)
             processed_text = self.preprocess_text(text, lower, drop_specials, collapse_repeats)
+            metrics.annotate(tokenizer_type, chars=len(text))
 
+            # Same tokens as /tokenize on this input, from the result cache when it is there
+            tokens = None
+            if tokenizer_type in TOKENIZERS:
+                tokens = server_tasks.tokens_from_result(self.cached_tokenize(data))
             stream_name = _stream_name_for(tokenizer_type)
-            analysis = KT.analyze_compression_efficiency(processed_text, stream_name)
+            analysis = KT.analyze_compression_efficiency(processed_text, stream_name, tokens)
             methods = analysis.get('compression_methods', {}) if analysis else {}
             token_count = analysis.get('original_tokens', 0) if analysis else 0
             response = []
@@ -331,23 +527,44 @@ class CORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
 
     def send_json_response(self, data: Dict[str, Any]):
         """Send JSON response"""
+        with KT.stage('serialize'):
+            body = fast_json.dumps(data)
         self.send_response(200)
         self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_server_timing()
         self.end_headers()
-        self.wfile.write(json.dumps(data).encode('utf-8'))
+        self.wfile.write(body)
+
+    def send_server_timing(self):
+        """Attach collected stage timings as a Server-Timing header"""
+        timings = KT.current_timings()
+        if timings is not None:
+            timings.add('total', time.perf_counter() - self._request_start)
+            self.send_header('Server-Timing', timings.server_timing())
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='SanTOK lightweight backend server')
+    http_runtime.add_arguments(parser)
+    args = parser.parse_args(argv)
+    http_runtime.MAX_BODY = args.max_body
+    PORT = args.port
 
-def main():
-    PORT = 8000
-    
     print("SanTOK Simple Backend Server")
     print("=" * 50)
     print(f"Starting server on port {PORT}")
     print(f"Server will be available at: http://localhost:{PORT}")
     print(f"Press Ctrl+C to stop the server")
     print("=" * 50)
-    
+
+    if args.production or args.workers > 1:
+        http_runtime.serve(CORSHTTPRequestHandler, args.host, PORT, workers=args.workers,
+                           keepalive=args.keepalive)
+        print("\nServer stopped")
+        return
+
     try:
-        with socketserver.TCPServer(("", PORT), CORSHTTPRequestHandler) as httpd:
+        with socketserver.TCPServer((args.host, PORT), CORSHTTPRequestHandler) as httpd:
             print(f"Server running at http://localhost:{PORT}")
             httpd.serve_forever()
     except KeyboardInterrupt:
@@ -3,17 +3,20 @@ FastAPI Backend Server for SanTOK
 Connects the frontend to the Python tokenization engine
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
 import sys
 import os
 import time
 import json
+import asyncio
 
-# Add src directory to path to import backend files
+# Add src directory (backend files) and this directory (server helpers) to path
 sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # Import your existing backend files (aliased to avoid symbol shadowing)
 try:
@@ -43,11 +46,34 @@ try:
 except ImportError as e:
     print(f"⚠️  Warning: Could not import unique_identifier.py: {e}")
 
+import server_tasks
+from server_tasks import (  # noqa: F401 (re-exported for existing importers)
+    TOKENIZERS, _stream_name_for, preprocess_text, generate_token_colors, calculate_fingerprint
+)
+from worker_pool import WorkerPool, PoolBusy, DeadlineExceeded
+from result_cache import ResultCache, cache_key
+import fast_json
+from session_store import SessionStore
+import metrics
+
+# Per-stage timings returned as a Server-Timing header (opt-in: SANTOK_SERVER_TIMING=1)
+SERVER_TIMING = os.environ.get("SANTOK_SERVER_TIMING", "0") not in ("", "0")
+
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse rendered by fast_json and recorded as the 'serialize' stage"""
+
+    def render(self, content: Any) -> bytes:
+        with KT.stage("serialize"):
+            return fast_json.dumps(content)
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="SanTOK API",
     description="Advanced Text Tokenization System with Multiple Algorithms",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=TimedJSONResponse,
 )
 
 # Add CORS middleware
@@ -57,8 +83,40 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+
+# Prometheus counters and latency histograms (GET /metrics)
+request_metrics = metrics.Metrics(tokenizers=TOKENIZERS)
+
+
+@app.middleware("http")
+async def track_requests(request: Request, call_next):
+    """Count and time every request by endpoint (route template) and tokenizer type"""
+    with request_metrics.track("other") as record:
+        try:
+            response = await call_next(request)
+            record.status = response.status_code
+        finally:
+            route = request.scope.get("route")
+            if route is not None:
+                record.endpoint = route.path
+    return response
+
+
+@app.middleware("http")
+async def server_timing(request: Request, call_next):
+    """Collect core stage timings for the request and return them as Server-Timing"""
+    if not SERVER_TIMING:
+        return await call_next(request)
+    start = time.perf_counter()
+    with KT.instrument() as timings:
+        response = await call_next(request)
+    timings.add("total", time.perf_counter() - start)
+    response.headers["Server-Timing"] = timings.server_timing()
+    return response
+
 # Pydantic models for request/response
 class TokenizationRequest(BaseModel):
     text: str
@@ -70,6 +128,28 @@ class TokenizationRequest(BaseModel):
     embedding: bool = False
     seed: Optional[int] = None
     embedding_bit: Optional[int] = None
+    # Per-request deadline; queued work is cancelled once it passes
+    timeout_ms: Optional[int] = None
+
+class AnalysisRequest(TokenizationRequest):
+    """Request for endpoints that can work from an earlier /tokenize result"""
+    text: Optional[str] = None
+    tokenizer_type: Optional[str] = None
+    # resultId from /tokenize; when given, text and options come from that result
+    result_id: Optional[str] = None
+
+class BatchTokenizationRequest(BaseModel):
+    texts: List[str]
+    tokenizer_type: str = "word"
+    lower: bool = False
+    drop_specials: bool = False
+    collapse_repeats: Optional[int] = 1
+    embedding: bool = False
+    seed: Optional[int] = None
+    embedding_bit: Optional[int] = None
+    # Skip the per-item fingerprint when only tokens/ids are needed
+    fingerprint: bool = True
+    timeout_ms: Optional[int] = None
 
 class Token(BaseModel):
     text: str
@@ -94,6 +174,8 @@ class TokenizationResult(BaseModel):
     frontendDigits: Optional[List[int]] = None
     backendScaled: Optional[List[int]] = None
     contentIds: Optional[List[int]] = None
+    # Handle for /analyze, /compress, /validate and /decode (see session_store.py)
+    resultId: Optional[str] = None
 
 class CompressionAnalysis(BaseModel):
     algorithm: str
@@ -102,82 +184,129 @@ class CompressionAnalysis(BaseModel):
     percentageSaved: float
     reversibility: bool
 
-# Tokenizer mapping (call the advanced engine by default)
-TOKENIZERS = {
-    'space': KT.tokenize_space,
-    'word': KT.tokenize_word,
-    'char': KT.tokenize_char,
-    'grammar': KT.tokenize_grammar,
-    'subword': lambda text: KT.tokenize_subword(text, 3, 'fixed'),
-    'bpe': lambda text: KT.tokenize_subword(text, 3, 'bpe'),
-    'syllable': lambda text: KT.tokenize_subword(text, 3, 'syllable'),
-    'frequency': lambda text: KT.tokenize_subword(text, 3, 'frequency'),
-    'byte': KT.tokenize_bytes,
-}
-
-def _stream_name_for(tokenizer_type: str) -> str:
-    if tokenizer_type == 'bpe':
-        return 'subword_bpe'
-    if tokenizer_type == 'syllable':
-        return 'subword_syllable'
-    if tokenizer_type == 'frequency':
-        return 'subword_frequency'
-    return tokenizer_type
-
-def preprocess_text(text: str, lower: bool, drop_specials: bool, collapse_repeats: bool) -> str:
-    """Preprocess text based on options"""
-    if lower:
-        text = text.lower()
-    
-    if drop_specials:
-        # Keep only alphanumeric and spaces
-        text = ''.join(c if c.isalnum() or c.isspace() else ' ' for c in text)
-    
-    if collapse_repeats:
-        # Collapse multiple spaces into single space
-        import re
-        text = re.sub(r'\s+', ' ', text).strip()
-    
-    return text
-
-def generate_token_colors(tokens: List[str]) -> List[str]:
-    """Generate colors for tokens"""
-    colors = []
-    for i, token in enumerate(tokens):
-        hue = (i * 137.5) % 360  # Golden angle for good distribution
-        colors.append(f"hsl({hue}, 70%, 50%)")
-    return colors
-
-def calculate_fingerprint(text: str, tokens: List[str], embedding: bool = False) -> Dict[str, Any]:
-    """Fallback fingerprint when engine summary is unavailable."""
+# CPU-bound work runs in a warm process pool so one large request cannot
+# stall the event loop (see worker_pool.py for the SANTOK_* settings)
+pool = WorkerPool.from_env()
+
+@app.on_event("startup")
+async def start_pool():
+    await asyncio.get_running_loop().run_in_executor(None, pool.start)
+
+@app.on_event("shutdown")
+async def stop_pool():
+    pool.shutdown()
+
+async def offload(func, *args, size: int = 0, timeout_ms: Optional[int] = None):
+    """Run a server task inline or in the pool, mapping pool errors to HTTP errors"""
+    timeout = timeout_ms / 1000.0 if timeout_ms else None
     try:
-        content_id = _content_id(text)
-        # Use engine's digital root semantics when possible
-        try:
-            sig = KT.digital_root_9(content_id)
-            if embedding:
-                sig = KT.digital_root_9(sig + 1)
-        except Exception:
-            sig = (content_id % 9) or 9
-            if embedding:
-                sig = ((sig + 1 - 1) % 9) + 1
-        compat = content_id % 10
-        text_value = sum(ord(c) for c in text) % 10000
-        text_value_with_embedding = (text_value + (1 if embedding else 0)) % 10000
-        return {
-            "signatureDigit": int(sig),
-            "compatDigit": int(compat),
-            "textValue": int(text_value),
-            "textValueWithEmbedding": int(text_value_with_embedding),
-        }
-    except Exception as e:
-        print(f"Error calculating fingerprint: {e}")
-        return {
-            "signatureDigit": 0,
-            "compatDigit": 0,
-            "textValue": 0,
-            "textValueWithEmbedding": 0,
-        }
+        if pool.should_inline(size):
+            return await pool.run(func, *args, size=size)
+        timed = KT.current_timings()
+        if timed is None:
+            return await pool.run(func, *args, size=size, timeout=timeout)
+        result, worker_timings = await pool.run(server_tasks.run_timed, func, *args, size=size, timeout=timeout)
+        timed.merge(worker_timings)
+        return result
+    except PoolBusy as e:
+        raise HTTPException(status_code=503, detail=f"Server busy: {e}", headers={"Retry-After": "1"})
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+# Identical text + options are served from here (see result_cache.py for
+# the SANTOK_CACHE_* settings)
+cache = ResultCache.from_env()
+
+@app.on_event("shutdown")
+async def close_cache():
+    cache.close()
+
+async def cached(kind: str, func, params: Dict[str, Any], *args, timeout_ms: Optional[int] = None):
+    """Cached result of func(params, *args), computed through offload() on a miss"""
+    size = len(params.get("text", ""))
+    if not cache.admits(size):
+        return await offload(func, params, *args, size=size, timeout_ms=timeout_ms)
+    with KT.stage("cache"):
+        key = cache_key(kind, params)
+        result = cache.get(key)
+    if result is None:
+        result = await offload(func, params, *args, size=size, timeout_ms=timeout_ms)
+        with KT.stage("cache"):
+            cache.put(key, result)
+    return result
+
+# /tokenize results referenced by result_id (SANTOK_SESSION_* settings)
+sessions = SessionStore.from_env()
+
+request_metrics.add_stats("pool", "Worker pool", pool.stats,
+                          counters=("inline", "offloaded", "rejected", "timeouts", "cancelled"),
+                          gauges=("workers", "pending", "max_queue"))
+request_metrics.add_stats("cache", "Result cache", cache.stats,
+                          counters=("hits", "misses", "disk_hits", "stores", "evictions", "expirations"),
+                          gauges=("entries", "bytes", "hit_rate", "disk_bytes"))
+request_metrics.add_stats("sessions", "Result sessions", sessions.stats,
+                          counters=("created", "reused", "hits", "misses", "evictions", "expirations"),
+                          gauges=("sessions", "bytes"))
+
+def _pool_rss():
+    sizes = [size for size in map(metrics.rss_bytes, pool.pids()) if size is not None]
+    return [("santok_pool_resident_memory_bytes", "gauge", "Resident memory of all pool workers",
+             [(None, sum(sizes))])]
+
+request_metrics.add_collector(_pool_rss)
+
+def _session(result_id: str):
+    session = sessions.get(result_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired result_id: {result_id}")
+    return session
+
+async def derived(kind: str, func, request: AnalysisRequest):
+    """
+    func(params, tokenized) for an AnalysisRequest: from the session when it
+    names a result_id (computed once per session), else from the cached
+    tokenization of the request's text.
+    """
+    if request.result_id:
+        session = _session(request.result_id)
+        metrics.annotate(session.params.get("tokenizer_type"), chars=len(session.params.get("text", "")))
+        result = session.derived.get(kind)
+        if result is None:
+            result = await offload(func, session.params, session.result,
+                                   size=len(session.params.get("text", "")), timeout_ms=request.timeout_ms)
+            sessions.add_derived(session, kind, result)
+        return result
+    if request.text is None or request.tokenizer_type is None:
+        raise HTTPException(status_code=400, detail="Either result_id or text and tokenizer_type is required")
+    _check_tokenizer(request.tokenizer_type)
+    metrics.annotate(request.tokenizer_type, chars=len(request.text))
+    params = request.model_dump(exclude={"result_id"})
+    tokenized = await cached("tokenize", server_tasks.tokenize_task, params, timeout_ms=request.timeout_ms)
+    return await cached(kind, func, params, tokenized, timeout_ms=request.timeout_ms)
+
+# Largest accepted /tokenize/batch request (number of texts)
+BATCH_MAX = int(os.environ.get("SANTOK_BATCH_MAX", "1000"))
+
+def _partition(texts: List[str], parts: int) -> List[List[str]]:
+    """Split texts into at most parts contiguous chunks of similar total size"""
+    total = sum(len(t) for t in texts)
+    target = total / max(1, parts)
+    chunks: List[List[str]] = [[]]
+    size = 0
+    for text in texts:
+        if chunks[-1] and size >= target and len(chunks) < parts:
+            chunks.append([])
+            size = 0
+        chunks[-1].append(text)
+        size += len(text)
+    return chunks
+
+def _check_tokenizer(tokenizer_type: str):
+    if tokenizer_type not in TOKENIZERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown tokenizer type: {tokenizer_type}"
+        )
 
 @app.get("/")
 async def root():
@@ -188,216 +317,153 @@ async def root():
         "available_tokenizers": list(TOKENIZERS.keys())
     }
 
+# Tokens per record in streamed /tokenize responses
+STREAM_BATCH = int(os.environ.get("SANTOK_STREAM_BATCH", "1000"))
+
+def _wants_stream(http_request: Request, stream: bool) -> bool:
+    return stream or "application/x-ndjson" in http_request.headers.get("accept", "")
+
+def _ndjson(records, done=None):
+    try:
+        for record in records:
+            yield fast_json.dumps_line(record)
+    except Exception as e:
+        # Status and headers are already sent; report the failure in-band
+        print(f"Streaming tokenization error: {e}")
+        yield fast_json.dumps_line({"type": "error", "detail": str(e)})
+    finally:
+        if done is not None:
+            done()
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus text format: request counts, latency histograms, pool, cache and process figures"""
+    return Response(request_metrics.render(), headers={"Content-Type": metrics.CONTENT_TYPE})
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Result cache size and hit-rate counters"""
+    return cache.stats()
+
+@app.get("/sessions/stats")
+async def session_stats():
+    """Stored /tokenize results (result_id handles)"""
+    return sessions.stats()
+
+@app.delete("/sessions/{result_id}")
+async def release_session(result_id: str):
+    """Drop a stored result before it expires"""
+    if not sessions.discard(result_id):
+        raise HTTPException(status_code=404, detail=f"Unknown or expired result_id: {result_id}")
+    return {"released": result_id}
+
 @app.post("/tokenize", response_model=TokenizationResult)
-async def tokenize_text(request: TokenizationRequest):
+async def tokenize_text(request: TokenizationRequest, http_request: Request, stream: bool = False,
+                        response_format: str = Query("objects", alias="format"),
+                        fields: Optional[str] = None):
     """Tokenize text using the specified tokenizer"""
+    _check_tokenizer(request.tokenizer_type)
+    metrics.annotate(request.tokenizer_type, chars=len(request.text))
+    if response_format not in server_tasks.RESPONSE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format: {response_format}")
     try:
-        start_time = time.time()
-        
-        # Preprocess text
-        processed_text = preprocess_text(
-            request.text, 
-            request.lower, 
-            request.drop_specials, 
-            bool(request.collapse_repeats)
-        )
-        
-        # Get tokenizer function
-        if request.tokenizer_type not in TOKENIZERS:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Unknown tokenizer type: {request.tokenizer_type}"
-            )
-        
-        tokenizer_func = TOKENIZERS[request.tokenizer_type]
-        
-        # Tokenize
-        tokens = tokenizer_func(processed_text)
-        # Build engine digits using SanTOK core tokenizer streams
-        seed = request.seed if request.seed is not None else 12345
-        embedding_flag = bool(request.embedding_bit) or bool(request.embedding)
-        try:
-            engine = KT.TextTokenizer(seed, embedding_flag)
-            streams = engine.build(processed_text)
-            stream_name = _stream_name_for(request.tokenizer_type)
-            ts = streams.get(stream_name)
-            frontend_digits = [t.frontend for t in ts.tokens] if ts else []
-            backend_scaled = [t.backend_scaled for t in ts.tokens] if ts else []
-            content_ids = [t.content_id for t in ts.tokens] if ts else []
-        except Exception:
-            frontend_digits = []
-            backend_scaled = []
-            content_ids = []
-        
-        # Generate colors
-        colors = generate_token_colors(tokens)
-        
-        # Create token objects
-        token_objects = []
-        min_len = min(len(tokens), len(frontend_digits)) if frontend_digits else len(tokens)
-        for i in range(min_len):
-            tok = tokens[i]
-            token_text = tok if isinstance(tok, str) else tok.get('text', '')
-            token_length = len(token_text) if isinstance(tok, str) else tok.get('length', len(token_text))
-            position_val = i if isinstance(tok, str) else tok.get('index', i)
-            token_obj = Token(
-                text=token_text,
-                # Expose engine digit as the visible ID so UI "IDs" view matches engine output
-                id=(frontend_digits[i] if i < len(frontend_digits) else i),
-                position=position_val,
-                length=token_length,
-                type=(tok.get('type', request.tokenizer_type) if isinstance(tok, dict) else request.tokenizer_type),
-                color=colors[i] if i < len(colors) else colors[i % len(colors)]
-            )
-            token_objects.append(token_obj)
-        
-        # Calculate metrics
-        processing_time = (time.time() - start_time) * 1000  # Convert to ms
-        memory_usage = len(processed_text.encode('utf-8')) / 1024  # KB
-        compression_ratio = len(tokens) / len(processed_text.split()) if processed_text.split() else 1.0
-        
-        # Calculate fingerprint
-        try:
-            # Use engine's summary so digits match CLI
-            summary = KT.compute_text_value_summary(processed_text, embedding_flag)
-            fingerprint = {
-                "signatureDigit": summary.get("signature_digit", 0),
-                "compatDigit": summary.get("compat_digit", 0),
-                "textValue": summary.get("weighted_sum", 0),
-                "textValueWithEmbedding": summary.get("final_digit", 0)
-            }
-        except Exception:
-            fingerprint = calculate_fingerprint(processed_text, tokens, request.embedding)
-        
-        # Create result
-        result = TokenizationResult(
-            tokens=token_objects,
-            tokenCount=len(token_objects),
-            characterCount=len(processed_text),
-            tokenizerType=request.tokenizer_type,
-            processingTime=processing_time,
-            memoryUsage=memory_usage,
-            compressionRatio=compression_ratio,
-            reversibility=True,  # All our tokenizers are reversible
-            fingerprint=fingerprint,
-            originalText=request.text,  # Include original text for comparison
-            frontendDigits=frontend_digits if frontend_digits else None,
-            backendScaled=backend_scaled if backend_scaled else None,
-            contentIds=content_ids if content_ids else None,
-        )
-        
-        return result
-        
+        projection = server_tasks.parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if _wants_stream(http_request, stream):
+        # Header, token batches, trailer; the generator runs in Starlette's
+        # threadpool, so the event loop stays free while it tokenizes. A
+        # stream the pool would not run inline takes a pool queue slot
+        # until it ends, so it is refused with 503 like pool work
+        admitted = not pool.should_inline(len(request.text))
+        if admitted:
+            try:
+                pool.acquire()
+            except PoolBusy as e:
+                raise HTTPException(status_code=503, detail=f"Server busy: {e}", headers={"Retry-After": "1"})
+        records = server_tasks.stream_tokenize(request.model_dump(), STREAM_BATCH)
+        return StreamingResponse(_ndjson(records, pool.release if admitted else None),
+                                 media_type="application/x-ndjson")
+    try:
+        params = request.model_dump()
+        result = await cached("tokenize", server_tasks.tokenize_task, params, timeout_ms=request.timeout_ms)
+        # Repeats of the same request share one session
+        result_id = sessions.create(params, result, key=cache_key("tokenize", params))
+        metrics.annotate(tokens=result.get("tokenCount", 0))
+        # Built from trusted task output: skip response_model validation
+        # (the model still documents the default schema)
+        return TimedJSONResponse(server_tasks.project_result(
+            dict(result, resultId=result_id), response_format, projection))
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Tokenization error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/tokenize/batch")
+async def tokenize_batch(request: BatchTokenizationRequest):
+    """Tokenize many texts with shared options; identical texts are computed once"""
+    _check_tokenizer(request.tokenizer_type)
+    metrics.annotate(request.tokenizer_type, chars=sum(len(t) for t in request.texts))
+    if len(request.texts) > BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"Batch too large: {len(request.texts)} > {BATCH_MAX} texts")
+    try:
+        start_time = time.perf_counter()
+        unique, order = server_tasks.dedupe_texts(request.texts)
+        params = request.model_dump(exclude={"texts"})
+        total = sum(len(t) for t in unique)
+        parts = 1 if pool.should_inline(total) else max(1, pool.workers)
+        chunks = _partition(unique, parts)
+        results = await asyncio.gather(*[
+            offload(server_tasks.tokenize_batch_task, params, chunk,
+                    size=sum(len(t) for t in chunk), timeout_ms=request.timeout_ms)
+            for chunk in chunks
+        ])
+        computed = [item for chunk_items in results for item in chunk_items]
+        metrics.annotate(tokens=sum(computed[i]["tokenCount"] for i in order))
+        return TimedJSONResponse({
+            "tokenizerType": request.tokenizer_type,
+            "count": len(request.texts),
+            "uniqueCount": len(unique),
+            "processingTime": (time.perf_counter() - start_time) * 1000,
+            "items": [computed[i] for i in order],
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Batch tokenization error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/analyze")
-async def analyze_text(request: TokenizationRequest):
+async def analyze_text(request: AnalysisRequest):
     """Analyze text and return detailed metrics"""
     try:
-        # First tokenize
-        tokenize_result = await tokenize_text(request)
-        
-        # Calculate additional analysis metrics
-        analysis = {
-            "tokenDistribution": {},
-            "characterDistribution": {},
-            "averageTokenLength": sum(len(token.text) for token in tokenize_result.tokens) / len(tokenize_result.tokens) if tokenize_result.tokens else 0,
-            "uniqueTokens": len(set(token.text for token in tokenize_result.tokens)),
-            "repetitionRate": 1 - (len(set(token.text for token in tokenize_result.tokens)) / len(tokenize_result.tokens)) if tokenize_result.tokens else 0
-        }
-        
-        # Token distribution
-        for token in tokenize_result.tokens:
-            token_text = token.text
-            if token_text in analysis["tokenDistribution"]:
-                analysis["tokenDistribution"][token_text] += 1
-            else:
-                analysis["tokenDistribution"][token_text] = 1
-        
-        # Character distribution
-        for char in request.text:
-            if char in analysis["characterDistribution"]:
-                analysis["characterDistribution"][char] += 1
-            else:
-                analysis["characterDistribution"][char] = 1
-        
-        return {
-            "analysis": analysis,
-            "metrics": {
-                "processingTime": tokenize_result.processingTime,
-                "memoryUsage": tokenize_result.memoryUsage,
-                "compressionRatio": tokenize_result.compressionRatio
-            },
-            "fingerprint": tokenize_result.fingerprint
-        }
-        
+        return TimedJSONResponse(await derived("analyze", server_tasks.analyze_task, request))
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Analysis error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/compress", response_model=List[CompressionAnalysis])
-async def compress_text(request: TokenizationRequest):
+async def compress_text(request: AnalysisRequest):
     """Analyze compression using real engine metrics"""
     try:
-        processed_text = preprocess_text(
-            request.text,
-            request.lower,
-            request.drop_specials,
-            bool(request.collapse_repeats),
-        )
-        stream_name = _stream_name_for(request.tokenizer_type)
-        analysis = KT.analyze_compression_efficiency(processed_text, stream_name)
-        methods = analysis.get("compression_methods", {}) if analysis else {}
-        token_count = analysis.get("original_tokens", 0) if analysis else 0
-        out: List[CompressionAnalysis] = []
-        for method, stats in methods.items():
-            ratio = float(stats.get("compression_ratio", 1.0))
-            saved = int(stats.get("space_saved", 0))
-            pct = float(stats.get("compression_percentage", 0.0))
-            out.append(CompressionAnalysis(
-                algorithm=method.capitalize(),
-                compressionRatio=ratio,
-                tokensSaved=saved,
-                percentageSaved=pct if pct else ((saved / token_count) * 100 if token_count else 0.0),
-                reversibility=bool(stats.get("is_reversible", True)),
-            ))
-        return out
+        out = await derived("compress", server_tasks.compress_task, request)
+        return [CompressionAnalysis(**item) for item in out]
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Compression analysis error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/validate")
-async def validate_tokenization(request: TokenizationRequest):
+async def validate_tokenization(request: AnalysisRequest):
     """Validate tokenization reversibility using engine reconstruction"""
     try:
-        processed_text = preprocess_text(
-            request.text,
-            request.lower,
-            request.drop_specials,
-            bool(request.collapse_repeats),
-        )
-        # Produce tokens with the same tokenizer the user selected
-        tokenizer_func = TOKENIZERS.get(request.tokenizer_type)
-        if tokenizer_func is None:
-            raise HTTPException(status_code=400, detail=f"Unknown tokenizer type: {request.tokenizer_type}")
-        tokens = tokenizer_func(processed_text)
-        # Engine-aware reconstruction
-        stream_name = _stream_name_for(request.tokenizer_type)
-        reconstructed = KT.reconstruct_from_tokens(tokens, stream_name)
-        is_valid = reconstructed == processed_text
-        differences: List[str] = []
-        if not is_valid:
-            differences.append(f"Original length: {len(processed_text)}, Reconstructed length: {len(reconstructed)}")
-            if len(processed_text) != len(reconstructed):
-                differences.append("Length mismatch detected")
-        return {
-            "isValid": is_valid,
-            "reversibility": is_valid,
-            "reconstruction": reconstructed,
-            "differences": differences,
-        }
+        return TimedJSONResponse(await derived("validate", server_tasks.validate_task, request))
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Validation error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -405,23 +471,34 @@ async def validate_tokenization(request: TokenizationRequest):
 @app.post("/decode")
 async def decode_tokens(request: Dict[str, Any]):
     """Decode tokenized text back to original form"""
+    tokens = request.get("tokens", [])
+    tokenizer_type = request.get("tokenizer_type", "word")
+    metrics.annotate(tokenizer_type)
+
+    if request.get("result_id"):
+        session = _session(request["result_id"])
+        metrics.annotate(session.params.get("tokenizer_type"))
+        try:
+            result = session.derived.get("decode")
+            if result is None:
+                result = await offload(server_tasks.decode_result_task, session.params, session.result,
+                                       size=len(session.params.get("text", "")), timeout_ms=request.get("timeout_ms"))
+                sessions.add_derived(session, "decode", result)
+            return TimedJSONResponse(result)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Decoding failed: {str(e)}")
+
+    if not tokens:
+        raise HTTPException(status_code=400, detail="No tokens provided")
+
     try:
-        tokens = request.get("tokens", [])
-        tokenizer_type = request.get("tokenizer_type", "word")
-        
-        if not tokens:
-            raise HTTPException(status_code=400, detail="No tokens provided")
-        
         # Use the core tokenizer's reconstruction function
-        decoded_text = KT.reconstruct_from_tokens(tokens, tokenizer_type)
-        
-        return {
-            "decoded_text": decoded_text,
-            "tokenizer_type": tokenizer_type,
-            "token_count": len(tokens),
-            "decoded_length": len(decoded_text)
-        }
-        
+        return TimedJSONResponse(await offload(server_tasks.decode_task, tokens, tokenizer_type,
+                                               size=len(tokens), timeout_ms=request.get("timeout_ms")))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Decoding failed: {str(e)}")
 
@@ -0,0 +1,337 @@
+"""
+Prometheus metrics for the SanTOK servers
+Served as text exposition format from GET /metrics, without any client
+library.
+
+- Requests are counted and timed by endpoint, tokenizer type and status;
+  latencies go into a fixed-bucket histogram.
+- Input characters and output tokens are counters, so throughput is
+  rate(santok_input_chars_total[1m]) on the Prometheus side.
+- Recording takes no lock: every thread writes to its own shard and
+  /metrics adds the shards up. Shards of finished threads are folded into
+  one retired shard, so per-connection threads do not pile up.
+- Pool, cache and session figures are read from their stats() at scrape
+  time, next to process RSS and CPU time.
+
+Metrics are per process. In pre-fork mode every sample carries a
+worker="<slot>" label (set_worker()), and each worker has to be scraped
+on its own: a scrape of the shared port reaches whichever worker accepts
+the connection. Sum by worker on the Prometheus side.
+"""
+
+import contextvars
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; tokenization spans sub-millisecond snippets to multi-second documents
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# (labels, value) pairs for one metric
+Samples = List[Tuple[Optional[Dict[str, str]], float]]
+
+_CURRENT = contextvars.ContextVar('santok_request_record', default=None)
+
+# Added to every sample when set; one value per pre-forked worker
+_WORKER: Dict[str, str] = {}
+
+
+def set_worker(worker: Optional[Any]):
+    """Label everything this process reports with worker=<worker> (None removes the label)"""
+    _WORKER.clear()
+    if worker is not None:
+        _WORKER['worker'] = str(worker)
+
+
+class RequestRecord:
+    """What one request reports about itself; filled in while it runs"""
+
+    __slots__ = ('endpoint', 'tokenizer', 'status', 'chars', 'tokens')
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.tokenizer = None
+        self.status = None
+        self.chars = 0
+        self.tokens = 0
+
+
+def annotate(tokenizer: Optional[str] = None, chars: int = 0, tokens: int = 0):
+    """Attach tokenizer type and sizes to the request being tracked (no-op outside one)"""
+    record = _CURRENT.get()
+    if record is None:
+        return
+    if tokenizer is not None:
+        record.tokenizer = tokenizer
+    record.chars += chars
+    record.tokens += tokens
+
+
+class _Shard:
+    """One thread's counters"""
+
+    __slots__ = ('thread', 'requests', 'latency', 'chars', 'tokens')
+
+    def __init__(self, thread=None):
+        self.thread = thread
+        self.requests = {}  # (endpoint, tokenizer, status) -> count
+        self.latency = {}   # (endpoint, tokenizer) -> [bucket counts..., +Inf count, sum]
+        self.chars = {}     # (endpoint, tokenizer) -> chars
+        self.tokens = {}    # (endpoint, tokenizer) -> tokens
+
+    def merge(self, other: '_Shard'):
+        # dict()/list() copies are single C calls, so a shard that its
+        # thread is still writing to is read consistently enough
+        for key, n in dict(other.requests).items():
+            self.requests[key] = self.requests.get(key, 0) + n
+        for key, series in dict(other.latency).items():
+            series = list(series)
+            mine = self.latency.get(key)
+            if mine is None:
+                self.latency[key] = series
+            else:
+                for i, value in enumerate(series):
+                    mine[i] += value
+        for key, n in dict(other.chars).items():
+            self.chars[key] = self.chars.get(key, 0) + n
+        for key, n in dict(other.tokens).items():
+            self.tokens[key] = self.tokens.get(key, 0) + n
+
+
+class _Track:
+    def __init__(self, metrics: 'Metrics', endpoint: str):
+        self.metrics = metrics
+        self.record = RequestRecord(endpoint)
+
+    def __enter__(self) -> RequestRecord:
+        self.start = time.perf_counter()
+        self._token = _CURRENT.set(self.record)
+        return self.record
+
+    def __exit__(self, exc_type, exc, tb):
+        _CURRENT.reset(self._token)
+        record = self.record
+        status = record.status if record.status is not None else (500 if exc_type else 200)
+        self.metrics.observe(record.endpoint, record.tokenizer, status, time.perf_counter() - self.start,
+                             record.chars, record.tokens)
+        return False
+
+
+class Metrics:
+    """Request counters and latency histograms plus scrape-time collectors"""
+
+    def __init__(self, prefix: str = 'santok', buckets: Sequence[float] = LATENCY_BUCKETS,
+                 tokenizers: Optional[Iterable[str]] = None):
+        self.prefix = prefix
+        self.buckets = tuple(sorted(buckets))
+        # Label values come from requests; anything unknown is reported as
+        # "other" so clients cannot blow up the number of series
+        self.tokenizers = frozenset(tokenizers) if tokenizers is not None else None
+        self._local = threading.local()
+        self._lock = threading.Lock()  # shard registration and scrapes only
+        self._shards: List[_Shard] = []
+        self._retired = _Shard()
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, Samples]]]] = []
+        self._started = time.time()
+
+    # -- recording --
+
+    def track(self, endpoint: str) -> _Track:
+        """
+        Time and count the request run inside the block:
+
+            with metrics.track('/tokenize') as record:
+                record.status = handle()
+
+        annotate() inside the block adds tokenizer type and sizes.
+        """
+        return _Track(self, endpoint)
+
+    def observe(self, endpoint: str, tokenizer: Optional[str], status: int, seconds: float,
+                chars: int = 0, tokens: int = 0):
+        """Record one finished request"""
+        tokenizer = self._label(tokenizer)
+        shard = self._shard()
+        key = (endpoint, tokenizer)
+        request_key = (endpoint, tokenizer, str(status))
+        shard.requests[request_key] = shard.requests.get(request_key, 0) + 1
+        series = shard.latency.get(key)
+        if series is None:
+            series = shard.latency[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, seconds)] += 1
+        series[-1] += seconds
+        if chars:
+            shard.chars[key] = shard.chars.get(key, 0) + chars
+        if tokens:
+            shard.tokens[key] = shard.tokens.get(key, 0) + tokens
+
+    def _label(self, tokenizer: Optional[str]) -> str:
+        if tokenizer is None:
+            return 'none'
+        if self.tokenizers is not None and tokenizer not in self.tokenizers:
+            return 'other'
+        return tokenizer
+
+    def _shard(self) -> _Shard:
+        try:
+            return self._local.shard
+        except AttributeError:
+            pass
+        shard = _Shard(threading.current_thread())
+        with self._lock:
+            self._retire()
+            self._shards.append(shard)
+        self._local.shard = shard
+        return shard
+
+    def _retire(self):
+        # Caller holds the lock; finished threads no longer write to their shard
+        alive = []
+        for shard in self._shards:
+            if shard.thread.is_alive():
+                alive.append(shard)
+            else:
+                self._retired.merge(shard)
+        self._shards = alive
+
+    # -- scrape-time figures --
+
+    def add_collector(self, func: Callable[[], Iterable[Tuple[str, str, str, Samples]]]):
+        """Register func() -> [(name, type, help, [(labels, value), ...]), ...], called per scrape"""
+        self._collectors.append(func)
+
+    def add_stats(self, name: str, description: str, stats: Callable[[], Dict[str, Any]],
+                  counters: Sequence[str] = (), gauges: Sequence[str] = ()):
+        """
+        Export keys of a stats() dict (WorkerPool, ResultCache, SessionStore):
+        counters as <prefix>_<name>_<key>_total, gauges as <prefix>_<name>_<key>
+        """
+        def collect():
+            values = stats()
+            out = []
+            for key in counters:
+                if key in values:
+                    out.append((f"{self.prefix}_{name}_{key}_total", 'counter',
+                                f"{description}: {key.replace('_', ' ')}", [(None, values[key])]))
+            for key in gauges:
+                if values.get(key) is not None:
+                    out.append((f"{self.prefix}_{name}_{key}", 'gauge',
+                                f"{description}: {key.replace('_', ' ')}", [(None, values[key])]))
+            return out
+        self.add_collector(collect)
+
+    # -- exposition --
+
+    def snapshot(self) -> _Shard:
+        """All request counters added up"""
+        total = _Shard()
+        with self._lock:
+            self._retire()
+            total.merge(self._retired)
+            for shard in self._shards:
+                total.merge(shard)
+        return total
+
+    def render(self) -> bytes:
+        """The Prometheus text exposition of every metric"""
+        total = self.snapshot()
+        p = self.prefix
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        family(f"{p}_requests_total", 'counter', "Requests handled, by endpoint, tokenizer type and status")
+        for (endpoint, tokenizer, status), n in sorted(total.requests.items()):
+            lines.append(f"{p}_requests_total"
+                         f"{_labels({'endpoint': endpoint, 'tokenizer': tokenizer, 'status': status})} {n}")
+
+        name = f"{p}_request_duration_seconds"
+        family(name, 'histogram', "Request latency in seconds, by endpoint and tokenizer type")
+        for (endpoint, tokenizer), series in sorted(total.latency.items()):
+            labels = {'endpoint': endpoint, 'tokenizer': tokenizer}
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float('inf'),), series):
+                cumulative += n
+                lines.append(f"{name}_bucket{_labels(dict(labels, le=_number(bound)))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(series[-1])}")
+            lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+
+        for metric, values, help_text in (
+                ('input_chars_total', total.chars, "Input characters processed"),
+                ('output_tokens_total', total.tokens, "Tokens produced")):
+            family(f"{p}_{metric}", 'counter', f"{help_text}, by endpoint and tokenizer type")
+            for (endpoint, tokenizer), n in sorted(values.items()):
+                lines.append(f"{p}_{metric}{_labels({'endpoint': endpoint, 'tokenizer': tokenizer})} {n}")
+
+        for collector in [lambda: process_metrics(self._started)] + self._collectors:
+            try:
+                for metric, kind, help_text, samples in collector():
+                    family(metric, kind, help_text)
+                    for labels, value in samples:
+                        lines.append(f"{metric}{_labels(labels)} {_number(value)}")
+            except Exception as e:
+                # A broken collector must not take the whole scrape down
+                lines.append(f"# collector error: {_escape(str(e))}")
+        lines.append('')
+        return '\n'.join(lines).encode('utf-8')
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(labels: Optional[Dict[str, str]]) -> str:
+    if _WORKER:
+        labels = dict(labels or {}, **_WORKER)
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + '}'
+
+
+def _number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def rss_bytes(pid: Any = 'self') -> Optional[int]:
+    """Resident set size of a process (Linux /proc), or None when unavailable"""
+    try:
+        with open(f'/proc/{pid}/statm', 'rb') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def process_metrics(started: float) -> List[Tuple[str, str, str, Samples]]:
+    """Standard process_* figures for this process"""
+    out = []
+    rss = rss_bytes()
+    if rss is None:
+        try:
+            import resource
+            # Peak rather than current RSS (kilobytes on Linux)
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        except (ImportError, OSError):
+            rss = None
+    if rss is not None:
+        out.append(('process_resident_memory_bytes', 'gauge', "Resident memory size in bytes", [(None, rss)]))
+    out.append(('process_cpu_seconds_total', 'counter', "User and system CPU time in seconds",
+                [(None, time.process_time())]))
+    out.append(('process_start_time_seconds', 'gauge', "Start time of the process since the epoch",
+                [(None, started)]))
+    out.append(('process_threads', 'gauge', "Python threads", [(None, threading.active_count())]))
+    return out
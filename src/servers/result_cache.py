@@ -0,0 +1,257 @@
+"""
+Content-addressed result cache for the SanTOK servers
+Identical text + options are computed once; switching tabs in the UI
+(/tokenize, /analyze, /compress on the same input) then hits the cache.
+
+- Keys are a SHA-256 of the text and every option that changes the result
+  (tokenizer type, seed, embedding bit, preprocessing flags) plus the kind
+  of result, so the key never needs the text itself.
+- The memory tier is an LRU bounded by the JSON size of the stored results.
+- Entries expire after a TTL.
+- An optional sqlite3 tier keeps results across restarts; memory misses
+  fall through to it and promote the entry back into memory.
+- Inputs longer than max_chars bypass the cache: their results are too
+  big to be worth keeping, and sizing them would stall the server.
+
+Configuration (environment):
+  SANTOK_CACHE_BYTES       memory tier size in bytes (default: 64 MiB, 0 = disabled)
+  SANTOK_CACHE_TTL         seconds before an entry expires (default: 3600, 0 = never)
+  SANTOK_CACHE_MAX_CHARS   largest input (characters) that is cached (default: 262144)
+  SANTOK_CACHE_PATH        sqlite file for the disk tier (default: none)
+  SANTOK_CACHE_DISK_BYTES  disk tier size in bytes (default: 1 GiB)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# Bump when a cached result's shape changes so old disk entries are ignored
+CACHE_VERSION = 1
+
+_MISSING = object()
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    try:
+        return int(value) if value not in (None, '') else default
+    except ValueError:
+        return default
+
+
+def cache_key(kind: str, params: Dict[str, Any]) -> str:
+    """Key for one kind of result ('tokenize', 'analyze', ...) of a request"""
+    seed = params.get('seed')
+    options = [
+        CACHE_VERSION,
+        kind,
+        params.get('tokenizer_type', 'word'),
+        12345 if seed is None else int(seed),
+        bool(params.get('embedding', False)),
+        bool(params.get('embedding_bit')),
+        bool(params.get('lower', False)),
+        bool(params.get('drop_specials', False)),
+        bool(params.get('collapse_repeats', 1)),
+    ]
+    h = hashlib.sha256(json.dumps(options).encode('utf-8'))
+    h.update(b'\0')
+    h.update(params.get('text', '').encode('utf-8', 'surrogatepass'))
+    return h.hexdigest()
+
+
+class ResultCache:
+    """LRU-by-bytes result cache with TTL and an optional sqlite3 tier"""
+
+    def __init__(self, max_bytes: int = 64 << 20, ttl: float = 3600.0,
+                 path: Optional[str] = None, disk_bytes: int = 1 << 30, max_chars: int = 1 << 18):
+        self.max_bytes = max(0, max_bytes)
+        self.ttl = ttl
+        self.max_chars = max_chars
+        self.path = path
+        self.disk_bytes = disk_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (value, size, expires)
+        self._bytes = 0
+        self._db = None
+        self.counters = {'hits': 0, 'misses': 0, 'disk_hits': 0, 'stores': 0,
+                         'evictions': 0, 'expirations': 0, 'oversize': 0}
+        if path:
+            self._open_disk(path)
+            if hasattr(os, 'register_at_fork'):
+                # Pre-forked server workers must not share the sqlite connection
+                ref = weakref.ref(self)
+                os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._after_fork())
+
+    @classmethod
+    def from_env(cls) -> 'ResultCache':
+        return cls(
+            max_bytes=_env_int('SANTOK_CACHE_BYTES', 64 << 20),
+            ttl=float(_env_int('SANTOK_CACHE_TTL', 3600)),
+            path=os.path.expanduser(os.environ.get('SANTOK_CACHE_PATH', '')) or None,
+            disk_bytes=_env_int('SANTOK_CACHE_DISK_BYTES', 1 << 30),
+            max_chars=_env_int('SANTOK_CACHE_MAX_CHARS', 1 << 18),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 or self._db is not None
+
+    def admits(self, chars: int) -> bool:
+        """Whether results for an input of this many characters are cached"""
+        return self.enabled and chars <= self.max_chars
+
+    def _open_disk(self, path: str):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL,"
+            " expires REAL NOT NULL, accessed REAL NOT NULL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        if self._db is not None:
+            # Keep the inherited connection referenced but unused; closing it
+            # here could release locks the parent still holds
+            self._inherited_db = self._db
+            self._open_disk(self.path)
+
+    def _expiry(self, now: float) -> float:
+        return now + self.ttl if self.ttl > 0 else float('inf')
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Cached value for key, or default on a miss or an expired entry"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[2] > now:
+                    self._entries.move_to_end(key)
+                    self.counters['hits'] += 1
+                    return entry[0]
+                self._drop(key)
+                self.counters['expirations'] += 1
+            value = self._disk_get(key, now)
+            if value is _MISSING:
+                self.counters['misses'] += 1
+                return default
+            self.counters['hits'] += 1
+            self.counters['disk_hits'] += 1
+            return value
+
+    def put(self, key: str, value: Any):
+        """Store a JSON-serializable result"""
+        if not self.enabled:
+            return
+        data = json.dumps(value, separators=(',', ':')).encode('utf-8')
+        size = len(data)
+        now = time.time()
+        expires = self._expiry(now)
+        with self._lock:
+            self.counters['stores'] += 1
+            if size <= self.max_bytes:
+                self._memory_put(key, value, size, expires)
+            elif self.max_bytes:
+                self.counters['oversize'] += 1
+            if self._db is not None:
+                self._disk_put(key, data, size, expires, now)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    # -- memory tier (caller holds the lock) --
+
+    def _memory_put(self, key, value, size, expires):
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (value, size, expires)
+        self._bytes += size
+        while self._bytes > self.max_bytes and self._entries:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.counters['evictions'] += 1
+
+    def _drop(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    # -- disk tier (caller holds the lock) --
+
+    def _disk_get(self, key, now):
+        if self._db is None:
+            return _MISSING
+        row = self._db.execute(
+            "SELECT value, size, expires FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return _MISSING
+        data, size, expires = row
+        if expires <= now:
+            self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+            self.counters['expirations'] += 1
+            return _MISSING
+        self._db.execute("UPDATE results SET accessed = ? WHERE key = ?", (now, key))
+        value = json.loads(data)
+        if size <= self.max_bytes:
+            self._memory_put(key, value, size, expires)
+        return value
+
+    def _disk_put(self, key, data, size, expires, now):
+        if size > self.disk_bytes:
+            return
+        self._db.execute(
+            "INSERT OR REPLACE INTO results (key, value, size, expires, accessed) VALUES (?, ?, ?, ?, ?)",
+            (key, data, size, expires, now))
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.disk_bytes:
+            return
+        # Drop least recently used rows until the tier fits again
+        self._db.execute("DELETE FROM results WHERE expires <= ?", (now,))
+        excess = total - self.disk_bytes
+        freed = 0
+        victims = []
+        for row_key, row_size in self._db.execute(
+                "SELECT key, size FROM results WHERE key != ? ORDER BY accessed", (key,)):
+            if freed >= excess:
+                break
+            victims.append((row_key,))
+            freed += row_size
+        self._db.executemany("DELETE FROM results WHERE key = ?", victims)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.counters['hits'] + self.counters['misses']
+            stats = {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'max_chars': self.max_chars,
+                'hit_rate': self.counters['hits'] / lookups if lookups else 0.0,
+                'disk': self.path,
+            }
+            if self._db is not None:
+                n, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+                stats['disk_entries'] = n
+                stats['disk_bytes'] = size
+            stats.update(self.counters)
+            return stats
@@ -0,0 +1,486 @@
+"""
+CPU-bound work for the SanTOK servers
+Module-level, picklable functions so they can run in worker processes.
+Every task takes plain parameters and returns plain dicts/lists.
+"""
+
+import sys
+import os
+import re
+import time
+from collections import deque
+from typing import List, Dict, Any, Iterator, Optional
+
+# Add src directory to path to import backend files
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import core.core_tokenizer as KT
+from core.core_tokenizer import _content_id
+
+# Tokenizer mapping (call the advanced engine by default)
+TOKENIZERS = {
+    'space': KT.tokenize_space,
+    'word': KT.tokenize_word,
+    'char': KT.tokenize_char,
+    'grammar': KT.tokenize_grammar,
+    'subword': lambda text: KT.tokenize_subword(text, 3, 'fixed'),
+    'bpe': lambda text: KT.tokenize_subword(text, 3, 'bpe'),
+    'syllable': lambda text: KT.tokenize_subword(text, 3, 'syllable'),
+    'frequency': lambda text: KT.tokenize_subword(text, 3, 'frequency'),
+    'byte': KT.tokenize_bytes,
+}
+
+def _stream_name_for(tokenizer_type: str) -> str:
+    if tokenizer_type == 'bpe':
+        return 'subword_bpe'
+    if tokenizer_type == 'syllable':
+        return 'subword_syllable'
+    if tokenizer_type == 'frequency':
+        return 'subword_frequency'
+    return tokenizer_type
+
+def preprocess_text(text: str, lower: bool, drop_specials: bool, collapse_repeats: bool) -> str:
+    """Preprocess text based on options"""
+    if lower:
+        text = text.lower()
+
+    if drop_specials:
+        # Keep only alphanumeric and spaces
+        text = ''.join(c if c.isalnum() or c.isspace() else ' ' for c in text)
+
+    if collapse_repeats:
+        # Collapse multiple spaces into single space
+        import re
+        text = re.sub(r'\s+', ' ', text).strip()
+
+    return text
+
+def generate_token_colors(tokens: List[str]) -> List[str]:
+    """Generate colors for tokens"""
+    colors = []
+    for i, token in enumerate(tokens):
+        hue = (i * 137.5) % 360  # Golden angle for good distribution
+        colors.append(f"hsl({hue}, 70%, 50%)")
+    return colors
+
+def calculate_fingerprint(text: str, tokens: List[str], embedding: bool = False) -> Dict[str, Any]:
+    """Fallback fingerprint when engine summary is unavailable."""
+    try:
+        content_id = _content_id(text)
+        # Use engine's digital root semantics when possible
+        try:
+            sig = KT.digital_root_9(content_id)
+            if embedding:
+                sig = KT.digital_root_9(sig + 1)
+        except Exception:
+            sig = (content_id % 9) or 9
+            if embedding:
+                sig = ((sig + 1 - 1) % 9) + 1
+        compat = content_id % 10
+        text_value = sum(ord(c) for c in text) % 10000
+        text_value_with_embedding = (text_value + (1 if embedding else 0)) % 10000
+        return {
+            "signatureDigit": int(sig),
+            "compatDigit": int(compat),
+            "textValue": int(text_value),
+            "textValueWithEmbedding": int(text_value_with_embedding),
+        }
+    except Exception as e:
+        print(f"Error calculating fingerprint: {e}")
+        return {
+            "signatureDigit": 0,
+            "compatDigit": 0,
+            "textValue": 0,
+            "textValueWithEmbedding": 0,
+        }
+
+def _processed(params: Dict[str, Any]) -> str:
+    return preprocess_text(
+        params.get('text', ''),
+        params.get('lower', False),
+        params.get('drop_specials', False),
+        bool(params.get('collapse_repeats', 1)),
+    )
+
+def _fingerprint(processed_text: str, tokens: List[Any], embedding_flag: bool, embedding: bool) -> Dict[str, Any]:
+    try:
+        # Use engine's summary so digits match CLI
+        summary = KT.compute_text_value_summary(processed_text, embedding_flag)
+        return {
+            "signatureDigit": summary.get("signature_digit", 0),
+            "compatDigit": summary.get("compat_digit", 0),
+            "textValue": summary.get("weighted_sum", 0),
+            "textValueWithEmbedding": summary.get("final_digit", 0)
+        }
+    except Exception:
+        return calculate_fingerprint(processed_text, tokens, embedding)
+
+def dedupe_texts(texts: List[str]):
+    """Return (unique texts in first-seen order, index into them for every input)"""
+    unique: List[str] = []
+    seen: Dict[str, int] = {}
+    order: List[int] = []
+    for text in texts:
+        idx = seen.get(text)
+        if idx is None:
+            idx = seen[text] = len(unique)
+            unique.append(text)
+        order.append(idx)
+    return unique, order
+
+# ---------------------------- Tasks ----------------------------
+
+def tokenize_task(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Full /tokenize computation; returns the TokenizationResult fields"""
+    start_time = time.perf_counter()
+    tokenizer_type = params['tokenizer_type']
+    processed_text = _processed(params)
+
+    # Tokenize
+    tokens = TOKENIZERS[tokenizer_type](processed_text)
+    # Engine digits for the selected stream only (same values as a full build)
+    seed = params.get('seed') if params.get('seed') is not None else 12345
+    embedding_flag = bool(params.get('embedding_bit')) or bool(params.get('embedding'))
+    try:
+        engine = KT.TextTokenizer(seed, embedding_flag)
+        ts = engine.build_stream(_stream_name_for(tokenizer_type), tokens)
+        frontend_digits = [t.frontend for t in ts.tokens]
+        backend_scaled = [t.backend_scaled for t in ts.tokens]
+        content_ids = [t.content_id for t in ts.tokens]
+    except Exception:
+        frontend_digits = []
+        backend_scaled = []
+        content_ids = []
+
+    # Generate colors
+    colors = generate_token_colors(tokens)
+
+    # Create token objects
+    token_objects = []
+    min_len = min(len(tokens), len(frontend_digits)) if frontend_digits else len(tokens)
+    for i in range(min_len):
+        tok = tokens[i]
+        token_text = tok if isinstance(tok, str) else tok.get('text', '')
+        token_length = len(token_text) if isinstance(tok, str) else tok.get('length', len(token_text))
+        position_val = i if isinstance(tok, str) else tok.get('index', i)
+        token_objects.append({
+            "text": token_text,
+            # Expose engine digit as the visible ID so UI "IDs" view matches engine output
+            "id": (frontend_digits[i] if i < len(frontend_digits) else i),
+            "position": position_val,
+            "length": token_length,
+            "type": (tok.get('type', tokenizer_type) if isinstance(tok, dict) else tokenizer_type),
+            "color": colors[i] if i < len(colors) else colors[i % len(colors)],
+        })
+
+    # Calculate metrics
+    processing_time = (time.perf_counter() - start_time) * 1000  # Convert to ms
+    memory_usage = len(processed_text.encode('utf-8')) / 1024  # KB
+    words = processed_text.split()
+    compression_ratio = len(tokens) / len(words) if words else 1.0
+
+    # Calculate fingerprint
+    fingerprint = _fingerprint(processed_text, tokens, embedding_flag, params.get('embedding', False))
+
+    return {
+        "tokens": token_objects,
+        "tokenCount": len(token_objects),
+        "characterCount": len(processed_text),
+        "tokenizerType": tokenizer_type,
+        "processingTime": processing_time,
+        "memoryUsage": memory_usage,
+        "compressionRatio": compression_ratio,
+        "reversibility": True,  # All our tokenizers are reversible
+        "fingerprint": fingerprint,
+        "originalText": params.get('text', ''),  # Include original text for comparison
+        "frontendDigits": frontend_digits if frontend_digits else None,
+        "backendScaled": backend_scaled if backend_scaled else None,
+        "contentIds": content_ids if content_ids else None,
+    }
+
+def stream_tokenize(params: Dict[str, Any], batch_size: int = 1000,
+                    word_ratio: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    Streaming /tokenize: yields a header record, then {"type": "tokens"}
+    records of at most batch_size tokens as the tokenizer produces them,
+    then a trailer with the metrics and fingerprint. Token fields match
+    tokenize_task; the full token list is never held.
+
+    compressionRatio is tokens per word, as in tokenize_task; word_ratio
+    counts only "word" tokens instead, as the lightweight server's /tokenize.
+    """
+    start_time = time.perf_counter()
+    tokenizer_type = params['tokenizer_type']
+    stream_name = _stream_name_for(tokenizer_type)
+    processed_text = _processed(params)
+    seed = params.get('seed') if params.get('seed') is not None else 12345
+    embedding_flag = bool(params.get('embedding_bit')) or bool(params.get('embedding'))
+    engine = KT.TextTokenizer(seed, embedding_flag)
+
+    yield {
+        "type": "header",
+        "tokenizerType": tokenizer_type,
+        "characterCount": len(processed_text),
+        "seed": seed,
+        "embedding": embedding_flag,
+        "batchSize": batch_size,
+    }
+
+    # iter_stream reads one token ahead, so pair records with their tokens
+    # through a short queue
+    lookahead = deque()
+
+    def tokens():
+        for tok in KT.iter_tokens(processed_text, stream_name):
+            lookahead.append(tok)
+            yield tok
+
+    batch = []
+    token_count = 0
+    word_tokens = 0
+    for rec in engine.iter_stream(stream_name, tokens()):
+        tok = lookahead.popleft()
+        token_type = tok.get('type', tokenizer_type)
+        if token_type == 'word':
+            word_tokens += 1
+        batch.append({
+            "text": rec.text,
+            "id": rec.frontend,
+            "position": tok.get('index', token_count),
+            "length": tok.get('length', len(rec.text)),
+            "type": token_type,
+            "color": f"hsl({(token_count * 137.5) % 360}, 70%, 50%)",
+            "backendScaled": rec.backend_scaled,
+            "contentId": rec.content_id,
+        })
+        token_count += 1
+        if len(batch) >= batch_size:
+            yield {"type": "tokens", "tokens": batch}
+            batch = []
+    if batch:
+        yield {"type": "tokens", "tokens": batch}
+
+    words = sum(1 for _ in re.finditer(r'\S+', processed_text))
+    yield {
+        "type": "trailer",
+        "tokenCount": token_count,
+        "processingTime": (time.perf_counter() - start_time) * 1000,
+        "memoryUsage": len(processed_text.encode('utf-8')) / 1024,
+        "compressionRatio": (word_tokens if word_ratio else token_count) / words if words else 1.0,
+        "reversibility": True,
+        "fingerprint": _fingerprint(processed_text, [], embedding_flag, params.get('embedding', False)),
+    }
+
+RESPONSE_FORMATS = ("objects", "columnar")
+# Per-token fields a /tokenize response can be projected to
+TOKEN_FIELDS = ("text", "id", "position", "length", "type", "color", "backendScaled", "contentId")
+# Default columns for format=columnar (colors are cheap to compute client-side:
+# hsl(i * 137.5 % 360, 70%, 50%))
+COLUMNAR_FIELDS = ("text", "id", "position", "length", "type")
+# Extra top-level fields that are only sent when asked for
+OPTIONAL_FIELDS = ("originalText",)
+_SUMMARY_KEYS = ("tokenCount", "characterCount", "tokenizerType", "processingTime", "memoryUsage",
+                 "compressionRatio", "reversibility", "fingerprint", "resultId")
+# Per-token fields kept as parallel arrays in the default schema
+_ARRAY_KEYS = {"backendScaled": "backendScaled", "contentId": "contentIds"}
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """'text,id' -> ['text', 'id']; raises ValueError on unknown names"""
+    if fields is None:
+        return None
+    names = [name.strip() for name in fields.split(',') if name.strip()]
+    unknown = [name for name in names if name not in TOKEN_FIELDS and name not in OPTIONAL_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)} "
+                         f"(available: {', '.join(TOKEN_FIELDS + OPTIONAL_FIELDS)})")
+    return names
+
+def project_result(result: Dict[str, Any], fmt: str = "objects", fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Lean views of a tokenize_task result. fmt="columnar" returns one array
+    per field under "columns"; fmt="objects" with fields keeps the token
+    objects but only the named keys. Without fields, objects is the full
+    default schema and columnar uses COLUMNAR_FIELDS.
+    """
+    if fmt not in RESPONSE_FORMATS:
+        raise ValueError(f"Unknown format: {fmt} (expected objects or columnar)")
+    if fmt == "objects" and fields is None:
+        return result
+    if fields is None:
+        fields = list(COLUMNAR_FIELDS)
+    token_fields = [name for name in fields if name in TOKEN_FIELDS]
+    out = {key: result[key] for key in _SUMMARY_KEYS if key in result}
+    tokens = result["tokens"]
+    columns = {}
+    for name in token_fields:
+        if name in _ARRAY_KEYS:
+            columns[name] = result.get(_ARRAY_KEYS[name]) or []
+        else:
+            columns[name] = [t[name] for t in tokens]
+    if fmt == "columnar":
+        out["format"] = "columnar"
+        out["columns"] = columns
+    else:
+        object_fields = [name for name in token_fields if name not in _ARRAY_KEYS]
+        out["tokens"] = [{name: t[name] for name in object_fields} for t in tokens]
+        for name in token_fields:
+            if name in _ARRAY_KEYS:
+                out[_ARRAY_KEYS[name]] = columns[name]
+    for name in OPTIONAL_FIELDS:
+        if name in fields and name in result:
+            out[name] = result[name]
+    return out
+
+def tokenize_batch_task(params: Dict[str, Any], texts: List[str]) -> List[Dict[str, Any]]:
+    """
+    Compact /tokenize/batch items for a list of texts sharing one set of
+    options; the engine is built once for the whole list.
+    """
+    tokenizer_type = params['tokenizer_type']
+    stream_name = _stream_name_for(tokenizer_type)
+    tokenizer_func = TOKENIZERS[tokenizer_type]
+    seed = params.get('seed') if params.get('seed') is not None else 12345
+    embedding_flag = bool(params.get('embedding_bit')) or bool(params.get('embedding'))
+    with_fingerprint = params.get('fingerprint', True)
+    engine = KT.TextTokenizer(seed, embedding_flag)
+    items = []
+    for text in texts:
+        processed_text = preprocess_text(
+            text,
+            params.get('lower', False),
+            params.get('drop_specials', False),
+            bool(params.get('collapse_repeats', 1)),
+        )
+        tokens = tokenizer_func(processed_text)
+        ts = engine.build_stream(stream_name, tokens)
+        item = {
+            "tokens": [t["text"] for t in tokens],
+            "ids": [t.frontend for t in ts.tokens],
+            "positions": [t.get("index", i) for i, t in enumerate(tokens)],
+            "tokenCount": len(tokens),
+            "characterCount": len(processed_text),
+        }
+        if with_fingerprint:
+            item["fingerprint"] = _fingerprint(processed_text, tokens, embedding_flag, params.get('embedding', False))
+        items.append(item)
+    return items
+
+def tokens_from_result(result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Engine-style token dicts rebuilt from a tokenize_task result (enough to reconstruct the text)"""
+    tokens = []
+    byte_index = 0
+    for i, t in enumerate(result["tokens"]):
+        tok = {"id": i, "text": t["text"], "index": t["position"], "type": t["type"], "length": t["length"]}
+        if t["type"] == "utf8_byte":
+            # Bytes of one character share its index and come in order
+            if i and tokens[-1]["index"] == tok["index"]:
+                byte_index += 1
+            else:
+                byte_index = 0
+            tok["byte_index"] = byte_index
+            tok["byte_value"] = int(t["text"])
+        tokens.append(tok)
+    return tokens
+
+def analyze_task(params: Dict[str, Any], tokenized: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """/analyze computation on top of a tokenize_task result (computed if not given)"""
+    result = tokenized if tokenized is not None else tokenize_task(params)
+    tokens = result["tokens"]
+    unique = len(set(token["text"] for token in tokens))
+
+    # Calculate additional analysis metrics
+    analysis = {
+        "tokenDistribution": {},
+        "characterDistribution": {},
+        "averageTokenLength": sum(len(token["text"]) for token in tokens) / len(tokens) if tokens else 0,
+        "uniqueTokens": unique,
+        "repetitionRate": 1 - (unique / len(tokens)) if tokens else 0
+    }
+
+    # Token distribution
+    token_distribution = analysis["tokenDistribution"]
+    for token in tokens:
+        token_text = token["text"]
+        token_distribution[token_text] = token_distribution.get(token_text, 0) + 1
+
+    # Character distribution
+    char_distribution = analysis["characterDistribution"]
+    for char in params.get('text', ''):
+        char_distribution[char] = char_distribution.get(char, 0) + 1
+
+    return {
+        "analysis": analysis,
+        "metrics": {
+            "processingTime": result["processingTime"],
+            "memoryUsage": result["memoryUsage"],
+            "compressionRatio": result["compressionRatio"]
+        },
+        "fingerprint": result["fingerprint"]
+    }
+
+def compress_task(params: Dict[str, Any], tokenized: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Compression analysis using real engine metrics, reusing a tokenize_task result if given"""
+    processed_text = _processed(params)
+    tokens = tokens_from_result(tokenized) if tokenized is not None else None
+    analysis = KT.analyze_compression_efficiency(processed_text, _stream_name_for(params['tokenizer_type']), tokens)
+    methods = analysis.get("compression_methods", {}) if analysis else {}
+    token_count = analysis.get("original_tokens", 0) if analysis else 0
+    out = []
+    for method, stats in methods.items():
+        ratio = float(stats.get("compression_ratio", 1.0))
+        saved = int(stats.get("space_saved", 0))
+        pct = float(stats.get("compression_percentage", 0.0))
+        out.append({
+            "algorithm": method.capitalize(),
+            "compressionRatio": ratio,
+            "tokensSaved": saved,
+            "percentageSaved": pct if pct else ((saved / token_count) * 100 if token_count else 0.0),
+            "reversibility": bool(stats.get("is_reversible", True)),
+        })
+    return out
+
+def validate_task(params: Dict[str, Any], tokenized: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Reversibility check using engine reconstruction, reusing a tokenize_task result if given"""
+    processed_text = _processed(params)
+    if tokenized is not None:
+        tokens = tokens_from_result(tokenized)
+    else:
+        # Produce tokens with the same tokenizer the user selected
+        tokens = TOKENIZERS[params['tokenizer_type']](processed_text)
+    # Engine-aware reconstruction
+    reconstructed = KT.reconstruct_from_tokens(tokens, _stream_name_for(params['tokenizer_type']))
+    is_valid = reconstructed == processed_text
+    differences: List[str] = []
+    if not is_valid:
+        differences.append(f"Original length: {len(processed_text)}, Reconstructed length: {len(reconstructed)}")
+        if len(processed_text) != len(reconstructed):
+            differences.append("Length mismatch detected")
+    return {
+        "isValid": is_valid,
+        "reversibility": is_valid,
+        "reconstruction": reconstructed,
+        "differences": differences,
+    }
+
+def decode_task(tokens: List[Any], tokenizer_type: str) -> Dict[str, Any]:
+    """Reconstruct text from tokens"""
+    decoded_text = KT.reconstruct_from_tokens(tokens, tokenizer_type)
+    return {
+        "decoded_text": decoded_text,
+        "tokenizer_type": tokenizer_type,
+        "token_count": len(tokens),
+        "decoded_length": len(decoded_text)
+    }
+
+def decode_result_task(params: Dict[str, Any], tokenized: Dict[str, Any]) -> Dict[str, Any]:
+    """decode_task on the tokens of a stored tokenize_task result"""
+    return decode_task(tokens_from_result(tokenized), _stream_name_for(params['tokenizer_type']))
+
+def run_timed(func, *args):
+    """
+    Run a task under core instrumentation and return (result, StageTimings)
+    so a worker process can ship its stage timings back to the server.
+    """
+    with KT.instrument() as timings:
+        result = func(*args)
+    return result, timings
@@ -0,0 +1,187 @@
+"""
+Session handles for tokenize-once workflows
+/tokenize stores its result under a result_id; /analyze, /compress,
+/validate and /decode can then reference that id instead of sending the
+text again, and reuse the stored tokens and fingerprint.
+
+- The store is bounded by an estimate of the memory its results hold;
+  least recently used sessions are dropped first.
+- Sessions not used for idle_ttl seconds expire.
+- Results derived from a session (analysis, compression, validation,
+  decoding) are kept on the session, so asking twice costs nothing. They
+  count against the memory bound by their JSON size, like result cache
+  entries.
+- Storing a result under a key that already has a live session (the same
+  text and options) returns that session's result_id instead of keeping a
+  second copy.
+
+Configuration (environment):
+  SANTOK_SESSION_BYTES  approximate memory for sessions (default: 256 MiB, 0 = disabled)
+  SANTOK_SESSION_IDLE   seconds a session may go unused (default: 900)
+"""
+
+import json
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# Rough in-memory cost of one token object in a tokenize result
+# (dict, strings and the per-token digit lists)
+TOKEN_BYTES = 512
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    try:
+        return int(value) if value not in (None, '') else default
+    except ValueError:
+        return default
+
+
+def estimate_size(params: Dict[str, Any], result: Dict[str, Any]) -> int:
+    """Approximate bytes held by a session, without walking the result"""
+    text = params.get('text') or ''
+    return 64 + 2 * len(text) + TOKEN_BYTES * int(result.get('tokenCount', 0))
+
+
+def estimate_derived_size(value: Any) -> int:
+    """Approximate bytes held by a derived result: its JSON size"""
+    return 64 + len(json.dumps(value, separators=(',', ':')))
+
+
+class Session:
+    """One stored /tokenize result and what has been derived from it"""
+
+    __slots__ = ('result_id', 'params', 'result', 'derived', 'size', 'last_used', 'key')
+
+    def __init__(self, result_id: str, params: Dict[str, Any], result: Dict[str, Any], size: int,
+                 key: Optional[str] = None):
+        self.result_id = result_id
+        self.key = key
+        self.params = params
+        self.result = result
+        self.derived: Dict[str, Any] = {}
+        self.size = size
+        self.last_used = time.monotonic()
+
+
+class SessionStore:
+    """Memory-bounded result_id -> Session map with idle expiry"""
+
+    def __init__(self, max_bytes: int = 256 << 20, idle_ttl: float = 900.0):
+        self.max_bytes = max(0, max_bytes)
+        self.idle_ttl = idle_ttl
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._by_key: Dict[str, str] = {}
+        self._bytes = 0
+        self.counters = {'created': 0, 'reused': 0, 'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+
+    @classmethod
+    def from_env(cls) -> 'SessionStore':
+        return cls(
+            max_bytes=_env_int('SANTOK_SESSION_BYTES', 256 << 20),
+            idle_ttl=float(_env_int('SANTOK_SESSION_IDLE', 900)),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def create(self, params: Dict[str, Any], result: Dict[str, Any], key: Optional[str] = None) -> Optional[str]:
+        """
+        Store a tokenize result; returns its result_id (None if it cannot be kept).
+        With a key (see result_cache.cache_key), a live session stored under
+        the same key is reused.
+        """
+        size = estimate_size(params, result)
+        if not self.enabled or size > self.max_bytes:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            result_id = self._by_key.get(key) if key is not None else None
+            if result_id is not None:
+                session = self._sessions[result_id]
+                session.last_used = now
+                self._sessions.move_to_end(result_id)
+                self.counters['reused'] += 1
+                return result_id
+            result_id = secrets.token_urlsafe(16)
+            self._sessions[result_id] = Session(result_id, params, result, size, key)
+            if key is not None:
+                self._by_key[key] = result_id
+            self._bytes += size
+            self.counters['created'] += 1
+            self._evict()
+        return result_id
+
+    def add_derived(self, session: Session, kind: str, value: Any):
+        """Keep a result derived from session, counted against the memory bound"""
+        size = estimate_derived_size(value)
+        with self._lock:
+            if self._sessions.get(session.result_id) is not session or kind in session.derived:
+                # Evicted meanwhile, or another request stored it first
+                return
+            session.derived[kind] = value
+            session.size += size
+            self._bytes += size
+            self._evict()
+
+    def get(self, result_id: str) -> Optional[Session]:
+        """Session for result_id, or None if unknown, evicted or expired"""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(result_id)
+            if session is None:
+                self.counters['misses'] += 1
+                return None
+            session.last_used = now
+            self._sessions.move_to_end(result_id)
+            self.counters['hits'] += 1
+            return session
+
+    def discard(self, result_id: str) -> bool:
+        with self._lock:
+            if result_id not in self._sessions:
+                return False
+            self._drop(result_id)
+            return True
+
+    def _expire(self, now: float):
+        # Sessions are kept in last-used order, so expired ones are at the front
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest.last_used < self.idle_ttl:
+                break
+            self._drop(oldest.result_id)
+            self.counters['expirations'] += 1
+
+    def _evict(self):
+        while self._bytes > self.max_bytes:
+            self._drop(next(iter(self._sessions)))
+            self.counters['evictions'] += 1
+
+    def _drop(self, result_id: str):
+        session = self._sessions.pop(result_id)
+        self._bytes -= session.size
+        if session.key is not None and self._by_key.get(session.key) == result_id:
+            del self._by_key[session.key]
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = {
+                'sessions': len(self._sessions),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'idle_ttl': self.idle_ttl,
+            }
+            stats.update(self.counters)
+            return stats
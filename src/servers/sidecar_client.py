@@ -0,0 +1,138 @@
+"""
+Python client for the SanTOK sidecar server (binary_protocol.py)
+
+    with SidecarClient('/tmp/santok.sock') as client:
+        item = client.tokenize("Hello World!", 'word')
+        items = client.tokenize_many(texts, 'word')   # pipelined
+
+Results have the /tokenize/batch item shape: tokens, ids, positions,
+tokenCount, characterCount and (with fingerprint=True) fingerprint.
+
+send() / receive() expose the pipelining directly: send any number of
+requests, then receive responses in whatever order the server answers.
+A client is not thread-safe; use one per thread.
+"""
+
+import socket
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import binary_protocol as bp
+
+Address = Union[str, Tuple[str, int]]
+
+
+class SidecarError(Exception):
+    """The server answered a request with an error"""
+
+    def __init__(self, request_id: int, message: str):
+        super().__init__(message)
+        self.request_id = request_id
+
+
+class SidecarClient:
+    """One connection to a sidecar server (a socket path or a (host, port) pair)"""
+
+    def __init__(self, address: Address, timeout: Optional[float] = None):
+        if isinstance(address, str):
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.settimeout(timeout)
+        self.sock.connect(address)
+        self._next_id = 1
+        self._out = []
+        self._buf = bytearray()
+        self._frames = []
+        self._ready: Dict[int, Tuple[int, Any]] = {}  # answered out of order
+
+    def close(self):
+        self.sock.close()
+
+    def __enter__(self) -> 'SidecarClient':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    # -- pipelining --
+
+    def send(self, text: str, tokenizer_type: str = 'word', seed: int = 12345, lower: bool = False,
+             drop_specials: bool = False, collapse_repeats: bool = False, embedding: bool = False,
+             fingerprint: bool = False, op: int = bp.OP_TOKENIZE) -> int:
+        """Queue a request (written on flush() or receive()); returns its request_id"""
+        request_id = self._next_id
+        self._next_id = (self._next_id + 1) & 0xFFFFFFFF or 1
+        flags = bp.options_to_flags(lower, drop_specials, collapse_repeats, embedding, fingerprint)
+        self._out.append(bp.encode_request(request_id, text, tokenizer_type, flags, seed, op))
+        return request_id
+
+    def flush(self):
+        if self._out:
+            data = b''.join(self._out)
+            self._out.clear()
+            self.sock.sendall(data)
+
+    def receive(self, request_id: Optional[int] = None) -> Tuple[int, Dict[str, Any]]:
+        """
+        The next response, or the one for request_id: (request_id, item).
+        Raises SidecarError when that request failed.
+        """
+        self.flush()
+        if request_id is None and self._ready:
+            request_id = next(iter(self._ready))
+        if request_id is not None and request_id in self._ready:
+            return self._result(request_id, *self._ready.pop(request_id))
+        while True:
+            payload = self._read_frame()
+            rid, status, body = bp.decode_response(payload)
+            if request_id is None or rid == request_id:
+                return self._result(rid, status, body)
+            self._ready[rid] = (status, body)
+
+    def _result(self, request_id, status, body):
+        if status != bp.STATUS_OK:
+            raise SidecarError(request_id, bytes(body).decode('utf-8', 'replace'))
+        return request_id, (bp.decode_tokens(body) if len(body) else {})
+
+    def _read_frame(self) -> bytes:
+        while not self._frames:
+            data = self.sock.recv(256 << 10)
+            if not data:
+                raise ConnectionError("sidecar closed the connection")
+            self._buf += data
+            frames, used = bp.split_frames(self._buf, max_frame=1 << 31)
+            del self._buf[:used]
+            self._frames.extend(reversed(frames))
+        return self._frames.pop()
+
+    # -- convenience --
+
+    def ping(self):
+        self.receive(self.send('', op=bp.OP_PING))
+
+    def tokenize(self, text: str, tokenizer_type: str = 'word', **options) -> Dict[str, Any]:
+        return self.receive(self.send(text, tokenizer_type, **options))[1]
+
+    def tokenize_many(self, texts: Iterable[str], tokenizer_type: str = 'word', window: int = 256,
+                      **options) -> List[Dict[str, Any]]:
+        """Tokenize texts with up to window requests in flight; results in input order"""
+        order = {}
+        results: List[Any] = []
+        in_flight = 0
+        for text in texts:
+            order[self.send(text, tokenizer_type, **options)] = len(results)
+            results.append(None)
+            in_flight += 1
+            if in_flight >= window:
+                # Drain half the window so new requests go out in batches
+                while in_flight > window // 2:
+                    rid, item = self.receive()
+                    results[order.pop(rid)] = item
+                    in_flight -= 1
+        while in_flight:
+            rid, item = self.receive()
+            results[order.pop(rid)] = item
+            in_flight -= 1
+        return results
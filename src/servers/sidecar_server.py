@@ -0,0 +1,193 @@
+"""
+SanTOK sidecar server
+Tokenizes over the binary protocol in binary_protocol.py, on a Unix domain
+socket (default) or TCP. Meant for a process on the same host that sends
+many short texts, where HTTP + JSON framing costs more than the work.
+
+- Connections are served by threads; each reads whatever frames have
+  arrived, answers them and writes all the responses with one send, so
+  pipelined requests cost one syscall per batch rather than per request.
+- Consecutive requests with the same options are tokenized together
+  (tokenize_batch_task builds the engine once for them).
+- Responses carry the request's id; clients may keep any number of
+  requests in flight.
+
+Run: python src/servers/sidecar_server.py --socket /tmp/santok.sock
+     python src/servers/sidecar_server.py --tcp 127.0.0.1:8700
+
+Configuration (environment, overridden by command line flags):
+  SANTOK_SIDECAR_SOCKET     socket path (default: <tempdir>/santok.sock)
+  SANTOK_SIDECAR_MAX_FRAME  largest accepted request in bytes (default: 64 MiB)
+"""
+
+import argparse
+import os
+import signal
+import socket
+import socketserver
+import stat
+import sys
+import tempfile
+import threading
+from typing import List
+
+# Add src directory (backend files) and this directory (server helpers) to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import binary_protocol as bp
+import server_tasks
+
+RECV_SIZE = 256 << 10
+
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), 'santok.sock')
+
+
+def handle_frames(frames: List[bytes]) -> bytes:
+    """Responses (already framed and joined) for a list of request payloads"""
+    out = []
+    run = []  # consecutive tokenize requests sharing options: (request_id, text)
+    run_params = None
+
+    def flush_run():
+        if not run:
+            return
+        texts = [text for _, text in run]
+        try:
+            items = server_tasks.tokenize_batch_task(run_params, texts)
+        except Exception:
+            # Answer each request on its own so one bad text fails alone
+            items = None
+        for i, (request_id, text) in enumerate(run):
+            try:
+                item = items[i] if items is not None else server_tasks.tokenize_batch_task(run_params, [text])[0]
+                out.append(bp.encode_response(request_id, bp.STATUS_OK, bp.encode_tokens(item)))
+            except Exception as e:
+                out.append(bp.encode_error(request_id, f"Tokenization error: {e}"))
+        run.clear()
+
+    for payload in frames:
+        try:
+            op, request_id, params, text = bp.decode_request(payload)
+        except bp.ProtocolError as e:
+            flush_run()
+            out.append(bp.encode_error(bp.peek_request_id(payload), str(e)))
+            continue
+        if op == bp.OP_PING:
+            flush_run()
+            out.append(bp.encode_response(request_id, bp.STATUS_OK, b''))
+        elif op == bp.OP_TOKENIZE:
+            if params != run_params:
+                flush_run()
+                run_params = params
+            run.append((request_id, text))
+        else:
+            flush_run()
+            out.append(bp.encode_error(request_id, f"Unknown op: {op}"))
+    flush_run()
+    return b''.join(out)
+
+
+class SidecarHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        sock = self.request
+        buf = bytearray()
+        while True:
+            try:
+                data = sock.recv(RECV_SIZE)
+            except (ConnectionResetError, OSError):
+                return
+            if not data:
+                return
+            buf += data
+            try:
+                frames, used = bp.split_frames(buf, self.server.max_frame)
+            except bp.ProtocolError as e:
+                # The stream cannot be resynchronised after a bad length
+                sock.sendall(bp.encode_error(0, str(e)))
+                return
+            if not frames:
+                continue
+            del buf[:used]
+            try:
+                sock.sendall(handle_frames(frames))
+            except (BrokenPipeError, ConnectionResetError):
+                return
+
+
+class UnixSidecarServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, path: str, max_frame: int = bp.MAX_FRAME):
+        self.max_frame = max_frame
+        if os.path.exists(path):
+            # A stale socket from an earlier run; refuse to clobber anything else
+            if not _is_socket(path):
+                raise OSError(f"{path} exists and is not a socket")
+            os.unlink(path)
+        super().__init__(path, SidecarHandler)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+
+class TCPSidecarServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+    def __init__(self, address, max_frame: int = bp.MAX_FRAME):
+        self.max_frame = max_frame
+        super().__init__(address, SidecarHandler)
+
+    def get_request(self):
+        conn, addr = super().get_request()
+        # Small request/response frames: do not wait for Nagle
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return conn, addr
+
+
+def _is_socket(path: str) -> bool:
+    return stat.S_ISSOCK(os.stat(path).st_mode)
+
+
+def make_server(socket_path: str = None, tcp: str = None, max_frame: int = bp.MAX_FRAME):
+    """UnixSidecarServer on socket_path, or TCPSidecarServer on "host:port" """
+    if tcp:
+        host, _, port = tcp.rpartition(':')
+        return TCPSidecarServer((host or '127.0.0.1', int(port)), max_frame)
+    return UnixSidecarServer(socket_path or DEFAULT_SOCKET, max_frame)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='SanTOK sidecar server (binary protocol)')
+    parser.add_argument('--socket', default=os.environ.get('SANTOK_SIDECAR_SOCKET', DEFAULT_SOCKET),
+                        help='Unix domain socket path')
+    parser.add_argument('--tcp', help='Listen on HOST:PORT instead of a Unix socket')
+    parser.add_argument('--max-frame', type=int, default=bp.MAX_FRAME,
+                        help='Largest accepted request in bytes')
+    args = parser.parse_args(argv)
+
+    server = make_server(args.socket, args.tcp, args.max_frame)
+
+    def stop(signum, frame):
+        threading.Thread(target=server.shutdown, daemon=True).start()
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    where = f"tcp://{args.tcp}" if args.tcp else f"unix://{server.server_address}"
+    print(f"SanTOK sidecar listening on {where}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
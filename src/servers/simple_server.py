@@ -4,6 +4,7 @@ Simple HTTP Server for SanTOK (No FastAPI dependencies)
 Uses only standard library for maximum compatibility
 """
 
+import argparse
 import http.server
 import socketserver
 import json
@@ -13,8 +14,9 @@ import os
 import time
 from typing import Dict, List, Any
 
-# Add src directory to path to import backend files
+# Add src directory (backend files) and this directory (server helpers) to path
 sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # Import backend files
 try:
@@ -25,6 +27,12 @@ except ImportError as e:
     print(f"❌ Error importing core modules: {e}")
     sys.exit(1)
 
+import fast_json
+import http_runtime
+
+# Per-stage timings returned as a Server-Timing header (opt-in: SANTOK_SERVER_TIMING=1)
+SERVER_TIMING = os.environ.get('SANTOK_SERVER_TIMING', '0') not in ('', '0')
+
 class SanTOKHandler(http.server.BaseHTTPRequestHandler):
     """HTTP request handler for SanTOK API"""
     
@@ -34,6 +42,7 @@ class SanTOKHandler(http.server.BaseHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Content-Length', '0')
         self.end_headers()
     
     def do_GET(self):
@@ -47,6 +56,20 @@ class SanTOKHandler(http.server.BaseHTTPRequestHandler):
     
     def do_POST(self):
         """Handle POST requests"""
+        self._request_start = time.perf_counter()
+        # Read the whole body up front so keep-alive connections stay in sync
+        try:
+            self.json_body = http_runtime.read_json(self)
+        except http_runtime.RequestError as e:
+            self.send_error(e.status, e.message)
+            return
+        if not SERVER_TIMING:
+            return self.route_post()
+        with KT.instrument():
+            self.route_post()
+    
+    def route_post(self):
+        """Dispatch POST requests by path"""
         if self.path == '/tokenize':
             self.handle_tokenize()
         elif self.path == '/decode':
@@ -80,9 +103,7 @@ class SanTOKHandler(http.server.BaseHTTPRequestHandler):
     def handle_tokenize(self):
         """Handle tokenization requests"""
         try:
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            data = json.loads(post_data.decode('utf-8'))
+            data = self.json_body
             
             text = data.get('text', '')
             tokenizer_type = data.get('tokenizer_type', 'word')
@@ -118,9 +139,7 @@ class SanTOKHandler(http.server.BaseHTTPRequestHandler):
     def handle_decode(self):
         """Handle decoding requests"""
         try:
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            data = json.loads(post_data.decode('utf-8'))
+            data = self.json_body
             
             tokens = data.get('tokens', [])
             tokenizer_type = data.get('tokenizer_type', 'word')
@@ -154,21 +173,32 @@ class SanTOKHandler(http.server.BaseHTTPRequestHandler):
     
     def send_json_response(self, data, status=200):
         """Send JSON response"""
+        with KT.stage('serialize'):
+            body = fast_json.dumps(data)
         self.send_response(status)
         self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
         self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Expose-Headers', 'Server-Timing')
+        timings = KT.current_timings()
+        if timings is not None:
+            timings.add('total', time.perf_counter() - self._request_start)
+            self.send_header('Server-Timing', timings.server_timing())
         self.end_headers()
         
-        json_data = json.dumps(data, indent=2)
-        self.wfile.write(json_data.encode('utf-8'))
+        self.wfile.write(body)
     
     def log_message(self, format, *args):
         """Override to customize logging"""
         print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {format % args}")
 
-def main():
+def main(argv=None):
     """Main server function"""
-    PORT = 8000
+    parser = argparse.ArgumentParser(description='SanTOK simple HTTP server')
+    http_runtime.add_arguments(parser)
+    args = parser.parse_args(argv)
+    http_runtime.MAX_BODY = args.max_body
+    PORT = args.port
     
     print("🚀 SanTOK Simple HTTP Server")
     print("=" * 40)
@@ -176,9 +206,14 @@ def main():
     print(f"🌐 Server will be available at: http://localhost:{PORT}")
     print("🔄 Press Ctrl+C to stop the server")
     print("=" * 40)
+
+    if args.production or args.workers > 1:
+        http_runtime.serve(SanTOKHandler, args.host, PORT, workers=args.workers, keepalive=args.keepalive)
+        print("\n🛑 Server stopped")
+        return
     
     try:
-        with socketserver.TCPServer(("", PORT), SanTOKHandler) as httpd:
+        with socketserver.TCPServer((args.host, PORT), SanTOKHandler) as httpd:
             print(f"✅ Server running at http://localhost:{PORT}")
             httpd.serve_forever()
     except KeyboardInterrupt:
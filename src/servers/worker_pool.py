@@ -0,0 +1,234 @@
+"""
+Warm process pool for CPU-bound server work
+Keeps the asyncio event loop free while the pure-Python tokenizers run.
+
+- Small requests (below inline_chars) run inline; shipping them to a worker
+  costs more than the work itself.
+- Admission is bounded: once max_queue jobs are queued or running, new
+  requests are rejected with PoolBusy (HTTP 503) instead of piling up.
+  Large work done outside the pool (streamed responses) takes a slot too,
+  through acquire() / release().
+- Every job has a deadline; a job still queued when it expires is
+  cancelled and the request fails with DeadlineExceeded (HTTP 504).
+  Jobs already running in a worker cannot be interrupted and finish there.
+
+Configuration (environment):
+  SANTOK_WORKERS          worker processes (default: CPU count, 0 = inline only)
+  SANTOK_MAX_QUEUE        queued + running jobs before 503 (default: 4 x workers)
+  SANTOK_INLINE_CHARS     requests smaller than this run inline (default: 4096)
+  SANTOK_REQUEST_TIMEOUT  per-request deadline in seconds (default: 60)
+"""
+
+import asyncio
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional
+
+
+# Executor.shutdown(cancel_futures=...) is Python 3.9+; before that queued
+# jobs are cancelled one by one
+_CANCEL_FUTURES = sys.version_info >= (3, 9)
+
+
+class PoolBusy(Exception):
+    """Raised when the pool queue is full"""
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a job does not finish before its deadline"""
+
+
+def _warm_worker():
+    # Import the engine once per worker so the first real request is not
+    # paying for it
+    import server_tasks  # noqa: F401
+
+
+def _ping():
+    time.sleep(0.05)
+    return os.getpid()
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    try:
+        return int(value) if value not in (None, '') else default
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.environ.get(name)
+    try:
+        return float(value) if value not in (None, '') else default
+    except ValueError:
+        return default
+
+
+class WorkerPool:
+    """Bounded, deadline-aware wrapper around a warm ProcessPoolExecutor"""
+
+    def __init__(self, workers: Optional[int] = None, max_queue: Optional[int] = None,
+                 inline_chars: int = 4096, timeout: float = 60.0, start_method: str = 'spawn'):
+        self.workers = (os.cpu_count() or 1) if workers is None else max(0, workers)
+        self.max_queue = max_queue if max_queue is not None else max(1, self.workers * 4)
+        self.inline_chars = inline_chars
+        self.timeout = timeout
+        self.start_method = start_method
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._futures = set()
+        self.counters = {'inline': 0, 'offloaded': 0, 'rejected': 0, 'timeouts': 0, 'cancelled': 0}
+
+    @classmethod
+    def from_env(cls) -> 'WorkerPool':
+        workers = _env_int('SANTOK_WORKERS', os.cpu_count() or 1)
+        return cls(
+            workers=workers,
+            max_queue=_env_int('SANTOK_MAX_QUEUE', max(1, workers * 4)),
+            inline_chars=_env_int('SANTOK_INLINE_CHARS', 4096),
+            timeout=_env_float('SANTOK_REQUEST_TIMEOUT', 60.0),
+        )
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def start(self):
+        """Spawn and warm all workers (idempotent; no-op with 0 workers)"""
+        with self._lock:
+            if self.workers <= 0 or self._executor is not None:
+                return
+            ctx = multiprocessing.get_context(self.start_method)
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx,
+                                                 initializer=_warm_worker)
+            executor = self._executor
+        # One short job per worker forces every process to start now
+        wait([executor.submit(_ping) for _ in range(self.workers)])
+
+    def shutdown(self):
+        """Cancel queued jobs and stop the workers without waiting for running ones"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            processes = list((getattr(executor, '_processes', None) or {}).values())
+            self._shutdown_executor(executor)
+            for proc in processes:
+                if proc.is_alive():
+                    proc.terminate()
+
+    def _discard(self, future):
+        with self._lock:
+            executor = self._executor
+            if executor is None or getattr(future, '_santok_executor', executor) is not executor:
+                return
+            self._executor = None
+        self._shutdown_executor(executor)
+
+    def _shutdown_executor(self, executor):
+        """shutdown(wait=False) that also cancels the jobs not yet handed to a worker"""
+        if _CANCEL_FUTURES:
+            executor.shutdown(wait=False, cancel_futures=True)
+            return
+        with self._lock:
+            futures = [f for f in self._futures if f._santok_executor is executor]
+        # cancel() only succeeds for jobs still queued, as with cancel_futures
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+    def should_inline(self, size: int) -> bool:
+        return self.workers <= 0 or size < self.inline_chars
+
+    def _release(self, future):
+        with self._lock:
+            self._pending -= 1
+            self._futures.discard(future)
+            if future.cancelled():
+                self.counters['cancelled'] += 1
+
+    def _admit(self):
+        # Caller holds the lock
+        if self._pending >= self.max_queue:
+            self.counters['rejected'] += 1
+            raise PoolBusy(f"worker queue full ({self._pending}/{self.max_queue})")
+        self._pending += 1
+
+    def acquire(self):
+        """
+        Take a queue slot for work that does not go through run() (e.g. a
+        streamed response); raises PoolBusy when the queue is full. Pair
+        with release().
+        """
+        with self._lock:
+            self._admit()
+
+    def release(self):
+        """Give back a slot taken by acquire()"""
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, func: Callable, *args: Any, size: int = 0, timeout: Optional[float] = None) -> Any:
+        """
+        Run func(*args) inline or in a worker depending on size.
+        Raises PoolBusy when the queue is full and DeadlineExceeded on timeout.
+        """
+        if self.should_inline(size):
+            self.counters['inline'] += 1
+            return func(*args)
+        if self._executor is None:
+            await asyncio.get_running_loop().run_in_executor(None, self.start)
+        with self._lock:
+            # _discard() or shutdown() may have dropped the executor since
+            # the check above; only this reference is used from here on
+            executor = self._executor
+            if executor is None:
+                self.counters['rejected'] += 1
+                raise PoolBusy("worker pool is restarting")
+            self._admit()
+            try:
+                future = executor.submit(func, *args)
+                future._santok_executor = executor
+                self._futures.add(future)
+            except Exception:
+                self._pending -= 1
+                raise
+        # Released when the job really finishes or is cancelled, so a timed
+        # out job that is still running keeps counting against the queue
+        future.add_done_callback(self._release)
+        self.counters['offloaded'] += 1
+        deadline = timeout if timeout is not None else self.timeout
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), deadline)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM); start a fresh pool on the next request
+            self._discard(future)
+            raise
+        except asyncio.TimeoutError:
+            future.cancel()
+            self.counters['timeouts'] += 1
+            raise DeadlineExceeded(f"request exceeded {deadline:g}s deadline")
+
+    def pids(self) -> List[int]:
+        """Process ids of the live workers"""
+        executor = self._executor
+        processes = (getattr(executor, '_processes', None) or {}) if executor is not None else {}
+        return [pid for pid, proc in list(processes.items()) if proc.is_alive()]
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {
+            'workers': self.workers,
+            'pending': self._pending,
+            'max_queue': self.max_queue,
+            'inline_chars': self.inline_chars,
+            'timeout': self.timeout,
+            'running': self._executor is not None,
+        }
+        stats.update(self.counters)
+        return stats
@@ -17,13 +17,15 @@ from typing import List, Dict, Any, Tuple
 import psutil
 import gc
 
-# Add src to path
+# Add src and the repository root (for the santok package) to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from core.core_tokenizer import (
     tokenize_space, tokenize_word, tokenize_char, tokenize_grammar,
     tokenize_subword, tokenize_bytes, reconstruct_from_tokens
 )
+from santok import corpus
 
 class AdvancedTestFramework:
     """Advanced testing framework for comprehensive SanTOK evaluation"""
@@ -37,6 +39,10 @@ class AdvancedTestFramework:
             'bpe', 'syllable', 'frequency', 'byte'
         ]
         
+        # Seeded so every run (and every machine) sees the same datasets
+        random.seed(corpus.DEFAULT_SEED)
+        self._generated = 0
+
         # Test datasets
         self.test_datasets = {
             'small': self._generate_small_dataset(),
@@ -185,22 +191,9 @@ class AdvancedTestFramework:
         return paragraph
     
     def _generate_random_document(self, target_size: int) -> str:
-        """Generate a random document of approximately target size"""
-        document_parts = []
-        current_size = 0
-        
-        while current_size < target_size:
-            # Generate a paragraph
-            paragraph = self._generate_random_paragraph(50, 200)
-            document_parts.append(paragraph)
-            current_size += len(paragraph)
-            
-            # Add some structure
-            if random.random() < 0.1:  # 10% chance of section break
-                document_parts.append('\n\n---\n\n')
-                current_size += 6
-        
-        return '\n\n'.join(document_parts)
+        """Generate a seeded document of target size (cached by santok.corpus)"""
+        self._generated += 1
+        return corpus.load_text('english', target_size, corpus.DEFAULT_SEED + self._generated)
     
     def _generate_code_snippet(self) -> str:
         """Generate a code snippet for testing"""
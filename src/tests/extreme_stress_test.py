@@ -24,13 +24,15 @@ from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import queue
 import signal
 
-# Add src to path
+# Add src and the repository root (for the santok package) to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from core.core_tokenizer import (
     tokenize_space, tokenize_word, tokenize_char, tokenize_grammar,
     tokenize_subword, tokenize_bytes, reconstruct_from_tokens
 )
+from santok import corpus
 
 class ExtremeStressTestFramework:
     """Extreme stress testing framework for SanTOK under extreme conditions"""
@@ -44,6 +46,10 @@ class ExtremeStressTestFramework:
             'bpe', 'syllable', 'frequency', 'byte'
         ]
         
+        # Seeded so every run (and every machine) sees the same datasets
+        random.seed(corpus.DEFAULT_SEED)
+        self._generated = 0
+
         # Extreme test datasets
         self.extreme_datasets = {
             'gigantic': self._generate_gigantic_dataset(),
@@ -184,58 +190,9 @@ class ExtremeStressTestFramework:
         return content
     
     def _generate_random_chunk(self, chunk_size: int) -> str:
-        """Generate a random chunk of text"""
-        # Common words for realistic text
-        words = [
-            'the', 'be', 'to', 'of', 'and', 'a', 'in', 'that', 'have', 'i',
-            'it', 'for', 'not', 'on', 'with', 'he', 'as', 'you', 'do', 'at',
-            'this', 'but', 'his', 'by', 'from', 'they', 'she', 'or', 'an',
-            'will', 'my', 'one', 'all', 'would', 'there', 'their', 'what',
-            'so', 'up', 'out', 'if', 'about', 'who', 'get', 'which', 'go',
-            'me', 'when', 'make', 'can', 'like', 'time', 'no', 'just', 'him',
-            'know', 'take', 'people', 'into', 'year', 'your', 'good', 'some',
-            'could', 'them', 'see', 'other', 'than', 'then', 'now', 'look',
-            'only', 'come', 'its', 'over', 'think', 'also', 'back', 'after',
-            'use', 'two', 'how', 'our', 'work', 'first', 'well', 'way', 'even',
-            'new', 'want', 'because', 'any', 'these', 'give', 'day', 'most',
-            'us', 'is', 'was', 'are', 'been', 'has', 'had', 'were', 'said',
-            'each', 'which', 'their', 'said', 'if', 'will', 'up', 'other',
-            'about', 'out', 'many', 'then', 'them', 'can', 'only', 'other',
-            'new', 'some', 'what', 'time', 'very', 'when', 'much', 'then',
-            'no', 'way', 'could', 'people', 'my', 'than', 'first', 'water',
-            'been', 'call', 'who', 'oil', 'its', 'now', 'find', 'long', 'down',
-            'day', 'did', 'get', 'come', 'made', 'may', 'part'
-        ]
-        
-        chunk_parts = []
-        current_size = 0
-        
-        while current_size < chunk_size:
-            # Generate a sentence
-            sentence_length = random.randint(10, 50)
-            sentence_words = [random.choice(words) for _ in range(sentence_length)]
-            sentence = ' '.join(sentence_words)
-            
-            # Add punctuation
-            if random.random() < 0.8:
-                sentence += random.choice(['.', '!', '?'])
-            
-            # Add some special characters
-            if random.random() < 0.1:
-                sentence += random.choice([' @#$%^&*()', ' _+-=[]{}|', ' ;:,.<>?'])
-            
-            # Add some numbers
-            if random.random() < 0.05:
-                sentence += f' {random.randint(0, 999999)}'
-            
-            # Add some unicode
-            if random.random() < 0.02:
-                sentence += random.choice([' 你好世界', ' 🌍', ' مرحبا', ' привет'])
-            
-            chunk_parts.append(sentence)
-            current_size += len(sentence) + 1  # +1 for space
-        
-        return ' '.join(chunk_parts)
+        """Generate a seeded chunk of text"""
+        self._generated += 1
+        return corpus.generate('english', chunk_size, corpus.DEFAULT_SEED + self._generated)
     
     def _get_memory_usage(self) -> float:
         """Get current memory usage in MB"""
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Test batch directory tokenization (src/cli/batch.py): scheduling, manifest and resume
+"""
+
+import gzip
+import json
+import sys
+import os
+import shutil
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'cli'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import batch
+from core.core_tokenizer import TokenStore, iter_tokens
+from santok import corpus
+
+
+def _tree():
+    root = tempfile.mkdtemp()
+    src = os.path.join(root, 'in')
+    for rel, text in (('a.txt', corpus.generate('english', 20000)),
+                      ('sub/b.txt', 'alpha beta gamma'),
+                      ('sub/c.log', 'one two three four'),
+                      ('.git/config', 'not me'),
+                      ('skip.bin', 'ignored')):
+        path = os.path.join(src, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+    with gzip.open(os.path.join(src, 'sub', 'd.txt.gz'), 'wt', encoding='utf-8') as f:
+        f.write('zipped words here')
+    return root, src, os.path.join(root, 'out')
+
+
+def _run(src, out, **kw):
+    kw.setdefault('workers', 0)
+    return batch.run_batch(src, out, include=['*.txt', '*.log', '*.gz'], exclude=['.git'], **kw)
+
+
+def _texts(path):
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+def test_walk_and_schedule():
+    root, src, _ = _tree()
+    try:
+        files = list(batch.walk(src, ['*.txt', '*.log'], ['.git']))
+        assert [f[0] for f in files] == ['a.txt', 'sub/b.txt', 'sub/c.log']
+        tasks = batch.make_tasks(files, small_bytes=1000, group_bytes=1 << 20)
+        # The big file alone and first; the small ones share a task
+        assert [[f[0] for f in t] for t in tasks] == [['a.txt'], ['sub/c.log', 'sub/b.txt']]
+    finally:
+        shutil.rmtree(root)
+
+
+def test_files_layout_and_resume():
+    root, src, out = _tree()
+    try:
+        summary = _run(src, out)
+        assert summary['processed'] == 4 and summary['failed'] == 0
+        manifest = batch.load_manifest(out)
+        assert sorted(manifest) == ['a.txt', 'sub/b.txt', 'sub/c.log', 'sub/d.txt.gz']
+        with TokenStore(os.path.join(out, manifest['sub/b.txt']['output'])) as store:
+            assert store.texts() == [t['text'] for t in iter_tokens('alpha beta gamma', 'word')]
+            assert store.header['stream_digest'] == manifest['sub/b.txt']['stream_digest']
+        with TokenStore(os.path.join(out, manifest['sub/d.txt.gz']['output'])) as store:
+            assert 'zipped' in store.texts()
+
+        # Nothing changed: nothing to do
+        assert _run(src, out)['processed'] == 0
+        # Touched but identical: the hash keeps it
+        path = os.path.join(src, 'sub', 'b.txt')
+        os.utime(path, ns=(1, 1))
+        summary = _run(src, out)
+        assert summary['processed'] == 0 and summary['touched'] == 1
+        assert batch.load_manifest(out)['sub/b.txt']['mtime_ns'] == 1
+        # Edited, same size: redone
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('alpha BETA gamma')
+        os.utime(path, ns=(2, 2))
+        assert _run(src, out)['processed'] == 1
+        # Removed: dropped with its output
+        output = os.path.join(out, batch.load_manifest(out)['sub/c.log']['output'])
+        os.unlink(os.path.join(src, 'sub', 'c.log'))
+        assert _run(src, out)['removed'] == 1
+        assert not os.path.exists(output)
+        assert 'sub/c.log' not in batch.load_manifest(out)
+        # A config change redoes everything
+        assert _run(src, out, tokenizer='space')['processed'] == 3
+        # The manifest is compacted to one line per file
+        assert len(_texts(os.path.join(out, batch.MANIFEST)).splitlines()) == 3
+    finally:
+        shutil.rmtree(root)
+
+
+def test_shards_layout():
+    root, src, out = _tree()
+    try:
+        summary = _run(src, out, layout='shards')
+        assert summary['tasks'] == 1 and summary['processed'] == 4
+        manifest = batch.load_manifest(out)
+        entry = manifest['sub/c.log']
+        with TokenStore(os.path.join(out, entry['output'])) as store:
+            texts = store.texts()[entry['token_start']:entry['token_start'] + entry['tokens']]
+            assert texts == [t['text'] for t in iter_tokens('one two three four', 'word')]
+            # Character offsets run across the shard's files
+            assert store.position_at(entry['char_start']) == entry['token_start']
+        # A changed file goes to a new shard; the old one stays while others use it
+        old = os.path.join(out, entry['output'])
+        with open(os.path.join(src, 'sub', 'b.txt'), 'a', encoding='utf-8') as f:
+            f.write(' delta')
+        assert _run(src, out, layout='shards')['processed'] == 1
+        manifest = batch.load_manifest(out)
+        assert manifest['sub/b.txt']['output'] != entry['output'] and os.path.exists(old)
+        # Once nothing points at it, it is deleted
+        assert _run(src, out, layout='shards', tokenizer='space')['processed'] == 4
+        assert not os.path.exists(old)
+        assert len(os.listdir(os.path.join(out, 'shards'))) == 1
+    finally:
+        shutil.rmtree(root)
+
+
+def test_errors_are_recorded():
+    root, src, out = _tree()
+    try:
+        summary = _run(src, out, fmt='jsonl')
+        assert summary['failed'] == 0
+        manifest = batch.load_manifest(out)
+        rows = [json.loads(line) for line in _texts(os.path.join(out, manifest['sub/b.txt']['output'])).splitlines()]
+        assert [r['text'] for r in rows] == ['alpha', ' ', 'beta', ' ', 'gamma']
+        files = [('gone.txt', os.path.join(src, 'gone.txt'), 5, 0)]
+        entries = batch.run_task(out, manifest['a.txt']['config'], 'files', files)
+        assert entries[0]['status'] == 'error' and 'gone.txt' in entries[0]['error']
+    finally:
+        shutil.rmtree(root)
+
+
+def test_process_pool():
+    root, src, out = _tree()
+    try:
+        summary = _run(src, out, workers=2, small_bytes=100)
+        assert summary['tasks'] == 2 and summary['processed'] == 4
+        assert _run(src, out, workers=2)['processed'] == 0
+    finally:
+        shutil.rmtree(root)
+
+
+def test_cli_rejects_bad_flags():
+    root, src, out = _tree()
+    try:
+        for flags in (['--layout', 'shards', '-f', 'jsonl'], ['-f', 'xml']):
+            try:
+                batch.main([src, out, '-q'] + flags)
+            except SystemExit as e:
+                assert e.code == 2, flags
+            else:
+                assert False, f"expected a usage error for {flags}"
+        assert not os.path.exists(out)
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    test_walk_and_schedule()
+    test_files_layout_and_resume()
+    test_shards_layout()
+    test_errors_are_recorded()
+    test_process_pool()
+    test_cli_rejects_bad_flags()
+    print("✅ Batch tokenization tests passed")
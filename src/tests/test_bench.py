@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test the benchmark harness (santok.bench): percentiles, measurement, baseline comparison
+"""
+
+import math
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from santok import bench
+
+
+def test_percentile():
+    """Linear interpolation between the closest ranks"""
+    assert bench.percentile([], 50) == 0.0
+    assert bench.percentile([3.0], 99) == 3.0
+    values = [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert bench.percentile(values, 0) == 1.0
+    assert bench.percentile(values, 50) == 3.0
+    assert bench.percentile(values, 100) == 5.0
+    assert abs(bench.percentile(values, 95) - 4.8) < 1e-12
+    assert bench.percentile([0.0, 10.0], 25) == 2.5
+
+
+def test_measure():
+    """Warmup calls are not timed; rates come from the median"""
+    calls = []
+    stats = bench.measure(lambda: calls.append(1) or [1, 2, 3], chars=300, tokens=len,
+                          warmup=2, iterations=5, track_memory=True)
+    # warmup + timed + one tracemalloc call
+    assert len(calls) == 2 + 5 + 1
+    assert stats['iterations'] == 5 and stats['warmup'] == 2
+    assert stats['tokens'] == 3 and stats['chars'] == 300
+    assert stats['min_ms'] <= stats['p50_ms'] <= stats['p95_ms'] <= stats['p99_ms'] <= stats['max_ms']
+    assert stats['peak_alloc_bytes'] > 0
+    if stats['p50_ms'] > 0:
+        assert abs(stats['chars_per_s'] - 300 / (stats['p50_ms'] / 1000)) < 1e-6 * stats['chars_per_s']
+    calls.clear()
+    stats = bench.measure(lambda: calls.append(1), tokens=7, warmup=0, iterations=3, track_memory=False)
+    assert len(calls) == 3 and stats['tokens'] == 7 and stats['peak_alloc_bytes'] == 0
+
+
+def test_compare_to_baseline():
+    """Only slowdowns beyond the threshold count; new and zero-baseline cases are skipped"""
+    baseline = {'results': {'a': {'p50_ms': 10.0, 'p95_ms': 20.0}, 'b': {'p50_ms': 10.0},
+                            'c': {'p50_ms': 0.0}}}
+    report = {'results': {'a': {'p50_ms': 10.5, 'p95_ms': 30.0}, 'b': {'p50_ms': 12.0},
+                          'c': {'p50_ms': 5.0}, 'new': {'p50_ms': 99.0}}}
+    regressions = bench.compare_to_baseline(report, baseline, threshold=0.10)
+    assert [r['case'] for r in regressions] == ['b']
+    assert regressions[0]['baseline'] == 10.0 and regressions[0]['current'] == 12.0
+    assert abs(regressions[0]['change'] - 0.2) < 1e-12
+    assert [r['case'] for r in bench.compare_to_baseline(report, baseline, 0.10, 'p95_ms')] == ['a']
+    assert bench.compare_to_baseline(report, baseline, threshold=0.25) == []
+
+
+def test_fit_exponent():
+    """The fitted slope of log(time) against log(size) recovers the power"""
+    sizes = [1 << 10, 1 << 12, 1 << 14, 1 << 16]
+    for power in (1.0, 2.0, 0.5):
+        k, r2 = bench.fit_exponent([(n, 3e-7 * n ** power) for n in sizes])
+        assert abs(k - power) < 1e-9 and abs(r2 - 1.0) < 1e-9, power
+    # n log n sits a little above linear
+    k, r2 = bench.fit_exponent([(n, n * math.log(n) * 1e-8) for n in sizes])
+    assert 1.0 < k < 1.2 and r2 > 0.99
+    # Noise lowers r2; unusable points are ignored
+    k, r2 = bench.fit_exponent([(1000, 1.0), (2000, 2.4), (4000, 3.6), (8000, 8.5), (0, 1.0), (10, 0.0)])
+    assert 0.9 < k < 1.2 and r2 < 1.0
+    assert bench.fit_exponent([(1000, 1.0)]) == (0.0, 0.0)
+    assert bench.fit_exponent([(1000, 1.0), (1000, 2.0)]) == (0.0, 0.0)
+
+
+if __name__ == "__main__":
+    test_percentile()
+    test_measure()
+    test_compare_to_baseline()
+    test_fit_exponent()
+    print("✅ Benchmark harness tests passed")
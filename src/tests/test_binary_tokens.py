@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test byte-stream tokenization of binary files (iter_binary_tokens / MappedFile)
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'core'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import core_tokenizer as KT
+from santok import corpus
+
+
+def _write(raw):
+    fd, path = tempfile.mkstemp()
+    with os.fdopen(fd, 'wb') as f:
+        f.write(raw)
+    return path
+
+
+def test_byte_tokens():
+    raw = bytes([0, 1, 127, 128, 255])
+    toks = list(KT.iter_binary_tokens(raw))
+    assert [t['text'] for t in toks] == ['0', '1', '127', '128', '255']
+    assert [t['index'] for t in toks] == [0, 1, 2, 3, 4]
+    assert [t['id'] for t in toks] == [0, 1, 2, 3, 4]
+    assert all(t['type'] == 'byte' for t in toks)
+
+
+def test_ngram_tokens():
+    toks = list(KT.iter_binary_tokens(b'\x00\x01\x02\x03\xff', 'ngram', width=2))
+    assert [t['text'] for t in toks] == ['0001', '0203', 'ff']
+    assert [t['value'] for t in toks] == [1, 0x0203, 0xff]
+    assert [t['index'] for t in toks] == [0, 2, 4]
+
+
+def test_word_tokens():
+    raw = b'\x00\x01ELF\x02hello world\xff\xfeab'
+    toks = list(KT.iter_binary_tokens(raw, 'word'))
+    words = [t['text'] for t in toks if t['type'] == 'word']
+    assert words == ['hello world']  # "ELF" and "ab" are shorter than min_word
+    assert [t['id'] for t in toks] == list(range(len(toks)))
+    assert len(toks) == len(raw) - len('hello world') + 1
+
+
+def test_file_round_trip():
+    raw = corpus.load('binary', 300000)
+    path = _write(raw)
+    try:
+        for mode in KT.BINARY_MODES:
+            toks = list(KT.iter_binary_file_tokens(path, mode))
+            assert KT.reconstruct_binary_tokens(toks) == raw, mode
+        # One token per byte: the byte stream is as long as the file
+        assert sum(1 for _ in KT.iter_file_tokens(path, 'byte', binary='byte')) == len(raw)
+    finally:
+        os.unlink(path)
+
+
+def test_text_files_ignore_binary_mode():
+    text = corpus.generate('english', 50000)
+    path = _write(text.encode('utf-8'))
+    try:
+        assert list(KT.iter_file_tokens(path, 'word', binary='byte')) == KT.tokenize_word(text)
+    finally:
+        os.unlink(path)
+
+
+def test_mapped_file():
+    path = _write(b'')
+    try:
+        with KT.MappedFile(path) as mf:
+            assert len(mf) == 0
+            assert list(KT.iter_binary_tokens(mf.data)) == []
+    finally:
+        os.unlink(path)
+    path = _write(b'abc')
+    try:
+        mf = KT.MappedFile(path)
+        assert mf.data[1] == ord('b')
+        mf.close()
+        # Abandoning the iterator closes the map
+        it = KT.iter_binary_file_tokens(path)
+        assert next(it)['byte_value'] == ord('a')
+        it.close()
+    finally:
+        os.unlink(path)
+
+
+def test_unknown_mode():
+    try:
+        list(KT.iter_binary_tokens(b'abc', 'nibble'))
+    except ValueError:
+        pass
+    else:
+        assert False, "expected ValueError"
+
+
+if __name__ == "__main__":
+    test_byte_tokens()
+    test_ngram_tokens()
+    test_word_tokens()
+    test_file_round_trip()
+    test_text_files_ignore_binary_mode()
+    test_mapped_file()
+    test_unknown_mode()
+    print("✅ Binary tokenization tests passed")
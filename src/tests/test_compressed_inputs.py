@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Test reading gzip/bz2/xz files and zip/tar archives (core reader and santok CLI)
+"""
+
+import bz2
+import gzip
+import io
+import lzma
+import sys
+import os
+import tarfile
+import tempfile
+import zipfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'core'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import core_tokenizer as KT
+from santok import corpus, inputs
+
+
+# Mostly ASCII (so it is read as UTF-8 text) with multibyte characters throughout
+TEXT = corpus.generate('english', 300000).replace(' the ', ' thé ').replace(' and ', ' ünd ')
+RAW = TEXT.encode('utf-8')
+
+
+def _path(suffix):
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    return path
+
+
+def _compressed(kind):
+    path = _path('.' + kind)
+    opener = {'gz': gzip.open, 'bz2': bz2.open, 'xz': lzma.open}[kind]
+    with opener(path, 'wb') as f:
+        f.write(RAW)
+    return path
+
+
+def _tar(members, mode='w:gz'):
+    path = _path('.tar')
+    with tarfile.open(path, mode) as tf:
+        for name, data in members:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+    return path
+
+
+def _zip(members):
+    path = _path('.zip')
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members:
+            zf.writestr(name, data)
+    return path
+
+
+def test_compression_kind():
+    for kind, expected in (('gz', 'gzip'), ('bz2', 'bz2'), ('xz', 'xz')):
+        path = _compressed(kind)
+        try:
+            assert KT.compression_kind(path) == expected
+            assert inputs.compression_kind(path) == expected
+        finally:
+            os.unlink(path)
+    path = _path('.txt')
+    try:
+        with open(path, 'wb') as f:
+            f.write(RAW)
+        assert KT.compression_kind(path) is None
+        assert KT._detect_file_type(path)['compression'] is None
+    finally:
+        os.unlink(path)
+    assert KT.compression_kind(path) is None and inputs.compression_kind(path) is None
+    # The core reads archives through the packaged module's file, not a copy of it
+    assert os.path.samefile(KT._inputs.__file__, inputs.__file__)
+
+
+def test_plain_text_that_looks_compressed():
+    # Plain files are only taken for bz2 with the whole header, and keep
+    # the CLI's text-mode newline translation
+    path = _path('.txt')
+    try:
+        with open(path, 'wb') as f:
+            f.write(b'BZh is a prefix here\r\nsecond line\rthird\n')
+        assert KT.compression_kind(path) is None and inputs.compression_kind(path) is None
+        assert KT._read_any_file(path) == 'BZh is a prefix here\r\nsecond line\rthird\n'
+        with open(path, encoding='utf-8') as f:
+            assert inputs.read_text(path) == f.read() == 'BZh is a prefix here\nsecond line\nthird\n'
+        # A "\r\n" split across blocks is still one newline
+        assert ''.join(inputs.iter_text(path, block_size=21)) == 'BZh is a prefix here\nsecond line\nthird\n'
+    finally:
+        os.unlink(path)
+    empty = _path('.bz2')
+    try:
+        with bz2.open(empty, 'wb'):
+            pass
+        assert inputs.compression_kind(empty) == 'bz2' and inputs.read_text(empty) == ''
+    finally:
+        os.unlink(empty)
+
+
+def test_single_streams():
+    for kind in ('gz', 'bz2', 'xz'):
+        path = _compressed(kind)
+        try:
+            assert KT._read_any_file(path) == TEXT, kind
+            # Small blocks split multibyte sequences across reads
+            assert ''.join(KT.iter_file_text(path, block_size=4093)) == TEXT, kind
+            assert inputs.read_text(path) == TEXT, kind
+        finally:
+            os.unlink(path)
+
+
+def test_archive_members():
+    members = [('a.txt', b'first member'), ('dir/b.log', RAW), ('c.bin', corpus.load('binary', 1000))]
+    expected = ['first member', TEXT, 'BINARY_FILE_HEX:' + members[2][1].hex()]
+    for path in (_tar(members), _tar(members, 'w'), _zip(members)):
+        try:
+            got = [(name, ''.join(chunks)) for name, chunks in KT.iter_file_members(path, block_size=4096)]
+            assert got == list(zip([m[0] for m in members], expected)), path
+            assert KT._read_any_file(path) == '\n'.join(expected)
+            # Same member order and names from the container layer
+            names = []
+            for number, name, _ in inputs.member_blocks(path, 4096):
+                if len(names) == number:
+                    names.append(name)
+            assert names == [m[0] for m in members], path
+        finally:
+            os.unlink(path)
+    # Text members decode the same in both readers (the package decodes strictly,
+    # so it is given no binary member)
+    text_members = members[:2]
+    for path in (_tar(text_members), _tar(text_members, 'w:bz2'), _zip(text_members)):
+        try:
+            assert inputs.read_text(path) == KT._read_any_file(path) == '\n'.join(expected[:2]), path
+        finally:
+            os.unlink(path)
+
+
+def test_members_can_be_skipped():
+    members = [('a.txt', RAW), ('b.txt', b'second')]
+    path = _tar(members)
+    try:
+        names = [name for name, _ in KT.iter_file_members(path, block_size=4096)]
+        assert names == ['a.txt', 'b.txt']
+    finally:
+        os.unlink(path)
+
+
+def test_iter_file_tokens_on_gzip():
+    text = corpus.generate('english', 200000)
+    path = _path('.gz')
+    try:
+        with gzip.open(path, 'wb') as f:
+            f.write(text.encode('utf-8'))
+        assert list(KT.iter_file_tokens(path, 'word', block_size=8192)) == KT.tokenize_word(text)
+    finally:
+        os.unlink(path)
+
+
+def test_corrupt_stream_raises():
+    path = _compressed('gz')
+    try:
+        with open(path, 'r+b') as f:
+            f.truncate(os.path.getsize(path) // 2)
+        for read in (lambda: ''.join(KT.iter_file_text(path)), lambda: inputs.read_text(path)):
+            try:
+                read()
+            except EOFError:
+                pass
+            else:
+                assert False, "expected EOFError"
+    finally:
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    test_compression_kind()
+    test_plain_text_that_looks_compressed()
+    test_single_streams()
+    test_archive_members()
+    test_members_can_be_skipped()
+    test_iter_file_tokens_on_gzip()
+    test_corrupt_stream_raises()
+    print("✅ Compressed input tests passed")
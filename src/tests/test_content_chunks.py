@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test content-defined chunking and incremental re-tokenization (ChunkedDocument)
+"""
+
+import random
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'core'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import core_tokenizer as KT
+from santok import corpus
+
+SMALL = dict(min_size=512, max_size=4096)
+
+
+def _doc(text, name='word', cache=None):
+    return KT.ChunkedDocument(text, name, cache if cache is not None else KT.ChunkCache(), **SMALL)
+
+
+def _layout(doc):
+    return [c[:2] for c in doc.chunks]
+
+
+def test_chunks_cut_at_token_starts():
+    text = corpus.generate('english', 100000)
+    chunks = list(KT.content_defined_chunks(text, **SMALL))
+    assert chunks[0][0] == 0 and chunks[-1][1] == len(text)
+    for (a, b), (c, _) in zip(chunks, chunks[1:]):
+        assert b == c and SMALL['min_size'] <= b - a <= SMALL['max_size']
+        assert KT._is_space(text[b - 1]) and not KT._is_space(text[b])
+    # Without newlines the cuts fall back to word starts
+    flat = text.replace('\n', ' ')
+    assert len(list(KT.content_defined_chunks(flat, **SMALL))) > 10
+
+
+def test_tokens_match_whole_text():
+    text = corpus.generate('english', 30000) + ' naïve 日本語 \ud800x ' + 'z' * 6000 + ' end'
+    for name in ('space', 'word', 'char', 'grammar', 'subword_bpe', 'byte'):
+        doc = _doc(text, name)
+        assert doc.tokens() == list(KT.iter_tokens(text, name)), name
+        assert len(doc) == doc.token_count
+    doc = _doc(text)
+    assert doc.token(5) == doc.tokens()[5]
+    assert list(doc.iter_tokens(100, 103)) == doc.tokens()[100:103]
+
+
+def test_edit_reuses_unchanged_chunks():
+    text = corpus.generate('english', 200000)
+    doc = _doc(text)
+    random.seed(7)
+    for _ in range(6):
+        p = text.index('\n', random.randrange(len(text) - 1000)) + 1
+        line = 'a freshly inserted line %d\n' % p
+        new = text[:p] + line + text[p:]
+        for edited in (doc.update(new), doc.edit(p, p, line)):
+            assert edited.text == new
+            assert edited.tokens() == KT.tokenize_word(new)
+            # The same chunks a fresh chunking finds, nearly all reused
+            assert _layout(edited) == _layout(_doc(new))
+            assert edited.stats['tokenized'] <= 2
+            assert edited.stats['reused'] >= len(edited.chunks) - 2
+    # Deletions, replacements and long tokens
+    for p, q, rep in ((5000, 25000, ''), (0, 10, 'Start'), (len(text) - 50, len(text), ' tail'),
+                      (90000, 90001, 'y' * 9000)):
+        new = text[:p] + rep + text[q:]
+        edited = doc.edit(p, q, rep)
+        assert edited.tokens() == KT.tokenize_word(new)
+        assert _layout(edited) == _layout(_doc(new))
+        assert doc.update(new).tokens() == edited.tokens()
+
+
+def test_update_edge_cases():
+    doc = _doc('one two three')
+    same = doc.update('one two three')
+    assert same.stats['tokenized'] == 0 and same.tokens() == doc.tokens()
+    for old in ('', 'abc', 'a b c\n' * 10):
+        d = _doc(old)
+        for new in ('', 'x', old + 'tail', 'head ' + old):
+            assert d.update(new).tokens() == KT.tokenize_word(new) == d.edit(0, len(old), new).tokens()
+
+
+def test_cache_shared_and_bounded():
+    text = corpus.generate('english', 50000)
+    cache = KT.ChunkCache()
+    first = _doc(text, cache=cache)
+    assert cache.misses == len(first.chunks) and cache.hits == 0
+    second = _doc(text, cache=cache)
+    assert second.stats['tokenized'] == 0 and cache.hits == len(first.chunks)
+    small = KT.ChunkCache(max_tokens=500)
+    _doc(text, cache=small)
+    assert 0 < small.tokens <= 500
+
+
+def test_records_window():
+    text = corpus.generate('english', 40000)
+    doc = _doc(text)
+    engine = KT.TextTokenizer(4242, False)
+    records = list(engine.iter_stream('word', KT.iter_tokens(text, 'word')))
+    for start, stop in ((0, 5), (1000, 1010), (len(records) - 3, len(records)), (0, len(records))):
+        got = list(doc.records(engine, 'word', start, stop))
+        assert [r.to_row() for r in got] == [r.to_row() for r in records[start:stop]], (start, stop)
+
+
+if __name__ == "__main__":
+    test_chunks_cut_at_token_starts()
+    test_tokens_match_whole_text()
+    test_edit_reuses_unchanged_chunks()
+    test_update_edge_cases()
+    test_cache_shared_and_bounded()
+    test_records_window()
+    print("✅ Content-defined chunking tests passed")
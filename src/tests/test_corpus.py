@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Test the seeded benchmark corpus generator and its cache
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from santok import corpus
+
+
+def test_generate_is_deterministic_and_exact_size():
+    """Same (kind, size, seed) gives identical data of exactly size units"""
+    for kind in corpus.KINDS:
+        a = corpus.generate(kind, 5000, seed=7)
+        b = corpus.generate(kind, 5000, seed=7)
+        assert a == b, kind
+        assert len(a) == 5000, kind
+        assert corpus.generate(kind, 5000, seed=8) != a, kind
+    assert isinstance(corpus.generate('binary', 10), bytes)
+    assert corpus.generate('english', 0) == ''
+
+
+def test_multilingual_covers_scripts():
+    """Multilingual corpus draws from the script ranges the core detects"""
+    text = corpus.generate('multilingual', 20000)
+    codes = [ord(c) for c in text]
+    for script, ranges in corpus.SCRIPT_RANGES.items():
+        assert any(lo <= c <= hi for c in codes for lo, hi in ranges), script
+
+
+def test_cache_roundtrip():
+    """Cached corpora are written once and read back unchanged"""
+    with tempfile.TemporaryDirectory() as tmp:
+        for kind in ('multilingual', 'binary'):
+            first = corpus.load(kind, 3000, seed=3, directory=tmp)
+            path = corpus.cache_path(kind, 3000, seed=3, directory=tmp)
+            assert os.path.exists(path) and path.endswith('.gz')
+            assert corpus.load(kind, 3000, seed=3, directory=tmp) == first
+            assert first == corpus.generate(kind, 3000, seed=3)
+        assert isinstance(corpus.load_text('binary', 100, directory=tmp), str)
+
+
+if __name__ == "__main__":
+    test_generate_is_deterministic_and_exact_size()
+    test_multilingual_covers_scripts()
+    test_cache_roundtrip()
+    print("✅ Corpus tests passed")
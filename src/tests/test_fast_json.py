@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Test the servers' JSON serialization layer (orjson and stdlib paths)
+"""
+
+import sys
+import os
+import json
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'servers'))
+
+import fast_json
+
+PAYLOAD = {
+    "tokens": [{"text": "Hello", "id": 3, "position": 0}, {"text": "你好 🌍", "id": 9, "position": 6}],
+    "compressionRatio": 0.5,
+    "reversibility": True,
+    "fingerprint": None,
+    "columns": {"id": [1, 2, 3], "text": ["a", "\"quoted\"", "tab\t"]},
+}
+
+
+def test_roundtrip_both_backends():
+    for dumps in (fast_json.dumps, fast_json.dumps_stdlib):
+        data = dumps(PAYLOAD)
+        assert isinstance(data, bytes)
+        assert json.loads(data) == PAYLOAD
+    assert json.loads(fast_json.dumps_stdlib(PAYLOAD)) == json.loads(fast_json.dumps(PAYLOAD))
+
+
+def test_values_orjson_rejects_fall_back():
+    """Integers over 64 bits and lone surrogates still serialize"""
+    tricky = {"uid": 2 ** 70, "text": "a\ud800b"}
+    assert json.loads(fast_json.dumps(tricky)) == tricky
+    assert json.loads(fast_json.dumps_line(tricky)) == tricky
+
+
+def test_ndjson_lines():
+    lines = b"".join(fast_json.dumps_line({"n": i}) for i in range(3)).splitlines()
+    assert [json.loads(line) for line in lines] == [{"n": 0}, {"n": 1}, {"n": 2}]
+
+
+if __name__ == "__main__":
+    test_roundtrip_both_backends()
+    test_values_orjson_rejects_fall_back()
+    test_ndjson_lines()
+    print("✅ Fast JSON tests passed")
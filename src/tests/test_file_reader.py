@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test streaming file ingestion (iter_file_text / iter_file_tokens)
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'core'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import core_tokenizer as KT
+from santok import corpus
+
+
+def _whole_file(raw):
+    # The previous reader: decode everything, check every character
+    if not raw:
+        return ""
+    for encoding in ('utf-8', 'latin-1'):
+        try:
+            decoded = raw.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+        printable = sum(1 for c in decoded if 32 <= ord(c) <= 126 or c in '\n\r\t')
+        if printable / len(decoded) > 0.7:
+            return decoded
+    return "BINARY_FILE_HEX:" + raw.hex()
+
+
+def _write(raw):
+    fd, path = tempfile.mkstemp()
+    with os.fdopen(fd, 'wb') as f:
+        f.write(raw)
+    return path
+
+
+CASES = {
+    'english': lambda: corpus.generate('english', 300000).encode('utf-8'),
+    'multilingual': lambda: corpus.generate('multilingual', 200000).encode('utf-8', 'surrogatepass'),
+    'binary': lambda: corpus.load('binary', 200000),
+    'latin1': lambda: ('café résumé naïve, ' * 20000).encode('latin-1'),
+    'accented': lambda: ('héllo wörld ' * 10).encode('utf-8'),
+    'empty': lambda: b'',
+}
+
+
+def test_matches_whole_file_decode():
+    for name, make in CASES.items():
+        raw = make()
+        path = _write(raw)
+        try:
+            expected = _whole_file(raw)
+            assert KT._read_any_file(path) == expected, name
+            assert KT._bytes_to_text_representation(raw) == expected, name
+            # Tiny blocks split multibyte sequences across reads
+            assert ''.join(KT.iter_file_text(path, block_size=7)) == expected, name
+        finally:
+            os.unlink(path)
+
+
+def test_sniffed_encoding():
+    path = _write(corpus.generate('english', 500000).encode('utf-8'))
+    try:
+        assert KT.sniff_file_encoding(path) == 'utf-8'
+    finally:
+        os.unlink(path)
+    path = _write(corpus.load('binary', 500000))
+    try:
+        assert KT.sniff_file_encoding(path) == 'hex'
+        assert next(KT.iter_file_text(path)) == 'BINARY_FILE_HEX:'
+    finally:
+        os.unlink(path)
+
+
+def test_invalid_utf8_after_the_sampled_head():
+    # ~100 KB in: past the sniffed head and before the first sampled window
+    line = b'plain ascii text\n'
+    raw = line * 6000 + b'bad \xff byte\n' + 'ünïcode\n'.encode('utf-8') + line * 60000
+    path = _write(raw)
+    try:
+        assert KT.sniff_file_encoding(path) == 'utf-8'
+        text = ''.join(KT.iter_file_text(path, block_size=1000))
+        assert 'bad \xff byte\nünïcode\n' in text
+        assert len(text) == len(raw) - 2  # ü and ï are two bytes each
+    finally:
+        os.unlink(path)
+
+
+def test_iter_file_tokens():
+    text = corpus.generate('english', 200000)
+    path = _write(text.encode('utf-8'))
+    try:
+        assert list(KT.iter_file_tokens(path, 'word', block_size=4096)) == KT.tokenize_word(text)
+    finally:
+        os.unlink(path)
+
+
+def test_missing_file():
+    assert KT._read_any_file('/nonexistent/santok').startswith('ERROR: Could not read file')
+
+
+if __name__ == "__main__":
+    test_matches_whole_file_decode()
+    test_sniffed_encoding()
+    test_invalid_utf8_after_the_sampled_head()
+    test_iter_file_tokens()
+    test_missing_file()
+    print("✅ File reader tests passed")
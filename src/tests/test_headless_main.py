@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Test the headless (argparse) entry point of core_tokenizer.main()
+"""
+
+import builtins
+import io
+import json
+import sys
+import os
+import shutil
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'core'))
+
+import core_tokenizer as KT
+
+PROMPTS = ('Input mode?', 'Enter ', 'Use embedding bit?', 'Output mode?', 'Save outputs', 'Show readable',
+           'Output format?')
+
+
+def _capture(fn, *args):
+    # main() leaves the preprocessing's run-collapse flag set for the whole module
+    out, collapse = sys.stdout, KT._RUN_COLLAPSE_TO_ONE
+    sys.stdout = buf = io.StringIO()
+    try:
+        result = fn(*args)
+    finally:
+        sys.stdout, KT._RUN_COLLAPSE_TO_ONE = out, collapse
+    return result, buf.getvalue()
+
+
+def _interactive(answers):
+    it = iter(answers)
+    real_input = builtins.input
+    builtins.input = lambda *a: next(it)
+    try:
+        return _capture(KT.main, [])[1]
+    finally:
+        builtins.input = real_input
+
+
+def _report(text):
+    # Without prompts, timings and the blank line before the output-mode prompt
+    lines = []
+    for line in text.split('\n'):
+        if line.startswith(PROMPTS) or line == '':
+            continue
+        if ', perf:' in line:
+            line = line[:line.index(', perf:')]
+        lines.append(line)
+    return lines
+
+
+def test_same_report_as_interactive():
+    text = 'Say "hi" \\ there, 12 apples!'
+    for mode, answer in (('dev', '1'), ('user', '2'), ('json', '3')):
+        expected = _interactive(['1', text, '77', '1', answer, 'n', 'n'])
+        status, got = _capture(KT.main, ['--text', text, '--seed', '77', '--embedding-bit', '--mode', mode])
+        assert status == 0
+        assert _report(got) == _report(expected), mode
+
+
+def test_dev_lists():
+    _, got = _capture(KT.main, ['--text', 'a "b" c\\d', '--skip-validation', '--skip-determinism'])
+    lines = got.split('\n')
+    grammar = lines[lines.index('grammar_tokens_list:') + 1]
+    assert grammar == '["a", " ", "\\"", "b", "\\"", " ", "c", "\\\\", "d"]'
+    ids = json.loads(lines[lines.index('grammar_tokens_list:') + 6])
+    assert ids == [KT._content_id(t['text']) for t in KT.tokenize_grammar('a "b" c\\d')]
+
+
+def test_skips_and_saved_files():
+    directory = tempfile.mkdtemp()
+    try:
+        out = os.path.join(directory, 'tokens')
+        report = os.path.join(directory, 'report.txt')
+        status, printed = _capture(KT.main, ['--text', 'alpha beta', '--mode', 'user', '--save', '--format', 'csv',
+                                             '--output-dir', out, '--report', report,
+                                             '--skip-validation', '--skip-determinism'])
+        assert status == 0 and printed == ''
+        with open(report, encoding='utf-8') as f:
+            got = f.read()
+        assert 'VALIDATION' not in got and 'determinism:' not in got
+        assert 'word_csv_file: ' + out + '/word.csv' in got
+        with open(os.path.join(out, 'word.csv'), encoding='utf-8') as f:
+            assert f.readline().startswith('text,stream,index')
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_stdin_and_file():
+    stdin = sys.stdin
+    sys.stdin = io.StringIO('from stdin')
+    try:
+        _, got = _capture(KT.main, ['--mode', 'json', '--skip-validation'])
+    finally:
+        sys.stdin = stdin
+    assert 'final_text: from stdin' in got
+    assert json.loads(got.split('\n')[[l.startswith('{') for l in got.split('\n')].index(True)])['word_tokens'] == \
+        ['from', ' ', 'stdin']
+    fd, path = tempfile.mkstemp(suffix='.txt')
+    os.close(fd)
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('file words')
+        _, got = _capture(KT.main, ['--file', path, '--mode', 'user', '--skip-validation'])
+        assert 'final_text: file words' in got and 'determinism: ok' in got
+    finally:
+        os.unlink(path)
+
+
+def test_tokens_only_matches_saved_files():
+    text = '  Leading  SPACE\tand\r\nCRLF,  "quotes" & <tags>\n\nNaïve café ' * 50 + 'END'
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, 'input.txt')
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+        full, streamed = os.path.join(directory, 'full'), os.path.join(directory, 'streamed')
+        for fmt in ('json', 'csv', 'xml'):
+            _capture(KT.main, ['--file', path, '--mode', 'user', '--save', '--format', fmt, '--output-dir', full,
+                               '--skip-validation', '--skip-determinism'])
+            status, printed = _capture(KT.main, ['--file', path, '--tokens-only', '--format', fmt,
+                                                 '--output-dir', streamed])
+            assert status == 0 and 'FINAL SUMMARY' not in printed
+            for name in KT._HEADLESS_STREAMS:
+                with open(os.path.join(full, name + '.' + fmt), 'rb') as a, \
+                        open(os.path.join(streamed, name + '.' + fmt), 'rb') as b:
+                    assert a.read() == b.read(), (name, fmt)
+        _capture(KT.main, ['--text', 'one two', '--tokens-only', '--stream', 'word', '--format', 'txt',
+                           '--output-dir', directory])
+        with open(os.path.join(directory, 'word.txt'), encoding='utf-8') as f:
+            assert 'Total Tokens: 3' in f.read()
+        assert not os.path.exists(os.path.join(directory, 'char.txt'))
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_math_text_in_chunks():
+    text = '\t Mixed   CASE\n\n  text\r\nwith   runs  '
+    for size in (1, 2, 3, 7):
+        chunks = [text[i:i + size] for i in range(0, len(text), size)]
+        assert ''.join(KT._iter_math_text(chunks)) == KT.sanitize_text(text, True, False, 1), size
+
+
+def test_golden_digests():
+    directory = tempfile.mkdtemp()
+    golden = os.path.join(directory, 'golden.json')
+    args = ['--text', 'Golden run, golden run!', '--seed', '5', '--mode', 'user', '--skip-validation']
+    digests = KT.TextTokenizer.digests
+    try:
+        status, got = _capture(KT.main, args + ['--save-golden', golden])
+        assert status == 0 and 'determinism: ok' in got and os.path.exists(golden)
+
+        # The golden file replaces the second build
+        def no_rebuild(self, text):
+            raise AssertionError("rebuilt for the determinism check")
+        KT.TextTokenizer.digests = no_rebuild
+        status, got = _capture(KT.main, args + ['--golden', golden])
+        assert status == 0 and 'determinism: ok (golden)' in got
+        status, got = _capture(KT.main, ['--text', 'Golden run, golden run!', '--seed', '5', '--tokens-only',
+                                         '--stream', 'word', '--output-dir', directory, '--golden', golden])
+        assert status == 0 and 'determinism: ok (golden)' in got
+
+        status, got = _capture(KT.main, args[:3] + ['6'] + args[4:] + ['--golden', golden])
+        assert status == 1 and 'determinism: mismatch ' in got
+        try:
+            KT.main(args + ['--golden', os.path.join(directory, 'missing.json')])
+        except SystemExit as e:
+            assert e.code == 2
+        else:
+            assert False, "expected a usage error"
+    finally:
+        KT.TextTokenizer.digests = digests
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    test_same_report_as_interactive()
+    test_dev_lists()
+    test_skips_and_saved_files()
+    test_stdin_and_file()
+    test_tokens_only_matches_saved_files()
+    test_math_text_in_chunks()
+    test_golden_digests()
+    print("✅ Headless main tests passed")
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Test the stdlib server runtime: keep-alive, body limits and draining
+"""
+
+import sys
+import os
+import json
+import re
+import signal
+import socket
+import subprocess
+import threading
+import time
+import http.client
+import http.server
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'servers'))
+
+import http_runtime
+
+
+class EchoHandler(http.server.BaseHTTPRequestHandler):
+    def do_POST(self):
+        try:
+            data = http_runtime.read_json(self, max_bytes=100)
+        except http_runtime.RequestError as e:
+            self.send_error(e.status, e.message)
+            return
+        body = json.dumps({"echo": data, "peer": self.client_address[1]}).encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _start():
+    handler = http_runtime.production_handler(EchoHandler, keepalive=2.0)
+    httpd = http_runtime.ProductionHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
+def _post(conn, body):
+    conn.request('POST', '/', body=body)
+    r = conn.getresponse()
+    return r.status, r.getheader('Connection'), r.read()
+
+
+def test_keep_alive_reuses_connection():
+    httpd = _start()
+    try:
+        conn = http.client.HTTPConnection('127.0.0.1', httpd.server_address[1])
+        peers = {json.loads(_post(conn, json.dumps({"n": i}))[2])["peer"] for i in range(3)}
+        assert len(peers) == 1
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def test_body_limits():
+    httpd = _start()
+    try:
+        port = httpd.server_address[1]
+        assert _post(http.client.HTTPConnection('127.0.0.1', port), 'x' * 101)[0] == 413
+        assert _post(http.client.HTTPConnection('127.0.0.1', port), '{bad')[0] == 400
+        status, _, body = _post(http.client.HTTPConnection('127.0.0.1', port), '')
+        assert status == 200 and json.loads(body)["echo"] == {}
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def test_drain_closes_connections():
+    httpd = _start()
+    conn = http.client.HTTPConnection('127.0.0.1', httpd.server_address[1])
+    assert _post(conn, '{}')[1] is None
+    httpd.draining = True
+    assert _post(conn, '{}')[1] == 'close'
+    httpd.drain()
+    httpd.server_close()
+
+
+# A pre-fork server in its own process: answers with the worker's pid, /slow after a pause
+PREFORK_SERVER = """
+import os, sys, time, http.server
+sys.path.insert(0, sys.argv[1])
+import http_runtime
+import metrics
+
+class PidHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == '/slow':
+            time.sleep(1.0)
+        if self.path == '/metrics':
+            body = metrics.Metrics().render()
+        else:
+            body = str(os.getpid()).encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+http_runtime.serve(PidHandler, '127.0.0.1', int(sys.argv[2]), workers=2, keepalive=5.0)
+"""
+
+
+def _get(conn, path='/'):
+    conn.request('GET', path)
+    r = conn.getresponse()
+    return r.status, r.getheader('Connection'), r.read().decode()
+
+
+def test_prefork_workers_and_drain():
+    if not hasattr(os, 'fork'):
+        return
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    servers_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'servers')
+    proc = subprocess.Popen([sys.executable, '-c', PREFORK_SERVER, servers_dir, str(port)],
+                            stdout=subprocess.DEVNULL)
+    try:
+        deadline = time.time() + 30
+        while True:
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+                break
+            except OSError:
+                assert time.time() < deadline and proc.poll() is None, "server did not start"
+                time.sleep(0.1)
+        time.sleep(0.5)   # let the second worker bind too
+        pids = set()
+        workers = {}
+        for _ in range(20):
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+            answers = {_get(conn)[2] for _ in range(3)}
+            # Keep-alive: one connection stays with one worker
+            assert len(answers) == 1
+            pids |= answers
+            # Each worker labels its metrics with its own slot
+            labels = set(re.findall(r'worker="(\d+)"', _get(conn, '/metrics')[2]))
+            assert len(labels) == 1
+            workers.setdefault(labels.pop(), set()).update(answers)
+            conn.close()
+        assert len(pids) > 1 and str(proc.pid) not in pids
+        assert set(workers) == {'0', '1'} and all(len(p) == 1 for p in workers.values())
+
+        # SIGTERM while a request is in flight: it is answered, then everything exits 0
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        conn.request('GET', '/slow')
+        time.sleep(0.3)
+        proc.send_signal(signal.SIGTERM)
+        r = conn.getresponse()
+        assert r.status == 200 and r.getheader('Connection') == 'close' and r.read().decode() in pids
+        assert proc.wait(timeout=15) == 0
+        for pid in pids:
+            try:
+                os.kill(int(pid), 0)
+                assert False, f"worker {pid} still running"
+            except ProcessLookupError:
+                pass
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    test_keep_alive_reuses_connection()
+    test_body_limits()
+    test_drain_closes_connections()
+    test_prefork_workers_and_drain()
+    print("✅ HTTP runtime tests passed")
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test opt-in stage instrumentation
+"""
+
+import sys
+import os
+import threading
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'core'))
+
+import core_tokenizer
+from core_tokenizer import (
+    TextTokenizer, instrument, stage, count, current_timings,
+    sanitize_text, compress_tokens, tokenize_word
+)
+
+TEXT = "Hello world! The quick brown fox jumps over the lazy dog. 你好世界"
+
+
+def test_disabled_by_default():
+    """Without instrument() nothing is recorded and hooks are no-ops"""
+    assert current_timings() is None
+    with stage("anything"):
+        count("anything")
+    assert core_tokenizer._INSTRUMENT_ACTIVE == 0
+
+
+def test_pipeline_stages_recorded():
+    """build(), sanitization and compression report their stages"""
+    with instrument() as timings:
+        engine = TextTokenizer(12345, False)
+        streams = engine.build(sanitize_text(TEXT, True, False, 1))
+        compress_tokens(tokenize_word(TEXT), "rle")
+    stages = timings.as_dict()["stages"]
+    for name in ("sanitize_text", "tokenize_word", "tokenize_subword", "assign_uids",
+                 "neighbor_uids", "engine", "TextTokenizer.build", "compress_tokens"):
+        assert name in stages, name
+        assert stages[name]["calls"] >= 1 and stages[name]["ms"] >= 0, name
+    # One engine stage per stream, not one per token
+    assert stages["engine"]["calls"] == len(streams)
+    assert "compose_backend_number" not in stages and "combined_digit" not in stages
+    assert timings.counters["tokens.word"] == streams["word"].length()
+    assert current_timings() is None
+
+
+def test_server_timing_header():
+    """Server-Timing rendering uses name;dur=ms entries"""
+    with instrument() as timings:
+        with stage("serialize"):
+            pass
+        count("requests", 2)
+    header = timings.server_timing()
+    assert header.startswith("serialize;dur=")
+    assert timings.counters == {"requests": 2}
+
+
+def test_instrumented_functions_keep_identity():
+    """Decorated functions keep their names and results"""
+    assert tokenize_word.__name__ == "tokenize_word"
+    plain = tokenize_word.__wrapped__(TEXT)
+    with instrument():
+        assert tokenize_word(TEXT) == plain
+
+
+def test_concurrent_instrument_blocks():
+    """instrument() entered and left on many threads leaves the active count balanced"""
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    barrier = threading.Barrier(8)
+    seen = []
+
+    def run():
+        barrier.wait()
+        for _ in range(2000):
+            with instrument() as timings:
+                with stage("work"):
+                    pass
+            seen.append(timings.stages["work"][0])
+
+    try:
+        threads = [threading.Thread(target=run) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        sys.setswitchinterval(interval)
+    assert core_tokenizer._INSTRUMENT_ACTIVE == 0
+    assert seen == [1] * 8 * 2000
+
+
+if __name__ == "__main__":
+    test_disabled_by_default()
+    test_pipeline_stages_recorded()
+    test_server_timing_header()
+    test_instrumented_functions_keep_identity()
+    test_concurrent_instrument_blocks()
+    print("✅ Instrumentation tests passed")
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Test streaming tokenization (iter_tokens / TextTokenizer.iter_stream)
+"""
+
+import sys
+import os
+import random
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'core'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from core_tokenizer import TextTokenizer, iter_tokens, _tokenize_named
+from santok import corpus
+
+STREAMS = ("space", "word", "char", "grammar", "subword", "subword_bpe",
+           "subword_syllable", "subword_frequency", "byte")
+
+
+def test_iter_tokens_matches_whole_text():
+    """Chunked tokenization yields the same tokens, ids and offsets as one call"""
+    for kind in ("english", "multilingual", "code", "json"):
+        text = corpus.generate(kind, 5000, seed=7)
+        for name in STREAMS:
+            whole = _tokenize_named(text, name)
+            for chunk_chars in (7, 1000):
+                assert list(iter_tokens(text, name, chunk_chars=chunk_chars)) == whole, (kind, name, chunk_chars)
+
+
+def test_iter_tokens_accepts_chunk_iterables():
+    text = corpus.generate("english", 5000, seed=3)
+    rng = random.Random(1)
+    chunks = []
+    i = 0
+    while i < len(text):
+        n = rng.randint(1, 300)
+        chunks.append(text[i:i + n])
+        i += n
+    assert list(iter_tokens(iter(chunks), "word")) == _tokenize_named(text, "word")
+    assert list(iter_tokens(iter([]), "word")) == []
+
+
+def test_iter_stream_matches_build_stream():
+    """Lazy records equal the records of a single-stream build"""
+    text = corpus.generate("multilingual", 3000, seed=5)
+    engine = TextTokenizer(12345, True)
+    for name in ("word", "char", "subword_bpe", "byte"):
+        built = engine.build_stream(name, _tokenize_named(text, name)).tokens
+        lazy = list(engine.iter_stream(name, iter_tokens(text, name, chunk_chars=100)))
+        assert [t.to_row() for t in lazy] == [t.to_row() for t in built], name
+    assert list(engine.iter_stream("word", [])) == []
+
+
+if __name__ == "__main__":
+    test_iter_tokens_matches_whole_text()
+    test_iter_tokens_accepts_chunk_iterables()
+    test_iter_stream_matches_build_stream()
+    print("✅ Streaming tokenization tests passed")
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test the Prometheus metrics registry
+"""
+
+import sys
+import os
+import threading
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'servers'))
+
+import metrics
+
+
+def _samples(text):
+    out = {}
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            out[name] = float(value)
+    return out
+
+
+def test_counts_and_histogram():
+    m = metrics.Metrics(buckets=(0.01, 0.1), tokenizers=['word'])
+    m.observe('/tokenize', 'word', 200, 0.005, chars=10, tokens=3)
+    m.observe('/tokenize', 'word', 200, 0.05, chars=20, tokens=5)
+    m.observe('/tokenize', 'evil"label', 400, 1.0)
+    s = _samples(m.render().decode())
+    assert s['santok_requests_total{endpoint="/tokenize",tokenizer="word",status="200"}'] == 2
+    assert s['santok_requests_total{endpoint="/tokenize",tokenizer="other",status="400"}'] == 1
+    base = 'santok_request_duration_seconds_bucket{endpoint="/tokenize",tokenizer="word",le='
+    assert s[base + '"0.01"}'] == 1
+    assert s[base + '"0.1"}'] == 2
+    assert s[base + '"+Inf"}'] == 2
+    assert s['santok_request_duration_seconds_count{endpoint="/tokenize",tokenizer="word"}'] == 2
+    assert s['santok_input_chars_total{endpoint="/tokenize",tokenizer="word"}'] == 30
+    assert s['santok_output_tokens_total{endpoint="/tokenize",tokenizer="word"}'] == 8
+    assert 'process_cpu_seconds_total' in s
+
+
+def test_track_and_annotate():
+    m = metrics.Metrics()
+    with m.track('/analyze'):
+        metrics.annotate('char', chars=4, tokens=4)
+    try:
+        with m.track('/analyze'):
+            raise RuntimeError('boom')
+    except RuntimeError:
+        pass
+    metrics.annotate('char', chars=100)  # outside a request: ignored
+    s = _samples(m.render().decode())
+    assert s['santok_requests_total{endpoint="/analyze",tokenizer="char",status="200"}'] == 1
+    assert s['santok_requests_total{endpoint="/analyze",tokenizer="none",status="500"}'] == 1
+    assert s['santok_input_chars_total{endpoint="/analyze",tokenizer="char"}'] == 4
+
+
+def test_threads_are_summed_and_retired():
+    m = metrics.Metrics()
+
+    def work():
+        for _ in range(1000):
+            m.observe('/tokenize', 'word', 200, 0.001)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    s = _samples(m.render().decode())
+    assert s['santok_requests_total{endpoint="/tokenize",tokenizer="word",status="200"}'] == 8000
+    assert len(m._shards) == 0
+    # Retired counts survive later scrapes
+    m.observe('/tokenize', 'word', 200, 0.001)
+    s = _samples(m.render().decode())
+    assert s['santok_requests_total{endpoint="/tokenize",tokenizer="word",status="200"}'] == 8001
+
+
+def test_stats_collectors():
+    m = metrics.Metrics()
+    m.add_stats('cache', 'Result cache', lambda: {'hits': 3, 'hit_rate': 0.75, 'disk_bytes': None},
+                counters=('hits',), gauges=('hit_rate', 'disk_bytes'))
+    m.add_collector(lambda: 1 / 0)
+    text = m.render().decode()
+    s = _samples(text)
+    assert s['santok_cache_hits_total'] == 3
+    assert s['santok_cache_hit_rate'] == 0.75
+    assert 'santok_cache_disk_bytes' not in s
+    assert '# collector error' in text
+
+
+def test_worker_label():
+    m = metrics.Metrics()
+    m.observe('/tokenize', 'word', 200, 0.01)
+    m.add_stats('cache', 'Result cache', lambda: {'hits': 3}, counters=('hits',))
+    metrics.set_worker(1)
+    try:
+        s = _samples(m.render().decode())
+    finally:
+        metrics.set_worker(None)
+    assert s['santok_requests_total{endpoint="/tokenize",tokenizer="word",status="200",worker="1"}'] == 1
+    assert s['santok_cache_hits_total{worker="1"}'] == 3
+    assert all('worker="1"' in name for name in s)
+    assert 'santok_cache_hits_total' in _samples(m.render().decode())
+
+
+if __name__ == "__main__":
+    test_counts_and_histogram()
+    test_track_and_annotate()
+    test_threads_are_summed_and_retired()
+    test_stats_collectors()
+    test_worker_label()
+    print("✅ Metrics tests passed")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Test NumPy .npy / .npz export of token stores (TokenStore.to_npy / to_npz / load_token_arrays)
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'core'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import core_tokenizer as KT
+from santok import corpus
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _store(directory, text, name='word'):
+    path = os.path.join(directory, name + '.stc')
+    KT.write_token_store(path, name, KT.iter_tokens(text, name), seed=3)
+    return KT.TokenStore(path)
+
+
+def _check(arrays, store, text_included=False):
+    assert arrays['metadata']['stream'] == store.name
+    assert arrays['metadata']['stream_digest'] == store.header['stream_digest']
+    for name, _, dtype in KT.STORE_COLUMNS:
+        assert arrays[name].dtype == np.dtype(dtype), name
+        assert arrays[name].tolist() == list(store.column(name)), name
+    assert arrays['text_offsets'].tolist() == list(store.column('text_offsets'))
+    if text_included:
+        assert arrays['text'].tobytes().decode('utf-8') == ''.join(store.texts())
+
+
+def test_npz_round_trip():
+    if np is None:
+        return
+    directory = tempfile.mkdtemp()
+    try:
+        store = _store(directory, corpus.generate('english', 30000))
+        path = os.path.join(directory, 'word.npz')
+        store.to_npz(path, include_text=True)
+        arrays = KT.load_token_arrays(path)
+        # Stored members come back memory-mapped
+        assert isinstance(arrays['uid'], np.memmap)
+        _check(arrays, store, text_included=True)
+        # A plain np.load sees the same arrays
+        with np.load(path) as npz:
+            assert npz['content_id'].tolist() == arrays['content_id'].tolist()
+        del arrays
+        store.close()
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_compressed_npz():
+    if np is None:
+        return
+    directory = tempfile.mkdtemp()
+    try:
+        store = _store(directory, corpus.generate('english', 10000))
+        path = os.path.join(directory, 'word.npz')
+        store.to_npz(path, compress=True)
+        arrays = KT.load_token_arrays(path)
+        assert not isinstance(arrays['uid'], np.memmap)
+        _check(arrays, store)
+        store.close()
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_npy_directory():
+    if np is None:
+        return
+    directory = tempfile.mkdtemp()
+    try:
+        store = _store(directory, corpus.generate('english', 10000))
+        out = os.path.join(directory, 'arrays')
+        paths = store.to_npy(out)
+        assert os.path.join(out, 'word.frontend.npy') in paths
+        arrays = KT.load_token_arrays(out)
+        assert isinstance(arrays['frontend'], np.memmap)
+        _check(arrays, store)
+        # A second stream in the same directory needs stream=
+        other = _store(directory, 'a b c', 'space')
+        other.to_npy(out)
+        try:
+            KT.load_token_arrays(out)
+        except ValueError:
+            pass
+        else:
+            assert False, "expected ValueError"
+        assert KT.load_token_arrays(out, 'space')['uid'].shape == (len(other),)
+        del arrays
+        store.close()
+        other.close()
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_empty_stream():
+    if np is None:
+        return
+    directory = tempfile.mkdtemp()
+    try:
+        store = _store(directory, '')
+        path = os.path.join(directory, 'empty.npz')
+        store.to_npz(path)
+        arrays = KT.load_token_arrays(path)
+        assert arrays['uid'].shape == (0,)
+        assert arrays['text_offsets'].tolist() == [0]
+        store.close()
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    test_npz_round_trip()
+    test_compressed_npz()
+    test_npy_directory()
+    test_empty_stream()
+    print("✅ NumPy export tests passed")
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Test lean /tokenize views: fields= projection and the columnar format
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'servers'))
+
+import server_tasks
+
+PARAMS = {"text": "Hello world! The quick brown fox.", "tokenizer_type": "word"}
+
+
+def test_default_schema_unchanged():
+    result = server_tasks.tokenize_task(PARAMS)
+    assert server_tasks.project_result(result) is result
+
+
+def test_columnar_matches_objects():
+    result = server_tasks.tokenize_task(PARAMS)
+    view = server_tasks.project_result(result, "columnar")
+    assert view["format"] == "columnar"
+    assert list(view["columns"]) == list(server_tasks.COLUMNAR_FIELDS)
+    for name in server_tasks.COLUMNAR_FIELDS:
+        assert view["columns"][name] == [t[name] for t in result["tokens"]], name
+    assert view["tokenCount"] == result["tokenCount"] and view["fingerprint"] == result["fingerprint"]
+    assert "originalText" not in view and "tokens" not in view
+
+    full = server_tasks.project_result(result, "columnar", list(server_tasks.TOKEN_FIELDS))
+    assert full["columns"]["color"] == [t["color"] for t in result["tokens"]]
+    assert full["columns"]["backendScaled"] == result["backendScaled"]
+    assert full["columns"]["contentId"] == result["contentIds"]
+
+
+def test_object_projection():
+    result = server_tasks.tokenize_task(PARAMS)
+    fields = server_tasks.parse_fields("text, id,contentId,originalText")
+    view = server_tasks.project_result(result, "objects", fields)
+    assert view["tokens"] == [{"text": t["text"], "id": t["id"]} for t in result["tokens"]]
+    assert view["contentIds"] == result["contentIds"]
+    assert view["originalText"] == PARAMS["text"]
+    assert "frontendDigits" not in view and "backendScaled" not in view
+    for bad in ("colour", "text,nope"):
+        try:
+            server_tasks.parse_fields(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"accepted {bad!r}")
+
+
+if __name__ == "__main__":
+    test_default_schema_unchanged()
+    test_columnar_matches_objects()
+    test_object_projection()
+    print("✅ Response projection tests passed")
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Test the servers' content-addressed result cache
+"""
+
+import sys
+import os
+import json
+import tempfile
+import threading
+import time
+import urllib.request
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'servers'))
+
+from result_cache import ResultCache, cache_key
+
+PARAMS = {"text": "Hello world!", "tokenizer_type": "word", "seed": None}
+
+
+def test_key_covers_text_and_options():
+    key = cache_key("tokenize", PARAMS)
+    assert key == cache_key("tokenize", dict(PARAMS, seed=12345, timeout_ms=50))
+    assert key != cache_key("analyze", PARAMS)
+    assert key != cache_key("tokenize", dict(PARAMS, text="Hello world?"))
+    assert key != cache_key("tokenize", dict(PARAMS, tokenizer_type="char"))
+    assert key != cache_key("tokenize", dict(PARAMS, lower=True))
+    assert key != cache_key("tokenize", dict(PARAMS, embedding_bit=1))
+
+
+def test_lru_by_bytes():
+    cache = ResultCache(max_bytes=100)
+    cache.put("a", "x" * 30)   # 32 bytes as JSON
+    cache.put("b", "y" * 30)
+    cache.put("c", "z" * 30)
+    assert cache.get("a") == "x" * 30   # a is now most recently used
+    cache.put("d", "w" * 30)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("d") is not None
+    cache.put("huge", "h" * 200)
+    stats = cache.stats()
+    assert stats["bytes"] <= 100 and stats["evictions"] == 1 and stats["oversize"] == 1
+    assert stats["hits"] == 3 and stats["misses"] == 1 and stats["hit_rate"] == 0.75
+
+
+def test_ttl_expiry():
+    cache = ResultCache(ttl=0.05)
+    cache.put("k", {"v": 1})
+    assert cache.get("k") == {"v": 1}
+    time.sleep(0.1)
+    assert cache.get("k") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_disk_tier_survives_restart():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.sqlite")
+        cache = ResultCache(path=path)
+        cache.put("k", {"tokens": [1, 2, 3]})
+        cache.close()
+        reopened = ResultCache(path=path)
+        assert reopened.get("k") == {"tokens": [1, 2, 3]}
+        assert reopened.stats()["disk_hits"] == 1
+        # Promoted into memory on the disk hit
+        assert reopened.get("k") == {"tokens": [1, 2, 3]}
+        assert reopened.stats()["disk_hits"] == 1
+        reopened.close()
+        # Memory tier disabled, disk only, bounded by size
+        small = ResultCache(max_bytes=0, path=path, disk_bytes=40)
+        small.put("a", "x" * 30)
+        small.put("b", "y" * 30)
+        assert small.get("b") == "y" * 30 and small.get("a") is None
+        small.close()
+
+
+def test_lightweight_compress_uses_cached_tokens():
+    """/compress on the lightweight server reads the tokens /tokenize cached, and fills them"""
+    import lightweight_server
+
+    class QuietHandler(lightweight_server.CORSHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+    lightweight_server.cache.clear()
+    httpd = lightweight_server.http_runtime.ProductionHTTPServer(('127.0.0.1', 0), QuietHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+
+    def post(path, body):
+        req = urllib.request.Request('http://127.0.0.1:%d%s' % (httpd.server_address[1], path),
+                                     data=json.dumps(body).encode(), headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(req) as resp:
+            return json.loads(resp.read())
+
+    try:
+        text = "aaa bbb aaa bbb aaa bbb ccc. " * 20
+        for tokenizer_type in ("word", "char", "bpe"):
+            body = {"text": text, "tokenizer_type": tokenizer_type}
+            stats = lightweight_server.cache.stats()
+            compressed = post('/compress', body)
+            # The first /compress tokenizes once and caches it for /tokenize
+            assert lightweight_server.cache.stats()["stores"] == stats["stores"] + 1
+            post('/tokenize', body)
+            assert post('/compress', body) == compressed
+            after = lightweight_server.cache.stats()
+            assert after["stores"] == stats["stores"] + 1 and after["hits"] == stats["hits"] + 2
+            fresh = lightweight_server.KT.analyze_compression_efficiency(
+                text, lightweight_server._stream_name_for(tokenizer_type))
+            assert [r["tokensSaved"] for r in compressed] == \
+                [m["space_saved"] for m in fresh["compression_methods"].values()]
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+if __name__ == "__main__":
+    test_key_covers_text_and_options()
+    test_lru_by_bytes()
+    test_ttl_expiry()
+    test_disk_tier_survives_restart()
+    test_lightweight_compress_uses_cached_tokens()
+    print("✅ Result cache tests passed")
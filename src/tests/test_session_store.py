@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test result_id session handles: memory bound, idle expiry, reuse of stored tokens
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'servers'))
+
+from session_store import SessionStore, estimate_size, estimate_derived_size
+import server_tasks
+
+TEXT = "Hello wörld! The quick brown fox 你好 🌍"
+
+
+def _result(tokens):
+    return {"tokenCount": tokens}
+
+
+def test_lru_by_estimated_bytes():
+    size = estimate_size({"text": "abc"}, _result(10))
+    store = SessionStore(max_bytes=3 * size)
+    ids = [store.create({"text": "abc"}, _result(10)) for _ in range(3)]
+    assert store.get(ids[0]) is not None   # ids[1] is now least recently used
+    extra = store.create({"text": "abc"}, _result(10))
+    assert store.get(ids[1]) is None
+    assert store.get(ids[0]) is not None and store.get(extra) is not None
+    assert store.create({"text": "abc"}, _result(10 ** 9)) is None
+    stats = store.stats()
+    assert stats["sessions"] == 3 and stats["evictions"] == 1 and stats["bytes"] <= 3 * size
+
+
+def test_idle_expiry_and_discard():
+    store = SessionStore(idle_ttl=0.05)
+    a = store.create({"text": "x"}, _result(1))
+    b = store.create({"text": "y"}, _result(1))
+    assert store.discard(b) and not store.discard(b)
+    time.sleep(0.1)
+    assert store.get(a) is None
+    assert store.stats()["expirations"] == 1 and len(store) == 0
+
+
+def test_same_key_reuses_session():
+    size = estimate_size({"text": "abc"}, _result(10))
+    store = SessionStore(max_bytes=3 * size)
+    other = store.create({"text": "zzz"}, _result(10))
+    ids = [store.create({"text": "abc"}, _result(10), key="k") for _ in range(5)]
+    assert len(set(ids)) == 1 and store.get(other) is not None
+    stats = store.stats()
+    assert stats["sessions"] == 2 and stats["bytes"] == 2 * size
+    assert stats["created"] == 2 and stats["reused"] == 4 and stats["evictions"] == 0
+    # Once the session is gone the key gets a new one
+    assert store.discard(ids[0])
+    assert store.create({"text": "abc"}, _result(10), key="k") not in (ids[0], None)
+
+
+def test_derived_results_count_against_bound():
+    size = estimate_size({"text": "abc"}, _result(10))
+    store = SessionStore(max_bytes=3 * size)
+    ids = [store.create({"text": "abc"}, _result(10)) for _ in range(2)]
+    session = store.get(ids[1])
+    value = {"reconstruction": "x" * (size // 2)}
+    store.add_derived(session, "validate", value)
+    assert session.derived["validate"] is value
+    assert session.size == size + estimate_derived_size(value)
+    assert store.stats()["bytes"] == 2 * size + estimate_derived_size(value)
+    # Storing it again changes nothing
+    store.add_derived(session, "validate", {"other": 1})
+    assert session.derived["validate"] is value and store.stats()["bytes"] == 2 * size + estimate_derived_size(value)
+    # Going over the bound evicts the least recently used session
+    store.add_derived(session, "decode", {"decoded_text": "y" * size})
+    assert store.get(ids[0]) is None and store.get(ids[1]) is session
+    assert store.stats()["evictions"] == 1 and store.stats()["bytes"] <= 3 * size
+    # A session evicted meanwhile keeps nothing
+    store.discard(ids[1])
+    store.add_derived(session, "analyze", {"a": 1})
+    assert "analyze" not in session.derived and store.stats()["bytes"] == 0
+
+
+def test_stored_result_reproduces_tasks():
+    """analyze/compress/validate/decode from a stored result equal a fresh run"""
+    for tokenizer_type in ("word", "byte", "bpe", "char"):
+        params = {"text": TEXT, "tokenizer_type": tokenizer_type, "collapse_repeats": 0}
+        stored = server_tasks.tokenize_task(params)
+        assert server_tasks.validate_task(params, stored) == server_tasks.validate_task(params)
+        assert server_tasks.compress_task(params, stored) == server_tasks.compress_task(params)
+        assert server_tasks.analyze_task(params, stored)["analysis"] == server_tasks.analyze_task(params)["analysis"]
+        assert server_tasks.decode_result_task(params, stored)["decoded_text"] == TEXT
+
+
+if __name__ == "__main__":
+    test_lru_by_estimated_bytes()
+    test_idle_expiry_and_discard()
+    test_same_key_reuses_session()
+    test_derived_results_count_against_bound()
+    test_stored_result_reproduces_tasks()
+    print("✅ Session store tests passed")
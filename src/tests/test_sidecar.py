@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test the binary sidecar protocol, server and client
+"""
+
+import sys
+import os
+import socket
+import tempfile
+import threading
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'servers'))
+
+import binary_protocol as bp
+import server_tasks
+import sidecar_server
+from sidecar_client import SidecarClient, SidecarError
+
+
+def _expected(text, tokenizer_type, fingerprint=False):
+    params = {'tokenizer_type': tokenizer_type, 'collapse_repeats': False, 'fingerprint': fingerprint}
+    return server_tasks.tokenize_batch_task(params, [text])[0]
+
+
+def _start():
+    path = os.path.join(tempfile.mkdtemp(), 'sidecar.sock')
+    server = sidecar_server.make_server(path)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, path
+
+
+def test_arrays_round_trip():
+    for values in ([], [1, 2, 255], [0, 300, 70000, 2 ** 40], [-5, 3, -(2 ** 40), 0]):
+        out = bytearray()
+        bp.encode_array(values, out)
+        assert bp.decode_array(out, 0, len(values)) == (values, len(out))
+    item = {'tokens': ['héllo', ' ', '😀'], 'ids': [3, 9, 1], 'positions': [0, 5, 6],
+            'tokenCount': 3, 'characterCount': 7,
+            'fingerprint': {'signatureDigit': 1, 'compatDigit': 2, 'textValue': 123456, 'textValueWithEmbedding': -1}}
+    assert bp.decode_tokens(bp.encode_tokens(item)) == item
+
+
+def test_split_frames():
+    data = bytearray(bp.frame(b'abc') + bp.frame(b'') + bp.frame(b'de')[:3])
+    frames, used = bp.split_frames(data)
+    assert frames == [b'abc', b''] and used == 11
+    try:
+        bp.split_frames(bytearray(bp.FRAME.pack(100)), max_frame=10)
+        assert False, "oversized frame accepted"
+    except bp.ProtocolError:
+        pass
+
+
+def test_tokenize_matches_batch_task():
+    server, path = _start()
+    try:
+        text = "Hello, wörld! 日本語 😀  done.\n"
+        with SidecarClient(path) as client:
+            client.ping()
+            for tokenizer_type in ('word', 'char', 'byte', 'bpe', 'grammar'):
+                assert client.tokenize(text, tokenizer_type, fingerprint=True) == \
+                    _expected(text, tokenizer_type, fingerprint=True)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_pipelining_and_out_of_order_receive():
+    server, path = _start()
+    try:
+        texts = [f"short text number {i}" for i in range(300)]
+        with SidecarClient(path) as client:
+            items = client.tokenize_many(texts, 'word', window=32)
+            assert [item['tokens'] for item in items] == [_expected(t, 'word')['tokens'] for t in texts]
+            first = client.send('a b', 'word')
+            second = client.send('c', 'char')
+            assert client.receive(second)[1]['tokens'] == ['c']
+            assert client.receive(first)[1]['tokens'] == ['a', ' ', 'b']
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_errors():
+    server, path = _start()
+    try:
+        with SidecarClient(path) as client:
+            request_id = client.send('x', op=7)
+            try:
+                client.receive(request_id)
+                assert False, "unknown op accepted"
+            except SidecarError as e:
+                assert e.request_id == request_id
+            # The connection stays usable after a failed request
+            assert client.tokenize('ok', 'word')['tokens'] == ['ok']
+        # A bad frame length closes the connection after an error frame
+        with socket.socket(socket.AF_UNIX) as raw:
+            raw.connect(path)
+            raw.sendall(bp.FRAME.pack(bp.MAX_FRAME + 1))
+            frames, _ = bp.split_frames(bytearray(raw.recv(4096)))
+            assert bp.decode_response(frames[0])[1] == bp.STATUS_ERROR
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert not os.path.exists(path)
+
+
+if __name__ == "__main__":
+    test_arrays_round_trip()
+    test_split_frames()
+    test_tokenize_matches_batch_task()
+    test_pipelining_and_out_of_order_receive()
+    test_errors()
+    print("✅ Sidecar tests passed")
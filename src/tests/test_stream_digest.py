@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test stream digests used for determinism and stability checks
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'core'))
+
+from core_tokenizer import (
+    TextTokenizer, StreamDigest, digest_tokens, compare_digests,
+    save_golden_digests, load_golden_digests, stability_test, tokenize_space,
+    tokenize_word
+)
+
+TEXT = "Hello world! The quick brown fox jumps over the lazy dog. 你好世界 🌍"
+
+
+def test_build_digest_matches_digest_only_pass():
+    """Digests maintained during build() equal the digest-only pass"""
+    engine = TextTokenizer(12345, False)
+    manifest = engine.validate(engine.build(TEXT))
+    digests = TextTokenizer(12345, False).digests(TEXT)
+    for name in manifest:
+        assert manifest[name]["digest"] == digests[name]["digest"], name
+        assert manifest[name]["length"] == digests[name]["length"], name
+    assert compare_digests(manifest, digests) == []
+
+
+def test_build_stream_matches_build():
+    """A single-stream build produces the same records as the full build"""
+    engine = TextTokenizer(12345, True)
+    full = engine.build(TEXT)
+    single = engine.build_stream("word", tokenize_word(TEXT))
+    assert single.hexdigest() == full["word"].hexdigest()
+    assert [t.frontend for t in single.tokens] == [t.frontend for t in full["word"].tokens]
+
+
+def test_digest_detects_differences():
+    """Seed, embedding bit and single-character edits all change the digest"""
+    base = TextTokenizer(12345, False).digests(TEXT)
+    other_seed = TextTokenizer(12346, False).digests(TEXT)
+    embedded = TextTokenizer(12345, True).digests(TEXT)
+    edited = TextTokenizer(12345, False).digests(TEXT.replace("fox", "fix"))
+    for name in base:
+        assert base[name]["digest"] != other_seed[name]["digest"], name
+        assert base[name]["digest"] != embedded[name]["digest"], name
+    assert compare_digests(edited, base) != []
+
+
+def test_digest_is_length_sensitive():
+    """A stream and its prefix never share a digest"""
+    tokens = tokenize_space(TEXT)
+    assert digest_tokens(tokens) != digest_tokens(tokens[:-1])
+    d = StreamDigest("space")
+    assert d.hexdigest() != StreamDigest("word").hexdigest()
+
+
+def test_golden_roundtrip():
+    """Golden digests survive a save/load cycle and detect regressions"""
+    engine = TextTokenizer(42, False)
+    manifest = engine.validate(engine.build(TEXT))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "golden.json")
+        save_golden_digests(path, manifest)
+        golden = load_golden_digests(path)
+    assert compare_digests(manifest, golden) == []
+    golden["word"]["digest"] = "0" * 64
+    assert compare_digests(manifest, golden) == ["word"]
+
+
+def test_stability_against_golden():
+    """stability_test reports digests and checks them against a golden run"""
+    first = stability_test(TEXT, iterations=5)
+    golden = {name: first[name]["digest"] for name in first}
+    second = stability_test(TEXT, iterations=5, golden=golden)
+    for name in second:
+        assert second[name]["stable"] and second[name]["matches_golden"], name
+    golden["space"] = "0" * 64
+    assert not stability_test(TEXT, iterations=2, golden=golden)["space"]["stable"]
+
+
+if __name__ == "__main__":
+    test_build_digest_matches_digest_only_pass()
+    test_build_stream_matches_build()
+    test_digest_detects_differences()
+    test_digest_is_length_sensitive()
+    test_golden_roundtrip()
+    test_stability_against_golden()
+    print("✅ Stream digest tests passed")
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Test the streaming token writers (JSONL / CSV / XML / TXT)
+"""
+
+import csv
+import json
+import sys
+import os
+import tempfile
+import xml.etree.ElementTree as ET
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'core'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import core_tokenizer as KT
+from santok import corpus
+
+AWKWARD = 'He said "hi, there"\nand <left> & \tright\x01 end \ud800'
+
+
+def _path(suffix):
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    return path
+
+
+def _records(text):
+    return KT.TextTokenizer(12345, False).build_stream('word', KT.tokenize_word(text)).tokens
+
+
+def _lazy_records(text):
+    # A generator: the writers must not need len() or a second pass
+    return KT.TextTokenizer(12345, False).iter_stream('word', KT.iter_tokens(text, 'word'))
+
+
+def test_jsonl():
+    records = _records(corpus.generate('english', 20000))
+    path = _path('.jsonl')
+    try:
+        # A tiny buffer forces many chunked writes
+        assert KT.write_jsonl_stream(path, iter(records), buffer_size=100) == len(records)
+        with open(path, encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f]
+        assert rows == [r.to_row() for r in records]
+    finally:
+        os.unlink(path)
+
+
+def test_jsonl_lone_surrogates():
+    # Written as \uXXXX escapes: the file stays valid UTF-8 and reads back the same text
+    records = _records(AWKWARD + ' tail')
+    rows = [{'text': AWKWARD, 'index': 0}, {'text': 'plain', 'index': 1}]
+    for items, expected in ((records, [r.to_row() for r in records]), (rows, rows)):
+        path = _path('.jsonl')
+        try:
+            assert KT.write_jsonl_stream(path, iter(items), buffer_size=10) == len(expected)
+            with open(path, encoding='utf-8') as f:
+                got = [json.loads(line) for line in f]
+            assert got == expected
+        finally:
+            os.unlink(path)
+    assert any('\ud800' in r.text for r in records)
+
+
+def test_csv_quoting():
+    rows = [{'text': AWKWARD.replace('\ud800', ''), 'index': 0}, {'text': 'plain', 'index': 1}]
+    path = _path('.csv')
+    try:
+        assert KT.write_csv_stream(path, rows) == 2
+        with open(path, encoding='utf-8', newline='') as f:
+            got = list(csv.reader(f))
+        assert got == [['text', 'index'], [rows[0]['text'], '0'], ['plain', '1']]
+    finally:
+        os.unlink(path)
+
+
+def test_csv_records():
+    records = _records(corpus.generate('english', 5000))
+    path = _path('.csv')
+    try:
+        KT.write_csv_stream(path, _lazy_records(corpus.generate('english', 5000)))
+        with open(path, encoding='utf-8', newline='') as f:
+            got = list(csv.DictReader(f))
+        assert [row['text'] for row in got] == [r.text for r in records]
+        assert [int(row['uid']) for row in got] == [r.uid for r in records]
+    finally:
+        os.unlink(path)
+
+
+def test_xml_elements():
+    rows = [{'text': AWKWARD, 'index': 0}, {'text': 'x & y', 'index': 1, 'uid': None}]
+    path = _path('.xml')
+    try:
+        assert KT.write_xml_stream(path, rows, 'word', buffer_size=10) == 2
+        root = ET.parse(path).getroot()
+        assert root.tag == 'tokens' and root.get('stream') == 'word'
+        tokens = list(root)
+        assert [t.tag for t in tokens] == ['token', 'token']
+        # Control characters and lone surrogates are not XML: written as hex
+        assert bytes.fromhex(tokens[0].get('text_hex')).decode('utf-8', 'surrogatepass') == AWKWARD
+        assert tokens[1].get('text') == 'x & y' and tokens[1].get('index') == '1'
+        assert tokens[1].get('uid') is None
+        # Newlines and tabs in plain text survive attribute normalization
+        KT.write_xml_stream(path, [{'text': 'a\tb\nc'}])
+        assert ET.parse(path).getroot()[0].get('text') == 'a\tb\nc'
+    finally:
+        os.unlink(path)
+
+
+def test_txt_total():
+    records = _records('one two three')
+    path = _path('.txt')
+    try:
+        KT.write_txt_stream(path, records, 'word')
+        with open(path, encoding='utf-8') as f:
+            head = f.read()
+        assert 'Total Tokens: %d\n' % len(records) in head.split('TOKEN DETAILS')[0]
+        # Without a length the total moves to the footer
+        assert KT.write_txt_stream(path, iter(records), 'word') == len(records)
+        with open(path, encoding='utf-8') as f:
+            text = f.read()
+        assert text.rstrip().endswith('Total Tokens: %d\nEND OF TOKENIZATION' % len(records))
+        assert "Token   1: 'one'" in text
+    finally:
+        os.unlink(path)
+
+
+def test_write_token_stream_dispatch():
+    records = _records('alpha beta')
+    for suffix in ('.json', '.csv', '.xml', '.txt'):
+        path = _path(suffix)
+        try:
+            assert KT.write_token_stream(path, records, stream_name='word') == len(records)
+            assert os.path.getsize(path) > 0
+        finally:
+            os.unlink(path)
+
+
+def test_empty_streams():
+    for writer in (KT.write_jsonl_stream, KT.write_csv_stream, KT.write_xml_stream):
+        path = _path('.out')
+        try:
+            assert writer(path, []) == 0
+        finally:
+            os.unlink(path)
+
+
+if __name__ == "__main__":
+    test_jsonl()
+    test_jsonl_lone_surrogates()
+    test_csv_quoting()
+    test_csv_records()
+    test_xml_elements()
+    test_txt_total()
+    test_write_token_stream_dispatch()
+    test_empty_streams()
+    print("✅ Stream writer tests passed")
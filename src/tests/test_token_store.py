@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Test the memory-mapped columnar token store (write_token_store / TokenStore)
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'core'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import core_tokenizer as KT
+from santok import corpus
+
+
+def _path():
+    fd, path = tempfile.mkstemp(suffix='.stc')
+    os.close(fd)
+    return path
+
+
+def _build(text, name='word', block_size=64):
+    path = _path()
+    header = KT.write_token_store(path, name, KT.iter_tokens(text, name), seed=7, block_size=block_size)
+    return path, header
+
+
+def test_round_trip():
+    text = corpus.generate('english', 50000) + ' naïve 日本語 \ud800x'
+    tokens = KT.tokenize_word(text)
+    stream = KT.TextTokenizer(7, False).build_stream('word', tokens)
+    path, header = _build(text)
+    try:
+        assert header['count'] == len(tokens)
+        assert header['stream_digest'] == stream.hexdigest()
+        with KT.TokenStore(path) as store:
+            assert len(store) == len(tokens)
+            assert store.config == {'seed': 7, 'embedding_bit': False, 'block_size': 64}
+            assert store.texts() == [t['text'] for t in tokens]
+            assert list(store.column('index')) == [t['index'] for t in tokens]
+            for col in ('uid', 'content_id', 'frontend', 'backend_scaled', 'global_id'):
+                assert list(store.column(col)) == [getattr(r, col) for r in stream.tokens], col
+            rec = stream.tokens[10]
+            row = store.row(10)
+            assert row['text'] == rec.text and row['uid'] == rec.uid and row['position'] == 10
+            assert store.text(len(tokens) - 1) == tokens[-1]['text']
+            assert store.verify()
+    finally:
+        os.unlink(path)
+
+
+def test_position_at():
+    text = corpus.generate('english', 20000)
+    tokens = KT.tokenize_word(text)
+    path, _ = _build(text, block_size=16)
+    try:
+        with KT.TokenStore(path) as store:
+            assert store.position_at(-1) == -1
+            for pos in (0, 1, 15, 16, 17, len(tokens) // 2, len(tokens) - 1):
+                start = tokens[pos]['index']
+                assert store.position_at(start) == pos
+                # Inside the token (or the gap after it) still maps to it
+                assert store.position_at(start + len(tokens[pos]['text']) - 1) == pos
+            assert store.position_at(len(text) + 100) == len(tokens) - 1
+    finally:
+        os.unlink(path)
+
+
+def test_numpy_columns():
+    try:
+        import numpy as np
+    except ImportError:
+        return
+    text = corpus.generate('english', 10000)
+    path, _ = _build(text)
+    try:
+        store = KT.TokenStore(path)
+        uids = store.numpy('uid')
+        assert uids.dtype == np.dtype('<u8') and len(uids) == len(store)
+        assert not uids.flags.writeable
+        assert uids.tolist() == list(store.column('uid'))
+        offsets = store.numpy('text_offsets')
+        assert len(offsets) == len(store) + 1
+        del uids, offsets
+        store.close()
+    finally:
+        os.unlink(path)
+
+
+def test_empty_stream_and_tamper():
+    path, header = _build('')
+    try:
+        with KT.TokenStore(path) as store:
+            assert len(store) == 0
+            assert store.texts() == []
+            assert store.position_at(0) == -1
+    finally:
+        os.unlink(path)
+    path, _ = _build('alpha beta gamma')
+    try:
+        with open(path, 'r+b') as f:
+            data = f.read()
+            f.seek(data.rindex(b'gamma'))
+            f.write(b'GAMMA')
+        with KT.TokenStore(path) as store:
+            assert not store.verify()
+    finally:
+        os.unlink(path)
+
+
+def test_not_a_store():
+    path = _path()
+    try:
+        with open(path, 'wb') as f:
+            f.write(b'plain text, not a store' * 10)
+        try:
+            KT.TokenStore(path)
+        except ValueError:
+            pass
+        else:
+            assert False, "expected ValueError"
+    finally:
+        os.unlink(path)
+
+
+def test_close_unmaps_after_lookups():
+    text = corpus.generate('english', 5000)
+    path, _ = _build(text)
+    try:
+        store = KT.TokenStore(path)
+        mapped = store._map
+        rows = [store.row(pos) for pos in range(0, len(store), 7)]
+        assert rows[1]['position'] == 7 and store.position_at(0) == 0
+        store.close()
+        assert mapped.closed
+    finally:
+        os.unlink(path)
+
+
+def test_copied_columns():
+    # The path big-endian hosts take: columns decoded into arrays, not cast in place
+    text = corpus.generate('english', 10000) + ' naïve 日本語'
+    path, _ = _build(text, block_size=16)
+    try:
+        with KT.TokenStore(path) as store:
+            expected = [store.row(pos) for pos in range(len(store))]
+            positions = [store.position_at(offset) for offset in range(0, len(text), 97)]
+        KT._STORE_ZERO_COPY = False
+        try:
+            store = KT.TokenStore(path)
+            mapped = store._map
+            assert [store.row(pos) for pos in range(len(store))] == expected
+            assert [store.position_at(offset) for offset in range(0, len(text), 97)] == positions
+            assert store.texts(3, 9) == [row['text'] for row in expected[3:9]]
+            store.close()
+            assert mapped.closed
+        finally:
+            KT._STORE_ZERO_COPY = sys.byteorder == 'little'
+    finally:
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    test_round_trip()
+    test_position_at()
+    test_numpy_columns()
+    test_empty_stream_and_tamper()
+    test_not_a_store()
+    test_close_unmaps_after_lookups()
+    test_copied_columns()
+    print("✅ Token store tests passed")
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test streamed /tokenize (NDJSON) against the plain response
+"""
+
+import sys
+import os
+import json
+import threading
+import urllib.request
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'servers'))
+
+import server_tasks
+
+TEXT = "Hello, world! Tokens, spaces and punctuation... " * 30
+
+
+def _records(lines):
+    return [json.loads(line) for line in lines if line.strip()]
+
+
+def test_lightweight_stream_matches_tokenize():
+    """The streamed trailer reports the same metrics as the lightweight /tokenize"""
+    import lightweight_server
+
+    class QuietHandler(lightweight_server.CORSHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+    lightweight_server.cache.clear()
+    httpd = lightweight_server.http_runtime.ProductionHTTPServer(('127.0.0.1', 0), QuietHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+
+    def post(path, body):
+        req = urllib.request.Request('http://127.0.0.1:%d%s' % (httpd.server_address[1], path),
+                                     data=json.dumps(body).encode(), headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(req) as resp:
+            return resp.read().decode('utf-8')
+
+    try:
+        for tokenizer_type in ("word", "char", "grammar"):
+            body = {"text": TEXT, "tokenizer_type": tokenizer_type}
+            plain = json.loads(post('/tokenize', body))
+            records = _records(post('/tokenize?stream=1', body).splitlines())
+            trailer = records[-1]
+            assert trailer["type"] == "trailer"
+            tokens = [t for r in records if r["type"] == "tokens" for t in r["tokens"]]
+            assert [t["text"] for t in tokens] == [t["text"] for t in plain["tokens"]], tokenizer_type
+            for key in ("tokenCount", "compressionRatio", "memoryUsage"):
+                assert trailer[key] == plain[key], (tokenizer_type, key)
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def test_task_stream_ratio():
+    """server_tasks streams keep tokens per word unless asked for word tokens"""
+    params = {"text": TEXT, "tokenizer_type": "word"}
+    trailer = list(server_tasks.stream_tokenize(params))[-1]
+    assert trailer["compressionRatio"] == server_tasks.tokenize_task(params)["compressionRatio"]
+    words = len(TEXT.split())
+    word_tokens = sum(t["type"] == "word" for r in server_tasks.stream_tokenize(params, word_ratio=True)
+                      if r["type"] == "tokens" for t in r["tokens"])
+    assert list(server_tasks.stream_tokenize(params, word_ratio=True))[-1]["compressionRatio"] == word_tokens / words
+
+
+if __name__ == "__main__":
+    test_lightweight_stream_matches_tokenize()
+    test_task_stream_ratio()
+    print("✅ Streamed tokenize tests passed")
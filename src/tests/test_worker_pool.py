@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test the server worker pool: inlining, backpressure and deadlines
+"""
+
+import sys
+import os
+import time
+import asyncio
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'servers'))
+
+import worker_pool
+from worker_pool import WorkerPool, PoolBusy, DeadlineExceeded
+
+
+def _sleep(seconds):
+    time.sleep(seconds)
+    return os.getpid()
+
+
+def test_small_requests_run_inline():
+    """Requests under the inline threshold never touch the pool"""
+    pool = WorkerPool(workers=1, inline_chars=100)
+    assert asyncio.run(pool.run(_sleep, 0, size=10)) == os.getpid()
+    assert pool.stats()['inline'] == 1 and not pool.stats()['running']
+
+
+def test_offload_backpressure_and_deadline():
+    """Large requests run in a worker; a full queue raises PoolBusy; deadlines cancel"""
+    pool = WorkerPool(workers=1, max_queue=2, inline_chars=1, timeout=5)
+    pool.start()
+    try:
+        assert asyncio.run(pool.run(_sleep, 0, size=10)) != os.getpid()
+
+        async def scenario():
+            running = asyncio.ensure_future(pool.run(_sleep, 1.0, size=10))
+            queued = asyncio.ensure_future(pool.run(_sleep, 0, size=10, timeout=0.2))
+            await asyncio.sleep(0.05)
+            try:
+                await pool.run(_sleep, 0, size=10)
+                busy = False
+            except PoolBusy:
+                busy = True
+            try:
+                await queued
+                expired = False
+            except DeadlineExceeded:
+                expired = True
+            await running
+            return busy, expired
+
+        busy, expired = asyncio.run(scenario())
+        assert busy and expired
+        stats = pool.stats()
+        assert stats['rejected'] == 1 and stats['timeouts'] == 1
+        # Expired jobs keep their slot until the worker lets go of them
+        deadline = time.time() + 5
+        while pool.pending and time.time() < deadline:
+            time.sleep(0.05)
+        assert pool.pending == 0
+    finally:
+        pool.shutdown()
+
+
+def test_shutdown_cancels_queued_jobs():
+    """Queued jobs are cancelled on shutdown, with and without Executor.shutdown(cancel_futures=)"""
+    supported = worker_pool._CANCEL_FUTURES
+    try:
+        for cancel_futures in sorted({False, supported}):
+            worker_pool._CANCEL_FUTURES = cancel_futures
+            pool = WorkerPool(workers=1, max_queue=10, inline_chars=1, timeout=30)
+            pool.start()
+
+            async def scenario():
+                jobs = [asyncio.ensure_future(pool.run(_sleep, 0.5, size=10)) for _ in range(5)]
+                await asyncio.sleep(0.2)
+                pool.shutdown()
+                return await asyncio.gather(*jobs, return_exceptions=True)
+
+            results = asyncio.run(scenario())
+            cancelled = sum(isinstance(r, asyncio.CancelledError) for r in results)
+            # One job runs and one sits in the worker's call queue; the rest never start
+            assert cancelled >= 3, (cancel_futures, results)
+            assert pool.stats()['cancelled'] == cancelled and not pool._futures
+    finally:
+        worker_pool._CANCEL_FUTURES = supported
+
+
+def test_acquire_and_dropped_executor():
+    """Slots taken outside run() count against the queue; a dropped executor is a PoolBusy"""
+    pool = WorkerPool(workers=1, max_queue=2, inline_chars=1)
+    pool.acquire()
+    pool.acquire()
+    try:
+        pool.acquire()
+        assert False, "expected PoolBusy"
+    except PoolBusy:
+        pass
+    assert pool.pending == 2 and pool.stats()['rejected'] == 1
+    pool.release()
+    pool.release()
+    assert pool.pending == 0
+    # As if _discard() ran between the start check and the submit
+    pool.start = lambda: None
+    try:
+        asyncio.run(pool.run(_sleep, 0, size=10))
+        assert False, "expected PoolBusy"
+    except PoolBusy:
+        pass
+    assert pool.pending == 0
+
+
+if __name__ == "__main__":
+    test_small_requests_run_inline()
+    test_offload_backpressure_and_deadline()
+    test_shutdown_cancels_queued_jobs()
+    test_acquire_and_dropped_executor()
+    print("✅ Worker pool tests passed")